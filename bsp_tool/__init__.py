@@ -37,6 +37,10 @@ if importlib.util.find_spec("PIL") is not None:
     __all__.extend(["lightmaps"])
 
 
-def load_bsp(filename: str, force_branch: ModuleType = None) -> base.Bsp:
+def load_bsp(filename: str, force_branch: ModuleType = None, mmap: bool = False,
+             lazy: bool = False, index=None) -> base.Bsp:
     """Calculate and return the correct base.Bsp sub-class for the given .bsp"""
-    return autodetect.guess_from_filename(filename, force_branch)
+    # NOTE: index is an optional index.Index; skips autodetect for cached files
+    if index is not None:
+        return index.load_bsp(filename, force_branch, mmap, lazy)
+    return autodetect.guess_from_filename(filename, force_branch, mmap, lazy)
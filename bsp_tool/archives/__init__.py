@@ -65,15 +65,15 @@ def search_folder(archive_class: base.Archive, path: str, pattern: str = "*.bsp"
     """check all archives in this folder for files matching pattern"""
     findings = dict()
     for archive_filename in fnmatch.filter(os.listdir(path), archive_class.ext):
-        archive = archive_class(os.path.join(path, archive_filename))
+        archive = archive_class.from_file(os.path.join(path, archive_filename))
         matching_files = [f for f in archive.search(pattern)]
         if len(matching_files) != 0:
             findings[archive_filename] = matching_files
     return findings
 
 
-def extract_folder(archive_class: base.Archive, path: str, pattern: str = "*.bsp", to_path: str = None):
+def extract_folder(archive_class: base.Archive, path: str, pattern: str = "*.bsp", to_path: str = None, **kwargs):
     """extract all files in archives in this folder which match pattern"""
     for archive_filename in fnmatch.filter(os.listdir(path), archive_class.ext):
-        archive = archive_class(os.path.join(path, archive_filename))
-        archive.extract_match(pattern=pattern, to_path=to_path)
+        archive = archive_class.from_file(os.path.join(path, archive_filename))
+        archive.extract_all_matching(pattern=pattern, to_path=to_path, **kwargs)
@@ -1,11 +1,17 @@
 from __future__ import annotations
+import concurrent.futures
 import enum
 import fnmatch
 import io
 import os
-from typing import Dict, List, Tuple
+import re
+import time
+from typing import Dict, Iterable, List, Tuple, Union
+import zlib
 
 from .. import external
+from .. import lumps
+from ..utils import cache
 
 
 def path_tuple(path: str) -> Tuple[str]:
@@ -16,9 +22,126 @@ def path_tuple(path: str) -> Tuple[str]:
         return out
 
 
+def folder_tuple(folder: str) -> Tuple[str]:
+    """path_tuple, but all spellings of root are ()"""
+    out = path_tuple(folder)
+    return tuple() if out in {(".",), ("",)} else out
+
+
+class DirectoryIndex:
+    """folder tree of a namelist; built once, so lookups don't scan the whole namelist"""
+    files: Dict[str, int]
+    # ^ {"filename": namelist_index}
+    folders: Dict[Tuple[str], Dict[str, bool]]
+    # ^ {folder_tuple: {"name": is_dir}}
+    folder_files: Dict[Tuple[str], List[str]]
+    # ^ {folder_tuple: ["filename"]}; only files directly inside each folder
+
+    def __init__(self, namelist: List[str]):
+        self.files = {filename: i for i, filename in enumerate(namelist)}
+        self.folders = {tuple(): dict()}
+        self.folder_files = dict()
+        for filename in namelist:
+            path = path_tuple(filename)
+            folder = path[:-1]
+            if folder not in self.folders:  # add missing parent folders
+                for i in range(len(folder)):
+                    self.folders.setdefault(folder[:i], dict())[folder[i]] = True
+                self.folders.setdefault(folder, dict())
+            self.folders[folder].setdefault(path[-1], False)
+            self.folder_files.setdefault(folder, list()).append(filename)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self.files)} files in {len(self.folders)} folders>"
+
+    def is_dir(self, folder: str) -> bool:
+        return folder_tuple(folder) in self.folders
+
+    def is_file(self, filename: str) -> bool:
+        return filename in self.files
+
+    def listdir(self, folder: str) -> List[str]:
+        children = self.folders.get(folder_tuple(folder), None)
+        if children is None:
+            raise FileNotFoundError(f"no such directory: {folder}")
+        return sorted(f"{name}/" if is_dir else name for name, is_dir in children.items())
+
+    def walk(self, folder: str) -> List[str]:
+        """all filenames inside folder & it's subfolders, in namelist order"""
+        out = list()
+        todo = [folder_tuple(folder)]
+        while len(todo) > 0:
+            folder = todo.pop()
+            out.extend(self.folder_files.get(folder, list()))
+            todo.extend([
+                (*folder, name)
+                for name, is_dir in self.folders.get(folder, dict()).items()
+                if is_dir])
+        return sorted(out, key=self.files.__getitem__)
+
+    def search(self, pattern: str = "*.bsp", case_sensitive: bool = False) -> List[str]:
+        # NOTE: only files below the folder before the first wildcard can match
+        # -- unless fnmatch.filter would normcase the pattern (e.g. on Windows)
+        folder = re.split(r"[*?\[]", pattern, maxsplit=1)[0].rpartition("/")[0]
+        if folder == "" or (not case_sensitive and os.path.normcase("A/") != "A/"):
+            candidates = list(self.files)
+        else:
+            candidates = self.walk(folder)
+        if case_sensitive:
+            return [path for path in candidates if fnmatch.fnmatchcase(path, pattern)]
+        else:
+            return fnmatch.filter(candidates, pattern)
+
+
+Located = Tuple[io.BytesIO, int, int]
+# ^ (stream, offset, length); an uncompressed file's bytes in a source stream
+Member = Tuple[str, int, int]
+# ^ ("filename", offset, length)
+
+
+def contiguous_runs(members: List[Member], max_gap: int, max_run: int) -> List[Tuple[int, int, List[Member]]]:
+    """[(offset, length, members)]; members sorted by offset, then joined where close enough to read at once"""
+    runs = list()
+    for member in sorted(members, key=lambda m: m[1]):
+        filename, offset, length = member
+        if len(runs) > 0:
+            run_offset, run_length, run_members = runs[-1]
+            run_end = max(run_offset + run_length, offset + length)
+            if offset - (run_offset + run_length) <= max_gap and run_end - run_offset <= max_run:
+                runs[-1] = (run_offset, run_end - run_offset, [*run_members, member])
+                continue
+        runs.append((offset, length, [member]))
+    return runs
+
+
+class ExtractionStats:
+    """returned by Archive.extract_all & friends"""
+    num_files: int
+    num_bytes: int
+    num_reads: int  # contiguous runs + whole files read w/ .read()
+    seconds: float
+
+    def __init__(self):
+        self.num_files = 0
+        self.num_bytes = 0
+        self.num_reads = 0
+        self.seconds = 0.0
+
+    def __repr__(self) -> str:
+        descriptor = f"{self.num_files} files ({self.num_bytes / 2 ** 20:.1f}MB) in {self.seconds:.3f}s"
+        return f"<{self.__class__.__name__} {descriptor} ({self.throughput:.1f}MB/s)>"
+
+    @property
+    def throughput(self) -> float:
+        """megabytes per second"""
+        return self.num_bytes / 2 ** 20 / self.seconds if self.seconds > 0 else 0.0
+
+
 class Archive:
     ext = None
     extras: Dict[str, external.File]
+    _directory_index: DirectoryIndex = None  # generated on first use
+    # NOTE: dropped by .mount_file() & .unmount_file(); subclasses that edit namelist must do the same
 
     def __init__(self):
         self.extras = dict()
@@ -27,12 +150,21 @@ class Archive:
         descriptor = f"{len(self.namelist())} files"
         return f"<{self.__class__.__name__} {descriptor} @ 0x{id(self):016X}>"
 
+    def crc(self, filename: str) -> Union[int, None]:
+        """expected CRC32 of filename; None if the ArchiveClass doesn't store one"""
+        return None
+
     def extra_patterns(self) -> List[str]:
         """filename patterns for files to mount (e.g. '*.bin')"""
         return list()
 
+    def directory_index(self) -> DirectoryIndex:
+        if self._directory_index is None:
+            self._directory_index = DirectoryIndex(self.namelist())
+        return self._directory_index
+
     def extract(self, filename, to_path=None):
-        if filename not in self.namelist():
+        if not self.is_file(filename):
             raise FileNotFoundError(f"Couldn't find {filename!r} to extract")
         to_path = "./" if to_path is None else to_path
         out_filename = os.path.join(to_path, filename)
@@ -40,46 +172,100 @@ class Archive:
         with open(out_filename, "wb") as out_file:
             out_file.write(self.read(filename))
 
-    def extract_all(self, to_path=None):
-        for filename in self.namelist():
-            self.extract(filename, to_path)
+    def extract_all(self, to_path=None, **kwargs) -> ExtractionStats:
+        return self.extract_many(self.namelist(), to_path, **kwargs)
+
+    def extract_all_matching(self, pattern="*.bsp", to_path=None, case_sensitive=False, **kwargs) -> ExtractionStats:
+        return self.extract_many(self.search(pattern, case_sensitive), to_path, **kwargs)
 
-    def extract_all_matching(self, pattern="*.bsp", to_path=None, case_sensitive=False):
-        for filename in self.search(pattern, case_sensitive):
-            self.extract(filename, to_path)
+    def extract_many(self, filenames: Iterable[str], to_path: str = None, max_workers: int = None,
+                     verify: bool = False, max_gap: int = 64 * 2 ** 10, max_run: int = 16 * 2 ** 20,
+                     max_in_flight: int = 256 * 2 ** 20) -> ExtractionStats:
+        """read files in source order & write them across a thread pool
+        files w/ a .locate() are read in contiguous runs, skipping gaps of up to max_gap bytes
+        verify=True checks the CRC32 of each file, where the ArchiveClass has one (.crc())
+        max_in_flight limits how many bytes are held in memory waiting to be written"""
+        start = time.perf_counter()
+        to_path = "./" if to_path is None else to_path
+        filenames = list(filenames)
+        stats = ExtractionStats()
+        sources = dict()
+        # ^ {id(stream): (stream, [member])}
+        unlocated = list()
+        for filename in filenames:
+            located = self.locate(filename)
+            if located is None:
+                unlocated.append(filename)
+            else:
+                stream, offset, length = located
+                sources.setdefault(id(stream), (stream, list()))[1].append((filename, offset, length))
+        for folder in {os.path.dirname(os.path.join(to_path, filename)) for filename in filenames}:
+            os.makedirs(folder, exist_ok=True)
+        crc_errors = list()
+
+        def write(batch: List[Tuple[str, Union[bytes, memoryview]]]):
+            for filename, data in batch:
+                if verify:
+                    expected = self.crc(filename)
+                    if expected is not None and zlib.crc32(data) != expected:
+                        crc_errors.append(filename)
+                with open(os.path.join(to_path, filename), "wb") as out_file:
+                    out_file.write(data)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            in_flight = dict()
+            # ^ {Future: num_bytes}
+
+            def submit(batch: List[Tuple[str, Union[bytes, memoryview]]]):
+                """write a batch of files on one worker thread; blocks while too many bytes are in flight"""
+                nonlocal in_flight_bytes
+                num_bytes = sum(len(data) for filename, data in batch)
+                while len(in_flight) > 0 and in_flight_bytes + num_bytes > max_in_flight:
+                    finished, pending = concurrent.futures.wait(
+                        in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in finished:
+                        future.result()  # raise any errors
+                        in_flight_bytes -= in_flight.pop(future)
+                in_flight[executor.submit(write, batch)] = num_bytes
+                in_flight_bytes += num_bytes
+                stats.num_files += len(batch)
+                stats.num_bytes += num_bytes
+
+            in_flight_bytes = 0
+            for stream, members in sources.values():
+                for run_offset, run_length, run_members in contiguous_runs(members, max_gap, max_run):
+                    run = memoryview(lumps.read_range(stream, run_offset, run_length))
+                    assert len(run) == run_length, "unexpected EOF"
+                    stats.num_reads += 1
+                    submit([
+                        (filename, run[offset - run_offset:offset - run_offset + length])
+                        for filename, offset, length in run_members])
+            for filename in unlocated:
+                stats.num_reads += 1
+                submit([(filename, self.read(filename))])
+            for future in concurrent.futures.as_completed(in_flight):
+                future.result()  # raise any errors
+        stats.seconds = time.perf_counter() - start
+        if len(crc_errors) != 0:
+            raise RuntimeError(f"CRC mismatch in {len(crc_errors)} files: {sorted(crc_errors)}")
+        return stats
 
     def is_dir(self, filename: str) -> bool:
-        all_dirs = {path_tuple(fn)[:-1] for fn in self.namelist()}
-        all_dirs.update({tuple_[:i] for tuple_ in all_dirs for i in range(1, len(tuple_))})
-        all_dirs.update({path_tuple(root) for root in (".", "./", "/")})
-        return path_tuple(filename) in all_dirs
+        return self.directory_index().is_dir(filename)
 
     def is_file(self, filename: str) -> bool:
-        return filename in self.namelist()
+        return self.directory_index().is_file(filename)
 
     def listdir(self, folder: str) -> List[str]:
-        if not self.is_dir(folder):
-            raise FileNotFoundError(f"no such directory: {folder}")
-        folder_tuple = path_tuple(folder)
-        if folder_tuple in {path_tuple(root) for root in (".", "./", "/")}:
-            folder_tuple = tuple()  # empty
-        folder_contents = set()
-        for fn in self.namelist():
-            path = path_tuple(fn)
-            if path[:-1] == folder_tuple:
-                base = path[-1]
-                if self.is_dir(fn):
-                    base += "/"
-                folder_contents.add(base)  # file
-            elif self.is_dir(fn):
-                continue
-            elif path[:len(folder_tuple)] == folder_tuple:  # descendant
-                subfolder = path[len(folder_tuple):][0] + "/"
-                folder_contents.add(subfolder)
-        return sorted(folder_contents)
+        return self.directory_index().listdir(folder)
+
+    def locate(self, filename: str) -> Union[Located, None]:
+        """(stream, offset, length) of an uncompressed file; None if it can't be read directly"""
+        return None
 
     def mount_file(self, filename: str, external_file: external.File):
         self.extras[filename] = external_file
+        self._directory_index = None
 
     def namelist(self) -> List[str]:
         # NOTE: we assume namelist only contains filenames, no folders
@@ -91,14 +277,13 @@ class Archive:
     def read(self, filename: str) -> bytes:
         raise NotImplementedError("ArchiveClass has not defined .read()")
 
+    def read_range(self, filename: str, offset: int, length: int) -> bytes:
+        """read part of a file, w/o reading the whole file"""
+        # NOTE: only worth defining for uncompressed files; external.File falls back to .read()
+        raise NotImplementedError("ArchiveClass has not defined .read_range()")
+
     def search(self, pattern="*.bsp", case_sensitive=False):
-        if case_sensitive:
-            return [
-                path
-                for path in self.namelist()
-                if fnmatch.fnmatchcase(path, pattern)]
-        else:
-            return fnmatch.filter(self.namelist(), pattern)
+        return self.directory_index().search(pattern, case_sensitive)
 
     def sizeof(self, filename: str) -> int:
         return len(self.read(filename))
@@ -113,11 +298,19 @@ class Archive:
 
     def unmount_file(self, filename: str):
         self.extras.pop(filename)
+        self._directory_index = None
+
+    def view(self, filename: str) -> Union[external.RangeView, io.BytesIO]:
+        """file-like access to filename; w/o copying it out of the archive where possible"""
+        located = self.locate(filename)
+        if located is None:
+            return io.BytesIO(self.read(filename))
+        return external.RangeView(*located)
 
     @classmethod
     def from_archive(cls, parent_archive: Archive, filename: str) -> Archive:
         """for ArchiveClasses composed of multiple files"""
-        archive = cls.from_bytes(parent_archive.read(filename))
+        archive = cls.from_stream(parent_archive.view(filename))
         folder = os.path.dirname(filename)
         extras = [
             filename
@@ -200,6 +393,12 @@ class DiscImage:
     _cursor: Tuple[int, int]
     # ^ (track_index, sub_lba)
     # NOTE: true_lba = track.start_lba + sub_lba
+    sector_cache_size: int = 16 * 2 ** 20  # in bytes
+    sector_block_size: int = 16  # sectors per cached block
+    sector_cache_max_read: int = 64  # longer reads (in sectors) bypass the cache
+    _sector_cache: cache.LRUCache = None  # generated on first use
+    # ^ {(track_index, block_index): b"sector_data"}
+    # NOTE: fixed size blocks, so partial & overlapping reads can hit the cache
 
     def __init__(self):
         self.extras = dict()
@@ -250,6 +449,7 @@ class DiscImage:
 
     def mount_file(self, filename: str, external_file: external.File):
         self.extras[filename] = external_file
+        self.sector_cache.clear()
 
     def read(self, length: int = -1) -> bytes:
         """moves cursor to end of sector, use with caution"""
@@ -260,6 +460,12 @@ class DiscImage:
             sector_length += 1
         return self.sector_read(sector_length)[:length]
 
+    @property
+    def sector_cache(self) -> cache.LRUCache:
+        if self._sector_cache is None:
+            self._sector_cache = cache.LRUCache(self.sector_cache_size)
+        return self._sector_cache
+
     def sector_read(self, length: int = -1) -> bytes:
         """expects length in sectors"""
         track_index, sub_lba = self._cursor
@@ -271,16 +477,43 @@ class DiscImage:
                 raise NotImplementedError("cannot read past end of current track")
         if sub_lba + length > track.length:
             raise NotImplementedError("cannot read past end of current track")
-        data_slice = track.data_slice()
-        track_stream = self.extras[track.name]
-        track_stream.seek(sub_lba * track.sector_size)
-        sector_data = [
-            track_stream.read(track.sector_size)[data_slice]
-            for i in range(length)]
+        if length > self.sector_cache_max_read:  # e.g. a large file; don't evict directory sectors
+            sector_data = self._read_sectors(track, sub_lba, length)
+        else:
+            block_size = self.sector_block_size
+            first_block, last_block = sub_lba // block_size, (sub_lba + length - 1) // block_size
+            blocks = list()
+            for block_index in range(first_block, last_block + 1):
+                key = (track_index, block_index)
+                block = self.sector_cache.get(key)
+                if block is None:
+                    block_lba = block_index * block_size
+                    block = self._read_sectors(track, block_lba, min(block_size, track.length - block_lba))
+                    self.sector_cache.put(key, block)
+                blocks.append(block)
+            data_slice = track.data_slice()
+            data_size = data_slice.stop - data_slice.start
+            start = (sub_lba - first_block * block_size) * data_size
+            sector_data = b"".join(blocks)[start:start + length * data_size]
         # NOTE: we're assuming that all tracks have gaps between them
         # -- so we don't need to worry about changing tracks here
         self._cursor = (track_index, sub_lba + length)
-        return b"".join(sector_data)
+        return sector_data
+
+    def _read_sectors(self, track: Track, sub_lba: int, length: int) -> bytes:
+        """data of length sectors from track, w/o headers & error correction"""
+        # NOTE: one read for all sectors, then strip headers & error correction
+        track_stream = self.extras[track.name]
+        track_stream.seek(sub_lba * track.sector_size)
+        raw_sectors = track_stream.read(track.sector_size * length)
+        data_slice = track.data_slice()
+        if (data_slice.start, data_slice.stop) == (0, track.sector_size):
+            return raw_sectors
+        raw_view = memoryview(raw_sectors)
+        start, stop = data_slice.start, data_slice.stop
+        return b"".join([
+            raw_view[offset + start:offset + stop]
+            for offset in range(0, len(raw_sectors), track.sector_size)])
 
     def sector_seek(self, lba: int, whence: int = 0) -> int:
         assert whence in (0, 1, 2)
@@ -302,10 +535,11 @@ class DiscImage:
 
     def unmount_file(self, filename: str):
         self.extras.pop(filename)
+        self.sector_cache.clear()
 
     @classmethod
     def from_archive(cls, parent_archive: Archive, filename: str) -> DiscImage:
-        disc = cls.from_bytes(parent_archive.read(filename))
+        disc = cls.from_stream(parent_archive.view(filename))
         folder = os.path.dirname(filename)
         extras = [
             filename
@@ -6,7 +6,7 @@ import datetime
 import enum
 import io
 import os
-from typing import List
+from typing import Dict, Iterable, List
 
 from .. import external
 from ..utils import binary
@@ -336,6 +336,10 @@ class Iso(base.Archive):
     disc: base.DiscImage
     pvd: PrimaryVolumeDescriptor
     path_table: List[PathTableEntry]
+    _records: Dict[str, List[Directory]] = None  # generated on first use
+    # ^ {"/folder/": [Directory]}
+    _files: Dict[str, Directory] = None  # generated on first use
+    # ^ {"folder/filename": Directory}
 
     def __init__(self):
         self.lba_offset = 0
@@ -348,22 +352,38 @@ class Iso(base.Archive):
         descriptor = f"{self.pvd.name!r} {len(self.namelist())} files"
         return f"<Iso {descriptor} @ 0x{id(self):016X}>"
 
-    def folder_records(self, search_folder: str) -> List[Directory]:
-        # NOTE: search_folder is case sensitive
+    def extract_many(self, filenames: Iterable[str], to_path: str = None, **kwargs) -> base.ExtractionStats:
+        # NOTE: in disc order, so extracting is a single pass over the disc
+        filenames = sorted(filenames, key=lambda f: self.file_record(f).data_lba)
+        return super().extract_many(filenames, to_path, **kwargs)
+
+    def file_record(self, filename: str) -> Directory:
+        # NOTE: case sensitive
+        folder, filename = os.path.split(filename)
+        folder = self.folder_path(folder).lstrip("/")
+        self.index_records()
+        assert f"{folder}{filename}" in self._files, "file not found"
+        return self._files[f"{folder}{filename}"]
+
+    def folder_path(self, search_folder: str) -> str:
+        """normalise search_folder to match full_path"""
         # TEST: "" & "/" should both index root
         # -- maybe also "." & "./"
-        # TODO: is it easier to walk the directory tree?
-        search_folder.replace("\\", "/")
+        search_folder = search_folder.replace("\\", "/")
         if search_folder.startswith("./"):
             search_folder = search_folder[2:]
         search_folder = f"/{search_folder}/"
         while "//" in search_folder:  # eliminate double slashes
             # NOTE: have to replace twice for root ("/")
             search_folder = search_folder.replace("//", "/")
-        folders = [self.full_path(i) for i, path in enumerate(self.path_table)]
-        assert search_folder in folders, f"couldn't find {search_folder!r}"
-        path_index = folders.index(search_folder)
-        return self.path_records(path_index)
+        return search_folder
+
+    def folder_records(self, search_folder: str) -> List[Directory]:
+        # NOTE: search_folder is case sensitive
+        search_folder = self.folder_path(search_folder)
+        self.index_records()
+        assert search_folder in self._records, f"couldn't find {search_folder!r}"
+        return self._records[search_folder]
 
     def full_path(self, path_table_index: int) -> str:
         if path_table_index == 0:
@@ -386,14 +406,24 @@ class Iso(base.Archive):
             f.name if f.is_file else f"{f.name}/"
             for f in records[2:]]
 
+    def index_records(self):
+        """read every folder's records once, in disc order"""
+        if self._records is not None:
+            return
+        self._records, self._files = dict(), dict()
+        in_disc_order = sorted(range(len(self.path_table)), key=lambda i: self.path_table[i].extent_lba)
+        for i in in_disc_order:
+            path_name = self.full_path(i)
+            records = self.path_records(i)
+            self._records[path_name] = records
+            self._files.update({
+                path_name.lstrip("/") + record.name: record
+                for record in records
+                if record.is_file})
+
     def namelist(self) -> List[str]:
-        filenames = set()
-        for i, path in enumerate(self.path_table):
-            path_name = self.full_path(i).lstrip("/")
-            for record in self.path_records(i):
-                if record.is_file:
-                    filenames.add(path_name + record.name)
-        return sorted(filenames)
+        self.index_records()
+        return sorted(self._files)
 
     def path_records(self, path_index: int) -> List[Directory]:
         path = self.path_table[path_index]
@@ -412,11 +442,7 @@ class Iso(base.Archive):
 
     def read(self, filename: str) -> bytes:
         # NOTE: case sensitive
-        folder, filename = os.path.split(filename)
-        records = {r.name: r for r in self.folder_records(folder)}
-        assert filename in records, "file not found"
-        record = records[filename]
-        assert record.is_file, "f{filename!r} is not a file"
+        record = self.file_record(filename)
         if record.interleaved_unit_size != 0 or record.interleaved_gap_size != 0:
             raise NotImplementedError("cannot read interleaved file")
         self.sector_seek(record.data_lba)
@@ -424,9 +450,29 @@ class Iso(base.Archive):
         assert len(data) == record.data_size, "unexpected EOF"
         return data
 
+    def read_range(self, filename: str, offset: int, length: int) -> bytes:
+        record = self.file_record(filename)
+        if record.interleaved_unit_size != 0 or record.interleaved_gap_size != 0:
+            raise NotImplementedError("cannot read interleaved file")
+        length = max(min(length, record.data_size - offset), 0)
+        if length == 0:
+            return b""
+        first_sector = offset // 2048
+        num_sectors = (offset + length - 1) // 2048 - first_sector + 1
+        self.sector_seek(record.data_lba + first_sector)
+        start = offset - first_sector * 2048
+        return self.disc.sector_read(num_sectors)[start:start + length]
+
     def sector_seek(self, lba: int) -> int:
         return self.disc.sector_seek(lba + self.lba_offset)
 
+    def sizeof(self, filename: str) -> int:
+        return self.file_record(filename).data_size
+
+    def view(self, filename: str) -> external.File:
+        # NOTE: files are split across sectors, so read_range does the work
+        return external.File.from_archive(filename, self)
+
     @classmethod
     def from_archive(cls, parent_archive, filename, pvd_sector=16, lba_offset=0) -> Iso:
         disc = base.DiscImage()
@@ -3,6 +3,7 @@ import io
 from typing import Dict, List
 
 from .. import core
+from .. import lumps
 from ..utils import binary
 from . import base
 from . import pkware
@@ -35,9 +36,21 @@ class Pak(base.Archive):
         self._file.seek(entry.offset)
         return self._file.read(entry.length)
 
+    def read_range(self, filepath: str, offset: int, length: int) -> bytes:
+        entry = self.entries[filepath]
+        length = max(min(length, entry.length - offset), 0)
+        return lumps.read_range(self._file, entry.offset + offset, length)
+
     def namelist(self) -> List[str]:
         return sorted(self.entries.keys())
 
+    def sizeof(self, filepath: str) -> int:
+        return self.entries[filepath].length
+
+    def locate(self, filepath: str) -> base.Located:
+        entry = self.entries[filepath]
+        return (self._file, entry.offset, entry.length)
+
     @classmethod
     def from_stream(cls, stream: io.BytesIO) -> Pak:
         out = cls()
@@ -0,0 +1,235 @@
+"""Persistent index of every file in every archive in a folder tree"""
+# usage: ArchiveIndex("assets.db").update_folder("Steam/steamapps/common/Half-Life 2")
+from __future__ import annotations
+import concurrent.futures
+import fnmatch
+import os
+import re
+import sqlite3
+from typing import Any, Dict, Generator, Iterable, List, Tuple, Union
+import zipfile
+
+from .. import autodetect
+from .. import index  # key_of, qualified_name & from_qualified_name
+from . import base
+from . import cdrom
+from . import with_extension
+
+
+schema = """
+CREATE TABLE IF NOT EXISTS archive (
+    path          TEXT PRIMARY KEY,
+    size          INTEGER,
+    mtime         INTEGER,
+    archive_class TEXT,
+    error         TEXT);
+CREATE TABLE IF NOT EXISTS member (
+    archive TEXT,
+    name    TEXT,
+    key     TEXT,
+    size    INTEGER,
+    offset  INTEGER,
+    crc     INTEGER,
+    PRIMARY KEY (archive, name));
+CREATE INDEX IF NOT EXISTS member_by_key ON member (key);
+CREATE INDEX IF NOT EXISTS member_by_name ON member (name);
+"""
+# NOTE: member.key is the lowercase name, for case-insensitive queries
+
+hints = autodetect.sorted_hints(with_extension)
+numbered_vpk = re.compile(r".*_[0-9]{3}\.vpk$")
+# ^ data for a _dir.vpk; indexed as part of that archive
+
+
+def archive_class_of(filename: str) -> Union[base.Archive, None]:
+    """ArchiveClass to index filename with; None if it isn't an archive"""
+    filename = os.path.basename(filename).lower()
+    if numbered_vpk.match(filename):
+        return None
+    return autodetect.guess_with_hints(filename, hints)
+
+
+def archives_in(folder: str) -> List[str]:
+    """every indexable archive in a folder tree"""
+    return sorted(
+        os.path.join(root, filename)
+        for root, folders, filenames in os.walk(folder)
+        for filename in filenames
+        if archive_class_of(filename) is not None)
+
+
+def member_details(archive: base.Archive, filename: str) -> Tuple[int, Union[int, None], Union[int, None]]:
+    """(size, offset, crc); offset & crc are None if the ArchiveClass doesn't store them"""
+    size = archive.sizeof(filename)
+    if isinstance(archive, zipfile.ZipFile):  # pkware.Zip, Pk3 & Iwd
+        return (size, archive.data_offset(filename), archive.getinfo(filename).CRC)
+    elif isinstance(archive, cdrom.Iso):
+        return (size, (archive.file_record(filename).data_lba + archive.lba_offset) * 2048, None)
+    entries = getattr(archive, "entries", None)
+    entry = entries.get(filename, None) if isinstance(entries, dict) else None
+    offset = getattr(entry, "offset", getattr(entry, "archive_offset", None))  # Vpk: in .archive_vpk()
+    return (size, offset, getattr(entry, "crc", None))
+
+
+def record_of(filename: str) -> Dict[str, Any]:
+    """everything the index stores about an archive; never raises"""
+    # NOTE: run in worker processes; returns only picklable values
+    path, size, mtime = index.key_of(filename)
+    record = {
+        "path": path, "size": size, "mtime": mtime,
+        "archive_class": None, "error": None, "members": list()}
+    archive_class = archive_class_of(filename)
+    try:
+        assert archive_class is not None, f"couldn't find ArchiveClass for {filename!r}"
+        record["archive_class"] = index.qualified_name(archive_class)
+        archive = archive_class.from_file(filename)
+        record["members"] = [
+            (member, *member_details(archive, member))
+            for member in archive.namelist()]
+    except Exception as exc:
+        record["error"] = repr(exc)
+        record["members"] = list()
+    return record
+
+
+class ArchiveIndex:
+    """sqlite index of archive contents; refreshed incrementally by size & mtime"""
+    filename: str
+    connection: sqlite3.Connection
+
+    def __init__(self, filename: str = ":memory:"):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.executescript(schema)
+
+    def __repr__(self) -> str:
+        num_archives = self.connection.execute("SELECT COUNT(*) FROM archive").fetchone()[0]
+        num_members = self.connection.execute("SELECT COUNT(*) FROM member").fetchone()[0]
+        descriptor = f"{self.filename!r} {num_members} files in {num_archives} archives"
+        return f"<{self.__class__.__name__} {descriptor} @ 0x{id(self):016X}>"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    # building
+
+    def add(self, record: Dict[str, Any]):
+        """store a record_of(archive); replaces any previous entry for the same path"""
+        path = record["path"]
+        with self.connection:  # transaction
+            self.connection.execute("DELETE FROM member WHERE archive = ?", (path,))
+            self.connection.execute(
+                "INSERT OR REPLACE INTO archive VALUES (?, ?, ?, ?, ?)",
+                (path, record["size"], record["mtime"], record["archive_class"], record["error"]))
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO member VALUES (?, ?, ?, ?, ?, ?)",
+                [(path, name, name.lower(), size, offset, crc)
+                 for name, size, offset, crc in record["members"]])
+
+    def is_stale(self, filename: str) -> bool:
+        """True if filename isn't indexed, or has changed since it was"""
+        path, size, mtime = index.key_of(filename)
+        row = self.connection.execute(
+            "SELECT 1 FROM archive WHERE path = ? AND size = ? AND mtime = ?", (path, size, mtime)).fetchone()
+        return row is None
+
+    def remove(self, filename: str):
+        path = os.path.realpath(filename)
+        with self.connection:  # transaction
+            self.connection.execute("DELETE FROM member WHERE archive = ?", (path,))
+            self.connection.execute("DELETE FROM archive WHERE path = ?", (path,))
+
+    def update(self, filenames: Iterable[str], max_workers: int = None, chunksize: int = 4) -> Dict[str, str]:
+        """index all stale or missing archives in parallel; returns {"filename": "error"} for failures"""
+        stale = [filename for filename in filenames if self.is_stale(filename)]
+        errors = dict()
+        if len(stale) == 0:
+            return errors
+        with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+            for filename, record in zip(stale, executor.map(record_of, stale, chunksize=chunksize)):
+                self.add(record)
+                if record["error"] is not None:
+                    errors[filename] = record["error"]
+        return errors
+
+    def update_folder(self, folder: str, max_workers: int = None, chunksize: int = 4) -> Dict[str, str]:
+        """index every archive in a folder tree; forgets archives which no longer exist"""
+        filenames = archives_in(folder)
+        found = {os.path.realpath(filename) for filename in filenames}
+        root = os.path.join(os.path.realpath(folder), "")
+        for path, in self.connection.execute(
+                "SELECT path FROM archive WHERE path >= ? AND path < ?", (root, root + "\U0010FFFF")).fetchall():
+            if path not in found:
+                self.remove(path)
+        return self.update(filenames, max_workers, chunksize)
+
+    # queries
+
+    def archives(self) -> List[str]:
+        """paths of all indexed archives"""
+        return [path for path, in self.connection.execute("SELECT path FROM archive ORDER BY path")]
+
+    def errors(self) -> Dict[str, str]:
+        """{"path": "error"} for each archive that couldn't be indexed"""
+        return dict(self.connection.execute(
+            "SELECT path, error FROM archive WHERE error IS NOT NULL ORDER BY path"))
+
+    def load_archive(self, filename: str) -> base.Archive:
+        """open an indexed archive w/ the ArchiveClass it was indexed with"""
+        row = self.connection.execute(
+            "SELECT archive_class FROM archive WHERE path = ?", (os.path.realpath(filename),)).fetchone()
+        if row is None or row[0] is None:
+            raise FileNotFoundError(f"{filename!r} is not indexed")
+        return index.from_qualified_name(row[0]).from_file(filename)
+
+    def member(self, archive: str, filename: str) -> Union[Dict[str, int], None]:
+        """{"size": int, "offset": int, "crc": int} for filename in archive; None if not indexed"""
+        row = self.connection.execute(
+            "SELECT size, offset, crc FROM member WHERE archive = ? AND name = ?",
+            (os.path.realpath(archive), filename)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("size", "offset", "crc"), row))
+
+    def namelist(self, archive: str) -> List[str]:
+        return [name for name, in self.connection.execute(
+            "SELECT name FROM member WHERE archive = ? ORDER BY name", (os.path.realpath(archive),))]
+
+    def search(self, pattern: str = "*.bsp", case_sensitive: bool = False) -> List[Tuple[str, str]]:
+        """[("archive", "filename")] for every indexed file matching a glob pattern"""
+        # NOTE: only the files starting w/ the text before the first wildcard are checked
+        prefix = re.split(r"[*?\[]", pattern, maxsplit=1)[0]
+        if not case_sensitive:
+            pattern = pattern.lower()
+        return [
+            (archive, name)
+            for archive, name, key in self._starting_with(prefix, case_sensitive)
+            if fnmatch.fnmatchcase(name if case_sensitive else key, pattern)]
+
+    def startswith(self, prefix: str, case_sensitive: bool = False) -> List[Tuple[str, str]]:
+        """[("archive", "filename")] for every indexed file starting with prefix"""
+        return [(archive, name) for archive, name, key in self._starting_with(prefix, case_sensitive)]
+
+    def which(self, filename: str, case_sensitive: bool = False) -> List[str]:
+        """paths of every archive containing filename"""
+        if case_sensitive:
+            query = "SELECT archive FROM member WHERE name = ? ORDER BY archive"
+        else:
+            query = "SELECT archive FROM member WHERE key = ? ORDER BY archive"
+            filename = filename.lower()
+        return [archive for archive, in self.connection.execute(query, (filename,))]
+
+    def _starting_with(self, prefix: str, case_sensitive: bool) -> Generator[Tuple[str, str, str], None, None]:
+        """(archive, name, key) rows; range scan over member_by_name / member_by_key"""
+        column = "name" if case_sensitive else "key"
+        if not case_sensitive:
+            prefix = prefix.lower()
+        yield from self.connection.execute(
+            f"SELECT archive, name, key FROM member WHERE {column} >= ? AND {column} < ? ORDER BY {column}, archive",
+            (prefix, prefix + "\U0010FFFF"))
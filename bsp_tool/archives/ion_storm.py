@@ -1,12 +1,17 @@
 """based on Anachronox DAT File Extractor Version 2 by John Rittenhouse"""
 # https://archive.thedatadungeon.com/anachronox_2001/community/datextract2.zip
 from __future__ import annotations
+import concurrent.futures
 import io
-from typing import Dict, List
+import os
+import time
+from typing import Dict, Iterable, List, Union
 import zlib
 
 from .. import core
+from .. import lumps
 from ..utils import binary
+from ..utils import cache
 from . import base
 from . import id_software
 
@@ -57,6 +62,20 @@ class Dat(base.Archive):
         assert len(data) == entry.length
         return data
 
+    def read_range(self, filename: str, offset: int, length: int) -> bytes:
+        if self.entries[filename].compressed_length != 0:
+            raise NotImplementedError("cannot read part of a compressed file")
+        return self.view(filename).pread(offset, length)
+
+    def sizeof(self, filename: str) -> int:
+        return self.entries[filename].length
+
+    def locate(self, filename: str) -> Union[base.Located, None]:
+        entry = self.entries[filename]
+        if entry.compressed_length != 0:
+            return None
+        return (self._file, entry.offset, entry.length)
+
     @classmethod
     def from_stream(cls, stream: io.BytesIO) -> Dat:
         out = cls()
@@ -88,48 +107,131 @@ class PakFileEntry(core.Struct):
     _classes = {"is_compressed": bool}
 
 
+def decompress(compressed: bytes, length: int) -> bytes:
+    """Daikatana .pak run-length / back-reference decoder"""
+    # https://github.com/yquake2/pakextract/blob/master/pakextract.c#L254
+    data = memoryview(compressed)
+    out = bytearray(length)  # zeroed
+    i, o = 0, 0  # cursors into data & out
+    while i < len(data):
+        x = data[i]
+        i += 1
+        if x < 64:  # copy x + 1 bytes
+            run = x + 1
+            out[o:o + run] = data[i:i + run]
+            i += run
+        elif x < 128:  # x - 62 zeroes
+            run = x - 62
+        elif x < 192:  # repeat the next byte x - 126 times
+            run = x - 126
+            out[o:o + run] = data[i:i + 1].tobytes() * run
+            i += 1
+        elif x < 255:  # copy x - 190 bytes from earlier in out
+            run = x - 190
+            start = o - (data[i] + 1)
+            assert start >= 0, "back-reference before start of data"
+            i += 1
+            if start + run <= o:
+                out[o:o + run] = out[start:start + run]
+            else:  # overlaps itself; repeats the bytes from start onwards
+                pattern = out[start:o]
+                out[o:o + run] = (pattern * (run // len(pattern) + 1))[:run]
+        else:  # x == 255
+            break  # terminator
+        o += run
+    else:
+        raise RuntimeError("no terminator at end of compressed data")
+    assert o == length == len(out)
+    return bytes(out)
+
+
 class Pak(id_software.Pak):
     # https://github.com/yquake2/pakextract
     ext = "*.pak"
     _file: io.BytesIO
     entries: Dict[str, PakFileEntry]
+    cache: cache.LRUCache
+    # ^ {"filename": b"decompressed"}
+
+    def __init__(self, cache_size: int = 64 * 2 ** 20):
+        super().__init__()
+        self.cache = cache.LRUCache(cache_size)
 
     def decompress(self, entry: PakFileEntry) -> bytes:
-        """average time to decompress is ~1min per MB"""
-        # https://github.com/yquake2/pakextract/blob/master/pakextract.c#L254
-        out = b""
         self._file.seek(entry.offset)
-        while self._file.tell() < entry.offset + entry.compressed_length:
-            x = int.from_bytes(self._file.read(1))
-            if x < 64:
-                out += self._file.read(x + 1)
-            elif x < 128:
-                out += b"\x00" * (x - 62)
-            elif x < 192:
-                out += self._file.read(1) * (x - 126)
-            elif x < 255:
-                ptr = int.from_bytes(self._file.read(1)) + 1
-                out += out[-ptr].to_bytes(1) * (x - 190)
-            else:  # x == 255
-                break  # terminator
-        else:
-            raise RuntimeError("no terminator at end of compressed data")
-        assert len(out) == entry.length
-        return out
+        return decompress(self._file.read(entry.compressed_length), entry.length)
+
+    def extract_many(self, filenames: Iterable[str], to_path: str = None, max_workers: int = None,
+                     max_in_flight: int = 256 * 2 ** 20, **kwargs) -> base.ExtractionStats:
+        """like base.Archive.extract_many, but compressed entries are decompressed across a process pool"""
+        # NOTE: max_in_flight also limits the bytes (compressed + decompressed) of entries waiting on the pool
+        start = time.perf_counter()
+        to_path = "./" if to_path is None else to_path
+        filenames = list(filenames)
+        compressed = [filename for filename in filenames if self.entries[filename].is_compressed]
+        stats = super().extract_many(
+            [filename for filename in filenames if not self.entries[filename].is_compressed],
+            to_path, max_workers=max_workers, max_in_flight=max_in_flight, **kwargs)
+        if len(compressed) == 0:
+            return stats
+
+        def write(filename: str, data: bytes):
+            out_filename = os.path.join(to_path, filename)
+            os.makedirs(os.path.dirname(out_filename), exist_ok=True)
+            with open(out_filename, "wb") as out_file:
+                out_file.write(data)
+            stats.num_files += 1
+            stats.num_bytes += len(data)
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+            in_flight = dict()
+            # ^ {Future: ("filename", num_bytes)}
+            in_flight_bytes = 0
+            for filename in sorted(compressed, key=lambda f: self.entries[f].offset):
+                entry = self.entries[filename]
+                num_bytes = entry.compressed_length + entry.length
+                while len(in_flight) > 0 and in_flight_bytes + num_bytes > max_in_flight:
+                    finished, pending = concurrent.futures.wait(
+                        in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in finished:
+                        finished_filename, finished_bytes = in_flight.pop(future)
+                        in_flight_bytes -= finished_bytes
+                        write(finished_filename, future.result())
+                raw = lumps.read_range(self._file, entry.offset, entry.compressed_length)
+                stats.num_reads += 1
+                in_flight[executor.submit(decompress, raw, entry.length)] = (filename, num_bytes)
+                in_flight_bytes += num_bytes
+            for future in concurrent.futures.as_completed(in_flight):
+                write(in_flight[future][0], future.result())
+        stats.seconds = time.perf_counter() - start
+        return stats
 
     def read(self, filename: str) -> bytes:
         if filename not in self.entries:
             raise FileNotFoundError(f"{filename!r} is not in this Pak")
         entry = self.entries[filename]
-        self._file.seek(entry.offset)
         if not entry.is_compressed:
+            self._file.seek(entry.offset)
             return self._file.read(entry.length)
-        else:
-            return self.decompress(entry)
+        data = self.cache.get(filename)
+        if data is None:
+            data = self.decompress(entry)
+            self.cache.put(filename, data)
+        return data
 
     def namelist(self) -> List[str]:
         return sorted(self.entries.keys())
 
+    def read_range(self, filename: str, offset: int, length: int) -> bytes:
+        if self.entries[filename].is_compressed:
+            raise NotImplementedError("cannot read part of a compressed file")
+        return super().read_range(filename, offset, length)
+
+    def locate(self, filename: str) -> Union[base.Located, None]:
+        if self.entries[filename].is_compressed:
+            return None
+        return super().locate(filename)
+
     @classmethod
     def from_stream(cls, stream: io.BytesIO) -> Pak:
         out = cls()
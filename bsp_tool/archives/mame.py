@@ -1,11 +1,20 @@
 # https://github.com/mamedev/mame/blob/master/src/lib/util/chd.h
 from __future__ import annotations
+import array
+import binascii
+import concurrent.futures
 import enum
 import io
-from typing import Dict, List
+import lzma
+import struct
+from typing import Callable, Dict, List, Tuple
+import zlib
 
 from .. import core
+from .. import external
+from .. import lumps
 from ..utils import binary
+from ..utils import cache
 from . import base
 
 
@@ -88,8 +97,225 @@ class Metadata:
         return out
 
 
+class Compression(enum.IntEnum):
+    """hunk map entry compression types"""
+    # from src/lib/util/chd.h
+    TYPE_0 = 0  # header.compressors[0]
+    TYPE_1 = 1  # header.compressors[1]
+    TYPE_2 = 2  # header.compressors[2]
+    TYPE_3 = 3  # header.compressors[3]
+    NONE = 4  # uncompressed
+    SELF = 5  # copy of another hunk in this file
+    PARENT = 6  # copy of a hunk in the parent file
+    # pseudo-types; only used in the compressed map
+    RLE_SMALL = 7  # repeat last compression type 2-17 times
+    RLE_LARGE = 8  # repeat last compression type 18-273 times
+    SELF_0 = 9  # same as last SELF
+    SELF_1 = 10  # same as last SELF + 1
+    PARENT_SELF = 11  # same as the same hunk in the parent
+    PARENT_0 = 12  # same as last PARENT
+    PARENT_1 = 13  # same as last PARENT + 1
+
+
+class BitStream:
+    """MSB-first bit reader (bitstream_in); reading past the end gives 0s"""
+    data: bytes
+    position: int  # in bits
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.position = 0
+
+    @property
+    def overflow(self) -> bool:
+        return self.position > len(self.data) * 8
+
+    def peek(self, num_bits: int) -> int:
+        if num_bits == 0:
+            return 0
+        start, shift = divmod(self.position, 8)
+        length = (shift + num_bits + 7) // 8
+        chunk = int.from_bytes(self.data[start:start + length].ljust(length, b"\x00"), "big")
+        return (chunk >> (length * 8 - shift - num_bits)) & ((1 << num_bits) - 1)
+
+    def read(self, num_bits: int) -> int:
+        out = self.peek(num_bits)
+        self.position += num_bits
+        return out
+
+
+class HuffmanDecoder:
+    """canonical Huffman decoder (huffman_decoder<num_codes, max_bits>)"""
+    # from src/lib/util/huffman.cpp
+    max_bits: int
+    code_lengths: List[int]  # in bits; 0 if unused
+    lookup: List[Tuple[int, int]]
+    # ^ [(code, num_bits)]; indexed by the next max_bits of input
+
+    def __init__(self, code_lengths: List[int], max_bits: int):
+        self.max_bits = max_bits
+        self.code_lengths = code_lengths
+        assert max(code_lengths) <= max_bits, "code too long"
+        # assign_canonical_codes
+        first_code = [0] * 33  # per code length
+        for length in code_lengths:
+            first_code[length] += 1
+        start = 0
+        for length in range(32, 0, -1):
+            next_start = (start + first_code[length]) >> 1
+            assert length == 1 or next_start * 2 == start + first_code[length], "invalid Huffman tree"
+            first_code[length] = start
+            start = next_start
+        # build_lookup_table
+        self.lookup = [(0, 0)] * (1 << max_bits)
+        for code, length in enumerate(code_lengths):
+            if length == 0:
+                continue
+            bits = first_code[length]
+            first_code[length] += 1
+            shift = max_bits - length
+            self.lookup[bits << shift:(bits + 1) << shift] = [(code, length)] * (1 << shift)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self.code_lengths)} codes @ 0x{id(self):016X}>"
+
+    def decode(self, bits: BitStream) -> int:
+        code, length = self.lookup[bits.peek(self.max_bits)]
+        bits.position += length
+        return code
+
+    @classmethod
+    def from_bitstream_rle(cls, bits: BitStream, num_codes: int, max_bits: int) -> HuffmanDecoder:
+        """import_tree_rle"""
+        num_bits = 5 if max_bits >= 16 else 4 if max_bits >= 8 else 3
+        code_lengths = list()
+        while len(code_lengths) < num_codes:
+            length = bits.read(num_bits)
+            if length != 1:
+                code_lengths.append(length)
+            elif bits.peek(num_bits) == 1:  # escaped 1
+                code_lengths.append(bits.read(num_bits))
+            else:  # run of the same length
+                length = bits.read(num_bits)
+                code_lengths.extend([length] * (bits.read(num_bits) + 3))
+        assert len(code_lengths) == num_codes, "invalid Huffman tree"
+        assert not bits.overflow, "unexpected end of bitstream"
+        return cls(code_lengths, max_bits)
+
+
+# CD-ROM sectors; from src/lib/util/cdrom.h
+SECTOR_SIZE = 2352
+SUBCODE_SIZE = 96
+FRAME_SIZE = SECTOR_SIZE + SUBCODE_SIZE
+cd_sync_header = b"\x00" + b"\xFF" * 10 + b"\x00"
+
+# Mode 1 error correction; from src/lib/util/cdrom.cpp
+ecc_low = [(i << 1) ^ (0x11D if i & 0x80 else 0) for i in range(256)]
+ecc_high = {i ^ low: i for i, low in enumerate(ecc_low)}
+
+
+def ecc_rows(major_count: int, minor_count: int, major_mult: int, minor_inc: int) -> List[List[int]]:
+    """offsets (from sector header) of the bytes covered by each parity byte"""
+    size = major_count * minor_count
+    out = list()
+    for major in range(major_count):
+        index = (major >> 1) * major_mult + (major & 1)
+        row = list()
+        for minor in range(minor_count):
+            row.append(12 + index)
+            index = (index + minor_inc) % size
+        out.append(row)
+    return out
+
+
+ecc_p_rows = ecc_rows(86, 24, 2, 86)
+ecc_q_rows = ecc_rows(52, 43, 86, 88)
+
+
+def ecc_generate(sector: memoryview):
+    """fill in P & Q parity of a raw Mode 1 sector"""
+    for parity_offset, rows in ((0x81C, ecc_p_rows), (0x8C8, ecc_q_rows)):
+        for i, row in enumerate(rows):
+            a = b = 0
+            for offset in row:
+                a = ecc_low[a ^ sector[offset]]
+                b ^= sector[offset]
+            a = ecc_high[ecc_low[a] ^ b]
+            sector[parity_offset + i] = a
+            sector[parity_offset + len(rows) + i] = a ^ b
+
+
+# decompressors; from src/lib/util/chdcodec.cpp
+def lzma_dict_size(length: int) -> int:
+    """LzmaEncProps_Normalize(level=8, reduceSize=length)"""
+    for i in range(11, 31):
+        for dict_size in (2 << i, 3 << i):
+            if length <= dict_size:
+                return min(dict_size, 1 << 26)
+    return 1 << 26
+
+
+def decompress_lzma(data: bytes, length: int) -> bytes:
+    # NOTE: raw LZMA w/o an end marker; properties are implied by the uncompressed length
+    filters = [{"id": lzma.FILTER_LZMA1, "dict_size": lzma_dict_size(length), "lc": 3, "lp": 0, "pb": 2}]
+    return lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=filters).decompress(data, length)
+
+
+def decompress_zlib(data: bytes, length: int) -> bytes:
+    return zlib.decompressobj(-zlib.MAX_WBITS).decompress(data, length)  # raw deflate
+
+
+def decompress_zstd(data: bytes, length: int) -> bytes:
+    import zstandard  # optional dependency
+    return zstandard.ZstdDecompressor().decompress(data, max_output_size=length)
+
+
+class CdCodec:
+    """chd_cd_decompressor; sector & subcode data are compressed separately"""
+    base: Callable[[bytes, int], bytes]
+    subcode: Callable[[bytes, int], bytes]
+
+    def __init__(self, base: Callable[[bytes, int], bytes], subcode: Callable[[bytes, int], bytes]):
+        self.base = base
+        self.subcode = subcode
+
+    def __call__(self, data: bytes, length: int) -> bytes:
+        frames = length // FRAME_SIZE
+        ecc_bytes = (frames + 7) // 8  # bitmask of frames w/ stripped sync header & ecc
+        header_length = ecc_bytes + (2 if length < 65536 else 3)
+        base_length = int.from_bytes(data[ecc_bytes:header_length], "big")
+        sectors = self.base(data[header_length:header_length + base_length], frames * SECTOR_SIZE)
+        subcode = self.subcode(data[header_length + base_length:], frames * SUBCODE_SIZE)
+        assert len(sectors) == frames * SECTOR_SIZE and len(subcode) == frames * SUBCODE_SIZE
+        # interleave sectors & subcode
+        out = memoryview(bytearray(frames * FRAME_SIZE))
+        for i in range(frames):
+            frame = i * FRAME_SIZE
+            out[frame:frame + SECTOR_SIZE] = sectors[i * SECTOR_SIZE:(i + 1) * SECTOR_SIZE]
+            out[frame + SECTOR_SIZE:frame + FRAME_SIZE] = subcode[i * SUBCODE_SIZE:(i + 1) * SUBCODE_SIZE]
+            if data[i // 8] & (1 << (i % 8)):  # reconstitute the sync header & ecc
+                out[frame:frame + 12] = cd_sync_header
+                ecc_generate(out[frame:frame + SECTOR_SIZE])
+        return out.tobytes()
+
+
+decompressors: Dict[bytes, Callable[[bytes, int], bytes]]
+decompressors = {
+    b"cdlz": CdCodec(decompress_lzma, decompress_zlib),
+    b"cdzl": CdCodec(decompress_zlib, decompress_zlib),
+    b"cdzs": CdCodec(decompress_zstd, decompress_zstd),
+    b"lzma": decompress_lzma,
+    b"zlib": decompress_zlib,
+    b"zstd": decompress_zstd}
+
+
 class CompressedMapHeaderv5:
     length: int  # size of compressed map data
+    first_block_offset: int  # offset of first compressed hunk
+    crc: int  # crc-16 of the decompressed map
+    length_bits: int  # bits per compressed length
+    hunk_bits: int  # bits per SELF hunk index
+    parent_unit_bits: int  # bits per PARENT unit index
 
     @classmethod
     def from_stream(cls, stream: io.BytesIO) -> CompressedMapHeaderv5:
@@ -106,15 +332,110 @@ class CompressedMapHeaderv5:
 
 
 class CompressedMapEntryv5:
+    compression: Compression
+    length: int  # compressed length
+    offset: int  # file offset; hunk index if SELF; unit index if PARENT
+    crc: int  # crc-16 of decompressed hunk; None if unchecked
+    __slots__ = ["compression", "length", "offset", "crc"]
+
+    def __init__(self, compression: Compression, length: int, offset: int, crc: int = None):
+        self.compression = Compression(compression)
+        self.length = length
+        self.offset = offset
+        self.crc = crc
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{attr}={getattr(self, attr)!r}" for attr in self.__slots__)
+        return f"{self.__class__.__name__}({args})"
+
+    def as_bytes(self) -> bytes:
+        return b"".join([
+            bytes([self.compression]), self.length.to_bytes(3, "big"),
+            self.offset.to_bytes(6, "big"), (self.crc or 0).to_bytes(2, "big")])
+
+    @classmethod
+    def from_bytes(cls, raw_entry: bytes) -> CompressedMapEntryv5:
+        return cls.from_stream(io.BytesIO(raw_entry))
+
     @classmethod
     def from_stream(cls, stream: io.BytesIO) -> CompressedMapEntryv5:
-        raise NotImplementedError()
-        out = cls()
         # [  0] uint8_t   compression;  // compression type
         # [  1] UINT24    complength;   // compressed length
         # [  4] UINT48    offset;       // offset
         # [ 10] uint16_t  crc;          // crc-16 of the data
-        return out
+        raw_entry = stream.read(12)
+        return cls(
+            raw_entry[0], int.from_bytes(raw_entry[1:4], "big"),
+            int.from_bytes(raw_entry[4:10], "big"), int.from_bytes(raw_entry[10:], "big"))
+
+
+class TrackStream:
+    """read-only stream of one track's sectors, w/o subcode & padding"""
+    chd: Chd
+    first_frame: int  # chd frame index of first sector
+    length: int  # in sectors
+    sector_size: int  # bytes used in each frame
+    byteswap: bool  # audio is stored big-endian
+    position: int  # in bytes
+
+    def __init__(self, chd: Chd, first_frame: int, length: int, sector_size: int, byteswap: bool = False):
+        self.chd = chd
+        self.first_frame = first_frame
+        self.length = length
+        self.sector_size = sector_size
+        self.byteswap = byteswap
+        self.position = 0
+
+    def read(self, length: int = -1) -> bytes:
+        size = self.length * self.sector_size
+        if length < 0 or self.position + length > size:
+            length = max(size - self.position, 0)
+        if length == 0:
+            return b""
+        first_sector = self.position // self.sector_size
+        num_sectors = (self.position + length - 1) // self.sector_size - first_sector + 1
+        frame_size = self.chd.header.unit_bytes
+        frames = memoryview(self.chd.read_bytes(
+            (self.first_frame + first_sector) * frame_size, num_sectors * frame_size))
+        sectors = b"".join([
+            frames[offset:offset + self.sector_size]
+            for offset in range(0, len(frames), frame_size)])
+        if self.byteswap:
+            samples = array.array("H", sectors)
+            samples.byteswap()
+            sectors = samples.tobytes()
+        start = self.position - first_sector * self.sector_size
+        self.position += length
+        return sectors[start:start + length]
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        assert whence in (0, 1, 2)
+        if whence == 1:
+            offset += self.position
+        elif whence == 2:
+            offset += self.length * self.sector_size
+        self.position = offset
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+
+# from src/lib/util/cdrom.cpp (cdrom_file::parse_metadata)
+track_types = {  # {"TYPE": (mode, sector_size)}
+    "AUDIO": (base.TrackMode.AUDIO, 2352),
+    "MODE1": (base.TrackMode.BINARY_1, 2048),
+    "MODE1/2048": (base.TrackMode.BINARY_1, 2048),
+    "MODE1_RAW": (base.TrackMode.BINARY_1, 2352),
+    "MODE1/2352": (base.TrackMode.BINARY_1, 2352),
+    "MODE2": (base.TrackMode.BINARY_2, 2336),
+    "MODE2/2336": (base.TrackMode.BINARY_2, 2336),
+    "MODE2_FORM1": (base.TrackMode.BINARY_2, 2048),
+    "MODE2/2048": (base.TrackMode.BINARY_2, 2048),
+    "MODE2_FORM_MIX": (base.TrackMode.BINARY_2, 2336),
+    "MODE2_RAW": (base.TrackMode.BINARY_2, 2352),
+    "MODE2/2352": (base.TrackMode.BINARY_2, 2352)}
+# TODO: MODE2_FORM2 (2324 byte sectors)
 
 
 class Chd(base.DiscImage):
@@ -122,16 +443,189 @@ class Chd(base.DiscImage):
     ext = "*.chd"
     header: ChdHeaderv5
     metadata: List[Metadata]
+    hunk_map: List[CompressedMapEntryv5]
+    max_workers: int = None  # hunk decompression threads
+    hunk_cache_size: int = 32 * 2 ** 20  # in bytes
+    _hunk_cache: cache.LRUCache = None  # generated on first use
+    # ^ {hunk_index: b"decompressed_hunk"}
+    _executor: concurrent.futures.ThreadPoolExecutor = None  # generated on first use; see .close()
+    _file: io.BytesIO = None  # set by .from_stream()
 
     def __init__(self):
         self.extras = dict()
         self.metadata = list()
+        self.hunk_map = list()
         self.tracks = list()
         self._cursor = (0, 0)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def close(self):
+        """stop the decompression threads & close the .chd"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._file is not None:
+            self._file.close()
+
+    @property
+    def executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """shared by every .read_hunks(); max_workers is only checked on first use"""
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(self.max_workers)
+        return self._executor
+
     def extra_patterns(self) -> List[str]:
         return list()
 
+    @property
+    def hunk_cache(self) -> cache.LRUCache:
+        if self._hunk_cache is None:
+            self._hunk_cache = cache.LRUCache(self.hunk_cache_size)
+        return self._hunk_cache
+
+    @property
+    def hunk_count(self) -> int:
+        return -(-self.header.logical_bytes // self.header.hunk_bytes)
+
+    @property
+    def is_gdrom(self) -> bool:
+        metadata_magics = {md.magic for md in self.metadata}
+        return any(magic in metadata_magics for magic in (b"CHGD", b"CHGT"))
+
+    def decompress_hunk(self, hunk_index: int, data: bytes) -> bytes:
+        """data from .read_block(); thread-safe"""
+        entry = self.hunk_map[hunk_index]
+        if entry.compression == Compression.NONE:
+            if entry.offset == 0:  # unallocated (uncompressed map only)
+                return bytes(self.header.hunk_bytes)
+            hunk = data
+        else:
+            codec = self.header.compressors[entry.compression]
+            if codec not in decompressors:
+                raise NotImplementedError(f"{compressor_codecs.get(codec, codec)} codec is not supported")
+            hunk = decompressors[codec](data, self.header.hunk_bytes)
+        assert len(hunk) == self.header.hunk_bytes, f"hunk {hunk_index} is truncated"
+        if entry.crc is not None:
+            assert binascii.crc_hqx(hunk, 0xFFFF) == entry.crc, f"hunk {hunk_index} failed crc check"
+        return hunk
+
+    def decompress_map(self, raw_map: bytes) -> List[CompressedMapEntryv5]:
+        """decompress_v5_map"""
+        bits = BitStream(raw_map)
+        huffman = HuffmanDecoder.from_bitstream_rle(bits, 16, 8)
+        # compression types are huffman & run-length encoded
+        compressions = list()
+        last, repeat = Compression.TYPE_0, 0
+        for hunk_index in range(self.hunk_count):
+            if repeat > 0:
+                repeat -= 1
+            else:
+                code = huffman.decode(bits)
+                if code == Compression.RLE_SMALL:
+                    repeat = 2 + huffman.decode(bits)
+                elif code == Compression.RLE_LARGE:
+                    repeat = 2 + 16 + (huffman.decode(bits) << 4)
+                    repeat += huffman.decode(bits)
+                else:
+                    last = code
+            compressions.append(last)
+        # then the offsets, lengths & crcs
+        out = list()
+        map_header = self.map_header
+        hunk_units = self.header.hunk_bytes // self.header.unit_bytes
+        block_offset = map_header.first_block_offset
+        last_self, last_parent = 0, 0
+        for hunk_index, compression in enumerate(compressions):
+            offset, length, crc = block_offset, 0, 0
+            if compression <= Compression.NONE:
+                if compression == Compression.NONE:
+                    length = self.header.hunk_bytes
+                else:
+                    length = bits.read(map_header.length_bits)
+                block_offset += length
+                crc = bits.read(16)
+            elif compression == Compression.SELF:
+                offset = last_self = bits.read(map_header.hunk_bits)
+            elif compression == Compression.PARENT:
+                offset = last_parent = bits.read(map_header.parent_unit_bits)
+            elif compression in (Compression.SELF_0, Compression.SELF_1):
+                last_self += 1 if compression == Compression.SELF_1 else 0
+                compression, offset = Compression.SELF, last_self
+            elif compression == Compression.PARENT_SELF:
+                compression = Compression.PARENT
+                offset = last_parent = hunk_index * hunk_units
+            elif compression in (Compression.PARENT_0, Compression.PARENT_1):
+                last_parent += hunk_units if compression == Compression.PARENT_1 else 0
+                compression, offset = Compression.PARENT, last_parent
+            else:
+                raise RuntimeError(f"invalid compression type for hunk {hunk_index}: {compression}")
+            out.append(CompressedMapEntryv5(compression, length, offset, crc))
+        assert not bits.overflow, "unexpected end of map"
+        decompressed_map = b"".join([entry.as_bytes() for entry in out])
+        assert binascii.crc_hqx(decompressed_map, 0xFFFF) == map_header.crc, "map failed crc check"
+        return out
+
+    def read_block(self, hunk_index: int) -> bytes:
+        """raw (compressed) hunk data"""
+        entry = self.hunk_map[hunk_index]
+        if entry.compression == Compression.PARENT:
+            raise NotImplementedError("parent .chd files are not supported")
+        assert entry.compression <= Compression.NONE, "hunk has no data of it's own"
+        if entry.offset == 0:  # unallocated (uncompressed map only)
+            return b""
+        return lumps.read_range(self._file, entry.offset, entry.length)  # NOTE: w/o the shared cursor, where possible
+
+    def read_bytes(self, offset: int, length: int) -> bytes:
+        """read from the decompressed image"""
+        if length <= 0:
+            return b""
+        hunk_bytes = self.header.hunk_bytes
+        first_hunk = offset // hunk_bytes
+        last_hunk = (offset + length - 1) // hunk_bytes
+        hunks = self.read_hunks(range(first_hunk, last_hunk + 1))
+        start = offset - first_hunk * hunk_bytes
+        if len(hunks) == 1:
+            return hunks[0][start:start + length]
+        hunks[0] = hunks[0][start:]
+        hunks[-1] = hunks[-1][:offset + length - last_hunk * hunk_bytes]
+        return b"".join(hunks)
+
+    def read_hunk(self, hunk_index: int) -> bytes:
+        return self.read_hunks([hunk_index])[0]
+
+    def read_hunks(self, hunk_indices: List[int]) -> List[bytes]:
+        """decompresses any uncached hunks across a thread pool"""
+        hunk_indices = [self.resolve_hunk(hunk_index) for hunk_index in hunk_indices]
+        hunks = {hunk_index: self.hunk_cache.get(hunk_index) for hunk_index in hunk_indices}
+        # NOTE: compressed blocks are read in file order by this thread; only decompression is threaded
+        missing = sorted(
+            [hunk_index for hunk_index, hunk in hunks.items() if hunk is None],
+            key=lambda hunk_index: self.hunk_map[hunk_index].offset)
+        blocks = [self.read_block(hunk_index) for hunk_index in missing]
+        if len(missing) > 1 and self.max_workers != 1:
+            # NOTE: lzma & zlib release the GIL while decompressing
+            hunks.update(zip(missing, self.executor.map(self.decompress_hunk, missing, blocks)))
+        else:
+            hunks.update({
+                hunk_index: self.decompress_hunk(hunk_index, block)
+                for hunk_index, block in zip(missing, blocks)})
+        for hunk_index in missing:
+            self.hunk_cache.put(hunk_index, hunks[hunk_index])
+        return [hunks[hunk_index] for hunk_index in hunk_indices]
+
+    def resolve_hunk(self, hunk_index: int) -> int:
+        """follow SELF references to the hunk w/ the data"""
+        entry = self.hunk_map[hunk_index]
+        while entry.compression == Compression.SELF:
+            hunk_index = entry.offset
+            entry = self.hunk_map[hunk_index]
+        return hunk_index
+
     @classmethod
     def from_stream(cls, stream: io.BytesIO) -> Chd:
         magic, header_length, header_version = binary.read_struct(stream, ">8s2I")
@@ -139,41 +633,50 @@ class Chd(base.DiscImage):
         assert header_version == 5, "only supporting v5"
         assert header_length == 124, "incorrect header size for v5"
         out = cls()
+        out._file = stream
         out.header = ChdHeaderv5.from_stream(stream)
         # metadata
-        stream.seek(out.header.meta_offset)
-        metadata = Metadata.from_stream(stream)
-        while metadata.next != 0:
-            out.metadata.append(metadata)
-            metadata = Metadata.from_stream(stream)
-        # TODO: CHGD & CHTR -> Track
-        # TODO: track data -> extras
-        # NOTE: https://github.com/mamedev/mame/blob/master/src/lib/util/chd.cpp#L2489
-        # -- get map (m_rawmap)
+        metadata_offset = out.header.meta_offset
+        while metadata_offset != 0:
+            stream.seek(metadata_offset)
+            out.metadata.append(Metadata.from_stream(stream))
+            metadata_offset = out.metadata[-1].next
+        # map
         # NOTE: https://github.com/mamedev/mame/blob/master/src/lib/util/chd.cpp#L2168
         # -- decompress_v5_map
-        # --- seek to map offset
         stream.seek(out.header.map_offset)
         if out.header.compressors[0] != b"\x00" * 4:  # data is compressed
             out.map_header = CompressedMapHeaderv5.from_stream(stream)
             out.raw_map = stream.read(out.map_header.length)
-            assert len(out.raw_map) == out.map_header.length  # should hit EOF exactly
-            # TODO: decompress Huffman encoded CompressedMapEntryv5 etc.
-        # INITIALISE DECOMPRESSORS
-        # NOTE: https://github.com/mamedev/mame/blob/master/src/lib/util/chdcodec.cpp#L406
-        # -- cdrom_file::MAX_SECTOR_DATA = 2352
-        # -- cdrom_file::MAX_SUBCODE_DATA = 96
-        # -- chd_cd_compressor needs a BaseCompressor & SubcodeCompressor for it's template
-        # --- cdlz: (LZMA, Deflate), cdzl: (Deflate,) * 2, cdzs: (Zstandard,) * 2
-        # -- chd_lzma_decompressor::decompress | lzma/C/LzmaDec.h | import lzma
-        # -- chd_zlib_decompressor::decompress | <zlib.h> | import zlib
-        # -- chd_zstd_decompressor::decompress | <zstd.h> | pip install zstandard (+ cffi) => import zstandard
-        else:
-            # TODO: need an uncompressed .chd to test
-            raise NotImplementedError("Cannot parse uncompressed Map")
+            assert len(out.raw_map) == out.map_header.length, "unexpected EOF"
+            out.hunk_map = out.decompress_map(out.raw_map)
+        else:  # NOTE: untested; need an uncompressed .chd
+            out.raw_map = stream.read(out.hunk_count * 4)
+            out.hunk_map = [
+                CompressedMapEntryv5(Compression.NONE, out.header.hunk_bytes, hunk * out.header.hunk_bytes)
+                for hunk in struct.unpack(f">{out.hunk_count}I", out.raw_map)]
+        # tracks
+        # NOTE: https://github.com/mamedev/mame/blob/master/src/lib/util/cdrom.cpp
+        # -- cdrom_file::cdrom_file (track offsets)
+        track_metadata = sorted(
+            [md for md in out.metadata if md.magic in (b"CHT2", b"CHGD", b"CHTR")],
+            key=lambda md: int(md.keyvalues["TRACK"]))
+        lba, frame = 0, 0
+        for i, md in enumerate(track_metadata):
+            if md.keyvalues["TYPE"] not in track_types:
+                raise NotImplementedError(f"unsupported track type: {md.keyvalues['TYPE']}")
+            mode, sector_size = track_types[md.keyvalues["TYPE"]]
+            frames = int(md.keyvalues["FRAMES"])
+            pregap = int(md.keyvalues.get("PREGAP", 0))
+            if out.is_gdrom and i == 2:  # high density area
+                lba = 45000
+            first_frame, length = frame, frames
+            if md.keyvalues.get("PGTYPE", "").startswith("V"):  # pregap data is in the image
+                first_frame, length = frame + pregap, frames - pregap
+            name = f"Track {int(md.keyvalues['TRACK']):02d}"
+            out.tracks.append(base.Track(mode, sector_size, lba + pregap, length, name))
+            track_stream = TrackStream(out, first_frame, length, sector_size, mode == base.TrackMode.AUDIO)
+            out.extras[name] = external.File.from_stream(name, track_stream)
+            lba += pregap + length
+            frame += -(-frames // 4) * 4  # tracks are padded to a multiple of 4 frames
         return out
-
-    @property
-    def is_gdrom(self) -> bool:
-        metadata_magics = {md.magic for md in self.metadata}
-        return any(magic in metadata_magics for magic in (b"CHGD", b"CHGT"))
@@ -1,14 +1,105 @@
 from __future__ import annotations
 import io
-from typing import Any
+import struct
+from typing import Any, Generator, Union
 import zipfile
 
+from .. import lumps
 from . import base
 
 
+class AppendBuffer:
+    """read-only source stream w/ an in-memory tail; writes are only ever made to the tail"""
+    # NOTE: lets a Zip be edited in append-only mode w/o copying the source
+    # -- ZipFile appends new members over the old central directory, which moves .cut back
+    source: io.BytesIO  # e.g. external.RangeView of a .bsp lump
+    cut: int  # bytes of source still in use; everything after is in .tail
+    tail: io.BytesIO
+    position: int
+
+    def __init__(self, source: io.BytesIO):
+        self.source = source
+        self.cut = lumps.size_of(source)
+        self.tail = io.BytesIO()
+        self.position = 0
+
+    def __repr__(self) -> str:
+        descriptor = f"{self.cut} source bytes + {len(self) - self.cut} new bytes"
+        return f"<{self.__class__.__name__} {descriptor} @ 0x{id(self):016X}>"
+
+    def __len__(self) -> int:
+        return self.cut + self.tail.seek(0, 2)
+
+    def chunks(self, chunk_size: int = 2 ** 20) -> Generator[bytes, None, None]:
+        """yields the whole buffer, w/o joining the source & tail"""
+        for offset in range(0, self.cut, chunk_size):
+            yield lumps.read_range(self.source, offset, min(chunk_size, self.cut - offset))
+        tail = self.tail.getbuffer()
+        try:
+            for offset in range(0, len(tail), chunk_size):
+                yield bytes(tail[offset:offset + chunk_size])
+        finally:
+            tail.release()
+
+    def flush(self):
+        pass
+
+    def getvalue(self) -> bytes:
+        return b"".join(self.chunks())
+
+    def pread(self, offset: int, length: int) -> bytes:
+        """read w/o moving the cursor"""
+        end = len(self) if length < 0 else min(offset + length, len(self))
+        out = list()
+        if offset < self.cut:
+            out.append(lumps.read_range(self.source, offset, min(end, self.cut) - offset))
+        if end > self.cut:
+            start = max(offset, self.cut)
+            out.append(lumps.read_range(self.tail, start - self.cut, end - start))
+        return b"".join(out)
+
+    def read(self, length: int = -1) -> bytes:
+        data = self.pread(self.position, length)
+        self.position += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        assert whence in (0, 1, 2)
+        if whence == 1:
+            offset += self.position
+        elif whence == 2:
+            offset += len(self)
+        self.position = offset
+        return self.position
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def truncate(self, size: int = None) -> int:
+        size = self.position if size is None else size
+        if size <= self.cut:
+            self.cut = size
+            self.tail = io.BytesIO()
+        else:
+            self.tail.truncate(size - self.cut)
+        return size
+
+    def write(self, data: bytes) -> int:
+        if self.position < self.cut:  # overwriting the source; discard everything after
+            self.truncate(self.position)
+        self.tail.seek(self.position - self.cut)
+        length = self.tail.write(data)
+        self.position += length
+        return length
+
+
 class Zip(zipfile.ZipFile, base.Archive):
     ext = "*.zip"
-    _buffer: io.BytesIO  # copy of raw data as a byte stream
+    _buffer: Union[io.BytesIO, AppendBuffer]  # raw data as a byte stream
+    _edited: bool  # see .is_dirty()
 
     def __init__(self, file_: Any = None, mode: str = "a", **kwargs):
         # wrapping ZipFile.__init__ so we always have the raw bytes & can init w/ no args
@@ -21,26 +112,133 @@ class Zip(zipfile.ZipFile, base.Archive):
             self._buffer = file_
         elif isinstance(file_, str):  # save a copy of source file bytes if initialising from file
             self._buffer = io.BytesIO(open(file_, "rb").read())
+        elif hasattr(file_, "read"):  # e.g. external.RangeView of a lump or parent archive
+            self._buffer = AppendBuffer(file_)
+            # NOTE: file_ is never written to; edits are appended in memory
         else:
             raise TypeError(f"Cannot create {self.__class__.__name__} from type '{type(file_)}'")
+        self._edited = False
         super().__init__(self._buffer, mode=mode, **kwargs)
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__} {len(self.namelist())} files mode='{self.mode}' @ 0x{id(self):016X}>"
 
     def as_bytes(self) -> bytes:
+        self._flush_end_record()
+        return self._buffer.getvalue()
+
+    def as_chunks(self, chunk_size: int = 2 ** 20) -> Generator[bytes, None, None]:
+        """like as_bytes, but yields the zip in chunks; never holds a second copy of the whole zip"""
+        self._flush_end_record()
+        if isinstance(self._buffer, AppendBuffer):
+            yield from self._buffer.chunks(chunk_size)
+            return
+        buffer = self._buffer.getbuffer()
+        try:
+            for offset in range(0, len(buffer), chunk_size):
+                yield bytes(buffer[offset:offset + chunk_size])
+        finally:
+            buffer.release()
+
+    def compact(self):
+        """drop the bytes of removed & replaced members; compressed data is copied, not recompressed"""
+        buffer = io.BytesIO()
+        for info in sorted(self.filelist, key=lambda i: i.header_offset):
+            start, end = info.header_offset, self.record_end(info.filename)
+            info.header_offset = buffer.tell()
+            buffer.write(lumps.read_range(self._buffer, start, end - start))
+        self._buffer = self.fp = buffer
+        self.start_dir = buffer.tell()
+        self._didModify = True  # central directory & end record need to be rewritten
+
+    @property
+    def dead_bytes(self) -> int:
+        """bytes used by removed & replaced members; reclaimed by .compact()"""
+        live = sum(self.record_end(info.filename) - info.header_offset for info in self.filelist)
+        return self.start_dir - live
+
+    def read_range(self, filename: str, offset: int, length: int) -> bytes:
+        info = self.getinfo(filename)
+        if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x01:  # compressed / encrypted
+            raise NotImplementedError("cannot read part of a compressed file")
+            # NOTE: seeking in a compressed member decompresses from the start every time
+        length = max(min(length, info.file_size - offset), 0)
+        return lumps.read_range(self._buffer, self.data_offset(filename) + offset, length)
+
+    def sizeof(self, filename: str) -> int:
+        return self.getinfo(filename).file_size
+
+    def crc(self, filename: str) -> int:
+        return self.getinfo(filename).CRC
+
+    def data_offset(self, filename: str) -> int:
+        """offset of filename's (possibly compressed) data in the zip"""
+        info = self.getinfo(filename)
+        # skip the local file header; its extra field can differ from the central directory's
+        filename_length, extra_length = struct.unpack("<2H", lumps.read_range(self._buffer, info.header_offset + 26, 4))
+        return info.header_offset + 30 + filename_length + extra_length
+
+    def record_end(self, filename: str) -> int:
+        """offset of the end of filename's local file header, data & data descriptor"""
+        info = self.getinfo(filename)
+        end = self.data_offset(filename) + info.compress_size
+        if info.flag_bits & 0x08:  # data descriptor
+            self._buffer.seek(end)
+            end += 16 if self._buffer.read(4) == b"PK\x07\x08" else 12
+            # NOTE: ignores zip64 descriptors
+        return end
+
+    def remove(self, filename: str):
+        """drop filename from the central directory; its data remains until .compact()"""
+        info = self.getinfo(filename)
+        self.filelist.remove(info)
+        del self.NameToInfo[filename]
+        self._didModify = True
+        self._directory_index = None  # namelist changed
+
+    def is_dirty(self) -> bool:
+        """True if any member has been written or removed since loading"""
+        return self._edited or self._didModify
+
+    def mark_clean(self):
+        self._flush_end_record()
+        self._edited = False
+
+    def locate(self, filename: str) -> Union[base.Located, None]:
+        info = self.getinfo(filename)
+        if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x01:  # compressed / encrypted
+            return None
+        return (self._buffer, self.data_offset(filename), info.file_size)
+
+    def write(self, filename: str, arcname: str = None, *args, **kwargs):
+        self._replace(zipfile.ZipInfo.from_file(filename, arcname).filename)
+        super().write(filename, arcname, *args, **kwargs)
+        self._directory_index = None  # namelist changed
+
+    def writestr(self, zinfo_or_arcname: Union[str, zipfile.ZipInfo], *args, **kwargs):
+        if isinstance(zinfo_or_arcname, zipfile.ZipInfo):
+            self._replace(zinfo_or_arcname.filename)
+        else:
+            self._replace(zipfile.ZipInfo(zinfo_or_arcname).filename)
+        super().writestr(zinfo_or_arcname, *args, **kwargs)
+        self._directory_index = None  # namelist changed
+
+    def _flush_end_record(self):
         # write ending records if edits were made (adapted from ZipFile.close)
         if self.mode in "wxa" and self._didModify and self.fp is not None:
             with self._lock:
                 if self._seekable:
                     self.fp.seek(self.start_dir)
                 self._write_end_record()
+        self._edited = self._edited or self._didModify
         self._didModify = False  # don't double up when .close() is called
         # NOTE: .close() can get funky but it's OK because ._buffer isn't a real file
-        return self._buffer.getvalue()
 
-    def sizeof(self, filename: str) -> int:
-        return self.getinfo(filename).file_size
+    def _replace(self, filename: str):
+        """new members w/ the same name replace old ones, instead of adding a duplicate entry"""
+        # NOTE: the old member's data is left in place (append-only); see .compact()
+        if filename in self.NameToInfo:
+            self.remove(filename)
 
     @classmethod
     def from_bytes(cls, raw_lump: bytes) -> Zip:
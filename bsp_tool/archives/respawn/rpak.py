@@ -3,7 +3,9 @@ from __future__ import annotations
 import datetime
 import enum
 import io
-from typing import Dict, List, Tuple, Union
+import mmap
+import tempfile
+from typing import BinaryIO, Callable, Dict, List, Tuple, Union
 
 from ... import core
 from ... import external
@@ -60,6 +62,25 @@ class Compression(enum.Enum):
     OODLE = 0x02
 
 
+decompressors: Dict[Compression, Callable[[io.BytesIO, BinaryIO, int], None]] = dict()
+# ^ {Compression: decompress(compressed_stream, out_file, decompressed_length)}
+# NOTE: no RTech or Oodle decompressor is implemented; compressed rpaks only load their header
+# -- registering a decompressor here is enough for RPak.from_stream to use it
+# TODO: port RTech (Compression.RESPAWN) from LegionPlus / RePak; needs real compressed .rpak to test against
+
+
+def memory_buffer(stream: io.BytesIO) -> Union[bytes, mmap.mmap]:
+    """sliceable view of a whole stream; memory mapped if the stream is a file on disk"""
+    if isinstance(stream, mmap.mmap):
+        return stream
+    try:
+        fileno = stream.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        stream.seek(0)
+        return stream.read()
+    return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
+
 class HeaderFlags(enum.IntFlag):
     """all guesses"""
     # NOTE: R5 flags only use the bottom byte
@@ -219,6 +240,16 @@ class RPak(base.Archive):
     optimal_starpaks: List[str]
     patch: Tuple[PatchHeader, List[CompressPair], List[int]]
     version: int
+    asset_entries: List[Union[AssetEntryv6, AssetEntryv8]] = None  # None if compressed
+    # lookups generated in .from_stream()
+    data_offset: int  # start of virtual_segment data in ._buffer
+    segment_offsets: List[int]  # virtual_segment data offsets in ._buffer; None if in a StaRPak
+    page_offsets: List[int]  # memory_page data offsets in ._buffer; None if in a StaRPak
+    _assets: Dict[str, Union[AssetEntryv6, AssetEntryv8]] = None  # generated on first use
+    # ^ {"filename": asset_entry}
+    _buffer: Union[bytes, mmap.mmap]  # whole (decompressed) file
+    _starpaks: Dict[str, StaRPak]
+    # ^ {"filename.starpak": StaRPak}
     # versioned struct lookups
     HeaderClasses = {
         6: RPakHeaderv6,
@@ -236,6 +267,7 @@ class RPak(base.Archive):
         self.optimal_starpaks = list()
         self.patch = None
         self.starpaks = list()
+        self._starpaks = dict()
 
     def __repr__(self) -> str:
         hash_ = f"{self.header.hash:016X}"
@@ -243,26 +275,21 @@ class RPak(base.Archive):
         descriptor = f"v{self.version} ({hash_}) {num_assets} assets"
         return f"<{self.__class__.__name__} {descriptor} @ 0x{id(self):016X}>"
 
-    def extra_patterns(self) -> List[str]:
-        # NOTE: assuming all starpaks are in the same folder
-        # "paks\\Win64\\example.starpak" -> "example.starpak"
-        return [
-            filename.replace("\\", "/").split("/")[-1]
-            for filename in (*self.optimal_starpaks, *self.starpaks)]
-
-    def virtual_segment_data(self, index: int) -> bytes:
-        assert index < len(self.virtual_segments)
-        start = sum(vs.size for vs in self.virtual_segments[:index] if not vs.flags & 64)
-        length = self.virtual_segments[index].size
-        return self.data[start:start + length]
+    @property
+    def data(self) -> bytes:
+        """everything after the headers"""
+        return self._buffer[self.data_offset:]
 
-    # TODO: memory_page_data(self, index: int) -> bytes:
-    # -- should be inside a virtual_segment, need relative offset
+    def asset_entry(self, filename: str) -> Union[AssetEntryv6, AssetEntryv8]:
+        if self._assets is None:
+            self._assets = dict(zip(self.asset_names(), self.asset_entries))
+        return self._assets[filename]
 
-    def namelist(self) -> List[str]:
+    def asset_names(self) -> List[str]:
+        """names of each asset_entry (in order)"""
         # we cannot reverse name hashes
-        if self.header.compression is not Compression.NONE:
-            raise NotImplementedError("cannot decompress asset_entries")
+        if self.asset_entries is None:  # no decompressor
+            raise NotImplementedError(f"cannot decompress asset_entries ({self.header.compression.name})")
         elif any(vs.flags == 1 and vs.type == 1 for vs in self.virtual_segments):
             # TODO: catch in .from_stream() & convert to Dict[str, AssetEntry]
             names_segment_index = [i for i, vs in enumerate(self.virtual_segments) if vs.flags == 1 and vs.type == 1][0]
@@ -277,13 +304,92 @@ class RPak(base.Archive):
                     self.virtual_segment_data(names_segment_index + 1)[:start]])
                 names = [fn.decode() for fn in raw_names.split(b"\0")[:-1]]
             assert len(names) == len(self.asset_entries)
-            return sorted(names)
+            # NOTE: assuming names are in the same order as asset_entries
+            return names
         else:
-            return sorted(f"{ae.magic.decode()}_{ae.name_hash:016X}" for ae in self.asset_entries)
+            return [f"{ae.magic.decode()}_{ae.name_hash:016X}" for ae in self.asset_entries]
+
+    def extra_patterns(self) -> List[str]:
+        # NOTE: assuming all starpaks are in the same folder
+        # "paks\\Win64\\example.starpak" -> "example.starpak"
+        return [
+            filename.replace("\\", "/").split("/")[-1]
+            for filename in (*self.optimal_starpaks, *self.starpaks)]
 
-    def read(self, filepath: str) -> bytes:
-        assert filepath in self.namelist()
-        raise NotImplementedError("cannot parse StaRPak")
+    def memory_page_data(self, index: int) -> bytes:
+        offset = self.page_offsets[index]
+        if offset is None:
+            raise RuntimeError(f"memory_page {index} is in a StaRPak")
+        return self._buffer[offset:offset + self.memory_pages[index].size]
+
+    def mount_file(self, filename: str, external_file: external.File):
+        super().mount_file(filename, external_file)
+        self._starpaks.pop(filename, None)
+
+    def namelist(self) -> List[str]:
+        return sorted(self.asset_names())
+
+    def read(self, filename: str) -> bytes:
+        """asset header data (subheader_size bytes from the head page)"""
+        asset = self.asset_entry(filename)
+        start = asset.head_offset
+        return self.memory_page_data(asset.head_index)[start:start + asset.subheader_size]
+
+    def read_cpu(self, filename: str) -> bytes:
+        """asset cpu data; from cpu_offset to the end of it's page"""
+        asset = self.asset_entry(filename)
+        if asset.cpu_index == -1 or asset.cpu_index >= len(self.memory_pages):
+            return b""
+        return self.memory_page_data(asset.cpu_index)[asset.cpu_offset:]
+
+    def read_stream(self, filename: str, optimal: bool = False) -> bytes:
+        """asset data streamed from a StaRPak; reads only that entry"""
+        asset = self.asset_entry(filename)
+        offset = asset.optimal_starpak_offset if optimal else asset.starpak_offset
+        if offset in (-1, 2 ** 64 - 1):
+            return b""
+        # NOTE: bottom byte of offset indexes starpak filenames; entries are 4KB aligned
+        starpak = self.starpak((self.optimal_starpaks if optimal else self.starpaks)[offset & 0xFF])
+        return starpak.read(offset & ~0xFF)
+
+    def sizeof(self, filename: str) -> int:
+        return self.asset_entry(filename).subheader_size
+
+    def starpak(self, filename: str) -> StaRPak:
+        """mounted StaRPak; only the entries table is read"""
+        filename = filename.replace("\\", "/").split("/")[-1]
+        if filename not in self._starpaks:
+            if filename not in self.extras:
+                raise FileNotFoundError(f"{filename} is not mounted")
+            self._starpaks[filename] = StaRPak.from_stream(self.extras[filename])
+        return self._starpaks[filename]
+
+    def unmount_file(self, filename: str):
+        super().unmount_file(filename)
+        self._starpaks.pop(filename, None)
+
+    def virtual_segment_data(self, index: int) -> bytes:
+        assert index < len(self.virtual_segments)
+        offset = self.segment_offsets[index]
+        if offset is None:  # flags & 64
+            raise RuntimeError(f"virtual_segment {index} is in a StaRPak")
+        return self._buffer[offset:offset + self.virtual_segments[index].size]
+
+    @staticmethod
+    def decompress(header: Union[RPakHeaderv7, RPakHeaderv8], stream: io.BytesIO) -> mmap.mmap:
+        """decompress into a memory mapped temporary file; stream must be after the header"""
+        decompressor = decompressors.get(header.compression)
+        if decompressor is None:
+            raise NotImplementedError(f"no {header.compression.name} decompressor")
+        header_length = stream.tell()
+        with tempfile.TemporaryFile() as out_file:
+            stream.seek(0)
+            out_file.write(stream.read(header_length))
+            decompressor(stream, out_file, header.decompressed_size - header_length)
+            out_file.flush()
+            assert out_file.tell() == header.decompressed_size, "decompressed size mismatch"
+            return mmap.mmap(out_file.fileno(), 0, access=mmap.ACCESS_READ)
+            # NOTE: the map stays valid after the file is closed
 
     @classmethod
     def from_stream(cls, stream: io.BytesIO) -> RPak:
@@ -295,19 +401,17 @@ class RPak(base.Archive):
         HeaderClass = cls.HeaderClasses[out.version]
         out.header = HeaderClass.from_stream(stream)
         assert out.header.patch_index < 16
+        if out.header.compression is not Compression.NONE:
+            if out.header.compression not in decompressors:
+                return out  # can't read anything else
+            header_length = stream.tell()
+            stream = out.decompress(out.header, stream)
+            stream.seek(header_length)
         if out.header.patch_index > 0:
             out.patch = (
                 PatchHeader.from_stream(stream),
                 [CompressPair.from_stream(stream) for i in range(out.header.patch_index)],
                 [binary.read_struct(stream, "H") for i in range(out.header.patch_index)])  # "IndicesToFile"
-        if out.header.compression is not Compression.NONE:
-            return out
-            # TODO: decompress everything after the main header
-            # uncompressed_rpak = b"".join([
-            #     out.header.as_bytes(),
-            #     decompress(out.header, stream)])
-            # stream = io.BytesIO(uncompressed_rpak)
-            # stream.seek(len(out.header.as_bytes()))
         # StaRPak references
         out.starpaks = [
             fn.decode("utf-8", "strict")
@@ -336,8 +440,26 @@ class RPak(base.Archive):
         # TODO: parse the rest of the file
         # virtual_segment data (unless flags & 0x40) & some other unknown data
         # TODO: around 200 bytes of non-virtual_segment data in some client_temp.rpak
-        out.data = stream.read()
+        out.data_offset = stream.tell()
+        out._buffer = memory_buffer(stream)
         out._file = stream
+        # offset tables
+        # NOTE: virtual_segments are stored back to back; memory_pages are stored inside their virtual_segment
+        out.segment_offsets = list()
+        offset = out.data_offset
+        for segment in out.virtual_segments:
+            if segment.flags & 64:
+                out.segment_offsets.append(None)
+            else:
+                out.segment_offsets.append(offset)
+                offset += segment.size
+        out.page_offsets = list()
+        segment_tails = list(out.segment_offsets)  # end of the last page in each segment
+        for page in out.memory_pages:
+            offset = segment_tails[page.virtual_segment]
+            out.page_offsets.append(offset)
+            if offset is not None:
+                segment_tails[page.virtual_segment] += page.size
         return out
 
 
@@ -353,10 +475,23 @@ class StaRPak:
     # -- RpakLib::MountStarpak
     ext = "*.starpak"  # or "*.opt.starpak"
     entries: List[StreamEntry]
+    sizes: Dict[int, int]
+    # ^ {offset: size}
     _file: io.BytesIO
 
     def __init__(self):
         self.entries = list()
+        self.sizes = dict()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self.entries)} entries @ 0x{id(self):016X}>"
+
+    def read(self, offset: int) -> bytes:
+        """read the entry starting at offset"""
+        if offset not in self.sizes:
+            raise KeyError(f"no entry @ 0x{offset:X}")
+        self._file.seek(offset)
+        return self._file.read(self.sizes[offset])
 
     @classmethod
     def from_bytes(cls, data: bytes) -> StaRPak:
@@ -375,4 +510,6 @@ class StaRPak:
         num_entries = binary.read_struct(stream, "Q")
         stream.seek(-(8 + num_entries * 16), 2)
         out.entries = [StreamEntry.from_stream(stream) for i in range(num_entries)]
+        out.sizes = {entry.offset: entry.size for entry in out.entries}
+        out._file = stream
         return out
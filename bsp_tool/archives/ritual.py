@@ -29,9 +29,19 @@ class Sin(base.Archive):
         self._file.seek(entry.offset)
         return self._file.read(entry.length)
 
+    def read_range(self, filename: str, offset: int, length: int) -> bytes:
+        return self.view(filename).pread(offset, length)
+
     def namelist(self) -> List[str]:
         return sorted(self.entries.keys())
 
+    def sizeof(self, filename: str) -> int:
+        return self.entries[filename].length
+
+    def locate(self, filename: str) -> base.Located:
+        entry = self.entries[filename]
+        return (self._file, entry.offset, entry.length)
+
     @classmethod
     def from_stream(cls, stream: io.BytesIO) -> Sin:
         out = cls()
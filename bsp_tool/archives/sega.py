@@ -4,7 +4,7 @@
 from __future__ import annotations
 import io
 import os
-from typing import List
+from typing import Iterable, List
 
 from .. import external
 from . import alcohol
@@ -131,6 +131,9 @@ class GDRom(base.Archive):
             for attr in ("product_number", "game", "version"))
         return f"<GDRom {descriptor} @ 0x{id(self):016X}>"
 
+    def extract_many(self, filenames: Iterable[str], to_path: str = None, **kwargs) -> base.ExtractionStats:
+        return self.gd_rom.extract_many(filenames, to_path, **kwargs)
+
     def listdir(self, search_folder: str) -> List[str]:
         return self.gd_rom.listdir(search_folder)
 
@@ -7,6 +7,7 @@ from typing import Dict, List, Union
 
 from .. import core
 from .. import external
+from .. import lumps
 from ..utils import binary
 from . import base
 
@@ -107,6 +108,31 @@ class Vpk(base.Archive):
         assert len(data) == entry.file_length, "unexpected EOF"
         return data
 
+    def read_range(self, filename: str, offset: int, length: int) -> bytes:
+        entry = self.entries[filename]
+        if entry.archive_index != 0x7FFF:
+            stream = self.archive_vpk(entry.archive_index)
+        else:
+            stream = self._file
+        length = max(min(length, entry.file_length - offset), 0)
+        return lumps.read_range(stream, entry.archive_offset + offset, length)
+
+    def sizeof(self, filename: str) -> int:
+        return self.entries[filename].file_length
+
+    def crc(self, filename: str) -> Union[int, None]:
+        entry = self.entries[filename]
+        # NOTE: .read() skips preload data, but the crc includes it
+        return entry.crc if entry.preload_length == 0 else None
+
+    def locate(self, filename: str) -> base.Located:
+        entry = self.entries[filename]
+        if entry.archive_index != 0x7FFF:
+            stream = self.archive_vpk(entry.archive_index)
+        else:
+            stream = self._file
+        return (stream, entry.archive_offset, entry.file_length)
+
     def archive_vpk(self, index: int) -> external.File:
         assert self.filename.endswith("_dir.vpk"), "not a _dir.vpk"
         return self.extras[f"{self.base_filename}_{index:03d}.vpk"]
@@ -115,7 +141,7 @@ class Vpk(base.Archive):
     def from_archive(cls, parent_archive: base.Archive, filename: str) -> Vpk:
         """for ArchiveClasses composed of multiple files"""
         folder, short_filename = os.path.split(filename)
-        archive = cls.from_bytes(parent_archive.read(filename), short_filename)
+        archive = cls.from_stream(parent_archive.view(filename), short_filename)
         extras = [
             filename
             for filename in parent_archive.listdir(folder)
@@ -175,17 +175,19 @@ def guess_from_archive_file(filename: str, archive, force_branch: ModuleType = N
     return guess_from_bytes(filename, archive.read(filename), force_branch)
 
 
-def guess_from_filename(filename: str, force_branch: ModuleType = None) -> base.Bsp:
+def guess_from_filename(filename: str, force_branch: ModuleType = None, mmap: bool = False,
+                        lazy: bool = False) -> base.Bsp:
     # verify path
     if not os.path.exists(filename):
         raise FileNotFoundError(f".bsp file '{filename}' does not exist.")
     elif os.path.getsize(filename) == 0:  # HL2/ d2_coast_02.bsp
         raise RuntimeError(f"{filename} is an empty file")
     with open(filename, "rb") as bsp_file:
-        return guess_from_stream(filename, bsp_file, force_branch)
+        return guess_from_stream(filename, bsp_file, force_branch, mmap, lazy)
 
 
-def guess_from_stream(filename: str, bsp_file: io.BytesIO, force_branch: ModuleType = None) -> base.Bsp:
+def guess_from_stream(filename: str, bsp_file: io.BytesIO, force_branch: ModuleType = None,
+                      mmap: bool = False, lazy: bool = False) -> base.Bsp:
     """Calculate and return the correct base.Bsp sub-class for the given .bsp"""
     # parse header
     file_magic = bsp_file.read(4)
@@ -245,7 +247,7 @@ def guess_from_stream(filename: str, bsp_file: io.BytesIO, force_branch: ModuleT
     # -- could try to resolve w/ sprp version
     # TODO: ata4's bspsrc uses unique entity classnames to identify branches
     # -- need this for identifying variants with overlapping identifiers
-    return BspClass.from_file(branch_script, filename)  # might raise errors
+    return BspClass.from_file(branch_script, filename, mmap, lazy)  # might raise errors
 
 
 def guess_from_bytes(filename: str, raw_bsp: bytes, force_branch: ModuleType = None) -> base.Bsp:
@@ -1,12 +1,15 @@
 from __future__ import annotations
 import fnmatch
 import io
+import mmap
 import os
 import struct
+import time
 from types import MethodType, ModuleType
-from typing import Any, Dict, List
+from typing import Any, Dict, Generator, List, Tuple, Union
 
 from . import external
+from . import lumps
 
 
 class Bsp:
@@ -25,6 +28,15 @@ class Bsp:
     # NOTE: header type is self.branch.LumpHeader
     loading_errors: Dict[str, Exception]
     # ^ {"LUMP.name": Error("details")}
+    lazy_headers: Dict[str, Any]
+    # ^ {"LUMP.name": LumpHeader}
+    # NOTE: lazy loaded lumps are mounted on first access
+    mount_times: Dict[str, float]
+    # ^ {"LUMP.name": seconds}
+    _headers_offset: Union[int, None] = None  # set by _header_generator; used by .save()
+    _mounted: Dict[str, Any]
+    # ^ {"LUMP.name": lump}
+    # NOTE: lumps replaced since mounting are always written by .save()
     signature: bytes = b""  # compiler signature; sometimes found between header & data
 
     def __init__(self, branch: ModuleType, filepath: str = "untitled.bsp"):
@@ -34,6 +46,9 @@ class Bsp:
         self.set_branch(branch)
         self.headers = dict()
         self.extras = dict()
+        self.lazy_headers = dict()
+        self.mount_times = dict()
+        self._mounted = dict()
 
     def __enter__(self):
         return self
@@ -41,6 +56,19 @@ class Bsp:
     def __exit__(self, exc_type, exc_value, exc_traceback):
         self.file.close()
 
+    def __getattr__(self, name: str) -> Any:
+        """mount lazy loaded lumps on first access"""
+        # NOTE: only called if regular attribute lookup fails
+        lazy_headers = self.__dict__.get("lazy_headers", dict())
+        if name not in lazy_headers:
+            raise AttributeError(f"{self.__class__.__name__!r} object has no attribute {name!r}")
+        lump_header = lazy_headers.pop(name)
+        start = time.perf_counter()
+        self.mount_lump(name, lump_header, self.file)
+        self.mount_times[name] = time.perf_counter() - start
+        self._mounted[name] = self.__dict__.get(name, None)
+        return object.__getattribute__(self, name)  # AttributeError if the lump is empty
+
     def __repr__(self):
         branch_script = ".".join(self.branch.__name__.split(".")[-2:])
         if isinstance(self.version, tuple):
@@ -69,12 +97,21 @@ class Bsp:
 
     def _header_generator(self, offset: int = 4) -> (str, Any):
         """iterator for reading headers from self.file"""
+        self._headers_offset = offset
         for LUMP in self.branch.LUMP:
             self.file.seek(offset + struct.calcsize(self.branch.LumpHeader._format) * LUMP.value)
             lump_header = self.branch.LumpHeader.from_stream(self.file)
             self.headers[LUMP.name] = lump_header
             yield (LUMP.name, lump_header)
 
+    def _load_lump(self, lump_name: str, lump_header: Any, lazy: bool = False):
+        """mount_lump now, or on first access if lazy"""
+        if lazy:
+            self.lazy_headers[lump_name] = lump_header
+        else:
+            self.mount_lump(lump_name, lump_header, self.file)
+            self._mounted[lump_name] = self.__dict__.get(lump_name, None)
+
     def extra_patterns(self) -> List[str]:
         """filename patterns for files to mount (e.g. 'mp_thaw.*.bsp_lump')"""
         return list()
@@ -91,6 +128,9 @@ class Bsp:
         # RawBspLump -> bytes
         if lump_name not in all_mapped_lumps or lump_name in self.loading_errors:
             return bytes(lump_entries)
+        # BspLump -> bytes (only changed entries are re-encoded)
+        if isinstance(lump_entries, lumps.RawBspLump):
+            return bytes(lump_entries)
         # BasicBspLump -> bytes
         if lump_name in self.branch.BASIC_LUMP_CLASSES:
             BasicLumpClass = self.branch.BASIC_LUMP_CLASSES[lump_name]
@@ -106,6 +146,26 @@ class Bsp:
             raw_lump = lump_entries.as_bytes()
         return raw_lump
 
+    def lump_as_chunks(self, lump_name: str) -> Generator[bytes, None, None]:
+        """like lump_as_bytes, but yields bytes as they are encoded"""
+        # NOTE: unchanged entries are copied straight from the source stream
+        if not hasattr(self, lump_name):
+            return  # lump is empty / deleted
+        lump = getattr(self, lump_name)
+        if isinstance(lump, lumps.RawBspLump):
+            yield from lump.as_chunks()
+        elif hasattr(lump, "as_chunks") and lump_name not in self.loading_errors:  # e.g. PAKFILE
+            yield from lump.as_chunks()
+        else:  # SpecialLumpClass etc.
+            yield self.lump_as_bytes(lump_name)
+
+    def _header_position(self, lump_name: str) -> Union[int, None]:
+        """offset of lump_name's header in self.file; None if unknown"""
+        if self._headers_offset is None or lump_name not in self.branch.LUMP.__members__:
+            return None
+        header_size = struct.calcsize(self.branch.LumpHeader._format)
+        return self._headers_offset + header_size * self.branch.LUMP[lump_name].value
+
     def mount_file(self, filename: str, external_file: external.File):
         self.extras[filename] = external_file
 
@@ -123,11 +183,180 @@ class Bsp:
         # outfile.write(b"0001") # map revision
         # # write contents of lumps
 
+    def patches(self) -> Union[List[Tuple[int, bytes]], None]:
+        """[(offset, new_bytes)] to apply all changes to self.file; None if .save() must use .save_as()"""
+        plan = self._save_plan()
+        return None if plan is None else plan[0]
+
+    def _save_plan(self) -> Union[Tuple[List[Tuple[int, bytes]], Dict[str, Any]], None]:
+        """(patches, {"LUMP.name": new_header}); lumps which changed size are moved to the end of the file"""
+        # NOTE: moved lumps leave their old bytes behind; .save_as() will reclaim that space
+        filename = os.path.join(self.folder, self.filename)
+        try:  # NOTE: compare the open file, not it's name; the file at filename may have been replaced
+            source = os.fstat(self.file.fileno())
+            target = os.stat(filename)
+        except (AttributeError, OSError, ValueError):
+            return None  # self.file isn't a file on disk (e.g. mmap or from_bytes)
+        if (source.st_dev, source.st_ino) != (target.st_dev, target.st_ino):
+            return None  # self.file isn't the .bsp on disk
+        if len(getattr(self, "extras", dict())) > 0:  # lumps may have come from other files
+            return None
+        out = list()
+        new_headers = dict()
+        end = os.path.getsize(filename)
+        for lump_name, header in self.headers.items():
+            if lump_name in self.lazy_headers:
+                continue  # never loaded, so never changed
+            lump = self.__dict__.get(lump_name, None)
+            replaced = lump is not self._mounted.get(lump_name, None)
+            compressed = getattr(header, "fourCC", 0) != 0
+            raw_lump = None  # bytes to write at header.offset, or the end of the file
+            if lump is None:
+                if header.length != 0:  # lump was deleted
+                    new_headers[lump_name] = self._moved_header(header, header.offset, 0)
+                continue
+            elif isinstance(lump, lumps.RawBspLump):
+                if not (replaced or lump.is_dirty()):
+                    continue
+                in_place = all([
+                    not lump._resized,
+                    lump.stream is self.file,  # not decompressed
+                    lump.offset == header.offset,
+                    len(lump) * lump._entry_size == header.length])
+                if in_place:
+                    for start, stop in lump.changed_ranges():
+                        out.append((lump.offset + start * lump._entry_size, lump.read_bytes(start, stop - start)))
+                    continue
+                raw_lump = b"".join(lump.as_chunks())
+            elif hasattr(lump, "is_dirty"):  # e.g. ENTITIES, PAKFILE & GAME_LUMP track their own changes
+                if not (replaced or lump.is_dirty()):
+                    continue
+                if lump_name == "GAME_LUMP":  # child lump offsets are relative to the file
+                    raw_lump = lump.as_bytes(header.offset)
+                else:
+                    raw_lump = self.lump_as_bytes(lump_name)
+            else:  # SpecialLumpClass; compare w/ the original bytes
+                if compressed:
+                    original = None
+                else:
+                    original = lumps.read_range(self.file, header.offset, header.length)
+                try:
+                    raw_lump = self.lump_as_bytes(lump_name)
+                    if original is not None and raw_lump != original and hasattr(lump, "from_bytes"):
+                        original = lump.from_bytes(original).as_bytes()
+                        # NOTE: not every SpecialLumpClass converts back to the exact same bytes
+                        # -- so we compare against a freshly loaded copy
+                except Exception:  # let save_as raise the error
+                    return None
+                if raw_lump == original and not replaced:
+                    continue
+            if len(raw_lump) == header.length and not compressed:
+                out.append((header.offset, raw_lump))
+                continue
+            # move to the end of the file
+            padding = b"\0" * (-end % 4)
+            offset = end + len(padding)
+            if lump_name == "GAME_LUMP" and not isinstance(lump, lumps.RawBspLump):
+                raw_lump = lump.as_bytes(offset)
+            out.append((end, padding + raw_lump))
+            new_headers[lump_name] = self._moved_header(header, offset, len(raw_lump))
+            end = offset + len(raw_lump)
+        for lump_name, new_header in new_headers.items():
+            header_position = self._header_position(lump_name)
+            if header_position is None:
+                return None  # can't back-patch the header
+            out.append((header_position, new_header.as_bytes()))
+        return (out, new_headers)
+
+    def _moved_header(self, header: Any, offset: int, length: int) -> Any:
+        """copy of header w/ a new offset & length; lumps moved by .save() are never compressed"""
+        out = type(header).from_bytes(header.as_bytes())
+        out.offset = offset
+        out.length = length
+        if hasattr(out, "fourCC"):
+            out.fourCC = 0
+        return out
+
     def save(self):
-        # NOTE: save_as must copy all lumps into memory (w/ lump_as_bytes) and close self.file
+        # NOTE: if no lump changed size, only changed entries are written over the original file
+        # -- lumps which changed size are appended to the end of the file & their headers are updated
+        # NOTE: otherwise, save_as must copy all lumps into memory (w/ lump_as_bytes) and close self.file
         # -- otherwise a write conflict will occur
+        # -- ValveBsp & RespawnBsp stream to a temporary file instead (see temp_filename_for)
         # NOTE: you should really be making backups anyway
-        self.save_as(os.path.join(self.folder, self.filename))
+        filename = os.path.join(self.folder, self.filename)
+        plan = self._save_plan()
+        if plan is None:
+            self.save_as(filename)
+            return
+        patches, new_headers = plan
+        with open(filename, "r+b") as outfile:
+            for offset, raw_bytes in patches:
+                outfile.seek(offset)
+                outfile.write(raw_bytes)
+            self.filesize = outfile.seek(0, 2)
+        self.file.seek(0, 2)  # NOTE: seeking relative to the end drops any stale read buffer
+        # point moved lumps at their new bytes
+        for lump_name, header in new_headers.items():
+            self.headers[lump_name] = header
+            lump = self.__dict__.get(lump_name, None)
+            if isinstance(lump, lumps.RawBspLump):
+                lump.stream, lump.offset = self.file, header.offset
+        # self.file now holds every change
+        for lump_name, lump in self.__dict__.items():
+            if lump_name in self.headers:
+                if hasattr(lump, "mark_clean"):
+                    lump.mark_clean()
+                self._mounted[lump_name] = lump
+
+    def temp_filename_for(self, filename: str) -> str:
+        """streaming save_as can't overwrite the file it's reading from"""
+        # NOTE: move the temp file into place w/ os.replace once it is written
+        # -- on Windows, self.file must be closed first
+        if os.path.realpath(filename) == os.path.realpath(os.path.join(self.folder, self.filename)):
+            return f"{filename}.tmp"
+        return filename
+
+    def _replace_file(self, temp_filename: str, filename: str, headers: Dict[str, Any]):
+        """move a finished save_as over self.file & point every lump at the new file"""
+        if temp_filename == filename:
+            return  # saved elsewhere; self.file is untouched
+        old_file = self.file
+        reopen = external.memory_map if isinstance(old_file, mmap.mmap) else lambda f: open(f, "rb")
+        old_file.close()  # NOTE: Windows can't replace an open file
+        try:
+            os.replace(temp_filename, filename)
+        except Exception:  # reopen the original file, so the loaded lumps still work
+            os.remove(temp_filename)
+            self.file = reopen(filename)
+            for lump in list(self.__dict__.values()):
+                for view in self._views(lump):
+                    if view.stream is old_file:
+                        view.stream = self.file
+            raise
+        self.file = reopen(filename)
+        self.headers = headers
+        self.lazy_headers = {name: headers[name] for name in self.lazy_headers}
+        self.filesize = os.path.getsize(filename)
+        # self.file now holds every change
+        for lump_name, lump in list(self.__dict__.items()):
+            if lump_name not in self.headers:
+                continue
+            if isinstance(lump, lumps.RawBspLump):
+                if lump.stream is old_file:
+                    lump.stream, lump.offset = self.file, headers[lump_name].offset
+            elif any(view.stream is old_file for view in self._views(lump)):  # e.g. GAME_LUMP & PAKFILE
+                self.mount_lump(lump_name, headers[lump_name], self.file)
+                lump = self.__dict__[lump_name]
+            if hasattr(lump, "mark_clean"):
+                lump.mark_clean()
+            self._mounted[lump_name] = lump
+
+    def _views(self, lump: Any) -> List[Any]:
+        """objects in lump which read from a .stream (e.g. RawBspLump or external.RangeView)"""
+        source = getattr(getattr(lump, "_buffer", None), "source", None)  # pkware.Zip
+        children = list(getattr(lump, "__dict__", dict()).values())  # GAME_LUMP child lumps
+        return [x for x in (lump, source, *children) if hasattr(x, "stream")]
 
     def set_branch(self, branch: ModuleType):
         """Calling .set_branch(...) on a loaded .bsp will not convert it!"""
@@ -146,8 +375,8 @@ class Bsp:
         self.extras.pop(filename)
 
     @classmethod
-    def from_archive(cls, branch: ModuleType, filepath: str, parent_archive) -> Bsp:
-        bsp = cls.from_bytes(branch, filepath, parent_archive.read(filepath))
+    def from_archive(cls, branch: ModuleType, filepath: str, parent_archive, lazy: bool = False) -> Bsp:
+        bsp = cls.from_stream(branch, filepath, parent_archive.view(filepath), lazy)
         extras = [
             filename
             for filename in parent_archive.listdir(bsp.folder)
@@ -160,12 +389,15 @@ class Bsp:
         return bsp
 
     @classmethod
-    def from_bytes(cls, branch: ModuleType, filepath: str, raw_bsp: bytes) -> Bsp:
-        return cls.from_stream(branch, filepath, io.BytesIO(raw_bsp))
+    def from_bytes(cls, branch: ModuleType, filepath: str, raw_bsp: bytes, lazy: bool = False) -> Bsp:
+        return cls.from_stream(branch, filepath, io.BytesIO(raw_bsp), lazy)
 
     @classmethod
-    def from_file(cls, branch: ModuleType, filepath: str) -> Bsp:
-        bsp = cls.from_stream(branch, filepath, open(filepath, "rb"))
+    def from_file(cls, branch: ModuleType, filepath: str, mmap: bool = False, lazy: bool = False) -> Bsp:
+        """mmap=True shares one read-only memory map instead of a file handle
+        lazy=True defers mounting each lump until it is first accessed"""
+        stream = external.memory_map(filepath) if mmap else open(filepath, "rb")
+        bsp = cls.from_stream(branch, filepath, stream, lazy)
         extras = [
             filename
             for filename in os.listdir(bsp.folder)
@@ -173,10 +405,10 @@ class Bsp:
             if fnmatch.fnmatch(filename.lower(), pattern.lower())]
         for filename in extras:
             full_filename = os.path.join(bsp.folder, filename)
-            external_file = external.File.from_file(full_filename)
+            external_file = external.File.from_file(full_filename, mmap)
             bsp.mount_file(filename, external_file)
         return bsp
 
     @classmethod
-    def from_stream(cls, branch: ModuleType, filepath: str, stream: io.BytesIO) -> Bsp:
+    def from_stream(cls, branch: ModuleType, filepath: str, stream: io.BytesIO, lazy: bool = False) -> Bsp:
         raise NotImplementedError()
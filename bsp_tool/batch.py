@@ -0,0 +1,240 @@
+"""Scan many .bsp files in parallel"""
+# usage: python -m bsp_tool.batch [-j WORKERS] [--checkpoint FILE] [--reducer module:function] PATTERN ...
+from __future__ import annotations
+import argparse
+import collections
+import concurrent.futures
+import fnmatch
+import glob
+import importlib
+import itertools
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Generator, Iterable, List, Union
+
+from . import autodetect
+from . import base
+
+
+DirList = Dict[str, List[str]]
+# ^ {"game_dir": ["maps_dir"]}
+
+Reducer = Callable[[base.Bsp], Any]
+# NOTE: reducers are sent to worker processes, so they must be picklable
+# -- lambdas & nested functions are not; define reducers at module level
+
+
+class Result:
+    filename: str
+    value: Any  # returned by reducer
+    load_time: float  # seconds
+    reduce_time: float  # seconds
+    loading_errors: Dict[str, str]
+    # ^ {"LUMP.name": "repr(Exception)"}
+    error: Union[str, None]  # repr(Exception) if loading or reducing failed
+
+    def __init__(self, filename: str, value: Any = None, load_time: float = 0.0, reduce_time: float = 0.0,
+                 loading_errors: Dict[str, str] = dict(), error: str = None):
+        self.filename = filename
+        self.value = value
+        self.load_time = load_time
+        self.reduce_time = reduce_time
+        self.loading_errors = dict(loading_errors)
+        self.error = error
+
+    def __repr__(self) -> str:
+        status = "OK" if self.error is None else self.error
+        return f"<Result {self.filename!r} {self.load_time + self.reduce_time:.3f}s {status}>"
+
+    def as_json(self) -> Dict[str, Any]:
+        return {
+            "filename": self.filename,
+            "value": self.value,
+            "load_time": self.load_time,
+            "reduce_time": self.reduce_time,
+            "loading_errors": self.loading_errors,
+            "error": self.error}
+
+    @classmethod
+    def from_json(cls, json_dict: Dict[str, Any]) -> Result:
+        return cls(**json_dict)
+
+
+# finding maps
+
+def find_maps(*patterns: str) -> List[str]:
+    """glob patterns ("**" is recursive) -> sorted filenames"""
+    filenames = set()
+    for pattern in patterns:
+        filenames.update(glob.glob(pattern, recursive=True))
+    return sorted(filenames)
+
+
+def maps_in(dirlist: DirList, group_dir: str = ".", pattern: str = "*.bsp") -> List[str]:
+    """tests/maplist.py style DirList -> sorted filenames"""
+    out = list()
+    for game_dir, map_dirs in dirlist.items():
+        for map_dir in map_dirs:
+            full_map_dir = os.path.join(group_dir, game_dir, map_dir)
+            if not os.path.isdir(full_map_dir):
+                continue
+            out.extend([
+                os.path.join(full_map_dir, map_file)
+                for map_file in fnmatch.filter(os.listdir(full_map_dir), pattern)])
+    return sorted(out)
+
+
+# workers
+
+def scan_map(filename: str, reducer: Reducer = None, mmap: bool = False, lazy: bool = False) -> Result:
+    """load & reduce a single .bsp; never raises"""
+    result = Result(filename)
+    start = time.perf_counter()
+    try:
+        bsp = autodetect.guess_from_filename(filename, mmap=mmap, lazy=lazy)
+    except Exception as exc:
+        result.load_time = time.perf_counter() - start
+        result.error = repr(exc)
+        return result
+    result.load_time = time.perf_counter() - start
+    try:
+        if reducer is not None:
+            start = time.perf_counter()
+            result.value = reducer(bsp)
+            result.reduce_time = time.perf_counter() - start
+    except Exception as exc:
+        result.reduce_time = time.perf_counter() - start
+        result.error = repr(exc)
+    finally:
+        result.loading_errors = {
+            lump_name: repr(exc)
+            for lump_name, exc in bsp.loading_errors.items()}
+        bsp.file.close()
+    return result
+
+
+def scan_chunk(filenames: List[str], reducer: Reducer = None, mmap: bool = False, lazy: bool = False) -> List[Result]:
+    return [scan_map(filename, reducer, mmap, lazy) for filename in filenames]
+
+
+# checkpoints
+
+def load_checkpoint(filename: str) -> Dict[str, Result]:
+    """read the results of a previous scan"""
+    out = dict()
+    if not os.path.exists(filename):
+        return out
+    with open(filename) as checkpoint_file:
+        for line in checkpoint_file:
+            try:
+                result = Result.from_json(json.loads(line))
+            except json.JSONDecodeError:  # truncated by a crash
+                continue
+            out[result.filename] = result
+    return out
+
+
+def chunks_of(filenames: Iterable[str], chunksize: int) -> Generator[List[str], None, None]:
+    filenames = iter(filenames)
+    chunk = list(itertools.islice(filenames, chunksize))
+    while len(chunk) > 0:
+        yield chunk
+        chunk = list(itertools.islice(filenames, chunksize))
+
+
+def scan(filenames: Iterable[str], reducer: Reducer = None, max_workers: int = None, chunksize: int = 1,
+         max_in_flight: int = None, checkpoint: str = None, mmap: bool = False,
+         lazy: bool = False) -> Generator[Result, None, None]:
+    """yields a Result for each map, in order of completion
+    max_in_flight limits how many chunks are submitted at once (default: 2 per worker)
+    checkpoint appends each Result as a line of json; scanning again skips completed maps
+    -- checkpointed Results are yielded first; reducers must return json serialisable values"""
+    filenames = list(filenames)
+    done = dict()
+    if checkpoint is not None:
+        done = load_checkpoint(checkpoint)
+        yield from [done[filename] for filename in filenames if filename in done]
+    todo = [filename for filename in filenames if filename not in done]
+    if len(todo) == 0:
+        return
+    checkpoint_file = None
+    if checkpoint is not None:
+        truncated = False
+        if os.path.exists(checkpoint) and os.path.getsize(checkpoint) > 0:
+            with open(checkpoint, "rb") as checkpoint_file:
+                checkpoint_file.seek(-1, 2)
+                truncated = checkpoint_file.read(1) != b"\n"
+        checkpoint_file = open(checkpoint, "a")
+        if truncated:  # by a crash
+            checkpoint_file.write("\n")
+    if max_in_flight is None:
+        max_in_flight = (max_workers or os.cpu_count() or 1) * 2
+    with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+        chunks = chunks_of(todo, chunksize)
+        in_flight = set()
+        try:
+            while True:
+                for chunk in itertools.islice(chunks, max_in_flight - len(in_flight)):
+                    in_flight.add(executor.submit(scan_chunk, chunk, reducer, mmap, lazy))
+                if len(in_flight) == 0:
+                    break
+                finished, in_flight = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    for result in future.result():
+                        if checkpoint_file is not None:
+                            checkpoint_file.write(json.dumps(result.as_json()) + "\n")
+                        yield result
+                    if checkpoint_file is not None:
+                        checkpoint_file.flush()
+        finally:
+            for future in in_flight:
+                future.cancel()
+            if checkpoint_file is not None:
+                checkpoint_file.close()
+
+
+# example reducers
+
+def entity_classnames(bsp: base.Bsp) -> Dict[str, int]:
+    """count entities by classname"""
+    entities = getattr(bsp, "ENTITIES", list())
+    return dict(collections.Counter(str(entity.get("classname", "")) for entity in entities))
+
+
+def reducer_from_str(reducer: str) -> Reducer:
+    """"module:function" -> function"""
+    module_name, function_name = reducer.split(":")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m bsp_tool.batch", description=__doc__)
+    parser.add_argument("patterns", nargs="+", metavar="PATTERN", help="glob pattern; e.g. 'maps/**/*.bsp'")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--chunksize", type=int, default=1, help="maps per task")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="max tasks submitted at once")
+    parser.add_argument("--checkpoint", default=None, help="resume from / append to this file")
+    parser.add_argument("--reducer", default=None, help="'module:function' called on each Bsp")
+    parser.add_argument("--mmap", action="store_true", help="memory map each .bsp")
+    parser.add_argument("--lazy", action="store_true", help="mount lumps on first access")
+    args = parser.parse_args()
+
+    reducer = reducer_from_str(args.reducer) if args.reducer is not None else None
+    filenames = find_maps(*args.patterns)
+    total_time = 0.0
+    failed = 0
+    for i, result in enumerate(scan(
+            filenames, reducer, args.workers, args.chunksize,
+            args.max_in_flight, args.checkpoint, args.mmap, args.lazy)):
+        total_time += result.load_time + result.reduce_time
+        failed += int(result.error is not None)
+        print(f"[{i + 1}/{len(filenames)}] {result.load_time + result.reduce_time:.3f}s {result.filename}")
+        if result.error is not None:
+            print(f"  ! {result.error}")
+        for lump_name, error in result.loading_errors.items():
+            print(f"  ! {lump_name}: {error}")
+        if result.value is not None:
+            print(f"  = {json.dumps(result.value)}")
+    print(f"scanned {len(filenames)} maps ({failed} failed) in {total_time:.3f}s of worker time")
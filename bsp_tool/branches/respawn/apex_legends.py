@@ -767,6 +767,10 @@ def texture_data_surface_name(bsp, texture_data_index: int) -> str:
     return bsp.SURFACE_NAMES.as_bytes()[texture_data.name_index:].lstrip(b"\0").partition(b"\0")[0].decode()
 
 
+def texture_data_name(bsp, texture_data_index: int) -> str:
+    return bsp.texture_data_surface_name(texture_data_index)
+
+
 def unlit_vertex(bsp, vertex: Union[VertexLitBump, VertexLitFlat]) -> geometry.Vertex:
     position = bsp.VERTICES[vertex.position_index]
     normal = bsp.VERTEX_NORMALS[vertex.normal_index]
@@ -793,10 +797,23 @@ def water_body_model(bsp, water_body_index: int) -> geometry.Model:
     return geometry.Model([geometry.Mesh(material, [*map(geometry.Polygon, triangles)])], origin)
 
 
+VERTEX_UVS = {
+    "VERTEX_LIT_FLAT": ("albedo_uv", None),
+    "VERTEX_LIT_BUMP": ("albedo_uv", "lightmap_uv"),
+    "VERTEX_UNLIT": ("albedo_uv",),
+    "VERTEX_UNLIT_TS": ("albedo_uv",)}
+# ^ {"VERTEX_LUMP": ("uv_attr",)}; for vertex_arrays
+
+
+def vertex_arrays(bsp, vertex_lump: str) -> geometry.MeshArrays:
+    return titanfall.vertex_arrays(bsp, vertex_lump, VERTEX_UVS[vertex_lump])
+
+
 # TODO: wave_model(bsp, water_body_index: int) -> geometry.Mesh:  # WaterBodyVertices & WaterBodyCenters
 
 
 methods = [lit_vertex, mesh, titanfall.model, unlit_vertex,  # geo
+           titanfall.all_meshes, titanfall.model_arrays, texture_data_name, vertex_arrays,  # batched geo
            titanfall.search_all_entities, shared.worldspawn_volume,  # entities
            titanfall.occlusion_mesh, shadow_mesh, water_body_model,  # other geo
            texture_data_surface_name]  # materials
@@ -4,7 +4,7 @@ import enum
 import io
 import math
 import struct
-from typing import Dict, List, Tuple, Union
+from typing import Any, Dict, List, Tuple, Union
 
 from ... import archives
 from ... import core
@@ -1167,16 +1167,24 @@ def mesh(bsp, mesh_index: int) -> geometry.Mesh:
         material_sort.vertex_offset + i
         for i in bsp.MESH_INDICES[start:start + length]]
     # vertices
+    # NOTE: each vertex is converted once, even if many triangles share it
     vertex_lump = (mesh.flags & MeshFlags.MASK_VERTEX).name
-    converters = {
-        "VERTEX_LIT_FLAT": bsp.lit_vertex,
-        "VERTEX_LIT_BUMP": bsp.lit_vertex,
-        "VERTEX_UNLIT": bsp.unlit_vertex,
-        "VERTEX_UNLIT_TS": bsp.unlit_vertex}
-    convert = converters[vertex_lump]
+    is_lit = vertex_lump in ("VERTEX_LIT_FLAT", "VERTEX_LIT_BUMP")
     VERTEX_LUMP = getattr(bsp, vertex_lump)
-    vertices = [convert(VERTEX_LUMP[i]) for i in indices]
-    return geometry.Mesh(material, geometry.triangle_soup(vertices))
+    arrays = geometry.MeshArrays(num_uvs=2 if is_lit else 1)
+    local_index = dict()
+    # ^ {vertex_lump_index: arrays_index}
+    for i in indices:
+        if i in local_index:
+            continue
+        vertex = VERTEX_LUMP[i]
+        uvs = (vertex.albedo_uv, vertex.lightmap.uv) if is_lit else (vertex.albedo_uv,)
+        local_index[i] = arrays.add_vertex(
+            bsp.VERTICES[vertex.position_index],
+            bsp.VERTEX_NORMALS[vertex.normal_index],
+            *uvs, colour=vertex.colour.as_floats())
+    arrays.add_triangles([local_index[i] for i in indices])
+    return geometry.Mesh(material, arrays=arrays)
 
 
 def model(bsp, model_index: int) -> geometry.Model:
@@ -1202,6 +1210,95 @@ def model(bsp, model_index: int) -> geometry.Model:
     return out
 
 
+VERTEX_UVS = {
+    "VERTEX_LIT_FLAT": ("albedo_uv", "lightmap"),
+    "VERTEX_LIT_BUMP": ("albedo_uv", "lightmap"),
+    "VERTEX_UNLIT": ("albedo_uv",),
+    "VERTEX_UNLIT_TS": ("albedo_uv",)}
+# ^ {"VERTEX_LUMP": ("uv_attr",)}; for vertex_arrays
+# NOTE: None for a uv channel w/ no attr (always (0, 0))
+
+
+def vertex_arrays(bsp, vertex_lump: str, uv_attrs: Tuple[str] = None) -> geometry.MeshArrays:
+    """every vertex in a VERTEX_* lump, decoded in one pass; has no polygons"""
+    if uv_attrs is None:
+        uv_attrs = VERTEX_UVS[vertex_lump]
+    positions = [*struct.iter_unpack(bsp.VERTICES.LumpClass._format, bytes(bsp.VERTICES))]
+    normals = [*struct.iter_unpack(bsp.VERTEX_NORMALS.LumpClass._format, bytes(bsp.VERTEX_NORMALS))]
+    lump = getattr(bsp, vertex_lump)
+    # NOTE: raw tuples, not Structs; the codec tells us where each attr is in the tuple
+    plan = {attr: index for attr, index, length, convert in lump.LumpClass.codec().plan}
+    position_index, normal_index = plan["position_index"], plan["normal_index"]
+    uv_indices = [plan[attr] if attr is not None else None for attr in uv_attrs]
+    colour_index = plan.get("colour", None)
+    out = geometry.MeshArrays(num_uvs=len(uv_attrs))
+    no_uv = (0.0, 0.0)
+    magenta = (1.0, 0.0, 1.0, 1.0)
+    for vertex in struct.iter_unpack(lump.LumpClass._format, bytes(lump)):
+        out.positions.extend(positions[vertex[position_index]])
+        out.normals.extend(normals[vertex[normal_index]])
+        for uv_channel, uv_index in zip(out.uvs, uv_indices):
+            uv_channel.extend(vertex[uv_index:uv_index + 2] if uv_index is not None else no_uv)
+        if colour_index is not None:
+            out.colours.extend([c / 255 for c in vertex[colour_index:colour_index + 4]])
+        else:
+            out.colours.extend(magenta)
+    return out
+
+
+def texture_data_name(bsp, texture_data_index: int) -> str:
+    texture_data = bsp.TEXTURE_DATA[texture_data_index]
+    return bsp.TEXTURE_DATA_STRING_DATA[texture_data.name_index]
+
+
+def model_arrays(bsp, model_index: int, decoded: Dict[str, Any] = None) -> geometry.Model:
+    """like .model(), but each vertex is decoded once & each material gets a single index buffer"""
+    # NOTE: decoded caches MESH_INDICES & each bsp.vertex_arrays(...) for reuse across models
+    if decoded is None:
+        decoded = dict()
+    # entity
+    entities = [
+        entity
+        for entities in bsp.search_all_entities(model=f"*{model_index}").values()
+        for entity in entities]
+    model_entity = entities[0] if len(entities) != 0 else dict()
+    origin = model_entity.get("origin", "0 0 0")
+    origin = vector.vec3(*origin.split())
+    pitch, yaw, roll = model_entity.get("angles", "0 0 0").split()
+    angles = vector.vec3(roll, pitch, yaw)
+    # gather indices
+    model = bsp.MODELS[model_index]
+    if "MESH_INDICES" not in decoded:
+        format_ = bsp.MESH_INDICES.LumpClass._format
+        decoded["MESH_INDICES"] = [i for i, in struct.iter_unpack(format_, bytes(bsp.MESH_INDICES))]
+    mesh_indices = decoded["MESH_INDICES"]
+    indices = dict()
+    # ^ {(material_sort.texture_data, "VERTEX_LUMP"): [vertex_lump_index]}
+    for mesh in bsp.MESHES[model.first_mesh:model.first_mesh + model.num_meshes]:
+        material_sort = bsp.MATERIAL_SORTS[mesh.material_sort]
+        vertex_lump = (mesh.flags & MeshFlags.MASK_VERTEX).name
+        key = (material_sort.texture_data, vertex_lump)
+        offset = material_sort.vertex_offset
+        start, length = mesh.first_mesh_index, mesh.num_triangles * 3
+        indices.setdefault(key, list()).extend([offset + i for i in mesh_indices[start:start + length]])
+    # geometry
+    meshes = list()
+    for (texture_data, vertex_lump), lump_indices in indices.items():
+        if vertex_lump not in decoded:
+            decoded[vertex_lump] = bsp.vertex_arrays(vertex_lump)
+        material = geometry.Material(bsp.texture_data_name(texture_data))
+        meshes.append(geometry.Mesh(material, arrays=decoded[vertex_lump].gather(lump_indices)))
+    out = geometry.Model(meshes, origin, angles)
+    out.entity = model_entity
+    return out
+
+
+def all_meshes(bsp) -> List[geometry.Model]:
+    """.model_arrays() for every model; each VERTEX_* lump is only decoded once"""
+    decoded = dict()
+    return [bsp.model_arrays(i, decoded) for i in range(len(bsp.MODELS))]
+
+
 def tricoll_model(bsp, tricoll_header_index: int) -> geometry.Model:
     header = bsp.TRICOLL_HEADERS[tricoll_header_index]
     if header.scale != 0.0:
@@ -1376,6 +1473,7 @@ def grid_cell_primitives(bsp, grid_cell_index: int) -> List[Tuple[Primitive, Bou
 
 methods = [shared.worldspawn_volume, search_all_entities,  # entities
            lit_vertex, mesh, model, tricoll_model, unlit_vertex,  # geo
+           all_meshes, model_arrays, texture_data_name, vertex_arrays,  # batched geo
            shadow_mesh, occlusion_mesh,  # other geo
            brush,  # brushes
            geo_set_primitives, grid_cell_bounds, grid_cell_primitives,  # physics
@@ -1,7 +1,7 @@
 from __future__ import annotations
 import math
 import re
-from typing import Dict, List
+from typing import Dict, List, Tuple, Union
 
 
 # Basic Lump Classes
@@ -39,6 +39,9 @@ class UnsignedShorts(int):
 
 # Special Lump Classes
 class Entities(list):
+    _snapshot: Tuple[Tuple[Tuple[str, Union[str, Tuple[str]]]]]
+    # ^ ((("key", "value"),),) as loaded; see .is_dirty()
+
     def __init__(self, iterable: List[Dict[str, str]] = tuple()):
         super().__init__(iterable)
 
@@ -63,6 +66,19 @@ class Entities(list):
                 if any([re.match(p, e.get(k, "")) is not None
                         for k, p in search.items()])]
 
+    def _frozen(self) -> Tuple[Tuple[Tuple[str, Union[str, Tuple[str]]]]]:
+        return tuple(
+            tuple((k, tuple(v) if isinstance(v, list) else v) for k, v in entity.items())
+            for entity in self)
+
+    def is_dirty(self) -> bool:
+        """True if any entity has been edited, added or removed since loading"""
+        # NOTE: compares against a snapshot, so we don't have to re-encode every entity
+        return getattr(self, "_snapshot", None) != self._frozen()
+
+    def mark_clean(self):
+        self._snapshot = self._frozen()
+
     def as_bytes(self) -> bytes:
         entities = list()
         for entity_dict in self:  # Dict[str, Union[str, List[str]]]
@@ -125,7 +141,9 @@ class Entities(list):
                 continue  # TODO: preserve comments
             else:
                 raise RuntimeError(f"Unexpected line in entities: L{line_no + 1}: {line.encode()}")
-        return cls(entities)
+        out = cls(entities)
+        out.mark_clean()
+        return out
 
 
 # methods
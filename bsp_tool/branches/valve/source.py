@@ -5,8 +5,9 @@
 from __future__ import annotations
 import enum
 import io
+import itertools
 import struct
-from typing import List, Tuple
+from typing import Any, Dict, List, Tuple
 
 from ... import archives
 from ... import core
@@ -821,9 +822,30 @@ class GameLump_SPRPv4:  # sprp GameLump (LUMP 35)
         self.leaves = list()
         self.props = list()
 
+    def _frozen(self) -> Dict[str, Any]:
+        # NOTE: BspLumps (e.g. props) track their own changes
+        return {
+            attr: tuple(value) if isinstance(value, list) else value
+            for attr, value in vars(self).items()
+            if attr != "_snapshot" and not isinstance(value, lumps.RawBspLump)}
+
+    def is_dirty(self) -> bool:
+        """True if .as_bytes() may differ from the bytes this lump was loaded from"""
+        if getattr(self, "_snapshot", None) != self._frozen():
+            return True
+        return any(
+            value.is_dirty()
+            for value in vars(self).values()
+            if isinstance(value, lumps.RawBspLump))
+
+    def mark_clean(self):
+        self._snapshot = self._frozen()
+
     @classmethod
     def from_bytes(cls, raw_lump: bytes) -> GameLump_SPRPv4:
-        return cls.from_stream(io.BytesIO(raw_lump))
+        out = cls.from_stream(io.BytesIO(raw_lump))
+        out.mark_clean()
+        return out
 
     @classmethod
     def from_stream(cls, stream: io.BytesIO) -> GameLump_SPRPv4:
@@ -1065,7 +1087,10 @@ def face_mesh(bsp, face_index: int) -> List[geometry.Mesh]:
     lightmap_vector = texture.TextureVector(
         texture.ProjectionAxis(*texture_info.lightmap.s),
         texture.ProjectionAxis(*texture_info.lightmap.t))
-    vertices = list()
+    arrays = geometry.MeshArrays(num_uvs=2)
+    lightmap_mins = face.lightmap.mins
+    lightmap_width = face.lightmap.size.x + 1
+    lightmap_height = face.lightmap.size.y + 1
     first_edge = face.first_edge
     for surfedge in bsp.SURFEDGES[first_edge:(first_edge + face.num_edges)]:
         if surfedge >= 0:  # +ve index
@@ -1076,33 +1101,22 @@ def face_mesh(bsp, face_index: int) -> List[geometry.Mesh]:
         # NOTE: not checking if face.lightmap.size is 0x0
         lightmap_uv = lightmap_vector.uv_at(position)
         # TODO: somehow move this mess into .uv_at(position)
-        lightmap_uv -= face.lightmap.mins
-        lightmap_uv += vector.vec2(0.5, 0.5)
-        lightmap_uv = vector.vec2(
-            lightmap_uv.x / (face.lightmap.size.x + 1),
-            lightmap_uv.y / (face.lightmap.size.y + 1))
-        lightmap_uv = vector.vec2(
-            max(0, min(lightmap_uv.x, 1)),
-            max(0, min(lightmap_uv.y, 1)))
-        vertices.append(
-            geometry.Vertex(position, normal, texture_uv, lightmap_uv, colour=colour))
+        lightmap_uv = (
+            max(0, min((lightmap_uv.x - lightmap_mins.x + 0.5) / lightmap_width, 1)),
+            max(0, min((lightmap_uv.y - lightmap_mins.y + 0.5) / lightmap_height, 1)))
+        arrays.add_vertex(position, normal, texture_uv, lightmap_uv, colour=colour)
     if face.primitives.count == 0:
-        polygons = [geometry.Polygon(vertices)]
+        arrays.add_polygon(range(len(arrays)))
     else:  # T-junction
-        polygons = list()
         offset, length = face.first_primitive, face.primitives.count
         for primitive in bsp.PRIMITIVES[offset:offset+length]:
             offset, length = primitive.first_index, primitive.num_indices
-            indices = bsp.PRIMITIVE_INDICES[offset:offset+length]
             if primitive.type == PrimitiveType.TRIANGLE_LIST:
-                assert len(indices) % 3 == 0
-                for i in range(0, len(indices), 3):
-                    polygons.append(geometry.Polygon([
-                        vertices[indices[i + j]] for j in range(3)]))
+                arrays.add_triangles(bsp.PRIMITIVE_INDICES[offset:offset+length])
             else:  # TRIANGLE_STRIP
                 raise NotImplementedError("TRIANGLE_STRIP Primitive")
     texture_name = bsp.TEXTURE_DATA_STRING_DATA[texture_data.name_index]
-    return geometry.Mesh(geometry.Material(texture_name), polygons)
+    return geometry.Mesh(geometry.Material(texture_name), arrays=arrays)
 
 
 def displacement_indices(power: int) -> List[List[int]]:  # for displacement_mesh
@@ -1135,10 +1149,11 @@ def displacement_mesh(bsp, face_index: int) -> geometry.Mesh:
     assert face.displacement_info != -1, "not a displacement"
     disp_info = bsp.DISPLACEMENT_INFO[face.displacement_info]
     base_mesh = bsp.face_mesh(face_index)
-    assert len(base_mesh.polygons) == 1
-    assert len(base_mesh.polygons[0].vertices) == 4
+    base = base_mesh.arrays
+    assert base.num_polygons == 1
+    assert len(base) == 4
     # rotate quad indices; point closest to start should be index 0
-    base_quad = {v.position: v for v in base_mesh.polygons[0].vertices}
+    base_quad = {vector.vec3(*base.positions[i * 3:i * 3 + 3]): i for i in base.indices}
     quad = list(base_quad.keys())
     if disp_info.start_position in base_quad:
         A = disp_info.start_position
@@ -1147,23 +1162,29 @@ def displacement_mesh(bsp, face_index: int) -> geometry.Mesh:
     A_index = quad.index(A)
     quad = [*quad[A_index:], *quad[:A_index]]
     A, B, C, D = [base_quad[P] for P in quad]
+    # corners as flat floats: x, y, z, u0, v0, u1, v1
+    A, B, C, D = [
+        (*base.positions[i * 3:i * 3 + 3], *base.uvs[0][i * 2:i * 2 + 2], *base.uvs[1][i * 2:i * 2 + 2])
+        for i in (A, B, C, D)]
+    normal = vector.vec3(*base.normals[0:3])
+    colour = base.colours[0:3]
     # displacement vertices
     offset, length = disp_info.first_displacement_vertex, disp_info.num_displacement_vertices
     disp_verts = bsp.DISPLACEMENT_VERTICES[offset:offset+length]
     power2 = 1 << disp_info.power
-    vertices = list()
+    arrays = geometry.MeshArrays(num_uvs=2)
     for i, disp_vertex in enumerate(disp_verts):
         t1 = i % (power2 + 1) / power2  # y position
         t2 = i // (power2 + 1) / power2  # x position
-        bary = A.lerp(D, t1).lerp(B.lerp(C, t1), t2)
-        position = bary.position + (disp_vertex.normal * disp_vertex.distance)
-        normal = disp_vertex.normal if vector.dot(disp_vertex.normal, A.normal) < 0 else -disp_vertex.normal
-        texture_uv = bary.uv0
-        lightmap_uv = bary.uv1
-        colour = (*A.colour[:3], disp_vertex.alpha)
-        vertices.append(geometry.Vertex(position, normal, texture_uv, lightmap_uv, colour=colour))
-    polygons = [geometry.Polygon([vertices[i] for i in tri]) for tri in displacement_indices(disp_info.power)]
-    return geometry.Mesh(base_mesh.material, polygons)
+        # bilinear interpolation; A.lerp(D, t1).lerp(B.lerp(C, t1), t2)
+        AD = [a + (d - a) * t1 for a, d in zip(A, D)]
+        BC = [b + (c - b) * t1 for b, c in zip(B, C)]
+        bary = [ad + (bc - ad) * t2 for ad, bc in zip(AD, BC)]
+        position = [p + n * disp_vertex.distance for p, n in zip(bary[0:3], disp_vertex.normal)]
+        disp_normal = disp_vertex.normal if vector.dot(disp_vertex.normal, normal) < 0 else -disp_vertex.normal
+        arrays.add_vertex(position, disp_normal, bary[3:5], bary[5:7], colour=(*colour, disp_vertex.alpha))
+    arrays.add_triangles(itertools.chain(*displacement_indices(disp_info.power)))
+    return geometry.Mesh(base_mesh.material, arrays=arrays)
 
 
 def model(bsp, model_index: int) -> geometry.Model:
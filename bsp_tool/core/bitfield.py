@@ -5,7 +5,7 @@ import enum
 import itertools
 import io
 import struct
-from typing import Dict, Iterable
+from typing import Callable, Dict, Iterable
 
 from . import common
 
@@ -104,6 +104,41 @@ class BitField:
             out_args.append((value & mask) >> offset)
         return cls(*out_args, _format=out_format, _fields=out_fields, _classes=out_classes)
 
+    @classmethod
+    def unpacker(cls, _fields=None, _format=None, _classes=None) -> Callable[[int], BitField]:
+        """precompute masks for repeated .from_int() calls w/ the same spec"""
+        out_fields = cls._fields if _fields is None else _fields
+        out_format = cls._format if _format is None else _format
+        out_classes = cls._classes if _classes is None else _classes
+        if cls.__init__ is not BitField.__init__ or cls.__setattr__ is not BitField.__setattr__:
+            return lambda value: cls.from_int(value, out_fields, out_format, out_classes)
+        # same checks as __init__, but only once
+        if not (out_format in [*"BHIQ"] and len(out_format) == 1):
+            raise NotImplementedError("Only unsigned single integer BitFields are supported")
+        if sum(out_fields.values()) != struct.calcsize(out_format) * 8:
+            raise RuntimeError("fields do not fill format! add an 'unused' field!")
+        layout = list()
+        # ^ [("attr", offset, mask, ChildClass)]
+        offset = struct.calcsize(out_format) * 8
+        for attr, size in out_fields.items():
+            offset -= size
+            child_class = out_classes.get(attr, None)
+            layout.append((attr, offset, 2 ** size - 1, child_class))
+
+        def from_int(value: int) -> BitField:
+            out = cls.__new__(cls)
+            object.__setattr__(out, "_format", out_format)
+            object.__setattr__(out, "_fields", collections.OrderedDict(out_fields))
+            object.__setattr__(out, "_classes", out_classes)
+            for attr, offset, mask, child_class in layout:
+                child = (value >> offset) & mask
+                if child_class is not None and not isinstance(child, child_class):
+                    child = child_class(child)
+                object.__setattr__(out, attr, child)
+            return out
+
+        return from_int
+
     @classmethod
     def from_stream(cls, stream: io.BytesIO) -> BitField:
         # TODO: _fields, _format & _classes
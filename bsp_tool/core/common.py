@@ -1,5 +1,6 @@
+import functools
 import re
-from typing import Any, Dict, Iterable, Tuple
+from typing import Any, Callable, Dict, Iterable, Tuple
 
 
 ClassesDict = Dict[str, Any]
@@ -34,7 +35,21 @@ def school(parent: Any, child_name: str, child_value: Any) -> Any:
     return child_value  # has no class / no conversion required
 
 
+# ChildClass -> (child -> ChildClass(child))
+def schooler(child_class: Any) -> Callable[[Any], Any]:
+    """school() for a single known class, skipping the _classes lookup"""
+    def convert(child_value: Any) -> Any:
+        if not isinstance(child_value, child_class):
+            if isinstance(child_value, Iterable):
+                return child_class(*child_value)
+            else:
+                return child_class(child_value)
+        return child_value
+    return convert
+
+
 # "hI3f16s" -> ("h", "I", "f", "f", "f", "16s")
+@functools.lru_cache(maxsize=None)
 def split_format(_format: str) -> Tuple[str]:
     """split a struct format string to zip with tuple"""
     # NOTE: strings returned as f"{count}s" (untouched)
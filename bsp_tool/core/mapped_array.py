@@ -1,8 +1,9 @@
 """Base classes for defining .bsp lump structs"""
 from __future__ import annotations
 import enum
+import functools
 import struct
-from typing import Any, Dict, Iterable, List, Union
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Union
 
 from . import bitfield
 from . import common
@@ -39,6 +40,44 @@ def mapping_length(mapping: AttrMap) -> int:  # MappedArray._mapping focused
     return length
 
 
+mapped_array_builders: Dict[MappedArray, Callable[[Sequence], MappedArray]] = dict()
+# ^ {LumpClass: LumpClass.builder()}
+
+
+def is_plain(cls: type) -> bool:
+    """cls can safely skip __init__ & __setattr__"""
+    return cls.__init__ is MappedArray.__init__ and cls.__setattr__ is MappedArray.__setattr__
+
+
+def is_valid(mapping: AttrMap, _format: str) -> bool:
+    """mapping fits _format exactly"""
+    if not isinstance(mapping, (list, dict)):
+        return False
+    return mapping_length({None: mapping}) == len(common.split_format(_format))
+
+
+def converter(child_class: Any) -> Callable[[Any], Any]:
+    """common.schooler, w/ a shortcut for plain MappedArray subclasses"""
+    school = common.schooler(child_class)
+    if not (isinstance(child_class, type) and issubclass(child_class, MappedArray)):
+        return school
+    if not (isinstance(child_class._mapping, list) and is_plain(child_class)):
+        return school
+    if not is_valid(child_class._mapping, child_class._format):  # e.g. colour.RGBExponent
+        return school
+    build = child_class.builder()
+    length = len(child_class._mapping)
+
+    def convert(child_value: Any) -> Any:
+        if isinstance(child_value, child_class):
+            return child_value
+        elif isinstance(child_value, Sequence) and len(child_value) == length:
+            return build(child_value)  # ChildClass(*child_value)
+        return school(child_value)
+
+    return convert
+
+
 class MappedArray:
     """Maps a given iterable to a series of names, can even be a nested mapping"""
     _mapping: AttrMap = list()
@@ -157,6 +196,76 @@ class MappedArray:
             _mapping=_mapping, _format=_format)
         return dict(zip(list(_mapping), defaults))
 
+    @classmethod
+    def builder(cls, _mapping=None, _format=None, _bitfields=None, _classes=None) -> Callable[[Sequence], MappedArray]:
+        """precompute .from_tuple() for repeated calls w/ the same spec"""
+        _format = cls._format if _format is None else _format
+        _mapping = cls._mapping if _mapping is None else _mapping
+        _classes = cls._classes if _classes is None else _classes
+        _bitfields = cls._bitfields if _bitfields is None else _bitfields
+        kwargs = dict(_mapping=_mapping, _format=_format, _bitfields=_bitfields, _classes=_classes)
+        if not is_valid(_mapping, _format) or not is_plain(cls):
+            return functools.partial(cls.from_tuple, **kwargs)  # no shortcuts
+        types = common.split_format(_format)
+        length = mapping_length({None: _mapping})
+        if isinstance(_mapping, list):
+            mapping = {attr: None for attr in _mapping}
+        else:
+            mapping = _mapping
+        attr_formats = dict()
+        plan = list()
+        # ^ [("attr", index, length, build_child, child_spec, convert)]
+        # NOTE: mirrors from_tuple, __init__ & __setattr__
+        index = 0
+        for attr, child_mapping in mapping.items():
+            child_length = mapping_length({None: child_mapping})
+            attr_formats[attr] = "".join(types[index:index + child_length])
+            build_child, child_spec, convert = None, None, None
+            if attr in _classes:
+                convert = converter(_classes[attr])
+            elif attr in _bitfields:
+                convert = bitfield.BitField.unpacker(
+                    _fields=_bitfields[attr],
+                    _format=attr_formats[attr],
+                    _classes=common.subgroup(_classes, attr))
+            if child_mapping is None:
+                child_length = None  # single value, not a slice
+            elif isinstance(child_mapping, dict) or (isinstance(child_mapping, list) and convert is None):
+                # NOTE: children are generated without _classes or _bitfields
+                # -- from_tuple assigns them afterwards, without applying them
+                build_child = MappedArray.builder(_mapping=child_mapping, _format=attr_formats[attr])
+                child_spec = (common.subgroup(_classes, attr), common.subgroup(_bitfields, attr))
+            elif isinstance(child_mapping, int) and convert is None:
+                build_child = list
+            # NOTE: otherwise convert unpacks the raw slice directly
+            plan.append((attr, index, child_length, build_child, child_spec, convert))
+            index += 1 if child_length is None else child_length
+
+        def from_tuple(array: Sequence) -> MappedArray:
+            assert len(array) == length, f"{cls.__name__}({array}, _mapping={_mapping})"
+            out = cls.__new__(cls)
+            object.__setattr__(out, "_mapping", _mapping)
+            object.__setattr__(out, "_format", _format)
+            object.__setattr__(out, "_bitfields", _bitfields)
+            object.__setattr__(out, "_classes", _classes)
+            object.__setattr__(out, "_attr_formats", dict(attr_formats))
+            for attr, index, length_, build_child, child_spec, convert in plan:
+                if length_ is None:
+                    value = array[index]
+                else:
+                    value = array[index:index + length_]
+                    if build_child is not None:
+                        value = build_child(value)
+                    if child_spec is not None:
+                        object.__setattr__(value, "_classes", child_spec[0])
+                        object.__setattr__(value, "_bitfields", child_spec[1])
+                if convert is not None:
+                    value = convert(value)
+                object.__setattr__(out, attr, value)
+            return out
+
+        return from_tuple
+
     # convertors
     @classmethod
     def from_bytes(cls, _bytes: bytes, _mapping=None, _format=None,
@@ -177,6 +286,11 @@ class MappedArray:
 
     @classmethod
     def from_tuple(cls, array, _mapping=None, _format=None, _bitfields=None, _classes=None) -> MappedArray:
+        if all(x is None for x in (_mapping, _format, _bitfields, _classes)) and is_plain(cls) \
+                and isinstance(cls._mapping, (list, dict)):  # LumpClass w/ fixed spec
+            if cls not in mapped_array_builders:
+                mapped_array_builders[cls] = cls.builder()
+            return mapped_array_builders[cls](array)
         _format = cls._format if _format is None else _format
         _mapping = cls._mapping if _mapping is None else _mapping
         _classes = cls._classes if _classes is None else _classes
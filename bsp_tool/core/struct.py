@@ -3,7 +3,7 @@ from __future__ import annotations
 import enum
 import io
 import struct
-from typing import Any, Dict, Iterable, List, Union
+from typing import Any, Callable, Dict, Iterable, List, Tuple, Union
 
 from . import bitfield
 from . import common
@@ -20,6 +20,9 @@ ArraysDict = Dict[str, Union[int, List[str], Dict[str, Any]]]  # recursive
 struct_attr_formats: Dict[Struct, Dict[str, str]] = dict()
 # ^ {LumpClass: {"attr": "sub_format"}}
 
+struct_codecs: Dict[Struct, StructCodec] = dict()
+# ^ {LumpClass: StructCodec}
+
 
 def mapping_length(mapping: mapped_array.AttrMap) -> int:
     """counts length of tuple required for mapping"""
@@ -44,6 +47,75 @@ def mapping_length(mapping: mapped_array.AttrMap) -> int:
     return length
 
 
+class StructCodec:
+    """precomputed tuple -> Struct conversion for a LumpClass"""
+    # NOTE: generated once per LumpClass by Struct.codec()
+    attr_formats: Dict[str, str]
+    # ^ {"attr": "sub_format"}
+    compiled: struct.Struct  # cached struct module format
+    fast: bool  # False if LumpClass overrides __init__ or __setattr__
+    plan: List[Tuple[str, int, Union[int, None], Union[Callable, None]]]
+    # ^ [("attr", tuple_index, length, convert)]
+    # NOTE: length is None for single values (no slice)
+    tuple_length: int  # expected len(struct.unpack(_format, ...))
+
+    def __init__(self, LumpClass: Struct):
+        self.compiled = struct.Struct(LumpClass._format)
+        self.fast = all([
+            LumpClass.__init__ is Struct.__init__,
+            LumpClass.__setattr__ is Struct.__setattr__])
+        self.attr_formats = dict()
+        self.plan = list()
+        types = common.split_format(LumpClass._format)
+        index = 0
+        for attr in LumpClass.__slots__:
+            convert = None
+            if attr not in LumpClass._arrays:  # Union[int, float, str]
+                self.attr_formats[attr] = types[index]
+                length = None
+                if attr in LumpClass._classes:
+                    convert = mapped_array.converter(LumpClass._classes[attr])
+                elif attr in LumpClass._bitfields:
+                    convert = bitfield.BitField.unpacker(
+                        _fields=LumpClass._bitfields[attr],
+                        _format=types[index],
+                        _classes=common.subgroup(LumpClass._classes, attr))
+                self.plan.append((attr, index, length, convert))
+                index += 1
+                continue
+            child_mapping = LumpClass._arrays[attr]
+            sub_classes = common.subgroup(LumpClass._classes, attr)
+            sub_bitfields = common.subgroup(LumpClass._bitfields, attr)
+            if isinstance(child_mapping, (list, dict)):
+                length = mapping_length({None: child_mapping})
+                # NOTE: a List[str] mapping w/o children to convert is just the raw slice
+                if isinstance(child_mapping, dict) or len(sub_classes) + len(sub_bitfields) > 0 \
+                        or attr not in LumpClass._classes:
+                    convert = mapped_array.MappedArray.builder(
+                        _mapping=child_mapping,
+                        _format="".join(types[index:index + length]),
+                        _classes=sub_classes,
+                        _bitfields=sub_bitfields)
+            elif isinstance(child_mapping, int):
+                length = child_mapping
+            else:
+                raise RuntimeError(f"Invalid type: {type(child_mapping)} in {LumpClass.__name__}._arrays")
+            if attr in LumpClass._classes:  # convert the whole array
+                school = mapped_array.converter(LumpClass._classes[attr])
+                convert = school if convert is None else self._chain(convert, school)
+            self.attr_formats[attr] = "".join(types[index:index + length])
+            self.plan.append((attr, index, length, convert))
+            index += length
+        self.tuple_length = index
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {self.compiled.format!r} ({len(self.plan)} attrs)>"
+
+    @staticmethod
+    def _chain(first: Callable, second: Callable) -> Callable:
+        return lambda value: second(first(value))
+
+
 class Struct:
     """base class for tuple <-> class conversion
     bytes <-> tuple conversion is handled by the struct module"""
@@ -157,22 +229,42 @@ class Struct:
             for t in types])
         return dict(zip(cls.__slots__, defaults))
 
+    @classmethod
+    def codec(cls) -> StructCodec:
+        """compile (once) & return the StructCodec for this LumpClass"""
+        global struct_codecs  # noqa: F824
+        if cls not in struct_codecs:
+            codec = StructCodec(cls)
+            struct_codecs[cls] = codec
+            struct_attr_formats[cls] = codec.attr_formats
+        return struct_codecs[cls]
+
     @classmethod
     def from_bytes(cls, _bytes: bytes) -> Struct:
-        expected_length = struct.calcsize(cls._format)
+        codec = cls.codec()
+        expected_length = codec.compiled.size
         assert len(_bytes) == expected_length, f"Not enough bytes! Expected {expected_length} got {len(_bytes)}"
-        _tuple = struct.unpack(cls._format, _bytes)
+        _tuple = codec.compiled.unpack(_bytes)
         expected_length = len(cls.__slots__) + mapping_length(cls._arrays) - len(cls._arrays)
         assert len(_tuple) == expected_length, f"{cls.__name__} mappings do not match _format"
         return cls.from_tuple(_tuple)
 
     @classmethod
     def from_stream(cls, stream: io.BytesIO) -> Struct:
-        return cls.from_bytes(stream.read(struct.calcsize(cls._format)))
+        return cls.from_bytes(stream.read(cls.codec().compiled.size))
 
     @classmethod
     def from_tuple(cls, _tuple: Iterable) -> Struct:
         """_tuple comes from: struct.unpack(self._format, bytes)"""
+        codec = cls.codec()
+        if codec.fast:  # skip __init__ & __setattr__
+            out = cls.__new__(cls)
+            for attr, index, length, convert in codec.plan:
+                value = _tuple[index] if length is None else _tuple[index:index + length]
+                if convert is not None:
+                    value = convert(value)
+                object.__setattr__(out, attr, value)
+            return out
         # NOTE: _classes & _bitfields are handled by cls.__init__
         out_args = list()
         types = common.split_format(cls._format)
@@ -1,22 +1,237 @@
 from __future__ import annotations
+import collections
 import io
+import mmap
 import os
+import threading
 from types import ModuleType
-from typing import Dict
+from typing import Dict, Set, Union
 
 from . import base
+from . import lumps
+
+
+def memory_map(filename: str) -> Union[mmap.mmap, io.BytesIO]:
+    """read-only memory map of a file on disk"""
+    with open(filename, "rb") as file:
+        if os.path.getsize(filename) == 0:  # can't map an empty file
+            return io.BytesIO(b"")
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        # NOTE: the map stays valid after the file is closed
+
+
+class HandlePool:
+    """process-wide, least recently used pool of read-only file descriptors"""
+    max_handles: int  # handles in use are never closed, so this can be exceeded briefly
+    _handles: collections.OrderedDict
+    # ^ {"/abs/path/filename": (file_descriptor, (st_dev, st_ino, st_mtime_ns))}; least recently used first
+    _users: Dict[int, int]
+    # ^ {file_descriptor: reads_in_progress}
+    _stale: Set[int]  # descriptors of replaced files; closed once no longer in use
+    _lock: threading.Lock
+    _seek_lock: threading.Lock  # only used where os.pread is unavailable (Windows)
+
+    def __init__(self, max_handles: int = 64):
+        self.max_handles = max_handles
+        self._handles = collections.OrderedDict()
+        self._users = dict()
+        self._stale = set()
+        self._lock = threading.Lock()
+        self._seek_lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self)}/{self.max_handles} handles @ 0x{id(self):016X}>"
+
+    def __contains__(self, filename: str) -> bool:
+        return os.path.abspath(filename) in self._handles
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def acquire(self, filename: str) -> int:
+        """file descriptor, opened if needed; pair w/ .release(file_descriptor)"""
+        filename = os.path.abspath(filename)
+        stat = os.stat(filename)
+        signature = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            if filename in self._handles and self._handles[filename][1] != signature:
+                # NOTE: replaced (e.g. os.replace by .save()) or modified since it was opened
+                self._retire(self._handles.pop(filename)[0])
+            if filename in self._handles:
+                self._handles.move_to_end(filename)
+            else:
+                file_descriptor = os.open(filename, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+                stat = os.fstat(file_descriptor)  # the file we actually opened
+                self._handles[filename] = (file_descriptor, (stat.st_dev, stat.st_ino, stat.st_mtime_ns))
+            file_descriptor = self._handles[filename][0]
+            self._users[file_descriptor] = self._users.get(file_descriptor, 0) + 1
+            self._evict()
+            return file_descriptor
+
+    def clear(self):
+        """close all handles not in use"""
+        with self._lock:
+            for filename in list(self._handles):
+                self._retire(self._handles.pop(filename)[0])
+
+    def pread(self, filename: str, offset: int, length: int) -> bytes:
+        """read w/o a shared cursor; safe to call from multiple threads"""
+        file_descriptor = self.acquire(filename)
+        try:
+            chunks = list()
+            if hasattr(os, "pread"):
+                while length > 0:
+                    chunk = os.pread(file_descriptor, length, offset)
+                    if len(chunk) == 0:  # EOF
+                        break
+                    chunks.append(chunk)
+                    offset += len(chunk)
+                    length -= len(chunk)
+            else:
+                with self._seek_lock:
+                    os.lseek(file_descriptor, offset, os.SEEK_SET)
+                    while length > 0:
+                        chunk = os.read(file_descriptor, length)
+                        if len(chunk) == 0:  # EOF
+                            break
+                        chunks.append(chunk)
+                        length -= len(chunk)
+            return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+        finally:
+            self.release(file_descriptor)
+
+    def release(self, file_descriptor: int):
+        with self._lock:
+            self._users[file_descriptor] -= 1
+            if self._users[file_descriptor] == 0:
+                self._users.pop(file_descriptor)
+                if file_descriptor in self._stale:
+                    self._stale.remove(file_descriptor)
+                    os.close(file_descriptor)
+            self._evict()
+
+    def _evict(self):
+        """close least recently used handles not in use; expects self._lock"""
+        excess = len(self._handles) - self.max_handles
+        if excess > 0:
+            unused = [fn for fn, (fd, signature) in self._handles.items() if fd not in self._users][:excess]
+            for filename in unused:
+                os.close(self._handles.pop(filename)[0])
+
+    def _retire(self, file_descriptor: int):
+        """close now, or once the last read using it is done; expects self._lock"""
+        if file_descriptor in self._users:
+            self._stale.add(file_descriptor)
+        else:
+            os.close(file_descriptor)
+
+
+handles = HandlePool()
+# NOTE: shared by every File on disk that isn't memory mapped
+
+
+class RangeView:
+    """read-only window into part of another stream; nested archives are read through these, not copied"""
+    stream: io.BytesIO  # parent: file handle / memory map / File / RangeView
+    offset: int  # start of the window in stream
+    size: int  # length of the window in bytes
+    position: int  # cursor; relative to offset
+    closed: bool  # closing a view leaves stream open
+
+    def __init__(self, stream: io.BytesIO, offset: int, size: int):
+        if isinstance(stream, RangeView):  # flatten views of views
+            offset += stream.offset
+            stream = stream.stream
+        self.stream = stream
+        self.offset = offset
+        self.size = size
+        self.position = 0
+        self.closed = False
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} 0x{self.offset:X}..0x{self.offset + self.size:X} of {self.stream!r}>"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def __iter__(self):
+        line = self.readline()
+        while line != b"":
+            yield line
+            line = self.readline()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def close(self):
+        self.closed = True
+
+    def pread(self, offset: int, length: int) -> bytes:
+        """read w/o moving the cursor"""
+        length = max(min(length, self.size - offset), 0)
+        if length == 0:
+            return b""
+        return lumps.read_range(self.stream, self.offset + offset, length)
+
+    # file-like methods
+    def read(self, length: int = -1) -> bytes:
+        if length < 0:
+            length = self.size - self.position
+        data = self.pread(self.position, length)
+        self.position += len(data)
+        return data
+
+    def readable(self) -> bool:
+        return True
+
+    def readline(self, length: int = -1) -> bytes:
+        end = self.size if length == -1 else min(self.position + length, self.size)
+        chunks = list()
+        while self.position < end:
+            chunk = self.pread(self.position, min(4096, end - self.position))
+            newline = chunk.find(b"\n")
+            if newline != -1:
+                chunk = chunk[:newline + 1]
+            chunks.append(chunk)
+            self.position += len(chunk)
+            if newline != -1 or len(chunk) == 0:
+                break
+        return b"".join(chunks)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        assert whence in (0, 1, 2)
+        if whence == 1:
+            offset += self.position
+        elif whence == 2:
+            offset += self.size
+        self.position = offset
+        return self.position
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
 
 
 class File:
     """read-only streamed binary file wrapper"""
     filename: str
     archive: object  # ArchiveClass
+    mmap: bool  # memory map the file instead of opening a handle
+    ranged: bool = True  # archive-backed; read w/ archive.read_range, until it raises NotImplementedError
     size: int  # filesize in bytes
-    _stream: io.BytesIO  # cached file handle
+    position: int  # cursor; unless reading from ._stream
+    _stream: io.BytesIO  # file handle / memory map / whole archived file
 
     def __init__(self, filename: str, archive=None):
         self.archive = archive
         self.filename = filename
+        self.mmap = False
+        self.position = 0
         self._stream = None
 
     def __repr__(self) -> str:
@@ -26,28 +241,87 @@ class File:
             descriptor = f"'{self.filename}'"
         return f"<{self.__class__.__name__} {descriptor} @ 0x{id(self):016X}>"
 
+    @property
+    def streamed(self) -> bool:
+        """reads go through .stream, instead of the handle pool / archive.read_range"""
+        return self._stream is not None or self.mmap or (self.archive is not None and not self.ranged)
+
     @property
     def stream(self) -> io.BytesIO:
         """deferring opening the file until it's touched"""
         if self._stream is None:
             if self.archive is None:
-                self._stream = open(self.filename, "rb")
+                if self.mmap:
+                    self._stream = memory_map(self.filename)
+                else:  # a handle of it's own, outside the pool
+                    self._stream = open(self.filename, "rb")
             else:
                 self._stream = io.BytesIO(self.archive.read(self.filename))
+            self._stream.seek(self.position)
         return self._stream
 
-    # exposed self.stream methods
+    def pread(self, offset: int, length: int) -> bytes:
+        """read w/o moving the cursor"""
+        if not self.streamed:
+            if self.archive is None:
+                return handles.pread(self.filename, offset, length)
+            try:
+                return self.archive.read_range(self.filename, offset, length)
+            except NotImplementedError:
+                self.ranged = False  # read the whole file into .stream instead
+        if isinstance(self.stream, mmap.mmap):
+            return self.stream[offset:offset + length]
+        position = self.stream.tell()
+        self.stream.seek(offset)
+        data = self.stream.read(length)
+        self.stream.seek(position)
+        return data
+
+    # file-like methods
     def read(self, length: int = -1) -> bytes:
-        return self.stream.read(length)
+        if self.streamed:
+            return self.stream.read(length)
+        if length < 0 or self.position + length > self.size:
+            length = max(self.size - self.position, 0)
+        data = self.pread(self.position, length)
+        if self.streamed:  # archive.read_range raised NotImplementedError
+            self.stream.seek(self.position + len(data))
+        self.position += len(data)
+        return data
 
     def readline(self, length: int = -1) -> bytes:
-        return self.stream.readline(length)
+        if self.streamed:
+            if length == -1:  # mmap.readline() takes no arguments
+                return self.stream.readline()
+            return self.stream.readline(length)
+        end = self.size if length == -1 else min(self.position + length, self.size)
+        chunks = list()
+        while self.position < end:
+            chunk = self.pread(self.position, min(4096, end - self.position))
+            newline = chunk.find(b"\n")
+            if newline != -1:
+                chunk = chunk[:newline + 1]
+            chunks.append(chunk)
+            self.position += len(chunk)
+            if newline != -1 or len(chunk) == 0:
+                break
+        return b"".join(chunks)
 
     def seek(self, offset: int, whence: int = 0) -> int:
-        return self.stream.seek(offset, whence)
+        if self.streamed:
+            return self.stream.seek(offset, whence)
+        assert whence in (0, 1, 2)
+        if whence == 1:
+            offset += self.position
+        elif whence == 2:
+            offset += self.size
+        self.position = offset
+        return self.position
 
     def tell(self) -> int:
-        return self.stream.tell()
+        if self.streamed:
+            return self.stream.tell()
+        return self.position
 
     @classmethod
     def from_archive(cls, filename: str, archive) -> File:
@@ -62,8 +336,9 @@ class File:
         return out
 
     @classmethod
-    def from_file(cls, filename: str) -> File:
+    def from_file(cls, filename: str, mmap: bool = False) -> File:
         out = cls(filename)
+        out.mmap = mmap
         out.size = os.path.getsize(filename)
         return out
 
@@ -49,7 +49,7 @@ class QuakeBsp(base.Bsp):
         setattr(self, lump_name, BspLump)
 
     @classmethod
-    def from_stream(cls, branch: ModuleType, filename: str, stream: io.BytesIO) -> QuakeBsp:
+    def from_stream(cls, branch: ModuleType, filename: str, stream: io.BytesIO, lazy: bool = False) -> QuakeBsp:
         bsp = cls(branch, filename)
         bsp.file = stream
         # collect metadata
@@ -60,7 +60,7 @@ class QuakeBsp(base.Bsp):
         bsp.headers: Dict[str, object] = dict()
         bsp.loading_errors: Dict[str, Exception] = dict()
         for lump_name, lump_header in bsp._header_generator(offset=4):
-            bsp.mount_lump(lump_name, lump_header, bsp.file)
+            bsp._load_lump(lump_name, lump_header, lazy)
         # TODO: detect additional BSPX data appended to end of file
         # -- if b"BSPX" in self._tail(): ...
         return bsp
@@ -80,7 +80,7 @@ class ReMakeQuakeBsp(QuakeBsp):
         return f"<{self.__class__.__name__} '{self.filename}' {branch_script}>"
 
     @classmethod
-    def from_stream(cls, branch: ModuleType, filepath: str, stream: io.BytesIO) -> ReMakeQuakeBsp:
+    def from_stream(cls, branch: ModuleType, filepath: str, stream: io.BytesIO, lazy: bool = False) -> ReMakeQuakeBsp:
         bsp = cls(branch, filepath)
         bsp.file = stream
         # collect metadata
@@ -94,7 +94,7 @@ class ReMakeQuakeBsp(QuakeBsp):
         bsp.headers = dict()
         bsp.loading_errors: Dict[str, Exception] = dict()
         for lump_name, lump_header in bsp._header_generator(offset=4):
-            bsp.mount_lump(lump_name, lump_header, bsp.file)
+            bsp._load_lump(lump_name, lump_header, lazy)
         bsp._get_signature(4 + (8 * len(bsp.branch.LUMP)))
         return bsp
 
@@ -116,7 +116,7 @@ class IdTechBsp(base.Bsp):
     mount_lump = QuakeBsp.mount_lump
 
     @classmethod
-    def from_stream(cls, branch: ModuleType, filepath: str, stream: io.BytesIO) -> IdTechBsp:
+    def from_stream(cls, branch: ModuleType, filepath: str, stream: io.BytesIO, lazy: bool = False) -> IdTechBsp:
         bsp = cls(branch, filepath)
         bsp.file = stream
         # collect metadata
@@ -130,7 +130,7 @@ class IdTechBsp(base.Bsp):
         bsp.headers = dict()
         bsp.loading_errors: Dict[str, Exception] = dict()
         for lump_name, lump_header in bsp._header_generator(offset=8):
-            bsp.mount_lump(lump_name, lump_header, bsp.file)
+            bsp._load_lump(lump_name, lump_header, lazy)
         bsp._get_signature(8 + (8 * len(bsp.branch.LUMP)))
         return bsp
 
@@ -0,0 +1,169 @@
+"""Persistent cache of autodetect results & lump headers"""
+from __future__ import annotations
+import importlib
+import json
+import os
+import sqlite3
+from types import ModuleType
+from typing import Any, Dict, Iterable, List, Union
+
+from . import autodetect
+from . import base
+from . import batch
+
+
+schema = """
+CREATE TABLE IF NOT EXISTS bsp (
+    path           TEXT PRIMARY KEY,
+    size           INTEGER,
+    mtime          INTEGER,
+    bsp_class      TEXT,
+    branch         TEXT,
+    version        TEXT,
+    loading_errors TEXT);
+CREATE TABLE IF NOT EXISTS lump (
+    path    TEXT,
+    name    TEXT,
+    offset  INTEGER,
+    length  INTEGER,
+    version INTEGER,
+    header  TEXT,
+    PRIMARY KEY (path, name));
+CREATE INDEX IF NOT EXISTS lump_by_name ON lump (name, length);
+"""
+
+
+def key_of(filename: str) -> (str, int, int):
+    """(path, size, mtime); cached entries are stale if the size or mtime change"""
+    stat = os.stat(filename)
+    return (os.path.realpath(filename), stat.st_size, stat.st_mtime_ns)
+
+
+def qualified_name(obj: Union[type, ModuleType]) -> str:
+    if isinstance(obj, ModuleType):
+        return obj.__name__
+    return f"{obj.__module__}:{obj.__qualname__}"
+
+
+def from_qualified_name(name: str) -> Union[type, ModuleType]:
+    module_name, _, attr = name.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attr) if attr != "" else module
+
+
+def record_of(bsp: base.Bsp) -> Dict[str, Any]:
+    """all the details of a loaded .bsp the index needs, as json"""
+    # NOTE: a batch.Reducer; record_of is picklable & returns json serialisable values
+    path, size, mtime = key_of(os.path.join(bsp.folder, bsp.filename))
+    return {
+        "path": path, "size": size, "mtime": mtime,
+        "bsp_class": qualified_name(bsp.__class__),
+        "branch": qualified_name(bsp.branch),
+        "version": getattr(bsp, "version", None),
+        "loading_errors": {
+            lump_name: repr(exc)
+            for lump_name, exc in bsp.loading_errors.items()},
+        "headers": {
+            lump_name: [
+                getattr(header, "offset", None),
+                getattr(header, "length", None),
+                getattr(header, "version", None),
+                header.as_tuple()]
+            for lump_name, header in bsp.headers.items()}}
+
+
+class Index:
+    """sqlite cache; skips autodetect for unchanged files"""
+    filename: str
+    connection: sqlite3.Connection
+
+    def __init__(self, filename: str = ":memory:"):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.executescript(schema)
+
+    def __repr__(self) -> str:
+        count = self.connection.execute("SELECT COUNT(*) FROM bsp").fetchone()[0]
+        return f"<{self.__class__.__name__} {self.filename!r} {count} maps @ 0x{id(self):016X}>"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def add(self, record: Dict[str, Any]):
+        """store a record_of(bsp); replaces any previous entry for the same path"""
+        path = record["path"]
+        with self.connection:  # transaction
+            self.connection.execute("DELETE FROM lump WHERE path = ?", (path,))
+            self.connection.execute(
+                "INSERT OR REPLACE INTO bsp VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, record["size"], record["mtime"], record["bsp_class"], record["branch"],
+                 json.dumps(record["version"]), json.dumps(record["loading_errors"])))
+            self.connection.executemany(
+                "INSERT INTO lump VALUES (?, ?, ?, ?, ?, ?)",
+                [(path, lump_name, offset, length, version, json.dumps(header))
+                 for lump_name, (offset, length, version, header) in record["headers"].items()])
+
+    def update(self, filenames: Iterable[str], max_workers: int = None) -> Dict[str, str]:
+        """index all stale or missing files in parallel; returns {"filename": "error"} for failures"""
+        stale = [filename for filename in filenames if self.lookup(filename) is None]
+        errors = dict()
+        for result in batch.scan(stale, record_of, max_workers):
+            if result.error is None:
+                self.add(result.value)
+            else:
+                errors[result.filename] = result.error
+        return errors
+
+    def lookup(self, filename: str) -> Union[Dict[str, Any], None]:
+        """cached details for filename, None if missing or stale"""
+        path, size, mtime = key_of(filename)
+        row = self.connection.execute(
+            "SELECT bsp_class, branch, version, loading_errors FROM bsp WHERE path = ? AND size = ? AND mtime = ?",
+            (path, size, mtime)).fetchone()
+        if row is None:
+            return None
+        bsp_class, branch, version, loading_errors = row
+        headers = {
+            lump_name: (offset, length, lump_version)
+            for lump_name, offset, length, lump_version in self.connection.execute(
+                "SELECT name, offset, length, version FROM lump WHERE path = ?", (path,))}
+        version = json.loads(version)
+        if isinstance(version, list):  # major, minor
+            version = tuple(version)
+        return {
+            "bsp_class": bsp_class, "branch": branch,
+            "version": version,
+            "loading_errors": json.loads(loading_errors),
+            "headers": headers}
+
+    def load_bsp(self, filename: str, force_branch: ModuleType = None, mmap: bool = False,
+                 lazy: bool = False) -> base.Bsp:
+        """like bsp_tool.load_bsp, but skips autodetect if filename is already indexed"""
+        cached = self.lookup(filename) if force_branch is None else None
+        if cached is not None:
+            BspClass = from_qualified_name(cached["bsp_class"])
+            branch = from_qualified_name(cached["branch"])
+            return BspClass.from_file(branch, filename, mmap, lazy)
+        bsp = autodetect.guess_from_filename(filename, force_branch, mmap, lazy)
+        if not lazy and force_branch is None:  # lazy loading_errors are incomplete
+            self.add(record_of(bsp))
+        return bsp
+
+    def maps_with_lump(self, lump_name: str, min_length: int = 1) -> List[str]:
+        """paths of all indexed maps where lump_name is at least min_length bytes"""
+        return [path for path, in self.connection.execute(
+            "SELECT path FROM lump WHERE name = ? AND length >= ? ORDER BY path",
+            (lump_name, min_length))]
+
+    def maps_with_errors(self) -> Dict[str, Dict[str, str]]:
+        """{"path": {"LUMP.name": "error"}} for all indexed maps w/ loading_errors"""
+        return {
+            path: json.loads(loading_errors)
+            for path, loading_errors in self.connection.execute(
+                "SELECT path, loading_errors FROM bsp WHERE loading_errors != '{}' ORDER BY path")}
@@ -25,6 +25,9 @@ class InfinityWardBsp(id_software.IdTechBsp):
         self.folder, self.filename = os.path.split(filepath)
         self.set_branch(branch)
         self.headers = dict()
+        self.lazy_headers = dict()
+        self.mount_times = dict()
+        self._mounted = dict()
 
 
 class D3DBsp(InfinityWardBsp):
@@ -38,7 +41,7 @@ class D3DBsp(InfinityWardBsp):
     # -- lumps are possibly divided into multiple files throughout the fastfile (*.ff)
 
     @classmethod
-    def from_stream(cls, branch: ModuleType, filepath: str, stream: io.BytesIO) -> D3DBsp:
+    def from_stream(cls, branch: ModuleType, filepath: str, stream: io.BytesIO, lazy: bool = False) -> D3DBsp:
         bsp = cls(branch, filepath)
         bsp.file = stream
         # collect metadata
@@ -61,9 +64,7 @@ class D3DBsp(InfinityWardBsp):
             cursor += lump_header.length
             lump_header.name = bsp.branch.LUMP(lump_header.id).name
             bsp.headers[lump_header.name] = lump_header
-            BspLump = bsp.mount_lump(lump_header.name, lump_header, bsp.file)
-            if BspLump is not None:
-                setattr(bsp, lump_header.name, BspLump)
+            bsp._load_lump(lump_header.name, lump_header, lazy)
         return bsp
 
     def print_headers(self):
@@ -13,6 +13,16 @@ LightmapID = Union[str, Tuple[str, int]]
 # use LightmapCollection.subset("SKY.A.*") to filter
 
 
+# NOTE: numpy is an optional dependency, only imported to decode HDR texels
+def decode_rgb_exponent(texels: bytes, width: int, height: int) -> Any:
+    """ColorRGBExp32 texels -> linear float32 numpy.ndarray w/ shape (height, width, 3); requires numpy"""
+    # NOTE: rgb * 2 ** exponent / 255, exponent is signed
+    import numpy
+    raw = numpy.frombuffer(texels, dtype=numpy.uint8, count=width * height * 4).reshape(height, width, 4)
+    scale = numpy.ldexp(numpy.float32(1 / 255), raw[..., 3].astype(numpy.int8).astype(numpy.int32))
+    return raw[..., :3] * scale[..., numpy.newaxis].astype(numpy.float32)
+
+
 class LightmapCollection:
     """for organising named lightmaps (e.g. titanfall SKY & RTL)"""
     name: str
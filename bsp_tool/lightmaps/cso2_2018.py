@@ -18,10 +18,10 @@ def face_lightmaps(bsp) -> base.LightmapCollection:
         start, length = face.light_offset, width * height * 4
         for sub in "ABCD":
             if has_ldr:
-                texels = bytes(bsp.LIGHTING[start:start + length])
+                texels = bsp.LIGHTING.read_bytes(start, length)
                 lightmaps[("LDR", sub, i)] = Image.frombytes("RGBA", (width, height), texels, "raw")
             if has_hdr:
-                texels = bytes(bsp.LIGHTING_HDR[start:start + length])
+                texels = bsp.LIGHTING_HDR.read_bytes(start, length)
                 lightmaps[("HDR", sub, i)] = Image.frombytes("RGBA", (width, height), texels, "raw")
             start += length
     return lightmaps
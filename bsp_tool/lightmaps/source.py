@@ -1,17 +1,12 @@
+from typing import Any, Dict, Generator, Tuple
+
 from . import base
 
 from PIL import Image
 
 
-# TODO: use FACES_HDR for HDR (face_lightmaps_hdr?)
-# TODO: do ORIGINAL_FACES have different lightmaps?
-def face_lightmaps(bsp) -> base.LightmapCollection:
-    # NOTE: each face has a single texel (4 bytes) before light_offset; we ignore it
-    lightmaps = base.LightmapCollection(bsp.filename)
-    has_ldr = bool(bsp.headers["LIGHTING"].length > 0)
-    has_hdr = bool(bsp.headers["LIGHTING_HDR"].length > 0)
-    if not has_ldr and not has_hdr:
-        raise RuntimeError(f"{bsp.filename} has no lighting data")
+def lightmapped_faces(bsp) -> Generator[Tuple[int, int, int, int], None, None]:
+    """(face_index, light_offset, width, height) for each lightmapped face"""
     for i, face in enumerate(bsp.FACES):
         if face.light_offset == -1 or face.styles == -1:
             continue  # face is not lightmapped
@@ -21,11 +16,36 @@ def face_lightmaps(bsp) -> base.LightmapCollection:
             # 2x2 grid of samples, sliced at different heights?
             # NOTE: determined from gaps between light_offset values
             width, height = width * 2, height * 2
-        start, length = face.light_offset, width * height * 4
+        yield i, face.light_offset, width, height
+
+
+# TODO: use FACES_HDR for HDR (face_lightmaps_hdr?)
+# TODO: do ORIGINAL_FACES have different lightmaps?
+def face_lightmaps(bsp) -> base.LightmapCollection:
+    # NOTE: each face has a single texel (4 bytes) before light_offset; we ignore it
+    lightmaps = base.LightmapCollection(bsp.filename)
+    has_ldr = bool(bsp.headers["LIGHTING"].length > 0)
+    has_hdr = bool(bsp.headers["LIGHTING_HDR"].length > 0)
+    if not has_ldr and not has_hdr:
+        raise RuntimeError(f"{bsp.filename} has no lighting data")
+    for i, start, width, height in lightmapped_faces(bsp):
+        length = width * height * 4
         if has_ldr:
-            texels = bytes(bsp.LIGHTING[start:start + length])
+            texels = bsp.LIGHTING.read_bytes(start, length)
             lightmaps[("LDR", i)] = Image.frombytes("RGBA", (width, height), texels, "raw")
         if has_hdr:
-            texels = bytes(bsp.LIGHTING_HDR[start:start + length])
+            texels = bsp.LIGHTING_HDR.read_bytes(start, length)
             lightmaps[("HDR", i)] = Image.frombytes("RGBA", (width, height), texels, "raw")
     return lightmaps
+
+
+def face_lightmaps_float(bsp, lump_name: str = "LIGHTING_HDR") -> Dict[int, Any]:
+    """{face_index: linear float32 numpy.ndarray w/ shape (height, width, 3)}; requires numpy"""
+    # NOTE: the whole lump is decoded at once; each face gets a view
+    if bsp.headers[lump_name].length == 0:
+        raise RuntimeError(f"{bsp.filename} has no {lump_name} data")
+    lump = getattr(bsp, lump_name)
+    texels = base.decode_rgb_exponent(lump.read_bytes(), len(lump) // 4, 1)[0]
+    return {
+        i: texels[start // 4:start // 4 + width * height].reshape(height, width, 3)
+        for i, start, width, height in lightmapped_faces(bsp)}
@@ -13,20 +13,20 @@ def extract(bsp) -> base.LightmapCollection:
         for j in range(2):
             # SKY A & B
             sky_end = sky_start + (header.width * header.height * 4)
-            sky_bytes = bytes(bsp.LIGHTMAP_DATA_SKY[sky_start:sky_end])
+            sky_bytes = bsp.LIGHTMAP_DATA_SKY.read_bytes(sky_start, sky_end - sky_start)
             sky_lightmap = Image.frombytes("RGBA", (header.width, header.height), sky_bytes, "raw")
             lightmaps[("SKY", "AB"[j], i)] = sky_lightmap
             sky_start = sky_end
             # RTL A & B
             rtl_end = rtl_start + (header.width * header.height * 4)
-            rtl_bytes = bytes(bsp.LIGHTMAP_DATA_REAL_TIME_LIGHTS[rtl_start:rtl_end])
+            rtl_bytes = bsp.LIGHTMAP_DATA_REAL_TIME_LIGHTS.read_bytes(rtl_start, rtl_end - rtl_start)
             rtl_lightmap = Image.frombytes("RGBA", (header.width, header.height), rtl_bytes, "raw")
             lightmaps[("RTL", "AB"[j], i)] = rtl_lightmap
             rtl_start = rtl_end
         if not hasattr(bsp.headers["LIGHTMAP_DATA_REAL_TIME_LIGHTS"], "filename"):  # internal only (not .bsp_lump)
             # RTL C
             rtl_end = rtl_start + (header.width * header.height)
-            rtl_bytes = bytes(bsp.LIGHTMAP_DATA_REAL_TIME_LIGHTS[rtl_start:rtl_end])
+            rtl_bytes = bsp.LIGHTMAP_DATA_REAL_TIME_LIGHTS.read_bytes(rtl_start, rtl_end - rtl_start)
             rtl_lightmap = Image.frombytes("RGBA", (header.width // 2, header.height // 2), rtl_bytes, "raw")
             lightmaps[("RTL", "C", i)] = rtl_lightmap
             rtl_start = rtl_end
@@ -2,14 +2,37 @@
 from __future__ import annotations
 
 import io
+import mmap
+import os
 import struct
-from typing import Any, Dict, Union
+from typing import Any, Dict, Generator, List, Tuple, Union
+
+from . import core
+from .core import common
 
 
 LumpHeader = Any
 # all: offset & length
 # ValveBsp / RespawnBsp: fourCC & version
-Stream = Union[io.BufferedReader, io.BytesIO]
+Stream = Union[io.BufferedReader, io.BytesIO, mmap.mmap]
+
+immutable_types = (int, float, bytes, str, tuple)
+# NOTE: entries of these types can't be edited in place, so reads don't need to be kept
+
+
+# NOTE: numpy is an optional dependency, only imported by .as_array()
+numpy_types = {
+    "c": "S1", "?": "?",
+    "b": "i1", "B": "u1",
+    "h": "i2", "H": "u2",
+    "i": "i4", "I": "u4",
+    "l": "i4", "L": "u4",
+    "q": "i8", "Q": "u8",
+    "e": "f2", "f": "f4", "d": "f8"}
+# NOTE: strings ("16s" etc.) become "S16"
+
+numpy_dtypes: Dict[object, Any] = dict()
+# ^ {LumpClass: numpy.dtype}
 
 
 def _remap_index(index: int, length: int) -> int:
@@ -30,21 +53,148 @@ def _remap_slice_to_range(_slice: slice, length: int) -> slice:
     return range(start, stop, step)
 
 
+def read_range(stream: Stream, offset: int, length: int) -> bytes:
+    """read bytes from stream without moving a shared cursor, where possible"""
+    if isinstance(stream, mmap.mmap):
+        return stream[offset:offset + length]
+    elif hasattr(stream, "pread"):  # external.File / external.RangeView / pkware.AppendBuffer
+        return stream.pread(offset, length)
+    elif isinstance(stream, io.BytesIO):
+        with stream.getbuffer() as buffer:
+            return bytes(buffer[offset:offset + length] if length >= 0 else buffer[offset:])
+    elif hasattr(os, "pread") and isinstance(stream, (io.BufferedReader, io.FileIO)):  # open(filename, "rb")
+        if length < 0:
+            length = os.fstat(stream.fileno()).st_size - offset
+        chunks = list()
+        while length > 0:
+            chunk = os.pread(stream.fileno(), length, offset)
+            if len(chunk) == 0:  # EOF
+                break
+            chunks.append(chunk)
+            offset += len(chunk)
+            length -= len(chunk)
+        return b"".join(chunks)
+    # NOTE: not thread-safe
+    stream.seek(offset)
+    return stream.read(length)
+
+
+def size_of(stream: Stream) -> int:
+    """total length of stream in bytes"""
+    if isinstance(stream, mmap.mmap):
+        return len(stream)
+    elif hasattr(stream, "size"):  # external.File
+        return stream.size
+    else:
+        return stream.seek(0, 2)
+
+
+def _numpy_fields(_format: str) -> List[Tuple[str, int]]:
+    """[(numpy_type, offset)] for each value in _format"""
+    prefix = _format[0] if _format[:1] in [*"@=<>!"] else ""
+    byte_order = ">" if prefix in (">", "!") else "<" if prefix == "<" else "="
+    types = [t for t in common.split_format(_format) if t != "x"]
+    out = list()
+    for i, type_ in enumerate(types):
+        # NOTE: calcsize accounts for native alignment padding
+        end = struct.calcsize(prefix + "".join(types[:i + 1]))
+        offset = end - struct.calcsize(prefix + type_)
+        if type_.endswith("s"):
+            out.append((f"S{type_[:-1] or 1}", offset))
+        else:
+            out.append((byte_order + numpy_types[type_], offset))
+    return out
+
+
+def _numpy_mapping(mapping: Any, fields: List[Tuple[str, int]]) -> Any:
+    """mapping -> numpy.dtype, offsets relative to the first field"""
+    import numpy
+    base = fields[0][1]
+    if isinstance(mapping, list):
+        mapping = {attr: None for attr in mapping}
+    names, formats, offsets = list(), list(), list()
+    index = 0
+    for attr, child_mapping in mapping.items():
+        length = core.mapped_array.mapping_length({None: child_mapping})
+        child_fields = fields[index:index + length]
+        if child_mapping is None:
+            format_ = child_fields[0][0]
+        elif isinstance(child_mapping, int):
+            assert len({t for t, o in child_fields}) == 1, f"{attr} is not a homogeneous array"
+            format_ = (child_fields[0][0], (child_mapping,))
+        else:
+            format_ = _numpy_mapping(child_mapping, child_fields)
+        names.append(attr)
+        formats.append(format_)
+        offsets.append(child_fields[0][1] - base)
+        index += length
+    last_type, last_offset = fields[-1]
+    itemsize = last_offset + numpy.dtype(last_type).itemsize - base
+    return numpy.dtype(dict(names=names, formats=formats, offsets=offsets, itemsize=itemsize))
+
+
+def numpy_dtype(LumpClass: object) -> Any:
+    """generate (& cache) a numpy.dtype matching LumpClass._format"""
+    # NOTE: BitFields & _classes are left as raw integers
+    if LumpClass in numpy_dtypes:
+        return numpy_dtypes[LumpClass]
+    import numpy
+    fields = _numpy_fields(LumpClass._format)
+    if issubclass(LumpClass, core.Struct):
+        mapping = {attr: LumpClass._arrays.get(attr, None) for attr in LumpClass.__slots__}
+    elif issubclass(LumpClass, core.MappedArray):
+        mapping = LumpClass._mapping
+    else:  # BasicLumpClass or list subclass (e.g. quake.Edge)
+        mapping = None
+    if mapping is None:
+        types = {t for t, o in fields}
+        assert len(types) == 1, f"{LumpClass.__name__} is not a homogeneous array"
+        if len(fields) == 1:
+            dtype = numpy.dtype(fields[0][0])
+        else:
+            dtype = numpy.dtype((fields[0][0], (len(fields),)))
+    else:
+        dtype = _numpy_mapping(mapping, fields)
+        itemsize = struct.calcsize(LumpClass._format)
+        if dtype.itemsize != itemsize:  # trailing padding
+            dtype = numpy.dtype(dict(
+                names=dtype.names,
+                formats=[dtype.fields[n][0] for n in dtype.names],
+                offsets=[dtype.fields[n][1] for n in dtype.names],
+                itemsize=itemsize))
+    numpy_dtypes[LumpClass] = dtype
+    return dtype
+
+
 class RawBspLump:
     """Maps an open binary stream to a bytearry-like object"""
     # TODO: be more bytearray-like
     stream: Stream
     offset: int  # position in stream where lump begins
+    _cache: Dict[int, object]
+    # ^ {index: mutable_entry}
+    # NOTE: entries returned by .get() are kept so edits like lump[0].x += 1 aren't lost
+    # -- cached entries only count as changes if their bytes differ from their snapshot
+    _snapshots: Dict[int, bytes]
+    # ^ {index: entry_bytes}
+    # NOTE: bytes of each cached entry when it was read (or last saved)
     _changes: Dict[int, bytes]
     # ^ {index: new_byte}
+    _entry_size: int = 1  # bytes per entry
     _length: int  # number of indexable entries
+    _resized: bool = False  # if True, _length no longer matches the stream
 
     def __init__(self):
+        self._cache = dict()
+        self._snapshots = dict()
         self._changes = dict()
         self._length = 0
         self.offset = 0
         self.stream = io.BytesIO(b"")
 
+    def __bytes__(self) -> bytes:
+        return b"".join(self.as_chunks())
+
     def __delitem__(self, index: Union[int, slice]):
         if isinstance(index, int):
             index = _remap_index(index, self._length)
@@ -65,6 +215,9 @@ class RawBspLump:
             return self.get(_remap_index(index, self._length))
         elif isinstance(index, slice):
             # TODO: BspLump[::] returns a copy (doesn't update _changes)
+            start, stop, step = index.indices(self._length)
+            if step == 1:  # contiguous; read in one go
+                return bytearray(self.read_bytes(start, max(stop - start, 0)))
             return bytearray([self[i] for i in _remap_slice_to_range(index, self._length)])
         else:
             raise TypeError(f"list indices must be integers or slices, not {type(index)}")
@@ -80,27 +233,88 @@ class RawBspLump:
         if isinstance(index, int):
             index = _remap_index(index, self._length)
             self._changes[index] = value
+            self._cache.pop(index, None)
+            self._snapshots.pop(index, None)
         elif isinstance(index, slice):
             slice_indices = list(_remap_slice_to_range(index, self._length))
             length_change = len(list(value)) - len(slice_indices)
             slice_changes = dict(zip(slice_indices, value))
             if length_change == 0:  # replace a slice with an equal length slice
                 self._changes.update(slice_changes)
+                for i in slice_indices:
+                    self._cache.pop(i, None)
+                    self._snapshots.pop(i, None)
             else:  # update a slice in the place of another slice (delete / insert)
                 self._length += length_change
+                self._resized = True
                 head, tail = min(slice_indices), max(slice_indices)
                 # NOTE: slice may have negative step
                 # TODO: TEST different slice step
                 new_head = {i: v for i, v in self._changes.items() if i < head}
-                new_tail = {i + length_change: v for i, v in self._changes.items() if i > tail}
+                new_tail = {i + length_change: v for i, v in {**self._cache, **self._changes}.items() if i > tail}
                 self._changes = {**new_head, **slice_changes, **new_tail}
+                self._cache = {i: v for i, v in self._cache.items() if i < head}
+                self._snapshots = {i: v for i, v in self._snapshots.items() if i < head}
         else:
             raise TypeError(f"list indices must be integers or slices, not {type(index)}")
 
+    def _entry_as_bytes(self, entry: int) -> bytes:
+        return bytes([entry])
+
     def append(self, entry):
         self._length += 1
+        self._resized = True
         self[-1] = entry
 
+    def as_chunks(self, chunk_size: int = 2 ** 20) -> Generator[bytes, None, None]:
+        """yields the whole lump as bytes; unchanged entries are copied from the stream without decoding"""
+        # NOTE: length changes move every shifted entry into _changes
+        # -- so unchanged entries are always at their original index
+        entries_per_chunk = max(chunk_size // self._entry_size, 1)
+        changed = self.changed_indices()
+        buffer = bytearray()
+        start = 0
+        for index in [*changed, self._length]:
+            if start < index and len(buffer) > 0:
+                yield bytes(buffer)
+                buffer.clear()
+            for run_start in range(start, index, entries_per_chunk):
+                run_length = min(entries_per_chunk, index - run_start)
+                yield read_range(
+                    self.stream,
+                    self.offset + run_start * self._entry_size,
+                    run_length * self._entry_size)
+            if index < self._length:
+                buffer += self._entry_as_bytes(self.get(index, mutable=False))
+                if len(buffer) >= chunk_size:
+                    yield bytes(buffer)
+                    buffer.clear()
+            start = index + 1
+        if len(buffer) > 0:
+            yield bytes(buffer)
+
+    def _changed_in_cache(self) -> List[int]:
+        """indices of cached entries that differ from their snapshot"""
+        return [
+            i for i, entry in self._cache.items()
+            if i < self._length and i not in self._changes and self._entry_as_bytes(entry) != self._snapshots[i]]
+
+    def changed_indices(self) -> List[int]:
+        """indices of every entry that differs from the stream"""
+        changed = {i for i in self._changes if i < self._length}
+        changed.update(self._changed_in_cache())
+        return sorted(changed)
+
+    def changed_ranges(self) -> List[Tuple[int, int]]:
+        """[(start, stop)] runs of changed entries"""
+        out = list()
+        for i in self.changed_indices():
+            if len(out) > 0 and out[-1][1] == i:
+                out[-1] = (out[-1][0], i + 1)
+            else:
+                out.append((i, i + 1))
+        return out
+
     def extend(self, entries: bytes):
         for entry in entries:
             self.append(entry)
@@ -109,22 +323,31 @@ class RawBspLump:
         # NOTE: don't use get! we can't be sure the given index in bounds
         if index in self._changes:
             return self._changes[index]
-        else:
-            value = self.get_unchanged(index)
-            if mutable:
-                self._changes[index] = value
-            return value
+        elif index in self._cache:
+            return self._cache[index]
+        value = self.get_unchanged(index)
+        if mutable and not isinstance(value, immutable_types):
+            self._cache[index] = value
+            self._snapshots[index] = self._entry_as_bytes(value)
+        return value
 
     def get_unchanged(self, index: int) -> int:
         """no index remapping, be sure to respect stream data bounds!"""
+        if isinstance(self.stream, mmap.mmap):
+            return self.stream[self.offset + index]
         self.stream.seek(self.offset + index)
         return self.stream.read(1)[0]
 
+    def is_dirty(self) -> bool:
+        """True if saving would write anything other than the original bytes"""
+        return self._resized or len(self._changes) > 0 or len(self.changed_indices()) > 0
+
     def index(self, *args, **kwargs) -> Any:
         return self[::].index(*args, **kwargs)
 
     def insert(self, index: int, entry: Any):
         self._length += 1
+        self._resized = True
         self[index + 1:] = self[index:]
         self[index] = entry
 
@@ -133,6 +356,44 @@ class RawBspLump:
         del self[index]
         return out
 
+    def mark_clean(self):
+        """call once the stream holds every change; e.g. after Bsp.save()"""
+        self._resized = False
+        self._cache.update({i: v for i, v in self._changes.items() if not isinstance(v, immutable_types)})
+        # NOTE: edited entries stay cached, so later edits to them aren't lost
+        self._cache = {i: v for i, v in self._cache.items() if i < self._length}
+        self._snapshots = {i: self._entry_as_bytes(v) for i, v in self._cache.items()}
+        self._changes = dict()
+
+    def prune_cache(self):
+        """move changed entries into _changes & forget the rest; keeps .save() from re-checking every entry read"""
+        # NOTE: entries read before pruning are no longer tracked, edits to them must be assigned back
+        # -- e.g. entry = lump[0]; lump.prune_cache(); entry.x += 1; lump[0] = entry
+        for index in self._changed_in_cache():
+            self._changes[index] = self._cache[index]
+        self._cache = dict()
+        self._snapshots = dict()
+
+    def read_bytes(self, start: int = 0, length: int = -1) -> bytes:
+        """raw bytes of length entries from start, w/ any changes; one read, instead of one per entry"""
+        # NOTE: no index remapping; start must be positive
+        stop = self._length if length < 0 else min(start + length, self._length)
+        if stop <= start:
+            return b""
+        size = self._entry_size
+        out = read_range(self.stream, self.offset + start * size, (stop - start) * size)
+        edited = list()
+        if len(self._changes) > 0 or len(self._cache) > 0:
+            edited = [i for i in {**self._cache, **self._changes} if start <= i < stop]
+        if len(edited) == 0:
+            return out
+        # NOTE: length changes move every shifted entry into _changes, so unchanged entries are still in the stream
+        out = bytearray(out.ljust((stop - start) * size, b"\x00"))  # appended entries can be past the stream's end
+        for i in edited:
+            entry = self._changes[i] if i in self._changes else self._cache[i]
+            out[(i - start) * size:(i - start + 1) * size] = self._entry_as_bytes(entry)
+        return bytes(out)
+
     @classmethod
     def from_header(cls, stream: Stream, lump_header: LumpHeader) -> RawBspLump:
         out = cls()
@@ -144,11 +405,7 @@ class RawBspLump:
     @classmethod
     def from_stream(cls, stream: Stream, offset: int = 0, length: int = -1) -> RawBspLump:
         if length == -1:
-            if hasattr(stream, "size"):
-                length = stream.size
-            else:
-                length = stream.seek(0, 2)
-            length -= offset
+            length = size_of(stream) - offset
         out = cls()
         out._length = length
         out.offset = offset
@@ -166,8 +423,12 @@ class BasicBspLump(RawBspLump):
     # NOTE: there are no checks to ensure changes are the correct type or size
     _entry_size: int  # sizeof(LumpClass)
     _length: int  # number of indexable entries
+    _array: Any = None  # numpy array of the whole lump; see .array_mode
+    _array_changed: List[int]  # indices already changed when .array_mode was enabled
 
     def __init__(self):
+        self._cache = dict()
+        self._snapshots = dict()
         self._changes = dict()
         self._entry_size = 0
         self._length = 0
@@ -176,6 +437,10 @@ class BasicBspLump(RawBspLump):
 
     def __getitem__(self, index: Union[int, slice]):
         """Reads bytes from self.stream & returns LumpClass(es)"""
+        if self._array is not None:  # numpy views
+            if not isinstance(index, (int, slice)):
+                raise TypeError(f"list indices must be integers or slices, not {type(index)}")
+            return self._array[index]
         if isinstance(index, int):
             return self.get(_remap_index(index, self._length))
         elif isinstance(index, slice):
@@ -183,15 +448,146 @@ class BasicBspLump(RawBspLump):
         else:
             raise TypeError(f"list indices must be integers or slices, not {type(index)}")
 
+    def __iter__(self):
+        if self._array is not None:
+            return iter(self._array)
+        return super().__iter__()
+
     def __repr__(self):
         return f"<{self.__class__.__name__} ({len(self)} {self.LumpClass.__name__}) at 0x{id(self):016X}>"
 
+    def __setitem__(self, index: int | slice, value: Any):
+        if self._array is None:
+            return super().__setitem__(index, value)
+        import numpy
+        if isinstance(index, int):
+            value = [value]
+        else:
+            value = list(value)
+            if len(value) != len(range(*index.indices(self._length))):
+                raise RuntimeError("cannot resize a lump in array mode; set .array_mode = False first")
+        rows = numpy.empty(len(value), dtype=self._array.dtype)
+        for i, entry in enumerate(value):
+            if hasattr(entry, "dtype"):  # numpy row
+                rows[i] = entry
+            else:
+                rows[i] = numpy.frombuffer(self._entry_as_bytes(entry), dtype=self._array.dtype)[0]
+        self._array[index] = rows[0] if isinstance(index, int) else rows
+
+    def append(self, entry: Any):
+        if self._array is not None:
+            raise RuntimeError("cannot resize a lump in array mode; set .array_mode = False first")
+        super().append(entry)
+
+    def insert(self, index: int, entry: Any):
+        if self._array is not None:
+            raise RuntimeError("cannot resize a lump in array mode; set .array_mode = False first")
+        super().insert(index, entry)
+
+    @property
+    def array_mode(self) -> bool:
+        """if True, indexing, slices & iteration return views of one numpy array (requires numpy)"""
+        # NOTE: the whole lump is read once; edit rows w/ lump[0]["x"] = 1 or lump[0] = LumpClass(...)
+        # -- length can't change & LumpClass methods aren't available until .array_mode is set back to False
+        return self._array is not None
+
+    @array_mode.setter
+    def array_mode(self, enabled: bool):
+        if enabled and self._array is None:
+            self._array_changed = self.changed_indices()
+            self._array = self.as_array()
+            if not self._array.flags.writeable:
+                self._array = self._array.copy()
+            self._cache, self._snapshots = dict(), dict()
+        elif not enabled and self._array is not None:
+            changed = self.changed_indices()
+            raw_lump = self._array.tobytes()
+            size = self._entry_size
+            self._changes = {i: self._entry_from_bytes(raw_lump[i * size:(i + 1) * size]) for i in changed}
+            self._array = None
+
+    def _changed_in_array(self) -> List[int]:
+        """indices of rows that differ from the stream"""
+        import numpy
+        changed = numpy.zeros(self._length, dtype=bool)
+        changed[[i for i in self._array_changed if i < self._length]] = True
+        # NOTE: length changes move every shifted entry into _changes
+        # -- so unchanged entries are always at their original index
+        count = int(numpy.flatnonzero(~changed)[-1]) + 1 if not changed.all() else 0
+        if count > 0:
+            original = numpy.frombuffer(read_range(self.stream, self.offset, count * self._entry_size), dtype=numpy.uint8)
+            current = numpy.frombuffer(self._array[:count].tobytes(), dtype=numpy.uint8)
+            changed[:count] |= (original != current).reshape(count, self._entry_size).any(axis=1)
+        return [int(i) for i in numpy.flatnonzero(changed)]
+
+    def _entry_as_bytes(self, entry: Any) -> bytes:
+        if hasattr(entry, "as_int"):  # core.BitField
+            entry = entry.as_int()
+        return struct.pack(self.LumpClass._format, entry)
+
+    def as_array(self) -> Any:
+        """read the whole lump into a numpy array (requires numpy)"""
+        # NOTE: returns a copy, changes to the array will not affect the lump
+        import numpy
+        if self._array is not None:
+            return self._array.copy()
+        dtype = numpy_dtype(self.LumpClass)
+        changed = self.changed_indices()
+        if len(changed) == 0:  # NOTE: appended entries are always changed, so this covers truncated lumps too
+            raw_lump = bytearray(read_range(self.stream, self.offset, self._length * self._entry_size))
+            return numpy.frombuffer(raw_lump, dtype=dtype)
+        unchanged = numpy.ones(self._length, dtype=bool)
+        unchanged[changed] = False
+        # NOTE: length changes move every shifted entry into _changes
+        # -- so unchanged entries are always at their original index
+        count = int(numpy.flatnonzero(unchanged)[-1]) + 1 if unchanged.any() else 0
+        raw_lump = bytearray(read_range(self.stream, self.offset, count * self._entry_size))
+        original = numpy.frombuffer(raw_lump, dtype=dtype)
+        out = numpy.empty(self._length, dtype=dtype)
+        out[:count][unchanged[:count]] = original[unchanged[:count]]
+        for index in changed:
+            out[index] = numpy.frombuffer(self._entry_as_bytes(self.get(index, mutable=False)), dtype=dtype)[0]
+        return out
+
+    def as_chunks(self, chunk_size: int = 2 ** 20) -> Generator[bytes, None, None]:
+        if self._array is None:
+            yield from super().as_chunks(chunk_size)
+            return
+        rows_per_chunk = max(chunk_size // self._entry_size, 1)
+        for start in range(0, self._length, rows_per_chunk):
+            yield self._array[start:start + rows_per_chunk].tobytes()
+
+    def changed_indices(self) -> List[int]:
+        if self._array is not None:
+            return self._changed_in_array()
+        return super().changed_indices()
+
+    def _entry_from_bytes(self, raw_entry: bytes) -> Any:
+        # NOTE: no .from_stream(); BasicLumpClasses only specify _format
+        return self.LumpClass(struct.unpack(self.LumpClass._format, raw_entry)[0])
+
+    def get(self, index: int, mutable: bool = True) -> Any:
+        if self._array is not None:
+            return self._array[index]
+        return super().get(index, mutable)
+
     def get_unchanged(self, index: int) -> int:
         """no index remapping, be sure to respect stream data bounds!"""
-        # NOTE: no .from_stream(); BasicLumpClasses only specify _format
-        self.stream.seek(self.offset + (index * self._entry_size))
-        raw_entry = struct.unpack(self.LumpClass._format, self.stream.read(self._entry_size))
-        return self.LumpClass(raw_entry[0])
+        return self._entry_from_bytes(read_range(self.stream, self.offset + (index * self._entry_size), self._entry_size))
+
+    def mark_clean(self):
+        if self._array is not None:  # the stream now matches the array
+            self._resized = False
+            self._changes = dict()
+            self._array_changed = list()
+            return
+        super().mark_clean()
+
+    def read_bytes(self, start: int = 0, length: int = -1) -> bytes:
+        if self._array is None:
+            return super().read_bytes(start, length)
+        stop = self._length if length < 0 else min(start + length, self._length)
+        return self._array[start:max(start, stop)].tobytes()
 
     @classmethod
     def from_count(cls, stream: Stream, count: int, LumpClass: object):
@@ -225,11 +621,7 @@ class BasicBspLump(RawBspLump):
     @classmethod
     def from_stream(cls, stream: Stream, LumpClass: object, offset: int = 0, length: int = -1) -> BasicBspLump:
         if length == -1:
-            if hasattr(stream, "size"):
-                length = stream.size
-            else:
-                length = stream.seek(0, 2)
-            length -= offset
+            length = size_of(stream) - offset
         out = cls()
         out.LumpClass = LumpClass
         out._entry_size = struct.calcsize(LumpClass._format)
@@ -252,14 +644,14 @@ class BspLump(BasicBspLump):
     _entry_size: int  # sizeof(LumpClass)
     _length: int  # number of indexable entries
 
-    def get_unchanged(self, index: int) -> int:
-        """no index remapping, be sure to respect stream data bounds!"""
-        self.stream.seek(self.offset + (index * self._entry_size))
+    def _entry_as_bytes(self, entry: Any) -> bytes:
+        return struct.pack(self.LumpClass._format, *entry.as_tuple())
+
+    def _entry_from_bytes(self, raw_entry: bytes) -> Any:
         # BROKEN: quake.Edge does not support .from_stream()
         # return self.LumpClass.from_stream(self.stream)
         # HACK: required for quake.Edge
-        _tuple = struct.unpack(self.LumpClass._format, self.stream.read(self._entry_size))
-        return self.LumpClass.from_tuple(_tuple)
+        return self.LumpClass.from_tuple(struct.unpack(self.LumpClass._format, raw_entry))
 
     def search(self, **kwargs):
         """Returns all lump entries which have the queried values [e.g. find(x=0)]"""
@@ -24,6 +24,8 @@ class LumpOverrides(external.LumpOverrides):
     def mount_lump(self, name: str, header: object, file: external.File):
         if file.size == 0:
             raise RuntimeError(f"The .bsp_lump file for {name} is empty!")
+        if file.mmap and file.archive is None:
+            file = file.stream  # read from the memory map directly
         try:
             if name == "GAME_LUMP":
                 lump = valve.GameLump.from_stream(file, self, sub_offset=header.offset)
@@ -81,8 +83,8 @@ class RespawnBsp(valve.ValveBsp):
             f"{base_filename}_*.ent"]
 
     @classmethod
-    def from_file(cls, branch: ModuleType, filepath: str) -> RespawnBsp:
-        bsp = super().from_file(branch, filepath)
+    def from_file(cls, branch: ModuleType, filepath: str, mmap: bool = False, lazy: bool = False) -> RespawnBsp:
+        bsp = super().from_file(branch, filepath, mmap, lazy)
         # .bsp_lump files
         bsp.external = LumpOverrides.from_bsp(bsp)
         # .ent files
@@ -103,7 +105,7 @@ class RespawnBsp(valve.ValveBsp):
         return bsp
 
     @classmethod
-    def from_stream(cls, branch: ModuleType, filepath: str, stream: io.BytesIO) -> RespawnBsp:
+    def from_stream(cls, branch: ModuleType, filepath: str, stream: io.BytesIO, lazy: bool = False) -> RespawnBsp:
         bsp = cls(branch, filepath)
         bsp.file = stream
         # collect metadata
@@ -132,75 +134,64 @@ class RespawnBsp(valve.ValveBsp):
         for lump_name, lump_header in bsp._header_generator(offset=16):
             if lump_header.offset >= bsp.filesize:
                 continue  # or version has flag (e.g. (50, 1))
-            bsp.mount_lump(lump_name, lump_header, bsp.file)
+            bsp._load_lump(lump_name, lump_header, lazy)
         # compiler signature
         bsp._get_signature(16 + (16 * 128))
         return bsp
 
     def save_as(self, filename: str, no_bsp_lump: bool = False):
-        # lumps -> bytes
         lump_order = sorted([L for L in self.branch.LUMP],
                             key=lambda L: (self.headers[L.name].offset, self.headers[L.name].length))
         # ^ ["LUMP.name"]
-        raw_lumps: Dict[str, bytes] = dict()
-        # ^ {"LUMP.name": b"raw lump data"}
-        for LUMP in self.branch.LUMP:
-            if LUMP.name == "GAME_LUMP":
-                continue  # need header.offset before generating
-            try:
-                lump_bytes = self.lump_as_bytes(LUMP.name)
-            except Exception as exc:
-                print(f"Failed to convert {LUMP.name} to bytes")
-                raise exc
-            if lump_bytes != b"":  # don't write empty lumps
-                raw_lumps[LUMP.name] = lump_bytes
-        # recalculate headers
-        current_offset = 16 + (16 * 128)
-        if len(self.signature) % 4 != 0:  # pad signature
-            self.signature += b"\0" * (4 - len(self.signature) % 4)
-        current_offset += len(self.signature)
-        headers = dict()
-        for LUMP in lump_order:
-            if LUMP.name == "GAME_LUMP" and hasattr(self, "GAME_LUMP"):  # generate
-                raw_lumps["GAME_LUMP"] = self.GAME_LUMP.as_bytes(current_offset)
-            if LUMP.name not in raw_lumps:  # lump is empty
-                version = self.headers[LUMP.name].version  # preserve PHYSICS_LEVEL version
-                header = self.branch.LumpHeader(current_offset, 0, version, 0)
-            else:  # lump has data
-                offset = current_offset
-                length = len(raw_lumps[LUMP.name])
-                version = self.headers[LUMP.name].version
-                fourCC = 0  # fourCC is always 0 (no LZMA lump compression)
-                header = self.branch.LumpHeader(offset, length, version, fourCC)
-                current_offset += length
-                if current_offset % 4 != 0:  # pad
-                    current_offset += 4 - current_offset % 4
-            headers[LUMP.name] = header
-        del current_offset
-        # write to file(s)
+        # NOTE: lumps are streamed straight to outfile, then headers are back-patched
+        # -- so we never hold more than one encoded lump in memory
+        internal = not isinstance(self.version, tuple)  # pre Apex Season 10+
+        temp_filename = self.temp_filename_for(filename)
         os.makedirs(os.path.dirname(os.path.realpath(filename)), exist_ok=True)
-        # TODO: close self.file if overwriting
-        outfile = open(filename, "wb")
-        version = self.version
-        if isinstance(self.version, tuple):  # Apex Legends Season 10+
-            version = version[0] + version[1] << 16
-        _format = "4s3I" if self.endianness == "little" else ">4s3I"
-        outfile.write(struct.pack(_format, self.file_magic, version, self.revision, 127))
-        for LUMP in self.branch.LUMP:
-            outfile.write(headers[LUMP.name].as_bytes())
-        outfile.write(self.signature)
-        # write lump contents (cannot be done until headers allocate padding)
-        for LUMP in [L for L in lump_order if L.name in raw_lumps]:
-            # write INTERNAL .bsp lump
-            if not isinstance(self.version, tuple):  # pre Apex Season 10+
-                padding_length = headers[LUMP.name].offset - outfile.tell()
-                if padding_length > 0:  # pad previous lump
-                    outfile.write(b"\0" * padding_length)
-                outfile.write(raw_lumps[LUMP.name])
-        # final padding
-        end = outfile.tell()
-        padding_length = 0
-        if end % 4 != 0:
-            padding_length = 4 - end % 4
-        outfile.write(b"\0" * padding_length)
-        outfile.close()  # main .bsp is written
+        try:
+            with open(temp_filename, "wb") as outfile:
+                version = self.version
+                if isinstance(self.version, tuple):  # Apex Legends Season 10+
+                    version = version[0] + (version[1] << 16)
+                _format = "4s3I" if self.endianness == "little" else ">4s3I"
+                outfile.write(struct.pack(_format, self.file_magic, version, self.revision, 127))
+                # reserve headers
+                headers_offset = outfile.tell()
+                outfile.write(b"\0" * 16 * 128)
+                if len(self.signature) % 4 != 0:  # pad signature
+                    self.signature += b"\0" * (4 - len(self.signature) % 4)
+                outfile.write(self.signature)
+                # write lump contents
+                current_offset = outfile.tell()
+                headers = dict()
+                for LUMP in lump_order:
+                    if LUMP.name == "GAME_LUMP" and not isinstance(getattr(self, "GAME_LUMP", None), lumps.RawBspLump):
+                        chunks = [self.GAME_LUMP.as_bytes(current_offset)] if hasattr(self, "GAME_LUMP") else []
+                    else:
+                        chunks = self.lump_as_chunks(LUMP.name)
+                    length = 0
+                    try:
+                        for chunk in chunks:
+                            length += len(chunk)
+                            if internal:  # write INTERNAL .bsp lump
+                                outfile.write(chunk)
+                    except Exception as exc:
+                        print(f"Failed to convert {LUMP.name} to bytes")
+                        raise exc
+                    version = self.headers[LUMP.name].version  # preserve PHYSICS_LEVEL version
+                    # NOTE: fourCC is always 0 (no LZMA lump compression)
+                    headers[LUMP.name] = self.branch.LumpHeader(current_offset, length, version, 0)
+                    current_offset += length
+                    if current_offset % 4 != 0:  # pad
+                        padding_length = 4 - current_offset % 4
+                        current_offset += padding_length
+                        if internal:
+                            outfile.write(b"\0" * padding_length)
+                # back-patch headers
+                outfile.seek(headers_offset)
+                for LUMP in self.branch.LUMP:
+                    outfile.write(headers[LUMP.name].as_bytes())
+        except Exception:  # don't leave a half-written file behind
+            os.remove(temp_filename)
+            raise
+        self._replace_file(temp_filename, filename, headers)
@@ -13,7 +13,7 @@ class RitualBsp(id_software.IdTechBsp):
     # struct { uint32_t file_magic, version, checksum; LumpHeader headers[]; };
 
     @classmethod
-    def from_stream(cls, branch: ModuleType, filename: str, stream: io.BytesIO) -> RitualBsp:
+    def from_stream(cls, branch: ModuleType, filename: str, stream: io.BytesIO, lazy: bool = False) -> RitualBsp:
         bsp = cls(branch, filename)
         bsp.file = stream
         # collect metadata
@@ -28,7 +28,7 @@ class RitualBsp(id_software.IdTechBsp):
         bsp.headers = dict()
         bsp.loading_errors: Dict[str, Exception] = dict()
         for lump_name, lump_header in bsp._header_generator(offset=12):
-            bsp.mount_lump(lump_name, lump_header, bsp.file)
+            bsp._load_lump(lump_name, lump_header, lazy)
         return bsp
 
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
+import itertools
 import os
-from typing import Dict, Generator, List, Union
+from typing import Dict, Generator, Iterable, List, Union
 
 from ..utils import geometry
 
@@ -14,6 +15,14 @@ def indent(count: int = 1) -> str:
     return " " * 4 * count  # 4 spaces, no tabs
 
 
+def write_lines(filename: str, lines: Iterable[str], block_size: int = 2 ** 14):
+    """writes lines in blocks, so the whole file is never held in memory"""
+    lines = iter(lines)
+    with open(filename, "w", buffering=2 ** 20) as out_file:
+        for block in iter(lambda: list(itertools.islice(lines, block_size)), []):
+            out_file.write("\n".join(block) + "\n")
+
+
 # TODO: mount_file etc. for:
 # -- .usd[acz] textures & subtrees
 # -- .obj materials (.mtl)
@@ -1,10 +1,16 @@
 from __future__ import annotations
+import array
 import enum
+import io
+import itertools
 import json
 import os
 import re
+import shutil
 import struct
-from typing import Any, Dict, List, Tuple, Union
+import sys
+import tempfile
+from typing import Any, Dict, Iterable, List, Tuple, Union
 
 from ..utils import geometry
 from ..utils import quaternion
@@ -12,9 +18,6 @@ from . import base
 
 
 # TODO: export Z-up geometry.Model as Y-up (add rotation to transform matrix?)
-# TODO: scrap complex vertex & index buffer construction
-# -- just dump the raw vertices, don't check for duplicates
-# -- keep it simple, just like in utils.geometry
 # TODO: custom JSONEncoder & Decoder classes
 # -- could handle converting enum.Enum
 
@@ -44,7 +47,7 @@ def split_sub_format(sub_format: str):
 
 
 class VertexBuffer:
-    """treat as write-only"""
+    """treat as write-only; identical vertices are welded into one"""
     # ENCODING
     format_: Dict[str, str]
     # ^ {"position": "3f"}
@@ -53,14 +56,28 @@ class VertexBuffer:
     byteLength: int
     accessors: List[Json]
     vertex_attrs: Dict[str, int]
+    epsilon: float  # weld vertices w/ every component within the same epsilon sized step; 0 for exact matches
     # DATA
-    vertices: List[geometry.Vertex]
+    count: int  # number of unique vertices
+    data: Union[array.array, bytearray]  # packed vertices
+    index: Dict[Tuple[Any], int]
+    # ^ {vertex_key: vertex_index}
 
-    def __init__(self, **format_: Dict[str, str]):
+    def __init__(self, epsilon: float = 0.0, **format_: Dict[str, str]):
         self.format_ = format_
-        self.vertices = list()
+        self.epsilon = epsilon
         self.format_string = "".join(self.format_.values())
-        self.byteStride = struct.calcsize(self.format_string)
+        self._struct = struct.Struct(f"<{self.format_string}")
+        self.byteStride = self._struct.size
+        typecodes = {split_sub_format(sub_format)[1] for sub_format in self.format_.values()}
+        if len(typecodes) == 1:  # every component fits in one array
+            self.data = array.array(typecodes.pop())
+            self._pack = self.data.extend
+        else:
+            self.data = bytearray()
+            self._pack = lambda key: self.data.extend(self._struct.pack(*key))
+        self.count = 0
+        self.index = dict()
         # for indexing / mapping vertex member accessors:
         # -- (might need to add an offset)
         self.attributes = dict()
@@ -82,11 +99,26 @@ class VertexBuffer:
 
     def add(self, vertex: geometry.Vertex) -> int:
         # TODO: assert vertex format is valid
-        if vertex in self.vertices:
-            return self.vertices.index(vertex)
-        else:
-            self.vertices.append(vertex)
-            return len(self.vertices) - 1
+        # NOTE: round-tripped through the vertex format, so keys match .add_arrays()
+        key = self._struct.unpack(self._struct.pack(*self.tuplify(vertex)))
+        return self._weld([key])[0]
+
+    def add_arrays(self, arrays: geometry.MeshArrays) -> array.array:
+        """welds every vertex in arrays; returns the index of each in this buffer"""
+        # NOTE: keys are zipped from strided slices, no per-vertex Python objects besides the key
+        components = list()
+        for attr, sub_format in self.format_.items():
+            stride = split_sub_format(sub_format)[0]
+            if attr.startswith("uv") and attr[2:].isnumeric():
+                channel = int(attr[2:])
+                column = arrays.uvs[channel] if channel < len(arrays.uvs) else None
+            else:
+                column = getattr(arrays, {"colour": "colours"}.get(attr, f"{attr}s"))
+            if column is None:  # pad missing uv channels w/ (0, 0)
+                components.extend([itertools.repeat(0.0, len(arrays))] * stride)
+            else:
+                components.extend(column[i::stride] for i in range(stride))
+        return self._weld(zip(*components))
 
     def tuplify(self, vertex: geometry.Vertex) -> Tuple[Any]:
         out = list()
@@ -99,9 +131,33 @@ class VertexBuffer:
         return tuple(out)
 
     def as_bytes(self) -> bytes:
-        return b"".join([
-            struct.pack(self.format_string, *self.tuplify(v))
-            for v in self.vertices])
+        if isinstance(self.data, array.array) and sys.byteorder == "big":
+            data = array.array(self.data.typecode, self.data)
+            data.byteswap()  # glTF is little-endian
+            return data.tobytes()
+        return bytes(self.data)
+
+    def _weld(self, keys: Iterable[Tuple[Any]]) -> array.array:
+        """index of each vertex key; packs new vertices onto the end of .data"""
+        index, pack = self.index, self._pack
+        out = array.array("I")
+        if self.epsilon == 0:
+            for key in keys:
+                vertex_index = index.setdefault(key, self.count)
+                if vertex_index == self.count:  # new vertex
+                    pack(key)
+                    self.count += 1
+                out.append(vertex_index)
+        else:  # quantised keys; the first vertex in each step is kept
+            # NOTE: close vertices either side of a step boundary won't weld
+            scale = 1 / self.epsilon
+            for key in keys:
+                vertex_index = index.setdefault(tuple(map(round, map(scale.__mul__, key))), self.count)
+                if vertex_index == self.count:  # new vertex
+                    pack(key)
+                    self.count += 1
+                out.append(vertex_index)
+        return out
 
     @property
     def accessors(self) -> List[Json]:
@@ -118,7 +174,14 @@ class VertexBuffer:
                 "type": type_,
                 "componentType": component_types[data_type].value,
                 "byteOffset": offset,
-                "count": len(self.vertices)})
+                "count": self.count})
+            if attr == "position" and isinstance(self.data, array.array) and self.count > 0:
+                # NOTE: required by the glTF spec
+                stride = self.byteStride // self.data.itemsize
+                start = offset // self.data.itemsize
+                axes = [self.data[start + i::stride] for i in range(num_data)]
+                out[-1]["min"] = [min(axis) for axis in axes]
+                out[-1]["max"] = [max(axis) for axis in axes]
             offset += struct.calcsize(sub_format)
         return out
 
@@ -131,46 +194,57 @@ class VertexBuffer:
 
     @property
     def byteLength(self) -> int:
-        return len(self.vertices) * self.byteStride
+        return self.count * self.byteStride
+
+    def write_to(self, file: io.BytesIO):
+        if isinstance(self.data, array.array) and sys.byteorder == "big":
+            file.write(self.as_bytes())
+        else:  # no copy
+            file.write(self.data)
 
 
 class IndexBuffer:
     """treat as write-only"""
-    indices: List[int]
+    indices: array.array  # "I"
+    max_index: int
     meshes: List[Tuple[int, int]]
-    # ^ [(byteOffset, count)]
+    # ^ [(first_index, count)]
     byteLength: int
+    # NOTE: stored as 16-bit indices when every index fits
 
     def __init__(self):
-        self.indices = list()
+        self.indices = array.array("I")
+        self.max_index = 0
         self.meshes = list()
 
-    def add(self, mesh: geometry.Mesh, vertex_buffer: VertexBuffer):
-        byteOffset = len(self.indices) * 4
-        new_indices = list()
-        for polygon in mesh.polygons:
-            loop_indices = [
-                vertex_buffer.add(vertex)
-                for vertex in polygon.vertices]
-            fan_indices = [
-                loop_indices[i]
-                for i in geometry.triangle_fan(len(loop_indices))]
-            new_indices.extend(fan_indices)
+    def add(self, mesh: geometry.Mesh, vertex_buffer: VertexBuffer, optimise: bool = False):
+        """optimise reorders triangles for the post-transform vertex cache"""
+        # NOTE: meshes w/o .arrays have them generated from .polygons
+        buffer_index = vertex_buffer.add_arrays(mesh.arrays)
+        new_indices = array.array("I", map(buffer_index.__getitem__, mesh.arrays.triangles()))
+        if optimise:
+            new_indices = geometry.optimise_vertex_cache(new_indices)
+        self.meshes.append((len(self.indices), len(new_indices)))
         self.indices.extend(new_indices)
-        self.meshes.append((byteOffset, len(new_indices)))
+        self.max_index = max(self.max_index, max(new_indices, default=0))
 
     def as_bytes(self) -> bytes:
-        return struct.pack(f"{len(self.indices)}I", *self.indices)
+        indices = self.indices if self.typecode == "I" else array.array(self.typecode, self.indices)
+        if sys.byteorder == "big":
+            indices = array.array(self.typecode, indices)
+            indices.byteswap()  # glTF is little-endian
+        return indices.tobytes()
 
     @property
     def accessors(self) -> List[Json]:
         """bufferView is unset"""  # ???
+        itemsize = self.itemsize
         return [
             {"type": "SCALAR",
-             "componentType": Data.UNSIGNED_INT.value,
-             "byteOffset": mesh[0],
-             "count": mesh[1]}
-            for mesh in self.meshes]
+             "componentType": self.componentType.value,
+             "byteOffset": first_index * itemsize,
+             "count": count}
+            for first_index, count in self.meshes]
 
     @property
     def bufferView(self) -> Json:
@@ -181,22 +255,41 @@ class IndexBuffer:
 
     @property
     def byteLength(self) -> int:
-        return len(self.indices) * 4
+        return len(self.indices) * self.itemsize
+
+    @property
+    def componentType(self) -> Data:
+        # NOTE: the largest value of each type is reserved (primitive restart)
+        return Data.UNSIGNED_SHORT if self.max_index < 0xFFFF else Data.UNSIGNED_INT
+
+    @property
+    def itemsize(self) -> int:
+        return 2 if self.componentType == Data.UNSIGNED_SHORT else 4
+
+    @property
+    def typecode(self) -> str:
+        return "H" if self.componentType == Data.UNSIGNED_SHORT else "I"
+
+    def write_to(self, file: io.BytesIO):
+        file.write(self.as_bytes())
 
 
 class MaterialList:
     materials: List[geometry.Material]
+    index: Dict[str, int]
+    # ^ {material.name: materials.index(material)}
     json: List[Json]
 
     def __init__(self):
         self.materials = list()
+        self.index = dict()
 
     def add(self, material: geometry.Material) -> int:
-        if material in self.materials:
-            return self.materials.index(material)
-        else:
+        # NOTE: materials are equal if their names are
+        if material.name not in self.index:
+            self.index[material.name] = len(self.materials)
             self.materials.append(material)
-            return len(self.materials) - 1
+        return self.index[material.name]
 
     @property
     def json(self) -> List[Json]:
@@ -207,30 +300,69 @@ class MaterialList:
 
 
 BufferPair = Tuple[VertexBuffer, IndexBuffer]
+Primitive = Tuple[Tuple[Tuple[str, str]], int, int]
+# ^ (vertex_format_key, index_buffer_mesh, material_index)
+
+
+def vertex_format(arrays: geometry.MeshArrays) -> Dict[str, str]:
+    """VertexBuffer format for arrays; every uv channel is kept & unused colours are dropped"""
+    format_ = {"position": "3f", "normal": "3f"}
+    format_.update({f"uv{i}": "2f" for i in range(len(arrays.uvs))})
+    if any(arrays.colours):  # not all (0, 0, 0, 0)
+        format_["colour"] = "4f"
+    return format_
 
 
 class Gltf(base.SceneDescription):
     """WebGL Transmission Format"""
-    buffers: List[BufferPair]
+    exts_bin = [".glb"]
+    buffers: List[BufferPair]  # one for each vertex format; generated on first access
     models: Dict[str, geometry.Model]
     # TODO: named models: Dict[str, geometry.Model]
-    json: Json
+    json: Json  # generated on first access
+    epsilon: float  # welds vertices which are almost identical; see VertexBuffer
+    optimise: bool  # reorder triangles for the post-transform vertex cache
+    # NOTE: .gltf shares buffers between all models
+    # -- .glb welds & writes one model at a time, so memory use is bounded by the largest model
 
     def __init__(self):
         self.models = dict()
-        self.buffers = list()
-        self.json = dict()
+        self.epsilon = 0.0
+        self.optimise = False
+        self._buffers = None
+        self._json = None
 
     def __repr__(self) -> str:
-        descriptor = f"{len(self.models)} models {len(self.buffers)} buffers"
+        descriptor = f"{len(self.models)} models"
         return f"<Gltf {descriptor} @ 0x{id(self):016X}>"
 
+    @property
+    def buffers(self) -> List[BufferPair]:
+        if self._buffers is None:
+            self._build()
+        return self._buffers
+
+    @property
+    def json(self) -> Json:
+        if self._json is None:
+            self._build()
+        return self._json
+
+    def as_bytes(self) -> bytes:
+        """.glb"""
+        out = io.BytesIO()
+        self.write_glb(out)
+        return out.getvalue()
+
     def save_as(self, filename):
-        """.gltf only! no .glb (yet)"""
         # TODO: use relpath so we can split off "./" is no folder if given
         folder, filename = os.path.split(filename)
         filename, ext = os.path.splitext(filename)
-        assert ext == ".gltf", f"cannot write to '{ext}' extension"
+        assert ext in (".gltf", ".glb"), f"cannot write to '{ext}' extension"
+        if ext == ".glb":
+            with open(os.path.join(folder, f"{filename}.glb"), "wb") as glb_file:
+                self.write_glb(glb_file)
+            return
         # write .bin
         for i, buffer_pair in enumerate(self.buffers):
             buffer_names = ("vertex", "index")
@@ -238,74 +370,126 @@ class Gltf(base.SceneDescription):
                 bin_name = f"{filename}.{name}.{i}.bin"
                 self.json["buffers"][i * 2 + j]["uri"] = bin_name
                 with open(os.path.join(folder, bin_name), "wb") as bin_file:
-                    bin_file.write(buffer.as_bytes())
+                    buffer.write_to(bin_file)
         # write .gltf
         with open(os.path.join(folder, f"{filename}.gltf"), "w") as json_file:
             json.dump(self.json, json_file, indent=2)
 
-    @classmethod
-    def from_buffers(cls, buffers: List[BufferPair]) -> Gltf:
-        raise NotImplementedError()
-
-    @classmethod
-    def from_models(cls, models: base.ModelList) -> Gltf:
-        out = super().from_models(models)
-
-        # base json
-        out.json = {
+    def write_glb(self, glb_file: io.BytesIO, chunk_size: int = 2 ** 20):
+        """streams a binary glTF; buffers are built one model at a time & spooled to a temporary file"""
+        gltf_json = self._base_json()
+        materials = MaterialList()
+        with tempfile.TemporaryFile() as bin_file:
+            for name, model in self.models.items():
+                buffer_pairs = dict()
+                primitives = self._add_model(model, buffer_pairs, materials)
+                buffer_views = list()
+                for buffer_pair in buffer_pairs.values():
+                    for buffer in buffer_pair:
+                        buffer_views.append({"buffer": 0, "byteOffset": bin_file.tell(), **buffer.bufferView})
+                        buffer.write_to(bin_file)
+                        bin_file.write(b"\x00" * (-bin_file.tell() % 4))  # 4 byte alignment
+                layout = self._add_buffer_pairs(gltf_json, buffer_pairs, buffer_views)
+                self._add_node(gltf_json, name, model, primitives, layout)
+            gltf_json["materials"] = materials.json
+            bin_length = bin_file.tell()
+            if bin_length > 0:
+                gltf_json["buffers"] = [{"byteLength": bin_length}]
+            raw_json = json.dumps(gltf_json, separators=(",", ":")).encode()
+            raw_json += b" " * (-len(raw_json) % 4)  # 4 byte alignment
+            # header & chunks
+            length = 12 + 8 + len(raw_json) + (8 + bin_length if bin_length > 0 else 0)
+            glb_file.write(struct.pack("<4s2I", b"glTF", 2, length))
+            glb_file.write(struct.pack("<I4s", len(raw_json), b"JSON"))
+            glb_file.write(raw_json)
+            if bin_length > 0:
+                glb_file.write(struct.pack("<I4s", bin_length, b"BIN\x00"))
+                bin_file.seek(0)
+                shutil.copyfileobj(bin_file, glb_file, chunk_size)
+
+    def _add_buffer_pairs(self, gltf_json: Json, buffer_pairs: Dict[Any, BufferPair], buffer_views: List[Json]) -> Dict:
+        """adds bufferViews & accessors; returns {vertex_format_key: (attributes, first_index_accessor)}"""
+        layout = dict()
+        for i, (key, (vertex_buffer, index_buffer)) in enumerate(buffer_pairs.items()):
+            view = len(gltf_json["bufferViews"])
+            gltf_json["bufferViews"].extend(buffer_views[i * 2:i * 2 + 2])
+            first = len(gltf_json["accessors"])
+            gltf_json["accessors"].extend({"bufferView": view, **a} for a in vertex_buffer.accessors)
+            gltf_json["accessors"].extend({"bufferView": view + 1, **a} for a in index_buffer.accessors)
+            attributes = {va: first + j for va, j in vertex_buffer.attributes.items()}
+            layout[key] = (attributes, first + len(vertex_buffer))
+        return layout
+
+    def _add_model(self, model: geometry.Model, buffer_pairs: Dict[Any, BufferPair],
+                   materials: MaterialList) -> List[Primitive]:
+        """welds model's meshes into buffer_pairs; new vertex formats get a new BufferPair"""
+        primitives = list()
+        for mesh in model.meshes:
+            if mesh.arrays.num_polygons == 0:
+                continue
+            format_ = vertex_format(mesh.arrays)
+            key = tuple(format_.items())
+            if key not in buffer_pairs:
+                buffer_pairs[key] = (VertexBuffer(self.epsilon, **format_), IndexBuffer())
+            vertex_buffer, index_buffer = buffer_pairs[key]
+            index_buffer.add(mesh, vertex_buffer, self.optimise)
+            primitives.append((key, len(index_buffer.meshes) - 1, materials.add(mesh.material)))
+        return primitives
+
+    def _add_node(self, gltf_json: Json, name: str, model: geometry.Model, primitives: List[Primitive], layout: Dict):
+        """adds a node & mesh for model"""
+        angles_quaternion = quaternion.Quaternion.from_euler(model.angles)
+        node = {
+            "name": name,
+            "rotation": list(angles_quaternion),
+            "translation": list(model.origin)}
+        if len(primitives) > 0:  # meshes must have at least 1 primitive
+            node["mesh"] = len(gltf_json["meshes"])
+            gltf_json["meshes"].append({"primitives": [
+                {"attributes": layout[key][0],
+                 "material": material_index,
+                 "indices": layout[key][1] + index_buffer_mesh}
+                for key, index_buffer_mesh, material_index in primitives]})
+        gltf_json["scenes"][0]["nodes"].append(len(gltf_json["nodes"]))
+        gltf_json["nodes"].append(node)
+
+    def _base_json(self) -> Json:
+        return {
             "scene": 0, "scenes": [{"nodes": []}],
             "nodes": [], "meshes": [], "materials": [],
             "buffers": [], "bufferViews": [], "accessors": [],
             "asset": {"version": "2.0"}}
-        out.json["scenes"][0]["nodes"] = [*range(len(out.models))]
-
-        # buffers
-        # TODO: add a new BufferPair for each vertex format
-        # -- check uv count for mesh
-        # -- optimising for unused vertex colour would be nice
-        out.buffers = [(
-            VertexBuffer(
-                position="3f",
-                normal="3f",
-                # uv0="2f",
-                # uv1="2f",
-                colour="4f"),
-            IndexBuffer())]
-        vertex_buffer, index_buffer = out.buffers[0]
-
-        # mesh geometry
+
+    def _build(self):
+        """.buffers & .json for a .gltf; buffers are shared by all models"""
+        self._json = self._base_json()
+        buffer_pairs = dict()
         materials = MaterialList()
-        mesh_offset = len(out.buffers[0][0])  # accessor index
-        for i, (name, model) in enumerate(out.models.items()):
-            # metadata
-            angles_quaternion = quaternion.Quaternion.from_euler(model.angles)
-            out.json["nodes"].append({
-                "mesh": i,
-                "name": name,
-                "rotation": list(angles_quaternion),
-                "translation": list(model.origin)})
-            # triangles
-            out.json["meshes"].append({
-                "primitives": list()})
-            for j, mesh in enumerate(model.meshes):
-                material_index = materials.add(mesh.material)
-                index_buffer.add(mesh, vertex_buffer)
-                out.json["meshes"][-1]["primitives"].append({
-                    "attributes": vertex_buffer.attributes,
-                    "material": material_index,
-                    "indices": mesh_offset + j})
-            mesh_offset += len(model.meshes)
-
-        # finalise
-        out.json["materials"] = materials.json
-        out.json["buffers"] = [
-            {"byteLength": vertex_buffer.byteLength},
-            {"byteLength": index_buffer.byteLength}]
+        primitives = {
+            name: self._add_model(model, buffer_pairs, materials)
+            for name, model in self.models.items()}
+        self._buffers = list(buffer_pairs.values())
         # NOTE: uri will be added by .save_as(filename)
-        out.json["bufferViews"] = [
-            {"buffer": 0, **vertex_buffer.bufferView},
-            {"buffer": 1, **index_buffer.bufferView}]
-        out.json["accessors"] = [
-            *[{"bufferView": 0, **a} for a in vertex_buffer.accessors],
-            *[{"bufferView": 1, **a} for a in index_buffer.accessors]]
+        self._json["buffers"] = [
+            {"byteLength": buffer.byteLength}
+            for buffer_pair in self._buffers
+            for buffer in buffer_pair]
+        buffer_views = [
+            {"buffer": i, **buffer.bufferView}
+            for i, buffer in enumerate(itertools.chain(*self._buffers))]
+        layout = self._add_buffer_pairs(self._json, buffer_pairs, buffer_views)
+        for name, model in self.models.items():
+            self._add_node(self._json, name, model, primitives[name], layout)
+        self._json["materials"] = materials.json
+
+    @classmethod
+    def from_buffers(cls, buffers: List[BufferPair]) -> Gltf:
+        raise NotImplementedError()
+
+    @classmethod
+    def from_models(cls, models: base.ModelList, epsilon: float = 0.0, optimise: bool = False) -> Gltf:
+        """epsilon > 0 also welds vertices which are almost identical"""
+        out = super().from_models(models)
+        out.epsilon = epsilon
+        out.optimise = optimise
         return out
@@ -1,8 +1,12 @@
 # https://openusd.org/release/glossary.html
 from __future__ import annotations
+import array
 import collections
+import concurrent.futures
+import itertools
+import os
 import re
-from typing import Any, Dict, Generator, List
+from typing import Any, Dict, Generator, List, Sequence
 
 from ..utils import geometry
 from ..utils import vector
@@ -21,6 +25,18 @@ def sanitise(material_name: str) -> str:
     return material_name.rpartition("/")[-1] if "/" in material_name else material_name
 
 
+def format_array(values: Sequence, stride: int = 1, item_format: str = "%.7g", block_size: int = 2 ** 14) -> str:
+    """usda array literal from a flat sequence; each block of values is formatted w/ a single % operation"""
+    assert len(values) % stride == 0
+    item = item_format if stride == 1 else "(" + ", ".join([item_format] * stride) + ")"
+    block_length = block_size * stride
+    blocks = list()
+    for start in range(0, len(values), block_length):
+        block = tuple(values[start:start + block_length])
+        blocks.append(", ".join([item] * (len(block) // stride)) % block)
+    return "[" + ", ".join(blocks) + "]"
+
+
 def usd_repr(value: Any) -> str:
     # NOTE: assumes lists of vectors will be converted beforehand
     if isinstance(value, list) and all(isinstance(v, str) for v in value):
@@ -38,13 +54,15 @@ def usd_repr(value: Any) -> str:
 
 
 class Prim:
-    type_: str
+    specifier: str  # "def" or "over"
+    type_: str  # None for typeless "over"s
     name: str
     metadata: Dict[str, Any]
     properties: List[Property]
     children: List[Prim]
 
-    def __init__(self, type_, name, metadata={}, properties=[], children=[]):
+    def __init__(self, type_, name, metadata={}, properties=[], children=[], specifier="def"):
+        self.specifier = specifier
         self.type_ = type_
         self.name = name
         self.metadata = metadata
@@ -56,15 +74,15 @@ class Prim:
         return f"<{self.__class__.__name__} {descriptor} @ 0x{id(self):016X}>"
 
     def lines(self) -> Generator[str, None, None]:
-        # NOTE: "def" is only one specifier
-        # -- but we haven't needed "over" or "class" yet
+        # NOTE: we haven't needed the "class" specifier yet
+        header = " ".join([self.specifier, *([self.type_] if self.type_ is not None else []), f'"{self.name}"'])
         if len(self.metadata) > 0:
-            yield f'def {self.type_} "{self.name}" ('
+            yield f"{header} ("
             for name, value in self.metadata.items():
                 yield f"    {name} = {usd_repr(value)}"
             yield ")"
         else:
-            yield f'def {self.type_} "{self.name}"'
+            yield header
         yield "{"
         for property_ in self.properties:
             for line in property_.lines():
@@ -107,14 +125,17 @@ class Property:
         return f'Property("{self.type_}", "{self.name}", {usd_repr(self.value)}, {metadata})'
 
     def lines(self) -> Generator[str, None, None]:
-        value = list(map(tuple, self.value)) if self.type_[-4:] in ("2f[]", "3f[]") else self.value
         if len(self.metadata) > 0:
-            yield f"{self.type_} {self.name} = {usd_repr(value)} ("
+            yield f"{self.type_} {self.name} = {self.value_repr()} ("
             for name, value in self.metadata.items():
                 yield f"    {name} = {usd_repr(value)}"
             yield ")"
         else:
-            yield f"{self.type_} {self.name} = {usd_repr(value)}"
+            yield f"{self.type_} {self.name} = {self.value_repr()}"
+
+    def value_repr(self) -> str:
+        value = list(map(tuple, self.value)) if self.type_[-4:] in ("2f[]", "3f[]") else self.value
+        return usd_repr(value)
 
     @classmethod
     def from_lines(cls, lines: List[str]) -> Property:
@@ -124,6 +145,103 @@ class Property:
         # return cls(type_, name, value, metadata)
 
 
+class ArrayProperty(Property):
+    """Property w/ a flat array value (e.g. MeshArrays.positions); no tuple per element"""
+    stride: int  # components per element
+
+    def __init__(self, type_, name, value, stride=1, **metadata):
+        super().__init__(type_, name, value, **metadata)
+        self.stride = stride
+
+    def value_repr(self) -> str:
+        item_format = "%d" if self.type_.rpartition(" ")[-1] == "int[]" else "%.7g"
+        return format_array(self.value, self.stride, item_format)
+
+
+def meshes_by_material(model: geometry.Model) -> Dict[geometry.Material, List[geometry.Mesh]]:
+    out = collections.defaultdict(list)
+    for mesh in model.meshes:
+        out[mesh.material].append(mesh)
+    return out
+
+
+def material_path(material: geometry.Material) -> str:
+    return f"</root/_materials/{sanitise(material.name)}>"
+
+
+def mesh_prim(model_name: str, model: geometry.Model, bind_materials: bool = True) -> Prim:
+    """Mesh w/ a GeomSubset per material; vertex data is formatted straight from MeshArrays"""
+    arrays = geometry.MeshArrays()
+    subsets = list()
+    for material, meshes in meshes_by_material(model).items():
+        start = arrays.num_polygons
+        for mesh in meshes:
+            arrays.extend(mesh.arrays)
+        properties = [
+            Property("uniform token", "elementType", "face"),
+            Property("uniform token", "familyName", "materialBind"),
+            ArrayProperty("int[]", "indices", range(start, arrays.num_polygons))]
+        if bind_materials:  # NOTE: payload layers can't target prims outside themselves
+            properties.append(Property("rel", "material:binding", material_path(material)))
+        subsets.append(Prim(
+            "GeomSubset", sanitise(material.name),
+            metadata={"prepend apiSchemas": ["MaterialBindingAPI"]},
+            properties=properties))
+    # NOTE: inverts winding order
+    face_vertex_indices = array.array("I")
+    start = 0
+    for size in arrays.polygon_sizes:
+        face_vertex_indices.extend(reversed(arrays.indices[start:start + size]))
+        start += size
+    colours = arrays.colours
+    return Prim(
+        "Mesh", model_name,
+        metadata={"prepend apiSchemas": ["MaterialBindingAPI"]},
+        properties=[
+            ArrayProperty("int[]", "faceVertexCounts", arrays.polygon_sizes),
+            ArrayProperty("int[]", "faceVertexIndices", face_vertex_indices),
+            ArrayProperty("point3f[]", "points", arrays.positions, 3),
+            ArrayProperty("normal3f[]", "normals", arrays.normals, 3, interpolation="vertex"),
+            *[
+                ArrayProperty("texCoord2f[]", f"primvars:uv{i}", uv_channel, 2, interpolation="vertex")
+                for i, uv_channel in enumerate(arrays.uvs)],
+            ArrayProperty("color3f[]", "primvars:displayColor", array.array("f", itertools.chain.from_iterable(
+                zip(colours[0::4], colours[1::4], colours[2::4]))), 3, interpolation="vertex"),
+            ArrayProperty("float[]", "primvars:displayOpacity", array.array("f", [
+                1 - (alpha / 255) for alpha in colours[3::4]]), interpolation="vertex")],
+        children=subsets)
+
+
+def model_prim(model_name: str, model: geometry.Model, payload: str = None) -> Prim:
+    """Xform w/ model's Mesh, or a payload arc to a layer containing it"""
+    properties = [
+        Property("float3", "xformOp:rotateXYZ", model.angles),
+        Property("float3", "xformOp:scale", model.scale),
+        Property("double3", "xformOp:translate", model.origin),
+        Property("uniform token[]", "xformOpOrder", [
+            "xformOp:translate", "xformOp:rotateXYZ", "xformOp:scale"])]
+    if payload is None:
+        return Prim("Xform", model_name, properties=properties, children=[mesh_prim(model_name, model)])
+    # material bindings are made from this layer, on top of the payload's Mesh
+    bindings = [
+        Prim(None, sanitise(material.name), specifier="over", properties=[
+            Property("rel", "material:binding", material_path(material))])
+        for material in meshes_by_material(model)]
+    return Prim(
+        "Xform", model_name,
+        metadata={"prepend payload": f"@{payload}@"},
+        properties=properties,
+        children=[Prim(None, model_name, specifier="over", children=bindings)])
+
+
+def save_payload(filename: str, model_name: str, model: geometry.Model):
+    """write model's Mesh to a layer of it's own; run in worker processes"""
+    layer = Usd()
+    layer.metadata["defaultPrim"] = model_name
+    layer.prims = [Prim("Xform", model_name, children=[mesh_prim(model_name, model, bind_materials=False)])]
+    layer.save_as(filename)
+
+
 class Usd(base.SceneDescription):
     """Pixar's Universal Scene Description format"""
     models: Dict[str, geometry.Model]
@@ -160,75 +278,12 @@ class Usd(base.SceneDescription):
     # TODO: material variants based on lightmap & cubemap indices (titanfall2)
     # -- could maybe do per-polygon attributes to encode this
     # TODO: catch duplicate material names ('Duplicate prim' will not load)
-    def regenerate_prims(self):
-        """build self.prims from self.models"""
+    def regenerate_prims(self, payload_folder: str = None):
+        """build self.prims from self.models; models are payloads in payload_folder if given"""
         # translate models
-        model_prims = list()
-        for model_name, model in self.models.items():
-            material_polygons = collections.defaultdict(list)
-            # ^ {Material: [Polygon]}
-            for mesh in model.meshes:
-                material_polygons[mesh.material].extend(mesh.polygons)
-            # core mesh properties
-            face_lengths = [
-                len(polygon.vertices)
-                for polygons in material_polygons.values()
-                for polygon in polygons]
-            vertices = [
-                vertex
-                for polygons in material_polygons.values()
-                for polygon in polygons
-                for vertex in reversed(polygon.vertices)]
-            # NOTE: crazy inefficient, but splitting models sucks
-            uvs = [
-                [
-                    tuple(vertex.uv[i]) if i < len(vertex.uv) else (0, 0)
-                    for vertex in vertices]
-                for i in range(max(len(vertex.uv) for vertex in vertices))]
-            # material binding spans
-            start = 0
-            material_bindings = list()
-            for material, polygons in material_polygons.items():
-                material_bindings.append(Prim(
-                    "GeomSubset", sanitise(material.name),
-                    metadata={
-                        "prepend apiSchemas": ["MaterialBindingAPI"]},
-                    properties=[
-                        Property("uniform token", "elementType", "face"),
-                        Property("uniform token", "familyName", "materialBind"),
-                        Property("int[]", "indices", [*range(start, start + len(polygons))]),
-                        Property("rel", "material:binding", "</_materials/sanitise>")]))
-                start += len(polygons)
-            # model prim
-            model_prims.append(Prim(
-                "Xform", model_name,
-                properties=[
-                    Property("float3", "xformOp:rotateXYZ", model.angles),
-                    Property("float3", "xformOp:scale", model.scale),
-                    Property("double3", "xformOp:translate", model.origin),
-                    Property("uniform token[]", "xformOpOrder", [
-                        "xformOp:translate", "xformOp:rotateXYZ", "xformOp:scale"])],
-                children=[
-                    Prim(
-                        "Mesh", model_name,
-                        metadata={
-                            "prepend apiSchemas": ["MaterialBindingAPI"]},
-                        properties=[
-                            Property("int[]", "faceVertexCounts", face_lengths),
-                            Property("int[]", "faceVertexIndices", [*range(sum(face_lengths))]),
-                            Property("point3f[]", "points", [vertex.position for vertex in vertices]),
-                            Property("normal3f[]", "normals", [vertex.normal for vertex in vertices]),
-                            *[
-                                Property("texCoord2f[]", f"primvars:uv{i}", uv_layer, interpolation="faceVarying")
-                                for i, uv_layer in enumerate(uvs)],
-                            Property("color3f[]", "primvars:displayColor", [
-                                tuple(vertex.colour[:3]) for vertex in vertices],
-                                interpolation="vertex"),
-                            Property("float[]", "primvars:displayOpacity", [
-                                1 - (vertex.colour[3] / 255)
-                                for vertex in vertices],
-                                interpolation="vertex")],
-                        children=material_bindings)]))
+        model_prims = [
+            model_prim(model_name, model, None if payload_folder is None else f"./{payload_folder}/{model_name}.usda")
+            for model_name, model in self.models.items()]
         # material prims
         materials = {
                 mesh.material
@@ -246,3 +301,29 @@ class Usd(base.SceneDescription):
             Prim("Scope", "_materials", children=[
                 *material_prims])])
         self.prims = [root]
+
+    def save_as(self, filename: str, payloads: bool = False, max_workers: int = None, block_size: int = 2 ** 10):
+        """payloads splits each model into a layer of it's own, written in parallel"""
+        # NOTE: payloads are only loaded on request, so a DCC can open the map w/o any geometry
+        folder, short_filename = os.path.split(filename)
+        if folder != "":
+            assert os.path.isdir(folder), f"folder does not exist: '{folder}'"
+        raw_filename, ext = os.path.splitext(short_filename)
+        assert ext.lower() in self.exts_txt, f"cannot save to '{ext}' extension"
+        if not payloads:
+            base.write_lines(filename, self.lines(), block_size)
+            return
+        payload_folder = f"{raw_filename}_payloads"
+        os.makedirs(os.path.join(folder, payload_folder), exist_ok=True)
+        filenames = [
+            os.path.join(folder, payload_folder, f"{model_name}.usda")
+            for model_name in self.models]
+        with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+            for _ in executor.map(save_payload, filenames, self.models.keys(), self.models.values()):
+                pass  # raise any errors
+        prims = self.prims  # restored afterwards, so .lines() isn't left pointing at payloads
+        try:
+            self.regenerate_prims(payload_folder)
+            base.write_lines(filename, self.lines(), block_size)
+        finally:
+            self.prims = prims
@@ -1,6 +1,7 @@
 from __future__ import annotations
 import collections
-from typing import Dict, Generator, List, Union
+import os
+from typing import Dict, Generator, Iterable, List, Union
 
 from ..utils import geometry
 from . import base
@@ -10,14 +11,46 @@ GroupList = Union[
     Dict[str, base.ModelList]]
 
 
+class LinePool:
+    """.obj index of each unique v / vn / vt line"""
+    count: int  # lines written so far; .obj indices start at 1
+    index: Dict[str, int]
+    # ^ {"v 0 0 0": 1}
+
+    def __init__(self):
+        self.count = 0
+        self.index = dict()
+
+    def add(self, lines: Iterable[str], new_lines: List[str]) -> List[int]:
+        """index of each line; lines not in the pool are appended to new_lines"""
+        index = self.index
+        out = list()
+        for line in lines:
+            line_index = index.get(line)
+            if line_index is None:
+                self.count += 1
+                line_index = index[line] = self.count
+                new_lines.append(line)
+            out.append(line_index)
+        return out
+
+    def clear(self):
+        """forget pooled lines; .count is kept, so new lines are still indexed correctly"""
+        self.index = dict()
+
+
 class Obj(base.SceneDescription):
     """Y+ forward; Z+ up"""
     groups: Dict[str, Dict[str, geometry.Model]]
     # ^ {"group_name": {"model_name": model}}
     exts_txt = [".obj"]
+    mtllib: Union[str, None]  # set by .save_as()
+    pooled: bool  # share v, vn & vt lines between polygons
 
     def __init__(self):
         self.groups = dict()
+        self.mtllib = None
+        self.pooled = False
 
     def __repr__(self) -> str:
         num_models = sum(len(ms) for ms in self.groups.values())
@@ -26,6 +59,11 @@ class Obj(base.SceneDescription):
 
     def lines(self) -> Generator[str, None, None]:
         yield "# generated by bsp_tool.extensions.geometry"
+        if self.mtllib is not None:
+            yield f"mtllib {self.mtllib}"
+        if self.pooled:
+            yield from self.pooled_lines()
+            return
 
         def indices(polygon: geometry.Polygon) -> List[int]:
             """rexx magic obj indexing; works for Blender, might break elsewhere"""
@@ -43,8 +81,6 @@ class Obj(base.SceneDescription):
                     polygons[mesh.material].extend(mesh.polygons)
                 for material in polygons:
                     yield f"usemtl {material.name}"
-                    # TODO: generate .mtl files
-                    # -- f"mtllib {material.name}.mtl"
                     for polygon in polygons[material]:
                         vertices = [*map(model.apply_transforms, polygon.vertices)]
                         # NOTE: only the first uv can be saved
@@ -62,9 +98,80 @@ class Obj(base.SceneDescription):
                             yield "f " + " ".join([
                                 f"{i}//{i}" for i in indices(polygon)])
 
+    def mtl_lines(self) -> Generator[str, None, None]:
+        """.mtl w/ every material used"""
+        yield "# generated by bsp_tool.extensions.geometry"
+        materials = dict.fromkeys(
+            mesh.material.name
+            for models in self.groups.values()
+            for model in models.values()
+            for mesh in model.meshes)
+        for name in materials:
+            # TODO: texture maps (map_Kd etc.)
+            yield f"newmtl {name}"
+            yield "Kd 1 1 1"
+
+    def pooled_lines(self) -> Generator[str, None, None]:
+        """.lines(), but polygons share v, vn & vt lines; vertices are transformed in bulk"""
+        # NOTE: lines are pooled per-model, vertices are rarely shared between models
+        pools = [LinePool() for i in range(3)]  # v, vn, vt
+        for group_name, models in self.groups.items():
+            yield f"g {group_name}"
+            for model_name, model in models.items():
+                yield f"o {model_name}"
+                for pool in pools:
+                    pool.clear()
+                meshes = collections.defaultdict(list)
+                # ^ {Material: [Mesh]}
+                for mesh in model.meshes:
+                    meshes[mesh.material].append(mesh)
+                for material in meshes:
+                    yield f"usemtl {material.name}"
+                    for mesh in meshes[material]:
+                        yield from self._pooled_mesh_lines(model.transformed_arrays(mesh.arrays), *pools)
+
+    def save_as(self, filename: str, block_size: int = 2 ** 16):
+        """writes .obj & .mtl; lines are written in blocks, the whole file is never held in memory"""
+        folder, short_filename = os.path.split(filename)
+        if folder != "":
+            assert os.path.isdir(folder), f"folder does not exist: '{folder}'"
+        raw_filename, ext = os.path.splitext(short_filename)
+        assert ext.lower() in self.exts, f"cannot save to unknown extension: '{ext}'"
+        self.mtllib = f"{raw_filename}.mtl"
+        with open(os.path.join(folder, self.mtllib), "w") as mtl_file:
+            mtl_file.write("\n".join(self.mtl_lines()) + "\n")
+        base.write_lines(filename, self.lines(), block_size)
+
+    @staticmethod
+    def _pooled_mesh_lines(arrays: geometry.MeshArrays, v: LinePool, vn: LinePool, vt: LinePool) -> List[str]:
+        """new v, vn & vt lines, then f lines"""
+        # NOTE: only the first uv can be saved
+        new_lines = list()
+        positions, normals = arrays.positions, arrays.normals
+        v_indices = v.add(
+            ["v %.7g %.7g %.7g" % xyz for xyz in zip(positions[0::3], positions[1::3], positions[2::3])],
+            new_lines)
+        vn_indices = vn.add(
+            ["vn %.7g %.7g %.7g" % xyz for xyz in zip(normals[0::3], normals[1::3], normals[2::3])],
+            new_lines)
+        if len(arrays.uvs) > 0:
+            uvs = arrays.uvs[0]
+            vt_indices = vt.add(["vt %.7g %.7g" % uv for uv in zip(uvs[0::2], uvs[1::2])], new_lines)
+            corners = [f"{i}/{j}/{k}" for i, j, k in zip(v_indices, vt_indices, vn_indices)]
+        else:  # no uv
+            corners = [f"{i}//{k}" for i, k in zip(v_indices, vn_indices)]
+        # NOTE: inverts winding order; which is desired
+        start = 0
+        for size in arrays.polygon_sizes:
+            new_lines.append("f " + " ".join([corners[i] for i in reversed(arrays.indices[start:start + size])]))
+            start += size
+        return new_lines
+
     @classmethod
-    def from_groups(cls, groups: GroupList) -> Obj:
+    def from_groups(cls, groups: GroupList, pooled: bool = False) -> Obj:
+        """pooled polygons share v, vn & vt lines; smaller & faster to write"""
         out = cls()
+        out.pooled = pooled
         if isinstance(groups, (list, tuple, set)):
             groups = {
                 f"group_{i:03d}": group
@@ -74,12 +181,12 @@ class Obj(base.SceneDescription):
         return out
 
     @classmethod
-    def from_models(cls, models: base.ModelList) -> Obj:
+    def from_models(cls, models: base.ModelList, pooled: bool = False) -> Obj:
         if isinstance(models, (list, tuple, set)):
             models = {
                 f"model_{i:03d}": model
                 for i, model in enumerate(models)}
         assert isinstance(models, dict), "'models' must be a ModelList!"
-        return cls.from_groups({"group_000": models})
+        return cls.from_groups({"group_000": models}, pooled)
 
     # TODO: @classmethod from_text(cls, raw_obj: str) -> Obj:
@@ -1,8 +1,9 @@
 __all__ = [
-    "binary", "editor", "geometry", "matrix", "physics",
+    "binary", "cache", "editor", "geometry", "matrix", "physics",
     "quaternion", "texture", "vector"]
 
 from . import binary
+from . import cache
 from . import editor
 from . import geometry
 from . import matrix
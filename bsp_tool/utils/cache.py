@@ -0,0 +1,64 @@
+from __future__ import annotations
+import collections
+import threading
+from typing import Any, Callable, Hashable
+
+
+class LRUCache:
+    """least recently used cache w/ a budget in bytes"""
+    max_size: int  # budget in bytes
+    size: int  # bytes currently cached
+    sizeof: Callable[[Any], int]  # len by default
+    _entries: collections.OrderedDict
+    # ^ {key: value}; least recently used first
+    _lock: threading.Lock
+    # NOTE: values bigger than max_size are never cached
+
+    def __init__(self, max_size: int = 64 * 2 ** 20, sizeof: Callable[[Any], int] = len):
+        self.max_size = max_size
+        self.size = 0
+        self.sizeof = sizeof
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self)} entries {self.size}/{self.max_size} bytes>"
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value = self._entries.pop(key)
+            self.size -= self.sizeof(value)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        value_size = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.size -= self.sizeof(self._entries.pop(key))
+            if value_size > self.max_size:
+                return
+            self._entries[key] = value
+            self.size += value_size
+            while self.size > self.max_size:
+                key, old_value = self._entries.popitem(last=False)
+                self.size -= self.sizeof(old_value)
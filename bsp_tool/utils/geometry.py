@@ -1,7 +1,8 @@
 from __future__ import annotations
+import array
 import collections
 import itertools
-from typing import Any, List, Tuple
+from typing import Any, Iterable, List, Tuple
 
 from . import vector
 
@@ -15,6 +16,71 @@ def triangle_fan(num_vertices: int) -> List[int]:
             for i in range(3, num_vertices)]]))
 
 
+def optimise_vertex_cache(triangles: Iterable[int], cache_size: int = 16) -> array.array:
+    """reorders triangles so vertices are reused while still in a GPU's post-transform cache"""
+    # NOTE: Tipsify; Sander, Nehab & Barczak, "Fast Triangle Reordering for Vertex Locality and Reduced Overdraw"
+    triangles = array.array("I", triangles)
+    assert len(triangles) % 3 == 0
+    local_index = {index: i for i, index in enumerate(dict.fromkeys(triangles))}
+    global_index = list(local_index)
+    local = [local_index[index] for index in triangles]
+    num_vertices, num_triangles = len(global_index), len(local) // 3
+    # triangles using each vertex
+    live = [0] * num_vertices  # unemitted triangles using each vertex
+    for index in local:
+        live[index] += 1
+    start = list(itertools.accumulate(live, initial=0))
+    adjacent = [0] * len(local)
+    fill = start[:-1]
+    for i, index in enumerate(local):
+        adjacent[fill[index]] = i // 3
+        fill[index] += 1
+    # emit triangles fanning around each vertex, walking to the next vertex still in the cache
+    cache_time = [0] * num_vertices
+    time = cache_size + 1
+    emitted = bytearray(num_triangles)
+    dead_ends = list()  # recently used vertices; fallbacks when the fan runs dry
+    cursor = 0  # fallback when dead_ends runs dry
+    out = array.array("I")
+    fanning = 0 if num_triangles > 0 else -1
+    while fanning >= 0:
+        candidates = set()
+        for triangle in adjacent[start[fanning]:start[fanning + 1]]:
+            if emitted[triangle]:
+                continue
+            emitted[triangle] = 1
+            for index in local[triangle * 3:triangle * 3 + 3]:
+                out.append(global_index[index])
+                dead_ends.append(index)
+                candidates.add(index)
+                live[index] -= 1
+                if time - cache_time[index] > cache_size:  # cache miss
+                    cache_time[index] = time
+                    time += 1
+        # pick the candidate w/ the most triangles left that will still be in the cache
+        fanning, best = -1, -1
+        for index in candidates:
+            if live[index] > 0:
+                priority = 0
+                if time - cache_time[index] + 2 * live[index] <= cache_size:
+                    priority = time - cache_time[index]
+                if priority > best:
+                    fanning, best = index, priority
+        if fanning == -1:
+            while len(dead_ends) > 0:
+                index = dead_ends.pop()
+                if live[index] > 0:
+                    fanning = index
+                    break
+            else:
+                while cursor < num_vertices:
+                    if live[cursor] > 0:
+                        fanning = cursor
+                        break
+                    cursor += 1
+    return out
+
+
 def triangle_soup(vertices: List[Vertex]) -> List[Polygon]:
     vertices = tuple(vertices)  # no generators, we need len
     assert len(vertices) % 3 == 0
@@ -152,17 +218,176 @@ class Material:
         return f"{self.__class__.__name__}({self.name!r})"
 
 
+class MeshArrays:
+    """struct-of-arrays vertex data; no Vertex or Polygon objects until asked for"""
+    positions: array.array  # "f" x, y, z per vertex
+    normals: array.array  # "f" x, y, z per vertex
+    uvs: List[array.array]  # "f" u, v per vertex; one array per uv channel
+    colours: array.array  # "f" r, g, b, a per vertex
+    indices: array.array  # "I" vertex indices of each polygon, in order
+    polygon_sizes: array.array  # "I" number of indices in each polygon
+    # NOTE: polygons are kept intact (not triangulated) so face_mesh ngons survive
+    # -- use .triangles() for an index buffer
+
+    def __init__(self, num_uvs: int = 0):
+        self.positions = array.array("f")
+        self.normals = array.array("f")
+        self.uvs = [array.array("f") for i in range(num_uvs)]
+        self.colours = array.array("f")
+        self.indices = array.array("I")
+        self.polygon_sizes = array.array("I")
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__name__} {len(self)} vertices, {self.num_polygons} polygons>"
+
+    def __len__(self) -> int:
+        return len(self.positions) // 3
+
+    @property
+    def num_polygons(self) -> int:
+        return len(self.polygon_sizes)
+
+    def add_vertex(self, position, normal, *uvs, colour=(0.0,) * 4) -> int:
+        """returns the index of the new vertex"""
+        index = len(self)
+        self.positions.extend(position)
+        self.normals.extend(normal)
+        if len(uvs) > len(self.uvs):
+            self.uvs.extend([array.array("f", [0.0] * index * 2) for i in range(len(uvs) - len(self.uvs))])
+        for uv_channel, uv in itertools.zip_longest(self.uvs, uvs, fillvalue=(0.0, 0.0)):
+            uv_channel.extend(uv)
+        self.colours.extend(colour)
+        return index
+
+    def add_polygon(self, indices: Iterable[int]):
+        start = len(self.indices)
+        self.indices.extend(indices)
+        assert len(self.indices) - start >= 3
+        self.polygon_sizes.append(len(self.indices) - start)
+
+    def add_triangles(self, indices: Iterable[int]):
+        start = len(self.indices)
+        self.indices.extend(indices)
+        num_indices = len(self.indices) - start
+        assert num_indices % 3 == 0
+        self.polygon_sizes.extend([3] * (num_indices // 3))
+
+    def extend(self, other: MeshArrays):
+        """append all of other's vertices & polygons"""
+        offset = len(self)
+        num_uvs = max(len(self.uvs), len(other.uvs))
+        self.positions.extend(other.positions)
+        self.normals.extend(other.normals)
+        # pad missing uv channels w/ (0, 0)
+        self.uvs.extend([array.array("f", [0.0] * offset * 2) for i in range(num_uvs - len(self.uvs))])
+        blank = array.array("f", [0.0] * len(other) * 2)
+        for i, uv_channel in enumerate(self.uvs):
+            uv_channel.extend(other.uvs[i] if i < len(other.uvs) else blank)
+        self.colours.extend(other.colours)
+        if offset == 0:
+            self.indices.extend(other.indices)
+        else:
+            self.indices.extend([offset + i for i in other.indices])
+        self.polygon_sizes.extend(other.polygon_sizes)
+
+    def gather(self, indices: Iterable[int]) -> MeshArrays:
+        """new MeshArrays of triangles; copies only the vertices indices use"""
+        indices = array.array("I", indices)
+        assert len(indices) % 3 == 0
+        local_index = {index: None for index in indices}  # first use order
+        for i, index in enumerate(local_index):
+            local_index[index] = i
+        out = MeshArrays()
+        for name, stride in (("positions", 3), ("normals", 3), ("colours", 4)):
+            source = getattr(self, name)
+            setattr(out, name, array.array("f", itertools.chain.from_iterable(
+                source[i * stride:(i + 1) * stride] for i in local_index)))
+        out.uvs = [
+            array.array("f", itertools.chain.from_iterable(uv_channel[i * 2:i * 2 + 2] for i in local_index))
+            for uv_channel in self.uvs]
+        out.indices = array.array("I", map(local_index.__getitem__, indices))
+        out.polygon_sizes = array.array("I", [3]) * (len(indices) // 3)
+        return out
+
+    def vertex(self, index: int) -> Vertex:
+        i2, i3, i4 = index * 2, index * 3, index * 4
+        return Vertex(
+            self.positions[i3:i3 + 3],
+            self.normals[i3:i3 + 3],
+            *[uv_channel[i2:i2 + 2] for uv_channel in self.uvs],
+            colour=self.colours[i4:i4 + 4])
+
+    def as_polygons(self) -> List[Polygon]:
+        """Polygon view; each corner gets its own Vertex, so edits don't leak between polygons"""
+        out = list()
+        start = 0
+        for size in self.polygon_sizes:
+            out.append(Polygon([self.vertex(i) for i in self.indices[start:start + size]]))
+            start += size
+        return out
+
+    def triangles(self) -> array.array:
+        """index buffer; polygons are triangulated as fans"""
+        if all(size == 3 for size in self.polygon_sizes):
+            return array.array("I", self.indices)
+        out = array.array("I")
+        start = 0
+        for size in self.polygon_sizes:
+            polygon = self.indices[start:start + size]
+            out.extend([polygon[i] for i in triangle_fan(size)])
+            start += size
+        return out
+
+    @classmethod
+    def from_polygons(cls, polygons: List[Polygon]) -> MeshArrays:
+        out = cls(max([len(vertex.uv) for polygon in polygons for vertex in polygon.vertices], default=0))
+        for polygon in polygons:
+            out.add_polygon([
+                out.add_vertex(vertex.position, vertex.normal, *vertex.uv, colour=vertex.colour)
+                for vertex in polygon.vertices])
+        return out
+
+
 class Mesh:
     material: Material
-    polygons: List[Polygon]
+    polygons: List[Polygon]  # generated from .arrays on first access
+    arrays: MeshArrays  # generated from .polygons on first access
+    # NOTE: whichever was given is the source of truth, the other is a one-off copy
+    # -- edits to one are not reflected in the other
 
-    def __init__(self, material=Material("default"), polygons=list()):
+    def __init__(self, material=Material("default"), polygons=None, arrays=None):
         self.material = material
-        self.polygons = polygons
+        if polygons is None and arrays is None:
+            polygons = list()
+        self._polygons = polygons
+        self._arrays = arrays
 
     def __repr__(self) -> str:
         material = self.material
-        return f"<{self.__class__.__name__} {len(self.polygons)} polygons, {material=!r}>"
+        num_polygons = len(self._polygons) if self._polygons is not None else self._arrays.num_polygons
+        return f"<{self.__class__.__name__} {num_polygons} polygons, {material=!r}>"
+
+    @property
+    def polygons(self) -> List[Polygon]:
+        if self._polygons is None:
+            self._polygons = self._arrays.as_polygons()
+        return self._polygons
+
+    @polygons.setter
+    def polygons(self, new_polygons: List[Polygon]):
+        self._polygons = new_polygons
+        self._arrays = None
+
+    @property
+    def arrays(self) -> MeshArrays:
+        if self._arrays is None:
+            self._arrays = MeshArrays.from_polygons(self._polygons)
+        return self._arrays
+
+    @arrays.setter
+    def arrays(self, new_arrays: MeshArrays):
+        self._arrays = new_arrays
+        self._polygons = None
 
 
 class Model:
@@ -191,8 +416,17 @@ class Model:
     def merge_meshes(meshes: List[Mesh]) -> List[Mesh]:
         sort = collections.defaultdict(list)
         for mesh in meshes:
-            sort[mesh.material].extend(mesh.polygons)
-        return [Mesh(material, polygons) for material, polygons in sort.items()]
+            sort[mesh.material].append(mesh)
+        out = list()
+        for material, meshes in sort.items():
+            if all(mesh._arrays is not None for mesh in meshes):  # merge w/o generating polygons
+                arrays = MeshArrays()
+                for mesh in meshes:
+                    arrays.extend(mesh._arrays)
+                out.append(Mesh(material, arrays=arrays))
+            else:
+                out.append(Mesh(material, [polygon for mesh in meshes for polygon in mesh.polygons]))
+        return out
 
     def apply_transforms(self, vertex: Vertex) -> Vertex:
         # scale
@@ -206,6 +440,31 @@ class Model:
         vertex.position += self.origin
         return vertex
 
+    @property
+    def rotation_matrix(self) -> List[vector.vec3]:
+        """columns; rotating by this matrix matches vec3.rotated(*self.angles)"""
+        return [vector.vec3(*axis).rotated(*self.angles) for axis in ((1, 0, 0), (0, 1, 0), (0, 0, 1))]
+
+    def transformed_arrays(self, arrays: MeshArrays) -> MeshArrays:
+        """.apply_transforms() for every vertex at once; uvs, colours & indices are shared, not copied"""
+        (ax, ay, az), (bx, by, bz), (cx, cy, cz) = self.rotation_matrix
+        ox, oy, oz = self.origin
+        sx, sy, sz = self.scale
+        out = MeshArrays()
+        out.uvs, out.colours = arrays.uvs, arrays.colours
+        out.indices, out.polygon_sizes = arrays.indices, arrays.polygon_sizes
+        # scale folded into the rotation matrix
+        out.positions = array.array("f", itertools.chain.from_iterable(
+            (x * ax + y * bx + z * cx + ox, x * ay + y * by + z * cy + oy, x * az + y * bz + z * cz + oz)
+            for x, y, z in zip(
+                (x * sx for x in arrays.positions[0::3]),
+                (y * sy for y in arrays.positions[1::3]),
+                (z * sz for z in arrays.positions[2::3]))))
+        out.normals = array.array("f", itertools.chain.from_iterable(
+            (x * ax + y * bx + z * cx, x * ay + y * by + z * cy, x * az + y * bz + z * cz)
+            for x, y, z in zip(arrays.normals[0::3], arrays.normals[1::3], arrays.normals[2::3])))
+        return out
+
     @property
     def transform_matrix(self) -> List[List[float]]:
         """for .gtlf/.glb & .usd/.usda"""
@@ -7,8 +7,10 @@ from types import ModuleType
 from typing import Any, Dict, List
 
 from . import base
+from . import external
 from . import id_software
 from . import lumps
+from .archives import pkware
 
 
 def decompress(data: bytes) -> bytes:
@@ -77,6 +79,20 @@ class GameLump:
         out[1:1] = headers
         return b"".join(out)
 
+    def is_dirty(self) -> bool:
+        """True if any child lump may have changed since loading"""
+        # NOTE: children w/o an .is_dirty() method are assumed to have changed
+        return any(
+            not hasattr(getattr(self, name), "is_dirty") or getattr(self, name).is_dirty()
+            for name in self.headers)
+
+    def mark_clean(self):
+        for name in self.headers:
+            lump = getattr(self, name)
+            if hasattr(lump, "mark_clean") and not isinstance(lump, lumps.RawBspLump):
+                lump.mark_clean()
+                # NOTE: RawBspLumps still point at the old bytes, so they stay dirty
+
     def mount_lump(self, name: str, header: object, sub_offset: int = 0):
         stream = self.stream
         offset, length = header.offset, header.length
@@ -241,8 +257,11 @@ class ValveBsp(base.Bsp):
                 BspLump = lumps.BspLump.from_stream(stream, LumpClass, offset, length)
             elif lump_name in self.branch.SPECIAL_LUMP_CLASSES:
                 SpecialLumpClass = self.branch.SPECIAL_LUMP_CLASSES[lump_name][lump_header.version]
-                stream.seek(offset)
-                BspLump = SpecialLumpClass.from_bytes(stream.read(length))
+                if issubclass(SpecialLumpClass, pkware.Zip):  # PAKFILE; read in place, edits are appended in memory
+                    BspLump = SpecialLumpClass.from_stream(external.RangeView(stream, offset, length))
+                else:
+                    stream.seek(offset)
+                    BspLump = SpecialLumpClass.from_bytes(stream.read(length))
             elif lump_name in self.branch.BASIC_LUMP_CLASSES:
                 LumpClass = self.branch.BASIC_LUMP_CLASSES[lump_name][lump_header.version]
                 BspLump = lumps.BasicBspLump.from_stream(stream, LumpClass, offset, length)
@@ -256,7 +275,7 @@ class ValveBsp(base.Bsp):
         setattr(self, lump_name, BspLump)
 
     @classmethod
-    def from_stream(cls, branch: ModuleType, filepath: str, stream: io.BytesIO) -> ValveBsp:
+    def from_stream(cls, branch: ModuleType, filepath: str, stream: io.BytesIO, lazy: bool = False) -> ValveBsp:
         bsp = cls(branch, filepath)
         bsp.file = stream
         # collect metadata
@@ -280,7 +299,7 @@ class ValveBsp(base.Bsp):
         bsp.headers = dict()
         bsp.loading_errors: Dict[str, Exception] = dict()
         for lump_name, lump_header in bsp._header_generator(offset=8):
-            bsp.mount_lump(lump_name, lump_header, bsp.file)
+            bsp._load_lump(lump_name, lump_header, lazy)
         return bsp
 
     def lump_as_bytes(self, lump_name: str) -> bytes:
@@ -301,6 +320,9 @@ class ValveBsp(base.Bsp):
                 if lump_version not in all_lump_classes[lump_name]:
                     return bytes(lump_entries)
                 # NOTE: if the lump's version is mapped, it will be handled below
+        # BspLump -> bytes (only changed entries are re-encoded)
+        if isinstance(lump_entries, lumps.RawBspLump):
+            return bytes(lump_entries)
         # BasicBspLump -> bytes
         if lump_name in self.branch.BASIC_LUMP_CLASSES:
             BasicLumpClass = self.branch.BASIC_LUMP_CLASSES[lump_name][lump_version]
@@ -324,62 +346,53 @@ class ValveBsp(base.Bsp):
                             key=lambda L: (self.headers[L.name].offset, self.headers[L.name].length))
         # ^ {"lump.name": LumpHeader}
         # NOTE: messes up on empty lumps, so we can't get an exact 1:1 copy /;
-        raw_lumps: Dict[str, bytes] = dict()
-        # ^ {"LUMP.name": b"raw lump data]"}
-        for LUMP in self.branch.LUMP:
-            try:
-                lump_bytes = self.lump_as_bytes(LUMP.name)
-            except Exception as exc:
-                print(f"Failed to convert {LUMP.name} to bytes!")
-                raise exc
-            if lump_bytes != b"":  # don't write empty lumps
-                raw_lumps[LUMP.name] = lump_bytes
-        # recalculate headers
-        current_offset = 0
-        headers = dict()
-        for LUMP in lump_order:
-            # NOTE: fourCC should default to zero, we don't repack
-            if LUMP.name not in raw_lumps:  # lump is not present
-                headers[LUMP.name] = self.branch.LumpHeader(
-                    offset=current_offset, length=0, version=self.headers[LUMP.name].version)
-                continue
-            # wierd hack to align unused lump offsets correctly
-            if current_offset == 0:  # shift to end of header section
-                # struct SourceBspHeader { char file_magic[4]; int version; LumpHeader headers[64]; int revision; };
-                current_offset = 8 + (struct.calcsize(self.branch.LumpHeader._format) * len(self.branch.LUMP)) + 4
-            length = len(raw_lumps[LUMP.name])
-            headers[LUMP.name] = self.branch.LumpHeader(
-                offset=current_offset, length=length, version=self.headers[LUMP.name].version)
-            current_offset += length
-            if current_offset % 4 != 0:
-                current_offset += 4 - current_offset % 4
-        del current_offset
-        if "GAME_LUMP" in raw_lumps:
-            raw_lumps["GAME_LUMP"] = self.GAME_LUMP.as_bytes(headers["GAME_LUMP"].offset)
-        # make file
+        # NOTE: lumps are streamed straight to outfile, then headers are back-patched
+        # -- so we never hold more than one encoded lump in memory
+        temp_filename = self.temp_filename_for(filename)
         os.makedirs(os.path.dirname(os.path.realpath(filename)), exist_ok=True)
-        outfile = open(filename, "wb")
-        outfile.write(self.file_magic)
-        version = self.version
-        if isinstance(self.version, tuple):
-            version = version[0] + version[1] << 16
-        outfile.write(version.to_bytes(4, self.endianness))
-        # write headers
-        for LUMP in self.branch.LUMP:
-            outfile.write(headers[LUMP.name].as_bytes())
-        outfile.write(self.revision.to_bytes(4, self.endianness))
-        # write lump contents (cannot be done until headers allocate padding)
-        for LUMP in lump_order:
-            if LUMP.name not in raw_lumps:
-                continue
-            padding_length = headers[LUMP.name].offset - outfile.tell()
-            if padding_length > 0:  # NOTE: padding_length should not exceed 3
-                outfile.write(b"\0" * padding_length)
-            outfile.write(raw_lumps[LUMP.name])
-        # final padding
-        end = outfile.tell()
-        padding_length = 0
-        if end % 4 != 0:
-            padding_length = 4 - end % 4
-        outfile.write(b"\0" * padding_length)
-        outfile.close()  # main .bsp is written
+        try:
+            with open(temp_filename, "wb") as outfile:
+                outfile.write(self.file_magic)
+                version = self.version
+                if isinstance(self.version, tuple):
+                    version = version[0] + (version[1] << 16)
+                outfile.write(version.to_bytes(4, self.endianness))
+                # reserve headers
+                # struct SourceBspHeader { char file_magic[4]; int version; LumpHeader headers[64]; int revision; };
+                headers_offset = outfile.tell()
+                outfile.write(b"\0" * struct.calcsize(self.branch.LumpHeader._format) * len(self.branch.LUMP))
+                outfile.write(self.revision.to_bytes(4, self.endianness))
+                # write lump contents
+                current_offset = 0  # wierd hack to align unused lump offsets correctly
+                headers = dict()
+                for LUMP in lump_order:
+                    offset = outfile.tell()
+                    try:
+                        if LUMP.name == "GAME_LUMP" and not isinstance(getattr(self, "GAME_LUMP", None), lumps.RawBspLump):
+                            if hasattr(self, "GAME_LUMP"):  # child lump offsets are relative to the file
+                                outfile.write(self.GAME_LUMP.as_bytes(offset))
+                        else:
+                            for chunk in self.lump_as_chunks(LUMP.name):
+                                outfile.write(chunk)
+                    except Exception as exc:
+                        print(f"Failed to convert {LUMP.name} to bytes!")
+                        raise exc
+                    length = outfile.tell() - offset
+                    # NOTE: fourCC should default to zero, we don't repack
+                    if length == 0:  # lump is not present
+                        headers[LUMP.name] = self.branch.LumpHeader(
+                            offset=current_offset, length=0, version=self.headers[LUMP.name].version)
+                        continue
+                    headers[LUMP.name] = self.branch.LumpHeader(
+                        offset=offset, length=length, version=self.headers[LUMP.name].version)
+                    if outfile.tell() % 4 != 0:  # pad
+                        outfile.write(b"\0" * (4 - outfile.tell() % 4))
+                    current_offset = outfile.tell()
+                # back-patch headers
+                outfile.seek(headers_offset)
+                for LUMP in self.branch.LUMP:
+                    outfile.write(headers[LUMP.name].as_bytes())
+        except Exception:  # don't leave a half-written file behind
+            os.remove(temp_filename)
+            raise
+        self._replace_file(temp_filename, filename, headers)
@@ -15,7 +15,7 @@ class Genesis3DBsp(id_software.IdTechBsp):
     # TODO: mount_lump: validate header.size against sizeof(LumpClass)
 
     @classmethod
-    def from_stream(cls, branch: ModuleType, filepath: str, stream: io.BytesIO) -> Genesis3DBsp:
+    def from_stream(cls, branch: ModuleType, filepath: str, stream: io.BytesIO, lazy: bool = False) -> Genesis3DBsp:
         bsp = cls(branch, filepath)
         bsp.file = stream
         # collect lumps
@@ -27,7 +27,7 @@ class Genesis3DBsp(id_software.IdTechBsp):
             lump_name = bsp.branch.LUMP(lump_header.id).name
             lump_header.offset = bsp.file.tell()
             lump_header.length = lump_header.size * lump_header.count
-            bsp.mount_lump(lump_name, lump_header, bsp.file)
+            bsp._load_lump(lump_name, lump_header, lazy)
             bsp.headers[lump_name] = lump_header
             bsp.file.seek(lump_header.offset + lump_header.length)
         # validate & use HEADER lump
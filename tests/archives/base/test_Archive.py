@@ -0,0 +1,131 @@
+import io
+import zlib
+
+import pytest
+
+from bsp_tool.archives import base
+from bsp_tool.external import File
+
+
+class NameListArchive(base.Archive):
+    ext = "*.test"
+
+    def __init__(self, namelist):
+        super().__init__()
+        self._namelist = namelist
+
+    def namelist(self):
+        return list(self._namelist)
+
+
+archive = NameListArchive([
+    "maps/a.bsp", "maps/sub/b.bsp", "./maps/c.bsp",
+    "readme.txt", "materials/x/y/z.vmt"])
+
+
+def test_is_dir():
+    for folder in (".", "./", "/", "maps", "maps/", "./maps", "maps/sub", "materials/x/y"):
+        assert archive.is_dir(folder)
+    for not_folder in ("maps/a.bsp", "readme.txt", "nope", "materials/y"):
+        assert not archive.is_dir(not_folder)
+
+
+def test_is_file():
+    assert archive.is_file("maps/a.bsp")
+    assert archive.is_file("./maps/c.bsp")
+    assert not archive.is_file("maps")
+    assert archive.path_exists("maps")
+    assert archive.path_exists("readme.txt")
+    assert not archive.path_exists("nope")
+
+
+def test_listdir():
+    assert archive.listdir(".") == ["maps/", "materials/", "readme.txt"]
+    assert archive.listdir("maps/") == ["a.bsp", "c.bsp", "sub/"]
+    assert archive.listdir("materials/x") == ["y/"]
+    try:
+        archive.listdir("nope")
+        raise AssertionError("listdir('nope') should raise")
+    except FileNotFoundError:
+        pass
+
+
+def test_search():
+    assert archive.search("*.bsp") == ["maps/a.bsp", "maps/sub/b.bsp", "./maps/c.bsp"]
+    assert archive.search("maps/*.bsp") == ["maps/a.bsp", "maps/sub/b.bsp"]
+    assert archive.search("maps/sub/*") == ["maps/sub/b.bsp"]
+    assert archive.search("materials/*/y/*", case_sensitive=True) == ["materials/x/y/z.vmt"]
+    assert archive.search("MAPS/*", case_sensitive=True) == list()
+
+
+def test_mount_file_invalidates():
+    archive = NameListArchive(["a.txt"])
+    assert archive.listdir(".") == ["a.txt"]
+    archive._namelist.append("b/c.txt")
+    assert not archive.is_dir("b")  # stale until the next mount / unmount
+    archive.mount_file("extra.bin", File.from_bytes("extra.bin", b""))
+    assert archive.is_dir("b")
+    assert archive.listdir(".") == ["a.txt", "b/"]
+
+
+class BlobArchive(base.Archive):
+    """files are slices of one stream; "*.z" files are compressed"""
+    ext = "*.blob"
+
+    def __init__(self, files: dict):
+        super().__init__()
+        self._file = io.BytesIO(b"".join(files.values()))
+        self.entries = dict()
+        # ^ {"filename": (offset, length)}
+        offset = 0
+        for filename, data in files.items():
+            self.entries[filename] = (offset, len(data))
+            offset += len(data)
+        self.crcs = {filename: zlib.crc32(data) for filename, data in files.items()}
+
+    def crc(self, filename: str) -> int:
+        return self.crcs[filename]
+
+    def locate(self, filename: str):
+        if filename.endswith(".z"):
+            return None
+        return (self._file, *self.entries[filename])
+
+    def namelist(self):
+        return sorted(self.entries)
+
+    def read(self, filename: str) -> bytes:
+        offset, length = self.entries[filename]
+        self._file.seek(offset)
+        return self._file.read(length)
+
+
+def test_contiguous_runs():
+    members = [("c", 200, 50), ("a", 0, 100), ("b", 100, 100), ("d", 1000, 10)]
+    runs = base.contiguous_runs(members, max_gap=0, max_run=1024)
+    assert runs == [(0, 250, [("a", 0, 100), ("b", 100, 100), ("c", 200, 50)]), (1000, 10, [("d", 1000, 10)])]
+    runs = base.contiguous_runs(members, max_gap=1024, max_run=1024)
+    assert [(offset, length) for offset, length, run_members in runs] == [(0, 1010)]
+    runs = base.contiguous_runs(members, max_gap=0, max_run=150)
+    assert [(offset, length) for offset, length, run_members in runs] == [(0, 100), (100, 150), (1000, 10)]
+
+
+def test_extract_all(tmp_path):
+    files = {
+        "maps/a.bsp": b"A" * 300,
+        "maps/b.bsp": b"B" * 200,
+        "readme.txt": b"hello~\n",
+        "data/c.z": b"compressed"}
+    archive = BlobArchive(files)
+    stats = archive.extract_all(tmp_path, max_workers=2, verify=True, max_in_flight=256)
+    for filename, data in files.items():
+        assert (tmp_path / filename).read_bytes() == data
+    assert stats.num_files == 4
+    assert stats.num_bytes == sum(map(len, files.values()))
+    assert stats.num_reads == 2  # 1 run + 1 unlocated file
+    stats = archive.extract_all_matching("maps/*", tmp_path / "maps_only")
+    assert stats.num_files == 2
+    assert (tmp_path / "maps_only" / "maps" / "b.bsp").read_bytes() == files["maps/b.bsp"]
+    archive.crcs["maps/b.bsp"] ^= 1
+    with pytest.raises(RuntimeError):
+        archive.extract_all(tmp_path, verify=True)
@@ -38,3 +38,42 @@ def test_basic():
 
 
 # TODO: set sub_lba is correct for tracks where start_lba != 0
+
+
+def test_raw_sectors():
+    """2352 byte sectors w/ 16 byte headers & 288 bytes of error correction"""
+    sectors = [bytes([i]) * 2048 for i in range(4)]
+    raw_data = b"".join([b"\xFF" * 16 + data + b"\xEE" * 288 for data in sectors])
+    di = RawDiscImage()
+    di.extras = {":memory:": File.from_bytes(":memory:", raw_data)}
+    di.tracks = [Track(TrackMode.BINARY_1, 2352, 0, 4, ":memory:")]
+    assert di.sector_read(1) == sectors[0]
+    assert di.sector_read(3) == b"".join(sectors[1:])
+    di.sector_seek(1)
+    assert di.sector_read(2) == b"".join(sectors[1:3])
+    assert (0, 0) in di.sector_cache
+    # cached reads move the cursor too
+    di.sector_seek(1)
+    assert di.sector_read(3) == b"".join(sectors[1:])
+    assert di.sector_tell() == 4
+
+
+def test_sector_cache():
+    sectors = [bytes([i]) * 2048 for i in range(8)]
+    di = RawDiscImage.from_bytes(b"".join(sectors))
+    di.sector_block_size = 2
+    di.sector_cache_max_read = 4
+    di.sector_seek(3)
+    assert di.sector_read(2) == b"".join(sectors[3:5])
+    assert set(di.sector_cache._entries) == {(0, 1), (0, 2)}  # whole blocks are cached
+    # partial & overlapping reads are served from the cache
+    di.extras[":memory:"] = None
+    di.sector_seek(2)
+    assert di.sector_read(1) == sectors[2]
+    assert di.sector_read(3) == b"".join(sectors[3:6])
+    # large reads bypass the cache
+    di = RawDiscImage.from_bytes(b"".join(sectors))
+    di.sector_block_size = 2
+    di.sector_cache_max_read = 4
+    assert di.sector_read(8) == b"".join(sectors)
+    assert len(di.sector_cache) == 0
@@ -0,0 +1,78 @@
+import struct
+
+from bsp_tool.archives import cdrom
+
+
+def both_endian(format_: str, value: int) -> bytes:
+    return struct.pack(f"<{format_}", value) + struct.pack(f">{format_}", value)
+
+
+def directory(name: bytes, lba: int, size: int, is_dir: bool = False) -> bytes:
+    pad = b"\x00" if len(name) % 2 == 0 else b""
+    length = 33 + len(name) + len(pad)
+    return b"".join([
+        bytes([length, 0]), both_endian("I", lba), both_endian("I", size),
+        b"\x00" * 7, bytes([0x02 if is_dir else 0x00, 0, 0]), both_endian("H", 1),
+        bytes([len(name)]), name, pad])
+
+
+def sector(data: bytes) -> bytes:
+    assert len(data) <= 2048
+    return data.ljust(2048, b"\x00")
+
+
+def path_table_entry(name: bytes, lba: int, parent: int) -> bytes:
+    pad = b"\x00" if len(name) % 2 != 0 else b""
+    return bytes([len(name), 0]) + struct.pack("<IH", lba, parent) + name + pad
+
+
+def iso_bytes() -> bytes:
+    """README.TXT & MAPS/TEST.BSP"""
+    # sectors: 16 pvd, 17 terminator, 18 path table, 19 root, 20 MAPS, 21 & 22 files
+    readme, bsp = b"hello~\n", b"VBSP" + b"\x00" * 2100  # 2 sectors
+    path_table = path_table_entry(b"\x00", 19, 1) + path_table_entry(b"MAPS", 20, 1)
+    pvd = b"".join([
+        b"\x01CD001\x01\x00", b" " * 32, b"TEST".ljust(32), b"\x00" * 8,
+        both_endian("I", 24), b"\x00" * 32,
+        both_endian("H", 1), both_endian("H", 1), both_endian("H", 2048),
+        both_endian("I", len(path_table)),
+        struct.pack("<2I", 18, 0), struct.pack(">2I", 0, 0),
+        directory(b"\x00", 19, 2048, True),
+        b" " * (128 * 4 + 37 * 3), (b"0" * 16 + b"\x00") * 4, b"\x01\x00", b" " * 512])
+    root = b"".join([
+        directory(b"\x00", 19, 2048, True), directory(b"\x01", 19, 2048, True),
+        directory(b"MAPS", 20, 2048, True), directory(b"README.TXT;1", 21, len(readme))])
+    maps = b"".join([
+        directory(b"\x00", 20, 2048, True), directory(b"\x01", 19, 2048, True),
+        directory(b"TEST.BSP;1", 22, len(bsp))])
+    return b"".join([
+        b"\x00" * 2048 * 16, sector(pvd), sector(b"\xFFCD001\x01"), sector(path_table),
+        sector(root), sector(maps), sector(readme), sector(bsp[:2048]), sector(bsp[2048:])])
+
+
+def test_read():
+    iso = cdrom.Iso.from_bytes(iso_bytes())
+    assert iso.namelist() == ["MAPS/TEST.BSP", "README.TXT"]
+    assert iso.listdir("/") == ["MAPS/", "README.TXT"]
+    assert iso.listdir("./MAPS") == ["TEST.BSP"]
+    assert iso.read("README.TXT") == b"hello~\n"
+    assert iso.read("MAPS/TEST.BSP") == b"VBSP" + b"\x00" * 2100
+    assert iso.read("./MAPS/TEST.BSP") == iso.read("MAPS/TEST.BSP")
+
+
+def test_extract_all(tmp_path):
+    iso = cdrom.Iso.from_bytes(iso_bytes())
+    stats = iso.extract_all_matching("*.BSP", tmp_path, case_sensitive=True, verify=True)
+    assert (tmp_path / "MAPS" / "TEST.BSP").read_bytes() == b"VBSP" + b"\x00" * 2100
+    assert not (tmp_path / "README.TXT").exists()
+    assert stats.num_files == 1
+    stats = iso.extract_all(tmp_path / "all", max_workers=1)
+    assert stats.num_files == 2
+    assert (tmp_path / "all" / "README.TXT").read_bytes() == b"hello~\n"
+
+
+def test_read_range():
+    iso = cdrom.Iso.from_bytes(iso_bytes())
+    assert iso.sizeof("MAPS/TEST.BSP") == 2104
+    assert iso.read_range("MAPS/TEST.BSP", 2, 4) == b"SP\x00\x00"
+    assert iso.read_range("MAPS/TEST.BSP", 2040, 100) == b"\x00" * 64  # spans 2 sectors; clipped at EOF
@@ -1,6 +1,12 @@
+import concurrent.futures
+import struct
+
 import pytest
 
+from bsp_tool import external
 from bsp_tool.archives import id_software
+from bsp_tool.branches.id_software import quake
+from bsp_tool.id_software import QuakeBsp
 
 from ... import files
 
@@ -54,6 +60,56 @@ def test_from_file(filename: str):
         assert isinstance(first_file, bytes), ".read() failed"
 
 
+def pak_bytes(entries: dict) -> bytes:
+    """{"filename": b"data"} -> .pak"""
+    data, file_table = list(), list()
+    offset = 12
+    for filename, raw_data in entries.items():
+        file_table.append(id_software.PakFileEntry(filename.encode(), offset, len(raw_data)))
+        data.append(raw_data)
+        offset += len(raw_data)
+    file_table = b"".join(entry.as_bytes() for entry in file_table)
+    header = b"PACK" + struct.pack("2I", offset, len(file_table))
+    return b"".join([header, *data, file_table])
+
+
+def bsp_bytes() -> bytes:
+    """quake .bsp w/ only an entities lump"""
+    entities = b'{\n"classname" "worldspawn"\n}\n\0'
+    headers = [(4 + 8 * len(quake.LUMP), len(entities)), *[(0, 0)] * (len(quake.LUMP) - 1)]
+    return b"".join([
+        struct.pack("I", quake.BSP_VERSION),
+        *[struct.pack("2I", *header) for header in headers],
+        entities])
+
+
+def test_nested():
+    inner = pak_bytes({"maps/test.bsp": bsp_bytes()})
+    outer = id_software.Pak.from_bytes(pak_bytes({"readme.txt": b"hello~\n", "pak0.pak": inner}))
+    assert outer.view("readme.txt").read() == b"hello~\n"
+    pak = id_software.Pak.from_archive(outer, "pak0.pak")
+    assert isinstance(pak._file, external.RangeView)  # not a copy
+    assert pak.read("maps/test.bsp") == bsp_bytes()
+    bsp = QuakeBsp.from_archive(quake, "maps/test.bsp", pak)
+    assert bsp.file.stream is outer._file  # views of views read from the outermost archive
+    assert bsp.loading_errors == dict()
+    assert bsp.ENTITIES[0]["classname"] == "worldspawn"
+
+
+def test_read_range(tmp_path):
+    filename = str(tmp_path / "pak0.pak")
+    with open(filename, "wb") as pak_file:
+        pak_file.write(pak_bytes({f"{i}.bin": bytes([i]) * 4096 for i in range(4)}))
+    pak = id_software.Pak.from_file(filename)
+    position = pak._file.tell()
+    assert pak.read_range("1.bin", 4090, 16) == b"\x01" * 6
+    assert pak._file.tell() == position  # shared cursor is never moved
+    # reads don't share a cursor, so they can run across threads
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        reads = executor.map(lambda i: pak.read_range(f"{i % 4}.bin", i, 1024), range(256))
+        assert all(data == bytes([i % 4]) * 1024 for i, data in enumerate(reads))
+
+
 # TODO: filesystem utility tests on "Steam | Quake | PAK0.PAK"
 # -- pak.is_dir("sound/")
 # -- pak.is_dir("sound/ambience/")
@@ -23,8 +23,71 @@ def test_from_file(filename: str):
     pak = ion_storm.Pak.from_file(filename)
     namelist = pak.namelist()
     assert isinstance(namelist, list), ".namelist() failed"
-    # NOTE: all entries in pak2.pak are compressed
-    # -- decompression takes approx. 1min per MB
+    # NOTE: all entries in pak2.pak are compressed; see test_decompress
     if len(namelist) != 0:
         first_file = pak.read(namelist[0])
         assert isinstance(first_file, bytes), ".read() failed"
+
+
+# x < 64: copy x + 1 bytes; x < 128: x - 62 zeroes; x < 192: repeat next byte x - 126 times
+# x < 255: copy x - 190 bytes from (next byte + 1) bytes back; x == 255: end
+compressed = b"".join([
+    b"\x02abc",  # "abc"
+    b"\x40",  # "\0\0"
+    b"\x80x",  # "xx"
+    b"\xC0\x02",  # "\0x" (copied from 3 bytes back)
+    b"\xC3\x00",  # "xxxxx" (overlapping copy of the last byte)
+    b"\xFF"])
+decompressed = b"abc\0\0xx\0xxxxxx"
+
+
+def test_decompress():
+    assert ion_storm.decompress(compressed, len(decompressed)) == decompressed
+    with pytest.raises(RuntimeError):
+        ion_storm.decompress(compressed[:-1], len(decompressed))
+
+
+def pak_bytes(entries: dict) -> bytes:
+    """{"filename": (raw_data, decompressed_length)} -> .pak"""
+    data, file_table = list(), list()
+    offset = 12
+    for filename, (raw_data, length) in entries.items():
+        is_compressed = len(raw_data) != length
+        file_table.append(ion_storm.PakFileEntry(
+            filename.encode(), offset, length, len(raw_data) if is_compressed else 0, is_compressed))
+        data.append(raw_data)
+        offset += len(raw_data)
+    file_table = b"".join(entry.as_bytes() for entry in file_table)
+    header = b"PACK" + offset.to_bytes(4, "little") + len(file_table).to_bytes(4, "little")
+    return b"".join([header, *data, file_table])
+
+
+def test_read_cached():
+    pak = ion_storm.Pak.from_bytes(pak_bytes({
+        "maps/test.bsp": (compressed, len(decompressed)),
+        "readme.txt": (b"hello~\n", 7)}))
+    assert pak.read("readme.txt") == b"hello~\n"
+    assert "readme.txt" not in pak.cache  # uncompressed
+    assert pak.read("maps/test.bsp") == decompressed
+    assert pak.cache.get("maps/test.bsp") == decompressed
+
+
+def test_extract_all(tmp_path):
+    pak = ion_storm.Pak.from_bytes(pak_bytes({
+        "maps/test.bsp": (compressed, len(decompressed)),
+        "readme.txt": (b"hello~\n", 7)}))
+    stats = pak.extract_all(tmp_path, max_workers=1, verify=True, max_in_flight=64)
+    assert (tmp_path / "maps" / "test.bsp").read_bytes() == decompressed
+    assert (tmp_path / "readme.txt").read_bytes() == b"hello~\n"
+    assert stats.num_files == 2
+    assert stats.num_bytes == len(decompressed) + 7
+
+
+def test_view():
+    pak = ion_storm.Pak.from_bytes(pak_bytes({
+        "maps/test.bsp": (compressed, len(decompressed)),
+        "readme.txt": (b"hello~\n", 7)}))
+    assert pak.view("readme.txt").read() == b"hello~\n"
+    assert pak.view("maps/test.bsp").read() == decompressed
+    with pytest.raises(NotImplementedError):  # external.File falls back to .read()
+        pak.read_range("maps/test.bsp", 0, 4)
@@ -0,0 +1,173 @@
+import binascii
+import functools
+import lzma
+import operator
+import struct
+import zlib
+
+from bsp_tool.archives import cdrom
+from bsp_tool.archives import mame
+
+from ..cdrom.test_Iso import iso_bytes
+
+
+class BitWriter:
+    def __init__(self):
+        self.bits = list()
+
+    def write(self, value: int, num_bits: int):
+        self.bits.extend((value >> (num_bits - 1 - i)) & 1 for i in range(num_bits))
+
+    def as_bytes(self) -> bytes:
+        bits = self.bits + [0] * (-len(self.bits) % 8)
+        return int("".join(map(str, bits)), 2).to_bytes(len(bits) // 8, "big")
+
+
+def cd_hunk(frames: bytes, base_codec, strip_ecc: bool = False) -> bytes:
+    """compress 8 frames like chd_cd_compressor"""
+    ecc_mask = 0
+    sectors = list()
+    for i, frame in enumerate(range(0, len(frames), mame.FRAME_SIZE)):
+        sector = frames[frame:frame + 2352]
+        if strip_ecc and sector[:12] == mame.cd_sync_header:  # NOTE: chdman also checks the ecc is valid
+            ecc_mask |= 1 << i
+            sector = b"\x00" * 12 + sector[12:0x81C] + b"\x00" * (2352 - 0x81C)
+        sectors.append(sector)
+    subcode = b"".join(frames[i + 2352:i + mame.FRAME_SIZE] for i in range(0, len(frames), mame.FRAME_SIZE))
+    base = base_codec(b"".join(sectors))
+    return bytes([ecc_mask]) + len(base).to_bytes(2, "big") + base + raw_deflate(subcode)
+
+
+def mode1_frame(lba: int, data: bytes) -> bytes:
+    """raw Mode 1 sector w/ ecc, followed by subcode"""
+    sector = bytearray(2352)
+    minute, second, frame = (lba + 150) // 4500, (lba + 150) // 75 % 60, (lba + 150) % 75
+    msf = bytes([int(str(x), 16) for x in (minute, second, frame)])  # BCD
+    sector[:16] = mame.cd_sync_header + msf + b"\x01"
+    sector[16:2064] = data
+    sector[2064:2068] = binascii.crc32(sector[:2064]).to_bytes(4, "little")  # stand-in EDC
+    mame.ecc_generate(memoryview(sector))
+    return bytes(sector) + bytes(range(96))
+
+
+def raw_deflate(data: bytes) -> bytes:
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+def raw_lzma(data: bytes) -> bytes:
+    filters = [{"id": lzma.FILTER_LZMA1, "dict_size": mame.lzma_dict_size(len(data)), "lc": 3, "lp": 0, "pb": 2}]
+    return lzma.compress(data, format=lzma.FORMAT_RAW, filters=filters)
+
+
+def chd_bytes() -> bytes:
+    """iso_bytes() as a Mode 1 track; 7 hunks of 8 frames: cdlz, cdzl, none, 4x self"""
+    hunk_bytes, unit_bytes = 8 * mame.FRAME_SIZE, mame.FRAME_SIZE
+    sectors = [iso_bytes()[i:i + 2048] for i in range(0, len(iso_bytes()), 2048)]
+    sectors += [b"\x00" * 2048] * (24 - len(sectors))
+    sectors += sectors[16:24] * 4  # hunks 3-6 are copies of hunk 2
+    frames = b"".join(sector.ljust(mame.FRAME_SIZE, b"\x00") for sector in sectors)
+    hunks = [frames[i:i + hunk_bytes] for i in range(0, len(frames), hunk_bytes)]
+    blocks = [cd_hunk(hunks[0], raw_lzma), cd_hunk(hunks[1], raw_deflate), hunks[2]]
+    # metadata
+    text = b"TRACK:1 TYPE:MODE1 SUBTYPE:NONE FRAMES:56 PREGAP:0 PGTYPE:MODE1 PGSUB:RW POSTGAP:0\x00"
+    metadata = b"CHT2" + struct.pack(">IQ", len(text), 0) + text
+    # map
+    first_block = 124
+    entries = list()
+    offset = first_block
+    for compression, block, hunk in zip((0, 1, 4), blocks, hunks):
+        crc = binascii.crc_hqx(hunk, 0xFFFF)
+        entries.append(mame.CompressedMapEntryv5(compression, len(block), offset, crc))
+        offset += len(block)
+    entries.extend([mame.CompressedMapEntryv5(mame.Compression.SELF, 0, 2, 0)] * 4)
+    bits = BitWriter()
+    for _ in range(16):  # huffman tree; every code is 4 bits long
+        bits.write(4, 4)
+    for code in (0, 1, 4, 5, 7, 0):  # RLE_SMALL 0 -> 3 more SELF hunks
+        bits.write(code, 4)
+    for entry in entries[:2]:
+        bits.write(entry.length, 24)
+        bits.write(entry.crc, 16)
+    bits.write(entries[2].crc, 16)
+    for entry in entries[3:]:
+        bits.write(entry.offset, 8)
+    raw_map = bits.as_bytes()
+    map_crc = binascii.crc_hqx(b"".join(entry.as_bytes() for entry in entries), 0xFFFF)
+    map_header = struct.pack(">IQ4B", len(raw_map), (first_block << 16) | map_crc, 24, 8, 0, 0)
+    # assemble
+    data = b"".join(blocks)
+    map_offset = first_block + len(data)
+    meta_offset = map_offset + len(map_header) + len(raw_map)
+    header = b"".join([
+        b"MComprHD", struct.pack(">2I", 124, 5), b"cdlzcdzl" + b"\x00" * 8,
+        struct.pack(">3Q2I", len(frames), map_offset, meta_offset, hunk_bytes, unit_bytes), b"\x00" * 60])
+    return b"".join([header, data, map_header, raw_map, metadata])
+
+
+def test_from_bytes():
+    chd = mame.Chd.from_bytes(chd_bytes())
+    assert len(chd.hunk_map) == 7
+    assert [entry.compression for entry in chd.hunk_map] == [0, 1, 4] + [mame.Compression.SELF] * 4
+    assert len(chd.tracks) == 1
+    track = chd.tracks[0]
+    assert (track.mode, track.sector_size, track.start_lba, track.length) == (mame.base.TrackMode.BINARY_1, 2048, 0, 56)
+
+
+def test_read_hunks():
+    chd = mame.Chd.from_bytes(chd_bytes())
+    chd.max_workers = 2
+    hunks = chd.read_hunks(range(7))
+    assert all(len(hunk) == chd.header.hunk_bytes for hunk in hunks)
+    assert hunks[3] == hunks[6] == hunks[2]
+    assert len(chd.hunk_cache) == 3  # self references aren't decompressed again
+    assert chd.read_bytes(mame.FRAME_SIZE * 16, 4) == b"\x01CD0"
+    executor = chd.executor
+    chd.hunk_cache.clear()
+    chd.read_hunks(range(7))
+    assert chd.executor is executor  # one thread pool per archive
+    chd.close()
+    assert chd._executor is None
+    assert chd._file.closed
+    mame.Chd().close()  # nothing to close
+
+
+def test_read_block(tmp_path):
+    filename = tmp_path / "test.chd"
+    filename.write_bytes(chd_bytes())
+    with mame.Chd.from_file(str(filename)) as chd:
+        position = chd._file.tell()
+        chd.read_hunks(range(7))
+        assert chd._file.tell() == position  # blocks are read w/o the shared cursor
+        assert chd.read_bytes(mame.FRAME_SIZE * 16, 4) == b"\x01CD0"
+
+
+def test_iso():
+    iso = cdrom.Iso.from_disc(mame.Chd.from_bytes(chd_bytes()))
+    assert iso.namelist() == ["MAPS/TEST.BSP", "README.TXT"]
+    assert iso.read("README.TXT") == b"hello~\n"
+    assert iso.read("MAPS/TEST.BSP") == b"VBSP" + b"\x00" * 2100
+
+
+def test_ecc_generate():
+    sector = bytearray(2352)
+    sector[:16] = mame.cd_sync_header + b"\x00\x02\x00\x01"
+    sector[16:2064] = bytes(range(256)) * 8
+    mame.ecc_generate(memoryview(sector))
+    assert any(sector[0x81C:2352])
+    # P & Q parity: each row + it's 2 parity bytes sums to 0
+    for rows, offset in ((mame.ecc_p_rows, 0x81C), (mame.ecc_q_rows, 0x8C8)):
+        for i, row in enumerate(rows):
+            parity = sector[offset + i] ^ sector[offset + len(rows) + i]
+            assert functools.reduce(operator.xor, [sector[j] for j in row], parity) == 0
+
+
+def test_ecc_stripped():
+    frames = b"".join(mode1_frame(i, bytes([i]) * 2048) for i in range(8))
+    hunk_bytes = 8 * mame.FRAME_SIZE
+    for codec, base_codec in ((b"cdzl", raw_deflate), (b"cdlz", raw_lzma)):
+        block = cd_hunk(frames, base_codec, strip_ecc=True)
+        assert block[0] == 0xFF  # every frame was stripped
+        hunk = mame.decompressors[codec](block, hunk_bytes)
+        assert hunk == frames  # sync header & ecc are regenerated
+        assert binascii.crc_hqx(hunk, 0xFFFF) == binascii.crc_hqx(frames, 0xFFFF)
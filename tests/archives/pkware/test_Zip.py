@@ -1,5 +1,8 @@
+import io
 from itertools import zip_longest
+import zipfile
 
+from bsp_tool import external
 from bsp_tool.archives import pkware
 from bsp_tool.utils import binary
 
@@ -79,3 +82,84 @@ def test_save_changes():
     assert zip_1.namelist() == zip_2.namelist()
     for filename in zip_1.namelist():
         assert zip_1.read(filename) == zip_2.read(filename)
+
+
+def test_writestr_invalidates():
+    zip_ = pkware.Zip()
+    assert not zip_.is_file("test.txt")
+    zip_.writestr("maps/test.txt", "hello~\n")
+    assert zip_.is_file("maps/test.txt")
+    assert zip_.listdir("maps") == ["test.txt"]
+
+
+def test_view():
+    inner = pkware.Zip()
+    inner.writestr("maps/test.txt", "hello~\n")
+    outer = pkware.Zip()
+    outer.writestr("inner.zip", inner.as_bytes())
+    outer.writestr("deflate.txt", "hello~\n", compress_type=zipfile.ZIP_DEFLATED)
+    assert isinstance(outer.view("inner.zip"), external.RangeView)
+    assert outer.view("deflate.txt").read() == b"hello~\n"
+    nested = pkware.Zip.from_archive(outer, "inner.zip")
+    assert nested.read("maps/test.txt") == b"hello~\n"
+
+
+def test_read_range():
+    zip_ = pkware.Zip()
+    zip_.writestr("stored.txt", bytes(range(64)))
+    zip_.writestr("deflate.txt", bytes(range(64)), compress_type=zipfile.ZIP_DEFLATED)
+    assert zip_.read_range("stored.txt", 60, 16) == bytes(range(60, 64))
+    with pytest.raises(NotImplementedError):
+        zip_.read_range("deflate.txt", 8, 8)  # would decompress from the start every call
+    file = external.File.from_archive("deflate.txt", zip_)
+    file.seek(8)
+    assert file.read(8) == bytes(range(8, 16))
+    assert not file.ranged  # fell back to .read()
+    assert file.read(4) == bytes(range(16, 20))
+
+
+def test_append_buffer():
+    source = io.BytesIO(b"0123456789")
+    buffer = pkware.AppendBuffer(source)
+    buffer.seek(6)
+    buffer.write(b"abcdef")  # overwrites the end of source
+    assert buffer.cut == 6
+    assert buffer.getvalue() == b"012345abcdef"
+    buffer.seek(4)
+    assert buffer.read(4) == b"45ab"
+    assert buffer.pread(2, 6) == b"2345ab"
+    assert buffer.tell() == 8  # .pread() doesn't move the cursor
+    buffer.truncate(8)
+    assert b"".join(buffer.chunks(3)) == b"012345ab"
+    assert source.getvalue() == b"0123456789"  # never written to
+
+
+def test_append_only():
+    original = pkware.Zip()
+    original.writestr("a.txt", b"A" * 64)
+    original.writestr("b.txt", b"B" * 64, compress_type=zipfile.ZIP_DEFLATED)
+    raw_zip = original.as_bytes()
+    zip_ = pkware.Zip.from_stream(external.RangeView(io.BytesIO(raw_zip), 0, len(raw_zip)))
+    assert isinstance(zip_._buffer, pkware.AppendBuffer)
+    assert b"".join(zip_.as_chunks()) == raw_zip  # unchanged
+    assert zip_.dead_bytes == 0
+    zip_.writestr("a.txt", b"new A")  # replaced, not duplicated
+    zip_.writestr("c.txt", b"C")
+    zip_.remove("b.txt")
+    assert zip_.namelist() == ["a.txt", "c.txt"]
+    assert zip_.dead_bytes > 0
+    assert len(zip_._buffer.tail.getvalue()) < len(raw_zip)  # only new data is held in memory
+    raw_new_zip = b"".join(zip_.as_chunks(16))
+    assert raw_new_zip == zip_.as_bytes()
+    with zipfile.ZipFile(io.BytesIO(raw_new_zip)) as new_zip:
+        assert new_zip.testzip() is None
+        assert [info.filename for info in new_zip.infolist()] == ["a.txt", "c.txt"]
+        assert new_zip.read("a.txt") == b"new A"
+    zip_.compact()
+    assert zip_.dead_bytes == 0
+    compacted = zip_.as_bytes()
+    assert len(compacted) < len(raw_new_zip)
+    with zipfile.ZipFile(io.BytesIO(compacted)) as new_zip:
+        assert new_zip.testzip() is None
+        assert new_zip.read("a.txt") == b"new A"
+        assert new_zip.read("c.txt") == b"C"
@@ -1,3 +1,6 @@
+import struct
+import zlib
+
 import pytest
 
 from bsp_tool.archives import respawn
@@ -26,4 +29,57 @@ def test_from_file(filename: str):
     rpak = respawn.RPak.from_file(filename)
     if rpak.header.compression == respawn.rpak.Compression.NONE:
         assert isinstance(rpak.namelist(), list)
-        # TODO: test .read() (NotYetImplemented)
+        assert all(isinstance(rpak.read(filename), bytes) for filename in rpak.namelist())
+
+
+def rpak_bytes(compressed_size: int = None, payload: bytes = None) -> bytes:
+    """v7 w/ 1 txtr asset: 2 memory pages in 1 virtual segment & streamed data"""
+    starpak_refs = b"paks\\Win64\\test.starpak\0"
+    segments = struct.pack("2IQ", 0, 0, 48)
+    pages = struct.pack("3I", 0, 0, 16) + struct.pack("3I", 0, 0, 32)
+    asset = struct.pack(
+        "2Q4IQ2H6I4s", 0x0123456789ABCDEF, 0, 0, 0, 1, 8, 0x1000, 1, 0,
+        0, 0, 0, 0, 16, 1, b"txtr")
+    data = b"H" * 16 + b"CPU:" * 8
+    body = payload or b"".join([starpak_refs, segments, pages, asset, data])
+    file_size = 88 + len(b"".join([starpak_refs, segments, pages, asset, data]))
+    header = struct.pack(
+        "4s2H6Q4H6I", b"RPak", 7, 0, 0, 0, compressed_size or file_size, 0, file_size, 0,
+        len(starpak_refs), 1, 2, 0, 0, 1, 0, 0, 0, 0)
+    return header + body
+
+
+def starpak_bytes() -> bytes:
+    streamed = b"STREAMED" * 4
+    return b"".join([
+        b"SRPk", struct.pack("I", 1), b"\x00" * (0x1000 - 8), streamed,
+        struct.pack("2Q", 0x1000, len(streamed)), struct.pack("Q", 1)])
+
+
+def test_read(tmp_path):
+    (tmp_path / "test.rpak").write_bytes(rpak_bytes())
+    (tmp_path / "test.starpak").write_bytes(starpak_bytes())
+    rpak = respawn.RPak.from_file(str(tmp_path / "test.rpak"))
+    assert rpak.namelist() == ["txtr_0123456789ABCDEF"]
+    assert rpak.segment_offsets == [rpak.data_offset]
+    assert rpak.page_offsets == [rpak.data_offset, rpak.data_offset + 16]
+    assert rpak.read("txtr_0123456789ABCDEF") == b"H" * 16
+    assert rpak.read_cpu("txtr_0123456789ABCDEF") == b"CPU:" * 6
+    assert rpak.read_stream("txtr_0123456789ABCDEF") == b"STREAMED" * 4
+
+
+def test_decompress(monkeypatch):
+    raw = rpak_bytes()
+
+    def decompress(stream, out_file, length):
+        out_file.write(zlib.decompress(stream.read()))
+
+    # NOTE: stand-in codec; exercises the decompress -> mmap path
+    compressed_body = zlib.compress(raw[88:])
+    compressed = respawn.RPak.from_bytes(rpak_bytes(88 + len(compressed_body), compressed_body))
+    with pytest.raises(NotImplementedError):  # no RTech decompressor; only the header is loaded
+        compressed.read("txtr_0123456789ABCDEF")
+    monkeypatch.setitem(respawn.rpak.decompressors, respawn.rpak.Compression.RESPAWN, decompress)
+    rpak = respawn.RPak.from_bytes(rpak_bytes(88 + len(compressed_body), compressed_body))
+    assert rpak.header.compression == respawn.rpak.Compression.RESPAWN
+    assert rpak.read("txtr_0123456789ABCDEF") == b"H" * 16
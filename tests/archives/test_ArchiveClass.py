@@ -1,3 +1,5 @@
+import inspect
+
 import pytest
 
 from bsp_tool.archives import base
@@ -57,3 +59,14 @@ def test_in_spec(archive_class: object):
     # -- .from_stream(), .namelist() & .read() must all be implemented by the subclass
     # -- each subclass will need it's own tests for those methods
     # -- as well as confirming __init__ creates an empty ArchiveClass
+
+
+@pytest.mark.parametrize("archive_class", archive_classes, ids=map(class_name, archive_classes))
+def test_extract_signature(archive_class: object):
+    # NOTE: archives.extract_folder passes **kwargs through .extract_all_matching() to .extract_many()
+    assert archive_class.extract_all is base.Archive.extract_all
+    assert archive_class.extract_all_matching is base.Archive.extract_all_matching
+    parameters = inspect.signature(archive_class.extract_many).parameters
+    base_parameters = inspect.signature(base.Archive.extract_many).parameters
+    accepts_kwargs = any(p.kind == inspect.Parameter.VAR_KEYWORD for p in parameters.values())
+    assert accepts_kwargs or set(base_parameters).issubset(parameters)
@@ -0,0 +1,72 @@
+import os
+import struct
+import zipfile
+
+from bsp_tool.archives import id_software
+from bsp_tool.archives import index
+
+
+def write_pak(filename: str, entries: dict):
+    """{"filename": b"data"} -> .pak"""
+    data, file_table = list(), list()
+    offset = 12
+    for name, raw_data in entries.items():
+        file_table.append(id_software.PakFileEntry(name.encode(), offset, len(raw_data)))
+        data.append(raw_data)
+        offset += len(raw_data)
+    file_table = b"".join(entry.as_bytes() for entry in file_table)
+    with open(filename, "wb") as pak_file:
+        pak_file.write(b"".join([b"PACK", struct.pack("2I", offset, len(file_table)), *data, file_table]))
+
+
+def game_folder(tmp_path) -> str:
+    os.makedirs(tmp_path / "id1" / "mod")
+    write_pak(str(tmp_path / "id1" / "PAK0.PAK"), {
+        "maps/e1m1.bsp": b"\x1D\x00\x00\x00",
+        "Sound/Ambience/Wind.wav": b"RIFF"})
+    write_pak(str(tmp_path / "id1" / "mod" / "pak1.pak"), {
+        "maps/e1m1.bsp": b"\x1E\x00\x00\x00",
+        "maps/start.bsp": b"\x1E\x00\x00\x00"})
+    with zipfile.ZipFile(tmp_path / "id1" / "textures.pk3", "w") as pk3:
+        pk3.writestr("textures/base/wall.tga", b"TGA")
+    with open(tmp_path / "id1" / "broken.pak", "wb") as broken:
+        broken.write(b"KCAP")
+    with open(tmp_path / "id1" / "readme.txt", "w") as readme:
+        readme.write("not an archive")
+    return str(tmp_path / "id1")
+
+
+def test_update_folder(tmp_path):
+    folder = game_folder(tmp_path)
+    pak0 = os.path.realpath(os.path.join(folder, "PAK0.PAK"))
+    pak1 = os.path.realpath(os.path.join(folder, "mod", "pak1.pak"))
+    pk3 = os.path.realpath(os.path.join(folder, "textures.pk3"))
+    db = str(tmp_path / "archives.db")
+    with index.ArchiveIndex(db) as archive_index:
+        errors = archive_index.update_folder(folder, max_workers=2)
+        assert list(errors) == [os.path.join(folder, "broken.pak")]
+        assert len(archive_index.archives()) == 4  # incl. broken.pak, so it isn't retried
+    # persistent
+    with index.ArchiveIndex(db) as archive_index:
+        assert archive_index.update_folder(folder, max_workers=2) == dict()  # nothing stale
+        assert archive_index.which("maps/E1M1.bsp") == sorted([pak0, pak1])
+        assert archive_index.which("maps/E1M1.bsp", case_sensitive=True) == list()
+        assert archive_index.search("maps/*.bsp") == [
+            (pak0, "maps/e1m1.bsp"), (pak1, "maps/e1m1.bsp"), (pak1, "maps/start.bsp")]
+        assert archive_index.search("sound/*/*.WAV") == [(pak0, "Sound/Ambience/Wind.wav")]
+        assert archive_index.startswith("textures/") == [(pk3, "textures/base/wall.tga")]
+        assert archive_index.member(pak0, "maps/e1m1.bsp") == {"size": 4, "offset": 12, "crc": None}
+        member = archive_index.member(pk3, "textures/base/wall.tga")
+        assert member["crc"] == zipfile.crc32(b"TGA")
+        pk3_archive = archive_index.load_archive(pk3)
+        assert pk3_archive.view("textures/base/wall.tga").read() == b"TGA"
+        # incremental refresh
+        os.remove(os.path.join(folder, "broken.pak"))
+        write_pak(os.path.join(folder, "mod", "pak1.pak"), {"maps/end.bsp": b"\x1E\x00\x00\x00"})
+        stat = os.stat(pak1)
+        os.utime(pak1, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert archive_index.is_stale(pak1)
+        assert archive_index.update_folder(folder, max_workers=2) == dict()
+        assert archive_index.errors() == dict()
+        assert archive_index.namelist(pak1) == ["maps/end.bsp"]
+        assert archive_index.which("maps/start.bsp") == list()
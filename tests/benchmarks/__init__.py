@@ -0,0 +1,2 @@
+# NOTE: benchmarks are scripts, not tests; run with:
+# -- $ python -m tests.benchmarks.<name>
@@ -0,0 +1,36 @@
+"""archives.index.ArchiveIndex: queries over a synthetic 1M file install"""
+import time
+import timeit
+
+from bsp_tool.archives import index
+
+
+def synthetic_record(archive: int, count: int) -> dict:
+    """count files in one archive, 100 per folder"""
+    return {
+        "path": f"/game/pak{archive:02d}_dir.vpk", "size": 0, "mtime": 0,
+        "archive_class": "bsp_tool.archives.valve:Vpk", "error": None,
+        "members": [
+            (f"materials/group_{archive:02d}/folder_{i // 100 % 1000:03d}/file_{i % 100:02d}.vmt", 256, i * 256, i)
+            for i in range(count)]}
+
+
+def main(num_archives: int = 10, count: int = 100_000, number: int = 100):
+    archive_index = index.ArchiveIndex()
+    start = time.perf_counter()
+    for i in range(num_archives):
+        archive_index.add(synthetic_record(i, count))
+    print(f"{num_archives * count:,} files in {num_archives} archives")
+    print(f"  index build:  {time.perf_counter() - start:9.3f}s")
+    queries = {
+        "which": lambda: archive_index.which("materials/group_07/folder_042/file_99.vmt"),
+        "startswith": lambda: archive_index.startswith("materials/group_07/folder_042/"),
+        "search": lambda: archive_index.search("materials/group_07/folder_04?/*_9[0-9].vmt"),
+        "member": lambda: archive_index.member("/game/pak07_dir.vpk", "materials/group_07/folder_042/file_99.vmt")}
+    for name, query in queries.items():
+        seconds = timeit.timeit(query, number=number) / number
+        print(f"  {name + ':':<13} {seconds * 1_000:9.3f}ms per call")
+
+
+if __name__ == "__main__":
+    main()
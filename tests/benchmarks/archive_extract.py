@@ -0,0 +1,49 @@
+"""archives.base.Archive.extract_all: a synthetic .pak of 20k small files"""
+import os
+import struct
+import tempfile
+import time
+
+from bsp_tool.archives import id_software
+
+
+def write_pak(filename: str, count: int, size: int):
+    """count files of size bytes, 100 per folder"""
+    file_table = list()
+    with open(filename, "wb") as pak_file:
+        pak_file.write(b"PACK" + b"\0" * 8)
+        for i in range(count):
+            name = f"materials/folder_{i // 100:03d}/file_{i % 100:02d}.vtf"
+            file_table.append(id_software.PakFileEntry(name.encode(), pak_file.tell(), size))
+            pak_file.write(os.urandom(size))
+        offset = pak_file.tell()
+        pak_file.write(b"".join(entry.as_bytes() for entry in file_table))
+        pak_file.seek(4)
+        pak_file.write(struct.pack("2I", offset, len(file_table) * 64))
+
+
+def naive_extract_all(pak: id_software.Pak, to_path: str):
+    """the old implementation; one read & one write at a time"""
+    for filename in pak.namelist():
+        out_filename = os.path.join(to_path, filename)
+        os.makedirs(os.path.dirname(out_filename), exist_ok=True)
+        with open(out_filename, "wb") as out_file:
+            out_file.write(pak.read(filename))
+
+
+def main(count: int = 20_000, size: int = 16 * 2 ** 10):
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "test.pak")
+        write_pak(filename, count, size)
+        pak = id_software.Pak.from_file(filename)
+        print(f"{count:,} files ({count * size / 2 ** 20:.1f}MB)")
+        start = time.perf_counter()
+        naive_extract_all(pak, os.path.join(folder, "naive"))
+        seconds = time.perf_counter() - start
+        print(f"  naive:       {seconds:9.3f}s ({count * size / 2 ** 20 / seconds:.1f}MB/s)")
+        stats = pak.extract_all(os.path.join(folder, "extract_all"))
+        print(f"  extract_all: {stats.seconds:9.3f}s ({stats.throughput:.1f}MB/s) in {stats.num_reads} reads")
+
+
+if __name__ == "__main__":
+    main()
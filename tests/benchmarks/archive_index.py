@@ -0,0 +1,54 @@
+"""archives.base.Archive: directory queries over a synthetic 1M entry namelist"""
+import time
+import timeit
+
+from bsp_tool.archives import base
+
+
+class NameListArchive(base.Archive):
+    ext = "*.test"
+
+    def __init__(self, namelist):
+        super().__init__()
+        self._namelist = namelist
+
+    def namelist(self):
+        return self._namelist
+
+
+def synthetic_namelist(count: int) -> list:
+    """count files, 100 per folder, nested 3 folders deep"""
+    return [
+        f"root_{i // 1_000_000:02d}/group_{i // 10_000 % 100:02d}/folder_{i // 100 % 100:02d}/file_{i % 100:02d}.vmt"
+        for i in range(count)]
+
+
+def naive_is_dir(archive: base.Archive, filename: str) -> bool:
+    """the old implementation; rebuilds every folder on every call"""
+    all_dirs = {base.path_tuple(fn)[:-1] for fn in archive.namelist()}
+    all_dirs.update({tuple_[:i] for tuple_ in all_dirs for i in range(1, len(tuple_))})
+    return base.path_tuple(filename) in all_dirs
+
+
+def main(count: int = 1_000_000, number: int = 100):
+    archive = NameListArchive(synthetic_namelist(count))
+    print(f"{count:,} files")
+    start = time.perf_counter()
+    naive_is_dir(archive, "root_00/group_42")
+    print(f"  naive is_dir: {time.perf_counter() - start:9.3f}s per call (listdir called this once per file)")
+    start = time.perf_counter()
+    archive.directory_index()
+    print(f"  index build:  {time.perf_counter() - start:9.3f}s (once per archive)")
+    queries = {
+        "is_dir": lambda: archive.is_dir("root_00/group_42/folder_07"),
+        "is_file": lambda: archive.is_file("root_00/group_42/folder_07/file_99.vmt"),
+        "listdir": lambda: archive.listdir("root_00/group_42/folder_07"),
+        "path_exists": lambda: archive.path_exists("root_00/group_42"),
+        "search": lambda: archive.search("root_00/group_42/*_07/*.vmt")}
+    for name, query in queries.items():
+        seconds = timeit.timeit(query, number=number) / number
+        print(f"  {name + ':':<13} {seconds * 1_000_000:9.1f}us per call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""scene.khronos.Gltf: welding & packing a synthetic scene of quad grids"""
+import array
+import os
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from bsp_tool.scene import khronos
+from bsp_tool.utils import geometry
+
+
+def grid_model(size: int, z: float) -> geometry.Model:
+    """size x size quads; each quad has 4 vertices of its own, as face meshes do"""
+    arrays = geometry.MeshArrays(num_uvs=1)
+    corners = ((0, 0), (1, 0), (1, 1), (0, 1))
+    positions = [(x + i, y + j, z) for y in range(size) for x in range(size) for i, j in corners]
+    arrays.positions = array.array("f", [c for position in positions for c in position])
+    arrays.normals = array.array("f", [0, 0, 1]) * len(positions)
+    arrays.uvs = [array.array("f", [c for position in positions for c in position[:2]])]
+    arrays.colours = array.array("f", [1, 1, 1, 1]) * len(positions)
+    arrays.indices = array.array("I", range(len(positions)))
+    arrays.polygon_sizes = array.array("I", [4]) * (size * size)
+    return geometry.Model([geometry.Mesh(geometry.Material("grid"), arrays=arrays)])
+
+
+def naive_weld(vertices: list) -> list:
+    """the old implementation; a linear search per vertex"""
+    unique, out = list(), list()
+    for vertex in vertices:
+        if vertex in unique:
+            out.append(unique.index(vertex))
+        else:
+            unique.append(vertex)
+            out.append(len(unique) - 1)
+    return unique, b"".join(struct.pack("3f3f4f", *v.position, *v.normal, *v.colour) for v in unique)
+
+
+def main(num_vertices: int = 1_000_000, models: int = 16):
+    size = int((num_vertices / models / 4) ** 0.5)
+    scene = {f"grid_{i:03d}": grid_model(size, float(i)) for i in range(models)}
+    total = models * size * size * 4
+    print(f"{total:,} vertices in {models} models")
+    sample = [scene["grid_000"].meshes[0].arrays.vertex(i) for i in range(2_000)]
+    start = time.perf_counter()
+    naive_weld(sample)
+    seconds = time.perf_counter() - start
+    estimate = seconds * (total / len(sample)) ** 2
+    print(f"  naive weld: {seconds:7.3f}s for {len(sample):,} vertices (quadratic; ~{estimate:,.0f}s for all)")
+    for epsilon in (0.0, 0.001):
+        start = time.perf_counter()
+        gltf = khronos.Gltf.from_models(scene, epsilon=epsilon)
+        vertex_buffer, index_buffer = gltf.buffers[0]
+        vertex_buffer.as_bytes(), index_buffer.as_bytes()
+        seconds = time.perf_counter() - start
+        print(f"  from_models(epsilon={epsilon}): {seconds:7.3f}s ({total / seconds:,.0f} vertices/s)"
+              f" -> {vertex_buffer.count:,} unique vertices, {len(index_buffer.indices):,} indices")
+    # peak memory: whole scene buffers (.gltf) vs. one model at a time (.glb)
+    # NOTE: tracemalloc slows these timings down considerably
+    with tempfile.TemporaryDirectory() as folder:
+        for ext, optimise in ((".gltf", False), (".glb", False), (".glb", True)):
+            gltf = khronos.Gltf.from_models(scene, optimise=optimise)
+            tracemalloc.start()
+            start = time.perf_counter()
+            gltf.save_as(os.path.join(folder, f"scene{ext}"))
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            size = sum(os.path.getsize(os.path.join(folder, fn)) for fn in os.listdir(folder) if fn.startswith("scene"))
+            print(f"  save_as('{ext}', {optimise=}): {seconds:7.3f}s {peak / 2 ** 20:7.1f}MB peak -> {size / 2 ** 20:.1f}MB")
+            for filename in os.listdir(folder):
+                os.remove(os.path.join(folder, filename))
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
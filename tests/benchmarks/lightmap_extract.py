@@ -0,0 +1,43 @@
+"""lightmaps: per-entry vs. bulk RawBspLump reads & decoding ColorRGBExp32 texels"""
+import io
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from bsp_tool import lumps
+from bsp_tool.lightmaps import base
+
+from PIL import Image
+
+
+def main(num_faces: int = 4_096, size: int = 16):
+    length = num_faces * size * size * 4
+    header = SimpleNamespace(offset=0, length=length)
+    lump = lumps.RawBspLump.from_header(io.BytesIO(os.urandom(length)), header)
+    print(f"{num_faces:,} {size}x{size} lightmaps ({length / 2 ** 20:.1f}MB)")
+    offsets = range(0, length, size * size * 4)
+    start = time.perf_counter()
+    for offset in offsets[:num_faces // 16]:
+        bytes([lump.get(i) for i in range(offset, offset + size * size * 4)])
+    seconds = (time.perf_counter() - start) * 16
+    print(f"  per-entry reads: {seconds:7.3f}s (estimated from 1/16th)")
+    start = time.perf_counter()
+    texels = [lump.read_bytes(offset, size * size * 4) for offset in offsets]
+    print(f"  read_bytes:      {time.perf_counter() - start:7.3f}s")
+    start = time.perf_counter()
+    for raw in texels:
+        Image.frombytes("RGBA", (size, size), raw, "raw")
+    print(f"  Image.frombytes: {time.perf_counter() - start:7.3f}s")
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("  numpy not installed, skipping decode_rgb_exponent")
+        return
+    start = time.perf_counter()
+    base.decode_rgb_exponent(lump.read_bytes(), length // 4, 1)
+    print(f"  decode_rgb_exponent (whole lump): {time.perf_counter() - start:7.3f}s")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,38 @@
+"""scene.wavefront.Obj: per-corner vs. pooled .obj export of a synthetic map"""
+import os
+import sys
+import tempfile
+import time
+
+from bsp_tool.scene import wavefront
+from bsp_tool.utils import geometry
+
+
+def brush_model(size: int, index: int) -> geometry.Model:
+    """size x size quads, like source.face_mesh; each quad has 4 vertices of its own"""
+    materials = [geometry.Material(f"materials/test/{index % 8}_{m}") for m in range(2)]
+    meshes = [geometry.Mesh(material, arrays=geometry.MeshArrays(num_uvs=2)) for material in materials]
+    for y in range(size):
+        for x in range(size):
+            arrays = meshes[(x + y) % 2].arrays
+            arrays.add_polygon([
+                arrays.add_vertex((x + i, y + j, 0), (0, 0, 1), ((x + i) / size, (y + j) / size), (i, j))
+                for i, j in ((0, 0), (1, 0), (1, 1), (0, 1))])
+    return geometry.Model(meshes, origin=(index * size, 0, 0), angles=(0, 0, index % 4 * 90))
+
+
+def main(num_quads: int = 100_000, models: int = 64):
+    size = int((num_quads / models) ** 0.5)
+    print(f"{models * size * size:,} quads in {models} models")
+    with tempfile.TemporaryDirectory() as folder:
+        for pooled in (False, True):
+            scene = {f"model_{i:03d}": brush_model(size, i) for i in range(models)}
+            filename = os.path.join(folder, f"scene_{pooled}.obj")
+            start = time.perf_counter()
+            wavefront.Obj.from_models(scene, pooled=pooled).save_as(filename)
+            seconds = time.perf_counter() - start
+            print(f"  save_as({pooled=}): {seconds:7.3f}s -> {os.path.getsize(filename) / 2 ** 20:6.1f}MB")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
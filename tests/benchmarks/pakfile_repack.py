@@ -0,0 +1,59 @@
+"""archives.pkware.Zip: replacing 1 file in a 200MB PAKFILE; full rebuild vs. append-only"""
+import os
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+from bsp_tool import external
+from bsp_tool.archives import pkware
+
+
+def write_zip(filename: str, count: int, size: int):
+    with zipfile.ZipFile(filename, "w") as zip_file:
+        for i in range(count):
+            zip_file.writestr(f"materials/folder_{i // 100:02d}/file_{i % 100:02d}.vtf", os.urandom(size))
+
+
+def full_rebuild(filename: str, out_filename: str):
+    """re-serialise every member into a new zip, like editing a PAKFILE used to"""
+    with open(filename, "rb") as zip_file:
+        old_zip = pkware.Zip.from_bytes(zip_file.read())
+    new_zip = pkware.Zip()
+    for info in old_zip.infolist():
+        if info.filename != "materials/folder_00/file_00.vtf":
+            new_zip.writestr(info, old_zip.read(info.filename))
+    new_zip.writestr("materials/folder_00/file_00.vtf", b"replaced")
+    with open(out_filename, "wb") as out_file:
+        out_file.write(new_zip.as_bytes())
+
+
+def append_only(filename: str, out_filename: str):
+    with open(filename, "rb") as zip_file:
+        zip_ = pkware.Zip.from_stream(external.RangeView(zip_file, 0, os.path.getsize(filename)))
+        zip_.writestr("materials/folder_00/file_00.vtf", b"replaced")
+        with open(out_filename, "wb") as out_file:
+            for chunk in zip_.as_chunks():
+                out_file.write(chunk)
+
+
+def main(count: int = 200, size: int = 2 ** 20):
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "pakfile.zip")
+        write_zip(filename, count, size)
+        print(f"{count} files ({os.path.getsize(filename) / 2 ** 20:.1f}MB)")
+        for name, method in {"full rebuild:": full_rebuild, "append-only:": append_only}.items():
+            out_filename = os.path.join(folder, "out.zip")
+            tracemalloc.start()
+            start = time.perf_counter()
+            method(filename, out_filename)
+            seconds = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            with zipfile.ZipFile(out_filename) as out_zip:
+                assert out_zip.read("materials/folder_00/file_00.vtf") == b"replaced"
+            print(f"  {name:<14} {seconds:7.3f}s {peak / 2 ** 20:7.1f}MB peak memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""core.Struct.from_tuple: reflective vs. compiled (StructCodec)"""
+import struct
+import timeit
+
+from bsp_tool.branches.respawn import titanfall
+from bsp_tool.branches.valve import source
+
+
+LumpClasses = [titanfall.VertexLitBump, source.Face]
+
+
+def entries_per_second(LumpClass, _tuple, fast: bool, count: int) -> float:
+    codec = LumpClass.codec()
+    was_fast = codec.fast
+    codec.fast = fast
+    try:
+        seconds = timeit.timeit(lambda: LumpClass.from_tuple(_tuple), number=count)
+    finally:
+        codec.fast = was_fast
+    return count / seconds
+
+
+def main(count: int = 50_000):
+    for LumpClass in LumpClasses:
+        _tuple = struct.unpack(LumpClass._format, LumpClass().as_bytes())
+        reflective = entries_per_second(LumpClass, _tuple, False, count)
+        compiled = entries_per_second(LumpClass, _tuple, True, count)
+        print(f"{LumpClass.__module__}.{LumpClass.__name__}")
+        print(f"  reflective: {reflective:12,.0f} entries/s")
+        print(f"  compiled:   {compiled:12,.0f} entries/s ({compiled / reflective:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""scene.pixar.Usd: formatting vertex data & writing per-model payload layers"""
+import array
+import os
+import sys
+import tempfile
+import time
+
+from bsp_tool.scene import pixar
+from bsp_tool.utils import vector
+
+from .obj_export import brush_model
+
+
+def main(num_points: int = 1_000_000, num_quads: int = 100_000, models: int = 64):
+    positions = array.array("f", [i * 0.25 for i in range(num_points * 3)])
+    print(f"{num_points:,} points")
+    start = time.perf_counter()
+    vectors = [vector.vec3(*positions[i:i + 3]) for i in range(0, len(positions), 3)]
+    "\n".join(pixar.Property("point3f[]", "points", vectors).lines())
+    print(f"  Property(vec3 list):  {time.perf_counter() - start:7.3f}s (old; incl. building vec3s)")
+    start = time.perf_counter()
+    "\n".join(pixar.ArrayProperty("point3f[]", "points", positions, 3).lines())
+    print(f"  ArrayProperty(array): {time.perf_counter() - start:7.3f}s")
+    size = int((num_quads / models) ** 0.5)
+    scene = {f"model_{i:03d}": brush_model(size, i) for i in range(models)}
+    print(f"{models * size * size:,} quads in {models} models ({os.cpu_count()} cpus)")
+    with tempfile.TemporaryDirectory() as folder:
+        for payloads in (False, True):
+            usd = pixar.Usd.from_models(scene)
+            start = time.perf_counter()
+            usd.save_as(os.path.join(folder, f"map_{payloads}.usda"), payloads=payloads)
+            print(f"  save_as({payloads=}): {time.perf_counter() - start:7.3f}s")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -1,5 +1,12 @@
+import io
+import struct
+
+from bsp_tool import lumps
 from bsp_tool import RespawnBsp
+from bsp_tool.branches import shared
+from bsp_tool.branches.respawn import titanfall
 from bsp_tool.branches.respawn import titanfall2
+from bsp_tool.branches.valve import source
 
 import pytest
 
@@ -15,6 +22,63 @@ bsps = {
 # NOTE: skipping depot/; should line up with results for maps/
 
 
+def lump_of(LumpClass, entries) -> lumps.BspLump:
+    raw_lump = b"".join([entry.as_bytes() for entry in entries])
+    return lumps.BspLump.from_stream(io.BytesIO(raw_lump), LumpClass)
+
+
+def synthetic_bsp() -> RespawnBsp:
+    """2 models, 3 meshes, 2 materials & 2 vertex lumps; just enough for .model()"""
+    bsp = RespawnBsp(titanfall2, "synthetic.bsp")
+    bsp.ENTITIES = shared.Entities([{"classname": "func_brush", "model": "*1", "origin": "64 0 0"}])
+    bsp.TEXTURE_DATA_STRING_DATA = source.TextureDataStringData(["world/dev/grey", "world/dev/orange"])
+    TextureData = titanfall2.LUMP_CLASSES["TEXTURE_DATA"][1]
+    bsp.TEXTURE_DATA = lump_of(TextureData, [TextureData(name_index=i) for i in range(2)])
+    MaterialSort = titanfall2.LUMP_CLASSES["MATERIAL_SORTS"][0]
+    bsp.MATERIAL_SORTS = lump_of(MaterialSort, [
+        MaterialSort(texture_data=0, vertex_offset=0),
+        MaterialSort(texture_data=1, vertex_offset=0),
+        MaterialSort(texture_data=0, vertex_offset=1)])
+    Mesh = titanfall2.LUMP_CLASSES["MESHES"][0]
+    unlit, lit_flat = titanfall.MeshFlags.VERTEX_UNLIT.value, titanfall.MeshFlags.VERTEX_LIT_FLAT.value
+    bsp.MESHES = lump_of(Mesh, [
+        Mesh(first_mesh_index=0, num_triangles=2, material_sort=0, flags=unlit),
+        Mesh(first_mesh_index=6, num_triangles=1, material_sort=1, flags=lit_flat),
+        Mesh(first_mesh_index=9, num_triangles=1, material_sort=2, flags=unlit)])
+    Model = titanfall2.LUMP_CLASSES["MODELS"][0]
+    bsp.MODELS = lump_of(Model, [Model(first_mesh=0, num_meshes=3), Model(first_mesh=2, num_meshes=1)])
+    indices = [0, 1, 2, 2, 1, 3, 0, 1, 2, 0, 1, 2]
+    bsp.MESH_INDICES = lumps.BasicBspLump.from_stream(
+        io.BytesIO(struct.pack(f"{len(indices)}H", *indices)), shared.UnsignedShorts)
+    Vertex = titanfall2.LUMP_CLASSES["VERTICES"][0]
+    bsp.VERTICES = lump_of(Vertex, [Vertex(x, y, 0) for x, y in [(0, 0), (0, 64), (64, 0), (64, 64)]])
+    bsp.VERTEX_NORMALS = lump_of(Vertex, [Vertex(0, 0, 1), Vertex(1, 0, 0)])
+    VertexUnlit = titanfall2.LUMP_CLASSES["VERTEX_UNLIT"][0]
+    bsp.VERTEX_UNLIT = lump_of(VertexUnlit, [
+        VertexUnlit(position_index=i, normal_index=i % 2, albedo_uv=[i / 4, 0.5], colour=[255, i * 64, 0, 255])
+        for i in range(4)])
+    VertexLitFlat = titanfall2.LUMP_CLASSES["VERTEX_LIT_FLAT"][1]
+    bsp.VERTEX_LIT_FLAT = lump_of(VertexLitFlat, [
+        VertexLitFlat(
+            position_index=3 - i, normal_index=0, albedo_uv=[0.5, i / 4], colour=[0, 0, 255, 128],
+            lightmap=[i / 8, 0.25, 0, 0])
+        for i in range(3)])
+    return bsp
+
+
+def corners(model) -> dict:
+    """{material: [(position, normal, uvs, colour)]} for every corner of every triangle"""
+    out = dict()
+    for mesh in model.meshes:
+        arrays = mesh.arrays
+        out.setdefault(mesh.material.name, list()).extend([
+            (tuple(arrays.positions[i * 3:i * 3 + 3]), tuple(arrays.normals[i * 3:i * 3 + 3]),
+             tuple(tuple(uv_channel[i * 2:i * 2 + 2]) for uv_channel in arrays.uvs),
+             tuple(arrays.colours[i * 4:i * 4 + 4]))
+            for i in arrays.indices])
+    return out
+
+
 # class TestConstant:
 #     """some things never change"""
 #     @pytest.mark.parametrize("bsp", bsps.values(), ids=bsps.keys())
@@ -43,10 +107,31 @@ class TestIndex:
 #     ...
 
 
-# class TestMethod:
-#     @pytest.mark.parametrize("bsp", bsps.values(), ids=bsps.keys())
-#     def test_method(self, bsp: RespawnBsp):
-#         ...
+class TestMethod:
+    @pytest.mark.parametrize("bsp", bsps.values(), ids=bsps.keys())
+    def test_model_arrays(self, bsp: RespawnBsp):
+        vertex_lumps = ("VERTEX_LIT_FLAT", "VERTEX_LIT_BUMP", "VERTEX_UNLIT", "VERTEX_UNLIT_TS")
+        if any(not isinstance(getattr(bsp, lump_name), lumps.BasicBspLump) for lump_name in vertex_lumps):
+            pytest.skip("vertex lumps not parsed")
+        model = bsp.model(0)
+        model_arrays = bsp.model_arrays(0)
+        num_triangles = {mesh.material: len(mesh.polygons) for mesh in model.meshes}
+        assert num_triangles == {mesh.material: mesh.arrays.num_polygons for mesh in model_arrays.meshes}
+
+    def test_model_arrays_synthetic(self):
+        bsp = synthetic_bsp()
+        all_meshes = bsp.all_meshes()
+        for model_index in range(len(bsp.MODELS)):
+            model = bsp.model(model_index)
+            model_arrays = bsp.model_arrays(model_index)
+            assert corners(model_arrays) == corners(model)
+            assert corners(all_meshes[model_index]) == corners(model)
+            assert model_arrays.origin == model.origin
+        assert len(bsp.model_arrays(0).meshes) == 2  # 1 mesh per material
+        assert bsp.model_arrays(1).origin == [64, 0, 0]
+        unlit = bsp.vertex_arrays("VERTEX_UNLIT")
+        assert len(unlit) == len(bsp.VERTEX_UNLIT)
+        assert unlit.num_polygons == 0
 
 
 # class TestParallel:
@@ -109,3 +109,45 @@ class TestStruct:
         assert isinstance(test_Struct.e, list)
 
         assert len(test_Struct.as_bytes()) == struct.calcsize(AllChildTypes._format)
+
+
+class Nested(core.Struct):
+    __slots__ = ["bounds", "colour", "bitfield"]
+    _format = "6f4BH"
+    _arrays = {"bounds": {"mins": [*"xyz"], "maxs": [*"xyz"]}, "colour": [*"rgba"]}
+    _classes = {"bounds.mins": vector.vec3, "bounds.maxs": vector.vec3}
+    _bitfields = {"bitfield": {"foo": 4, "bar": 12}}
+
+
+def reflective_from_tuple(LumpClass, _tuple):
+    codec = LumpClass.codec()
+    was_fast = codec.fast
+    codec.fast = False
+    try:
+        return LumpClass.from_tuple(_tuple)
+    finally:
+        codec.fast = was_fast
+
+
+class TestStructCodec:
+    def test_cached(self):
+        codec = Example.codec()
+        assert isinstance(codec, core.struct.StructCodec)
+        assert Example.codec() is codec
+        assert codec.tuple_length == len(core.common.split_format(Example._format))
+        assert codec.compiled.size == struct.calcsize(Example._format)
+
+    def test_matches_reflective(self):
+        for LumpClass, _tuple in [(Example, (1, 2.0, 3.0, 4.0, 5, 6, 2, 0xFF0000AA)),
+                                  (Nested, (1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7, 8, 9, 10, 0xA00F))]:
+            compiled = LumpClass.from_tuple(_tuple)
+            reflective = reflective_from_tuple(LumpClass, _tuple)
+            assert compiled.as_tuple() == reflective.as_tuple()
+            for attr in LumpClass.__slots__:
+                assert type(getattr(compiled, attr)) is type(getattr(reflective, attr))
+        nested = Nested.from_tuple((1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7, 8, 9, 10, 0xA00F))
+        assert isinstance(nested.bounds.mins, vector.vec3)
+        assert nested.bounds.maxs == (4, 5, 6)
+        assert nested.colour.a == 10
+        assert nested.bitfield.foo == 0xA
+        assert nested.bitfield.bar == 0x00F
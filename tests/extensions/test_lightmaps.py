@@ -1 +1,45 @@
-# TODO: test extensions.lightmaps still functions
+import io
+import struct
+from types import SimpleNamespace
+
+from bsp_tool import lumps
+from bsp_tool.lightmaps import base
+from bsp_tool.lightmaps import source
+
+import pytest
+
+
+# TODO: test extensions.lightmaps still functions w/ real .bsps
+
+
+def test_decode_rgb_exponent():
+    numpy = pytest.importorskip("numpy")
+    texels = bytes([255, 128, 0, 0, 255, 128, 0, 1, 255, 128, 0, 255, 0, 0, 0, 0])
+    floats = base.decode_rgb_exponent(texels, 2, 2)
+    assert floats.shape == (2, 2, 3)
+    assert floats.dtype == numpy.float32
+    assert numpy.allclose(floats[0, 0], [1, 128 / 255, 0])
+    assert numpy.allclose(floats[0, 1], [2, 256 / 255, 0])
+    assert numpy.allclose(floats[1, 0], [0.5, 64 / 255, 0])  # exponent is signed
+    assert numpy.allclose(floats[1, 1], [0, 0, 0])
+
+
+def fake_face(light_offset: int, width: int, height: int) -> SimpleNamespace:
+    lightmap = SimpleNamespace(size=(width - 1, height - 1))
+    return SimpleNamespace(light_offset=light_offset, styles=0, lightmap=lightmap, displacement_info=-1)
+
+
+def test_face_lightmaps_float():
+    numpy = pytest.importorskip("numpy")
+    texels = [(i, i, i, 0) for i in range(1 + 4 + 6)]  # 1 texel before each face's light_offset is ignored
+    raw = b"".join(struct.pack("4B", *texel) for texel in texels)
+    header = SimpleNamespace(offset=0, length=len(raw))
+    lump = lumps.RawBspLump.from_header(io.BytesIO(raw), header)
+    faces = [fake_face(4, 2, 2), fake_face(-1, 1, 1), fake_face(20, 3, 2)]
+    bsp = SimpleNamespace(filename="test.bsp", headers={"LIGHTING_HDR": header}, LIGHTING_HDR=lump, FACES=faces)
+    floats = source.face_lightmaps_float(bsp)
+    assert set(floats.keys()) == {0, 2}
+    assert floats[0].shape == (2, 2, 3)
+    assert floats[2].shape == (2, 3, 3)
+    assert numpy.allclose(floats[0][..., 0], numpy.arange(1, 5).reshape(2, 2) / 255)
+    assert numpy.allclose(floats[2][..., 0], numpy.arange(5, 11).reshape(2, 3) / 255)
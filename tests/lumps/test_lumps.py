@@ -1,5 +1,6 @@
 import collections
 import io
+import struct
 
 from bsp_tool import lumps
 from bsp_tool import core
@@ -38,6 +39,10 @@ class TestRemapSliceToRange:
 LumpHeader_basic = collections.namedtuple("basic", ["offset", "length"])
 
 
+class UnsignedShort(int):
+    _format = "H"
+
+
 class LumpClass_basic(core.MappedArray):
     _mapping = [*"xyz"]
     _format = "3H"
@@ -46,7 +51,27 @@ class LumpClass_basic(core.MappedArray):
 class TestRawBspLump:
     """test the changes system & bytearray-like behaviour"""
     # TODO: tests to ensure RawBspLump behaves like a bytearray
-    ...
+    def test_read_bytes(self):
+        header = LumpHeader_basic(offset=2, length=8)
+        stream = io.BytesIO(b"\xFF\xFF" + bytes(range(8)) + b"\xFF\xFF")
+        lump = lumps.RawBspLump.from_header(stream, header)
+        assert lump.read_bytes() == bytes(range(8))
+        assert lump.read_bytes(2, 3) == b"\x02\x03\x04"
+        assert lump.read_bytes(6, 16) == b"\x06\x07"
+        assert lump.read_bytes(8) == b""
+        assert lump[2:5] == bytearray(b"\x02\x03\x04")
+        assert lump[::2] == bytearray(b"\x00\x02\x04\x06")
+
+    def test_read_bytes_changes(self):
+        header = LumpHeader_basic(offset=0, length=4)
+        stream = io.BytesIO(bytes(range(4)))
+        lump = lumps.RawBspLump.from_header(stream, header)
+        lump[1] = 0xAA
+        assert lump.read_bytes() == b"\x00\xAA\x02\x03"
+        assert lump.read_bytes(2) == b"\x02\x03"
+        lump.append(0xBB)
+        assert lump.read_bytes(3) == b"\x03\xBB"
+        assert lump[:] == bytearray(lump.read_bytes())
 
 
 class TestBspLump:
@@ -59,6 +84,232 @@ class TestBspLump:
         assert lump[0].x == 2
 
 
+class LumpClass_nested(core.Struct):
+    __slots__ = ["id", "origin", "flags"]
+    _format = "H3fB"
+    _arrays = {"origin": [*"xyz"]}
+
+
+class TestDirty:
+    def test_reads(self):
+        header = LumpHeader_basic(offset=0, length=12)
+        stream = io.BytesIO(b"\x01\x00\x02\x00\x03\x00" * 2)
+        lump = lumps.BspLump.from_header(stream, header, LumpClass_basic)
+        assert [e.x for e in lump[::]] == [1, 1]
+        assert len(lump._changes) == 0
+        assert not lump.is_dirty()
+        basic_lump = lumps.BasicBspLump.from_header(stream, header, UnsignedShort)
+        assert basic_lump[::] == [1, 2, 3] * 2
+        assert len(basic_lump._cache) == 0  # ints can't be edited in place
+        assert not basic_lump.is_dirty()
+
+    def test_implicit_change(self):
+        header = LumpHeader_basic(offset=0, length=18)
+        stream = io.BytesIO(b"\x01\x00\x02\x00\x03\x00" * 3)
+        lump = lumps.BspLump.from_header(stream, header, LumpClass_basic)
+        lump[1].x += 1
+        lump[2].y += 0  # read, but unchanged
+        assert lump.is_dirty()
+        assert lump.changed_ranges() == [(1, 2)]
+        lump[2] = LumpClass_basic(x=4, y=5, z=6)
+        assert lump.changed_ranges() == [(1, 3)]
+
+    def test_resize(self):
+        header = LumpHeader_basic(offset=0, length=12)
+        stream = io.BytesIO(b"\x01\x00\x02\x00\x03\x00" * 2)
+        lump = lumps.BspLump.from_header(stream, header, LumpClass_basic)
+        del lump[-1]
+        assert lump.is_dirty()
+        assert lump.changed_ranges() == list()
+        assert bytes(lump) == b"\x01\x00\x02\x00\x03\x00"
+
+    def test_snapshots(self):
+        stream = io.BytesIO(struct.pack("H3fB", 0, 0, 0, 0, 0) * 64)
+        lump = lumps.BspLump.from_stream(stream, LumpClass_nested)
+        held = lump[0]
+        held_child = lump[1].origin
+        lump[2].origin.x += 1
+        for i in range(len(lump)):
+            lump[i]
+        assert len(lump._snapshots) == len(lump)
+        held.id = 1  # held entries can still be edited
+        held_child.y = 2  # so can held children
+        assert lump.changed_indices() == [0, 1, 2]
+        assert (lump[0].id, lump[1].origin.y, lump[2].origin.x) == (1, 2, 1)
+        stream.seek(0)
+        stream.write(b"\xFF" * 64)  # changes are found w/o reading the stream
+        assert lump.changed_indices() == [0, 1, 2]
+
+    def test_prune_cache(self):
+        stream = io.BytesIO(struct.pack("H3fB", 0, 0, 0, 0, 0) * 64)
+        lump = lumps.BspLump.from_stream(stream, LumpClass_nested)
+        held = lump[0]
+        lump[2].origin.x += 1
+        for i in range(len(lump)):
+            lump[i]
+        lump.prune_cache()
+        assert len(lump._cache) == 0
+        assert list(lump._changes) == [2]  # changed entries are kept
+        held.id = 1  # no longer tracked
+        assert lump.changed_indices() == [2]
+        lump[0] = held
+        assert lump.changed_indices() == [0, 2]
+
+    def test_mark_clean(self):
+        stream = io.BytesIO(b"\x01\x00\x02\x00\x03\x00" * 2)
+        lump = lumps.BspLump.from_stream(stream, LumpClass_basic)
+        entry = lump[0]
+        entry.x = 4
+        lump.append(LumpClass_basic(x=5, y=6, z=7))
+        stream.seek(0)
+        stream.write(bytes(lump))
+        lump.mark_clean()
+        assert not lump.is_dirty()
+        entry.x = 8  # edits after saving are still tracked
+        assert lump.changed_indices() == [0]
+
+
+class TestAsChunks:
+    def test_raw(self):
+        stream = io.BytesIO(bytes(range(256)) * 4)
+        lump = lumps.RawBspLump.from_stream(stream, 16, 512)
+        assert bytes(lump) == bytes(range(16, 256)) + bytes(range(256)) + bytes(range(16))
+        lump[0] = 0xFF
+        del lump[1]
+        lump.append(0xAA)
+        expected = bytes([lump.get(i, mutable=False) for i in range(len(lump))])
+        for chunk_size in (1, 3, 64, 2 ** 20):
+            chunks = list(lump.as_chunks(chunk_size))
+            assert b"".join(chunks) == expected
+            assert all(len(chunk) <= chunk_size for chunk in chunks)
+
+    def test_unchanged(self):
+        entries = [LumpClass_nested(i, [i, i, i], i) for i in range(64)]
+        raw_lump = b"".join(e.as_bytes() for e in entries)
+        header = LumpHeader_basic(offset=0, length=len(raw_lump))
+        lump = lumps.BspLump.from_header(io.BytesIO(raw_lump), header, LumpClass_nested)
+        assert b"".join(lump.as_chunks()) == raw_lump
+        assert len(lump._changes) == 0  # nothing was decoded
+
+    def test_changes(self):
+        entries = [LumpClass_nested(i, [i, i, i], i) for i in range(64)]
+        raw_lump = b"".join(e.as_bytes() for e in entries)
+        header = LumpHeader_basic(offset=0, length=len(raw_lump))
+        lump = lumps.BspLump.from_header(io.BytesIO(raw_lump), header, LumpClass_nested)
+        lump[2] = LumpClass_nested(8, [8, 8, 8], 8)
+        lump.append(LumpClass_nested(9, [9, 9, 9], 9))
+        entries[2] = lump[2]
+        entries.append(lump[-1])
+        expected = b"".join(e.as_bytes() for e in entries)
+        for chunk_size in (1, 32, 2 ** 20):
+            assert b"".join(lump.as_chunks(chunk_size)) == expected
+
+
+class TestAsArray:
+    def test_dtype(self):
+        pytest.importorskip("numpy")
+        dtype = lumps.numpy_dtype(LumpClass_nested)
+        assert dtype.names == ("id", "origin", "flags")
+        assert dtype["origin"].names == ("x", "y", "z")
+        assert dtype.itemsize == struct.calcsize(LumpClass_nested._format)
+        assert lumps.numpy_dtype(LumpClass_nested) is dtype  # cached
+
+    def test_basic(self):
+        numpy = pytest.importorskip("numpy")
+        header = LumpHeader_basic(offset=0, length=6)
+        stream = io.BytesIO(b"\x01\x00\x02\x00\x03\x00")
+        lump = lumps.BasicBspLump.from_header(stream, header, UnsignedShort)
+        assert numpy.array_equal(lump.as_array(), [1, 2, 3])
+
+    def test_columns(self):
+        pytest.importorskip("numpy")
+        entries = [LumpClass_nested(i, [i, i * 2, i * 3], i) for i in range(4)]
+        raw_lump = b"".join(e.as_bytes() for e in entries)
+        header = LumpHeader_basic(offset=0, length=len(raw_lump))
+        lump = lumps.BspLump.from_header(io.BytesIO(raw_lump), header, LumpClass_nested)
+        array = lump.as_array()
+        assert list(array["id"]) == [0, 1, 2, 3]
+        assert list(array["origin"]["y"]) == [0, 2, 4, 6]
+        assert list(array[1:3]["flags"]) == [1, 2]
+
+    def test_changes(self):
+        pytest.importorskip("numpy")
+        entries = [LumpClass_nested(i, [i, i, i], i) for i in range(4)]
+        raw_lump = b"".join(e.as_bytes() for e in entries)
+        header = LumpHeader_basic(offset=0, length=len(raw_lump))
+        lump = lumps.BspLump.from_header(io.BytesIO(raw_lump), header, LumpClass_nested)
+        lump[0] = LumpClass_nested(8, [8, 8, 8], 8)
+        lump.append(LumpClass_nested(9, [9, 9, 9], 9))
+        array = lump.as_array()
+        assert len(array) == 5
+        assert list(array["id"]) == [8, 1, 2, 3, 9]
+        del lump[-1]
+        del lump[-1]
+        assert list(lump.as_array()["id"]) == [8, 1, 2]
+        lump[0] = entries[0]  # same bytes as the stream
+        assert list(lump.as_array()["id"]) == [0, 1, 2]
+
+
+class TestArrayMode:
+    def test_views(self):
+        numpy = pytest.importorskip("numpy")
+        entries = [LumpClass_nested(i, [i, i * 2, i * 3], i) for i in range(4)]
+        raw_lump = b"".join(e.as_bytes() for e in entries)
+        header = LumpHeader_basic(offset=0, length=len(raw_lump))
+        lump = lumps.BspLump.from_header(io.BytesIO(raw_lump), header, LumpClass_nested)
+        lump.array_mode = True
+        assert lump.array_mode
+        assert list(lump[1:3]["flags"]) == [1, 2]
+        assert list(lump[::]["origin"]["y"]) == [0, 2, 4, 6]
+        assert [int(row["id"]) for row in lump] == [0, 1, 2, 3]
+        assert numpy.shares_memory(lump[1:3], lump[::])  # views, not copies
+        assert not lump.is_dirty()
+        assert bytes(lump) == raw_lump
+
+    def test_changes(self):
+        pytest.importorskip("numpy")
+        entries = [LumpClass_nested(i, [i, i, i], i) for i in range(4)]
+        raw_lump = b"".join(e.as_bytes() for e in entries)
+        header = LumpHeader_basic(offset=0, length=len(raw_lump))
+        stream = io.BytesIO(raw_lump)
+        lump = lumps.BspLump.from_header(stream, header, LumpClass_nested)
+        lump[0].id = 8  # changed before array mode
+        lump.array_mode = True
+        lump[1]["origin"]["x"] += 1  # edits through a view
+        lump[2:4]["flags"] = 0
+        lump[3] = LumpClass_nested(3, [3, 3, 3], 3)  # same bytes as the stream
+        assert lump.changed_indices() == [0, 1, 2]
+        with pytest.raises(RuntimeError):  # length is fixed
+            lump.append(entries[0])
+        with pytest.raises(RuntimeError):
+            del lump[0]
+        expected = bytes(lump)
+        lump.array_mode = False
+        assert lump.changed_indices() == [0, 1, 2]
+        assert bytes(lump) == expected
+        assert (lump[0].id, lump[1].origin.x, lump[2].flags) == (8, 2, 0)
+        # saved in array mode
+        lump.array_mode = True
+        stream.seek(0)
+        stream.write(bytes(lump))
+        lump.mark_clean()
+        assert not lump.is_dirty()
+
+    def test_basic(self):
+        numpy = pytest.importorskip("numpy")
+        header = LumpHeader_basic(offset=0, length=6)
+        stream = io.BytesIO(b"\x01\x00\x02\x00\x03\x00")
+        lump = lumps.BasicBspLump.from_header(stream, header, UnsignedShort)
+        lump.array_mode = True
+        assert numpy.array_equal(lump[::], [1, 2, 3])
+        lump[::] *= 2
+        lump[0] = 7
+        assert lump.changed_indices() == [0, 1, 2]
+        assert bytes(lump) == b"\x07\x00\x04\x00\x06\x00"
+        lump.array_mode = False
+        assert lump[::] == [7, 4, 6]
+
+
 # TODO: external lump test files as part of test maps (Issue #16)
 # TODO: TestGameLump
 # TODO: TestDarkMessiahSPGameLump
@@ -21,3 +21,16 @@ def test_no_errors(bsp):
 @pytest.mark.parametrize("bsp", bsps.values(), ids=bsps.keys())
 def test_entities_loaded(bsp):
     assert bsp.ENTITIES[0]["classname"] == "worldspawn"
+
+
+def test_save_as(tmp_path):
+    bsp = RespawnBsp.from_file(titanfall2, "tests/maps/Titanfall 2/mp_crossfire.bsp")
+    bsp.VERTICES[0].x += 1
+    filename = str(tmp_path / "mp_crossfire.bsp")
+    bsp.save_as(filename)
+    new_bsp = RespawnBsp.from_file(titanfall2, filename)
+    assert len(new_bsp.loading_errors) == 0
+    assert new_bsp.VERTICES[0] == bsp.VERTICES[0]
+    for LUMP in titanfall2.LUMP:
+        if LUMP.name != "GAME_LUMP":
+            assert new_bsp.lump_as_bytes(LUMP.name) == bsp.lump_as_bytes(LUMP.name)
@@ -1,4 +1,8 @@
+import json
+import struct
+
 from bsp_tool.scene import khronos
+from bsp_tool.utils import geometry
 from bsp_tool.utils import physics
 # from bsp_tool.utils import quaternion
 from bsp_tool.utils import vector
@@ -36,3 +40,96 @@ def test_cube():
     # TODO: verify buffers
     # -- vertex buffer
     # -- index buffer
+
+
+def test_welding():
+    vertex_buffer = khronos.VertexBuffer(position="3f", normal="3f", uv0="2f")
+    quad = geometry.MeshArrays(num_uvs=1)
+    for x, y in ((0, 0), (1, 0), (1, 1), (0, 0), (1, 1), (0, 1)):  # 2 triangles, 2 shared vertices
+        quad.add_vertex((x, y, 0), (0, 0, 1), (x, y))
+    quad.add_triangles(range(6))
+    assert list(vertex_buffer.add_arrays(quad)) == [0, 1, 2, 0, 2, 3]
+    assert vertex_buffer.count == 4
+    assert vertex_buffer.add(quad.vertex(3)) == 0
+    assert len(vertex_buffer.as_bytes()) == vertex_buffer.byteLength == 4 * 32
+    # missing uv channels are padded w/ (0, 0)
+    vertex_buffer = khronos.VertexBuffer(position="3f", uv1="2f")
+    vertex_buffer.add_arrays(quad)
+    assert list(vertex_buffer.data[:10]) == [0, 0, 0, 0, 0, 1, 0, 0, 0, 0]
+    # epsilon
+    nudged = geometry.MeshArrays()
+    for x in (0, 1, 1.001, 0.0001):
+        nudged.add_vertex((x, 0, 0), (0, 0, 1))
+    assert khronos.VertexBuffer(position="3f").add_arrays(nudged).tolist() == [0, 1, 2, 3]
+    assert khronos.VertexBuffer(0.01, position="3f").add_arrays(nudged).tolist() == [0, 1, 1, 0]
+
+
+def test_shared_buffers():
+    material = geometry.Material("test")
+    models = {
+        f"cube_{i}": physics.AABB.from_mins_maxs(vector.vec3(-1, -1, -1), vector.vec3(+1, +1, +1)).as_model()
+        for i in range(2)}
+    for model in models.values():
+        for mesh in model.meshes:
+            mesh.material = material
+    gltf = khronos.Gltf.from_models(models)
+    vertex_buffer, index_buffer = gltf.buffers[0]
+    assert vertex_buffer.count == 24  # 4 per face, welded across models
+    assert len(index_buffer.indices) == 2 * 6 * 2 * 3
+    assert gltf.json["materials"] == [{"name": "test"}]
+    assert len(index_buffer.as_bytes()) == index_buffer.byteLength
+
+
+def test_vertex_formats():
+    arrays = geometry.MeshArrays(num_uvs=2)
+    for x, y in ((0, 0), (1, 0), (1, 1)):
+        arrays.add_vertex((x, y, 0), (0, 0, 1), (x, y), (y, x))
+    arrays.add_polygon(range(3))
+    assert khronos.vertex_format(arrays) == {"position": "3f", "normal": "3f", "uv0": "2f", "uv1": "2f"}
+    arrays.colours[3] = 1.0
+    assert "colour" in khronos.vertex_format(arrays)
+    # one BufferPair per vertex format
+    cube = physics.AABB.from_mins_maxs(vector.vec3(-1, -1, -1), vector.vec3(+1, +1, +1)).as_model()
+    gltf = khronos.Gltf.from_models([cube, geometry.Model([geometry.Mesh(arrays=arrays)])])
+    assert len(gltf.buffers) == 2
+    attributes = [primitive["attributes"] for mesh in gltf.json["meshes"] for primitive in mesh["primitives"]]
+    assert {"TEXCOORD_0", "TEXCOORD_1", "COLOR_0"}.issubset(attributes[-1])
+    assert len({accessor for primitive in attributes for accessor in primitive.values()}) == 2 + 5
+
+
+def test_glb():
+    cube = physics.AABB.from_mins_maxs(vector.vec3(-1, -1, -1), vector.vec3(+1, +1, +1)).as_model()
+    gltf = khronos.Gltf.from_models({"cube_0": cube, "cube_1": cube}, optimise=True)
+    raw_glb = gltf.as_bytes()
+    magic, version, length = struct.unpack("<4s2I", raw_glb[:12])
+    assert (magic, version, length) == (b"glTF", 2, len(raw_glb))
+    json_length, chunk_type = struct.unpack("<I4s", raw_glb[12:20])
+    assert chunk_type == b"JSON" and json_length % 4 == 0
+    gltf_json = json.loads(raw_glb[20:20 + json_length])
+    bin_length, chunk_type = struct.unpack("<I4s", raw_glb[20 + json_length:28 + json_length])
+    assert chunk_type == b"BIN\x00"
+    raw_bin = raw_glb[28 + json_length:]
+    assert len(raw_bin) == bin_length == gltf_json["buffers"][0]["byteLength"]
+    # each model has buffers of it's own
+    assert len(gltf_json["nodes"]) == len(gltf_json["meshes"]) == 2
+    assert len(gltf_json["bufferViews"]) == 4
+    for mesh in gltf_json["meshes"]:
+        primitive = mesh["primitives"][0]
+        position = gltf_json["accessors"][primitive["attributes"]["POSITION"]]
+        assert position["count"] == 24
+        assert position["min"] == [-1, -1, -1] and position["max"] == [1, 1, 1]
+        indices = gltf_json["accessors"][primitive["indices"]]
+        assert indices["componentType"] == khronos.Data.UNSIGNED_SHORT.value
+        view = gltf_json["bufferViews"][indices["bufferView"]]
+        assert view["byteOffset"] % 4 == 0
+        start = view["byteOffset"] + indices["byteOffset"]
+        assert max(struct.unpack(f"<{indices['count']}H", raw_bin[start:start + indices["count"] * 2])) == 23
+
+
+def test_save_as(tmp_path):
+    cube = physics.AABB.from_mins_maxs(vector.vec3(-1, -1, -1), vector.vec3(+1, +1, +1)).as_model()
+    gltf = khronos.Gltf.from_models([cube])
+    gltf.save_as(str(tmp_path / "cube.glb"))
+    gltf.save_as(str(tmp_path / "cube.gltf"))
+    assert (tmp_path / "cube.glb").read_bytes() == gltf.as_bytes()
+    assert json.loads((tmp_path / "cube.gltf").read_text())["buffers"][0]["uri"] == "cube.vertex.0.bin"
@@ -1,4 +1,7 @@
+import array
+
 from bsp_tool.scene import pixar
+from bsp_tool.utils import geometry
 from bsp_tool.utils import physics
 from bsp_tool.utils import vector
 
@@ -39,3 +42,47 @@ def test_cube():
     # -- polygon indices & counts
     # -- mesh subsets (MaterialBindingAPI)
     # -- materials
+
+
+def test_format_array():
+    assert pixar.format_array([]) == "[]"
+    assert pixar.format_array(array.array("I", [4, 3]), item_format="%d") == "[4, 3]"
+    positions = array.array("f", [0, 0.5, -1, 2, 1e-3, 16384.25])
+    assert pixar.format_array(positions, 3) == "[(0, 0.5, -1), (2, 0.001, 16384.25)]"
+    # blocks
+    assert pixar.format_array(positions, 3, block_size=1) == pixar.format_array(positions, 3)
+    assert pixar.format_array(positions, 2, block_size=2) == "[(0, 0.5), (-1, 2), (0.001, 16384.25)]"
+
+
+def test_mesh_prim():
+    arrays = geometry.MeshArrays(num_uvs=1)
+    for x, y in ((0, 0), (1, 0), (1, 1), (0, 1)):
+        arrays.add_vertex((x, y, 0), (0, 0, 1), (x, y))
+    arrays.add_polygon([0, 1, 2])
+    arrays.add_polygon([0, 2, 3])
+    model = geometry.Model([geometry.Mesh(geometry.Material("tools/toolsnodraw"), arrays=arrays)])
+    lines = list(pixar.mesh_prim("quad", model).lines())
+    assert "    int[] faceVertexCounts = [3, 3]" in lines
+    assert "    int[] faceVertexIndices = [2, 1, 0, 3, 2, 0]" in lines  # inverted winding order
+    assert "    point3f[] points = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0)]" in lines
+    assert "    texCoord2f[] primvars:uv0 = [(0, 0), (1, 0), (1, 1), (0, 1)] (" in lines
+    assert "        rel material:binding = </root/_materials/toolsnodraw>" in lines
+
+
+def test_payloads(tmp_path):
+    aabb = physics.AABB.from_mins_maxs(vector.vec3(-1, -1, -1), vector.vec3(+1, +1, +1))
+    usd = pixar.Usd.from_models({"cube_0": aabb.as_model(), "cube_1": aabb.as_model()})
+    usd.save_as(str(tmp_path / "map.usda"), payloads=True, max_workers=1)
+    root = (tmp_path / "map.usda").read_text()
+    assert "    prepend payload = @./map_payloads/cube_0.usda@" in root
+    assert "point3f[]" not in root
+    assert "over \"cube_1\"" in root
+    assert "rel material:binding = </root/_materials/default>" in root
+    for i in range(2):
+        payload = (tmp_path / "map_payloads" / f"cube_{i}.usda").read_text()
+        assert f'    defaultPrim = "cube_{i}"' in payload
+        assert "point3f[]" in payload
+        assert "rel material:binding" not in payload
+    assert len(usd.prims) == 0  # not left pointing at payloads
+    usd.save_as(str(tmp_path / "inline.usda"))
+    assert "point3f[]" in (tmp_path / "inline.usda").read_text()
@@ -42,3 +42,55 @@ def test_dummy():
         line_no += 1
 
     assert len(lines) == 4 + 2 * 4 * len(quads) + len(quads)
+
+
+def faces(lines: list) -> list:
+    """[[(position, normal, uv)]] for each face; supports relative & absolute indices"""
+    pools = {"v": list(), "vn": list(), "vt": list()}
+    out = list()
+    for line in lines:
+        kind, *values = line.split()
+        if kind in pools:
+            pools[kind].append(tuple(round(float(x), 4) for x in values))
+        elif kind == "f":
+            face = list()
+            for corner in values:
+                indices = [int(i) if i != "" else None for i in corner.split("/")]
+                face.append(tuple(
+                    None if i is None else pool[i - 1 if i > 0 else i]
+                    for i, pool in zip(indices, (pools["v"], pools["vt"], pools["vn"]))))
+            out.append(face)
+    return out
+
+
+def test_pooled():
+    quads = geometry.MeshArrays(num_uvs=1)
+    for x in range(4):  # 4 quads in a row; 10 unique positions
+        quads.add_polygon([
+            quads.add_vertex((x + i, j, 0), (0, 0, 1), (x + i, j))
+            for i, j in ((0, 0), (1, 0), (1, 1), (0, 1))])
+    model = geometry.Model([geometry.Mesh(arrays=quads)], origin=(1, 2, 3), angles=(0, 0, 90), scale=2)
+    expected = faces(wavefront.Obj.from_models([model]).lines())
+    lines = list(wavefront.Obj.from_models([model], pooled=True).lines())
+    assert faces(lines) == expected
+    assert len([line for line in lines if line.startswith("v ")]) == 10
+    assert len([line for line in lines if line.startswith("vn ")]) == 1
+    assert len([line for line in lines if line.startswith("vt ")]) == 10
+    assert expected[0][1] == ((-1.0, 4.0, 3.0), (1.0, 1.0), (0.0, 0.0, 1.0))  # reversed winding
+
+
+def test_save_as(tmp_path):
+    model = geometry.Model([geometry.Mesh(geometry.Material("Brick\\Wall01"), arrays=geometry.MeshArrays.from_polygons(
+        [geometry.Polygon([geometry.Vertex((i, i * i, 0), (0, 0, 1)) for i in range(3)])]))])
+    obj = wavefront.Obj.from_models({"wall": model}, pooled=True)
+    obj.save_as(str(tmp_path / "scene.obj"))
+    lines = (tmp_path / "scene.obj").read_text().splitlines()
+    assert lines[:5] == [
+        "# generated by bsp_tool.extensions.geometry",
+        "mtllib scene.mtl",
+        "g group_000",
+        "o wall",
+        "usemtl brick/wall01"]
+    assert lines[-1] == "f 3//1 2//1 1//1"
+    mtl_lines = (tmp_path / "scene.mtl").read_text().splitlines()
+    assert "newmtl brick/wall01" in mtl_lines
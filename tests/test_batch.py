@@ -0,0 +1,53 @@
+import json
+
+from bsp_tool import batch
+
+
+def lump_count(bsp) -> int:
+    return len(bsp.headers)
+
+
+def raises(bsp):
+    raise RuntimeError("reducer failed")
+
+
+test_maps = batch.find_maps("./tests/maps/Quake*/*.bsp", "./tests/maps/Team Fortress 2/*.bsp")
+
+
+def test_find_maps():
+    assert len(test_maps) > 0
+    assert all(filename.endswith(".bsp") for filename in test_maps)
+    assert batch.maps_in({"Quake": [""], "Missing": ["maps"]}, "./tests/maps") == batch.find_maps("./tests/maps/Quake/*.bsp")
+
+
+def test_scan_map():
+    result = batch.scan_map(test_maps[0], lump_count)
+    assert result.error is None
+    assert result.value > 0
+    assert result.load_time > 0
+    assert batch.scan_map("./tests/maps/missing.bsp").error is not None
+    assert batch.scan_map(test_maps[0], raises).error == repr(RuntimeError("reducer failed"))
+
+
+def test_scan():
+    results = list(batch.scan(test_maps, lump_count, max_workers=2, chunksize=2, max_in_flight=1))
+    assert sorted(result.filename for result in results) == test_maps
+    assert all(result.error is None for result in results)
+
+
+def test_checkpoint(tmp_path):
+    checkpoint = str(tmp_path / "checkpoint.jsonl")
+    first_half = test_maps[:len(test_maps) // 2]
+    first = {r.filename: r for r in batch.scan(first_half, lump_count, max_workers=2, checkpoint=checkpoint)}
+    assert set(batch.load_checkpoint(checkpoint)) == set(first_half)
+    # simulate a crash mid-write
+    with open(checkpoint, "a") as checkpoint_file:
+        checkpoint_file.write('{"filename": "trunc')
+    resumed = list(batch.scan(test_maps, lump_count, max_workers=2, checkpoint=checkpoint))
+    assert sorted(r.filename for r in resumed) == test_maps
+    # checkpointed results are not scanned again
+    assert [r.as_json() for r in resumed[:len(first_half)]] == [first[f].as_json() for f in first_half]
+    with open(checkpoint) as checkpoint_file:
+        lines = checkpoint_file.readlines()
+    assert len(lines) == len(test_maps) + 1  # + truncated line
+    assert json.loads(lines[-1])["filename"] in test_maps
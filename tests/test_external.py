@@ -0,0 +1,110 @@
+import concurrent.futures
+import io
+import os
+
+from bsp_tool import external
+from bsp_tool.archives import pkware
+from bsp_tool.archives import base
+
+
+def test_handle_pool(tmp_path):
+    pool = external.HandlePool(max_handles=2)
+    filenames = list()
+    for i in range(4):
+        filename = str(tmp_path / f"{i}.bin")
+        with open(filename, "wb") as file:
+            file.write(bytes([i]) * 1024)
+        filenames.append(filename)
+    for i, filename in enumerate(filenames):
+        assert pool.pread(filename, 512, 4) == bytes([i]) * 4
+        assert len(pool) <= 2
+    assert filenames[-1] in pool and filenames[0] not in pool
+    assert pool.pread(filenames[0], 1020, 16) == b"\x00" * 4  # EOF
+    # shared across threads
+    with concurrent.futures.ThreadPoolExecutor(4) as executor:
+        reads = executor.map(lambda i: pool.pread(filenames[i % 4], i, 8), range(64))
+        assert all(data == bytes([i % 4]) * 8 for i, data in enumerate(reads))
+    pool.clear()
+    assert len(pool) == 0
+
+
+def test_handle_pool_replaced(tmp_path):
+    filename = str(tmp_path / "test.bin")
+
+    def replace(data: bytes):  # like Bsp.save()
+        with open(filename + ".tmp", "wb") as file:
+            file.write(data)
+        os.replace(filename + ".tmp", filename)
+
+    replace(b"OLD!" * 2)
+    assert external.File.from_file(filename).read() == b"OLD!OLD!"
+    replace(b"NEW!" * 8)
+    file = external.File.from_file(filename)
+    assert file.size == 32
+    assert file.read(8) == b"NEW!NEW!"
+    # replaced mid-read; the old descriptor is closed once released
+    pool = external.HandlePool()
+    file_descriptor = pool.acquire(filename)
+    replace(b"NEWER!")
+    assert pool.pread(filename, 0, 8) == b"NEWER!"
+    assert file_descriptor in pool._stale
+    pool.release(file_descriptor)
+    assert len(pool._stale) == 0
+    pool.clear()
+    assert len(pool) == 0
+
+
+def test_from_file(tmp_path):
+    filename = str(tmp_path / "test.txt")
+    with open(filename, "wb") as file:
+        file.write(b"line 1\nline 2\nend")
+    file = external.File.from_file(filename)
+    assert file.readline() == b"line 1\n"
+    assert file.tell() == 7
+    assert file.read(4) == b"line"
+    assert file.pread(0, 4) == b"line"
+    assert file.tell() == 11
+    file.seek(-3, 2)
+    assert file.read() == b"end"
+    assert file.read() == b""
+    assert file._stream is None  # reads went through the shared handle pool
+
+
+def test_from_archive():
+    zip_ = pkware.Zip()
+    zip_.writestr("maps/test.bsp", b"VBSP" + bytes(range(256)))
+    file = external.File.from_archive("maps/test.bsp", zip_)
+    assert file.size == 260
+    file.seek(4)
+    assert file.read(4) == bytes(range(4))
+    assert file._stream is None  # read w/ .read_range()
+
+
+class WholeFileArchive(base.Archive):
+    def read(self, filename: str) -> bytes:
+        return b"0123456789"
+
+
+def test_from_archive_fallback():
+    file = external.File.from_archive("test.txt", WholeFileArchive())
+    file.seek(2)
+    assert file.read(3) == b"234"
+    assert file.tell() == 5
+    assert not file.ranged
+    assert file.read() == b"56789"
+
+
+def test_range_view():
+    stream = io.BytesIO(b"header\nline 1\nline 2\nfooter")
+    view = external.RangeView(stream, 7, 14)
+    assert view.read() == b"line 1\nline 2\n"
+    view.seek(0)
+    assert list(view) == [b"line 1\n", b"line 2\n"]
+    assert view.pread(5, 100) == b"1\nline 2\n"  # clipped to the end of the view
+    assert view.tell() == 14
+    # views of views read from the original stream
+    inner = external.RangeView(view, 7, 4)
+    assert inner.stream is stream
+    assert inner.read() == b"line"
+    view.close()
+    assert not stream.closed
@@ -0,0 +1,51 @@
+import os
+
+from bsp_tool import autodetect
+from bsp_tool import batch
+from bsp_tool import index
+from bsp_tool import load_bsp
+
+
+test_maps = batch.find_maps("./tests/maps/Quake*/*.bsp", "./tests/maps/Team Fortress 2/*.bsp")
+
+
+def test_load_bsp(tmp_path):
+    db = str(tmp_path / "index.db")
+    with index.Index(db) as bsp_index:
+        for filename in test_maps:
+            assert bsp_index.lookup(filename) is None
+            bsp = load_bsp(filename, index=bsp_index)
+            assert bsp_index.lookup(filename)["version"] == bsp.version
+    # persistent
+    with index.Index(db) as bsp_index:
+        for filename in test_maps:
+            cached = bsp_index.lookup(filename)
+            assert cached is not None
+            bsp = load_bsp(filename, index=bsp_index)
+            expected = autodetect.guess_from_filename(filename)
+            assert bsp.__class__ == expected.__class__
+            assert bsp.branch == expected.branch
+            assert cached["headers"]["ENTITIES"][1] == expected.headers["ENTITIES"].length
+
+
+def test_stale(tmp_path):
+    filename = str(tmp_path / "mp_lobby.bsp")
+    with open(test_maps[0], "rb") as src, open(filename, "wb") as dest:
+        dest.write(src.read())
+    bsp_index = index.Index()
+    assert bsp_index.update([filename]) == dict()
+    assert bsp_index.lookup(filename) is not None
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert bsp_index.lookup(filename) is None
+
+
+def test_queries():
+    bsp_index = index.Index()
+    assert bsp_index.update(test_maps, max_workers=2) == dict()
+    large = {
+        os.path.realpath(filename)
+        for filename in test_maps
+        if autodetect.guess_from_filename(filename).headers["ENTITIES"].length >= 1000}
+    assert set(bsp_index.maps_with_lump("ENTITIES", 1000)) == large
+    assert bsp_index.maps_with_errors() == dict()
@@ -70,3 +70,25 @@ def test_autodetect(spec: str, maps: List[Tuple[str]]):
             errors[short_map_path] = error
     no_fails = (len(errors) == 0)
     assert no_fails, f"{len(errors)} / {len(maps)} maps encountered loading errors"
+
+
+@pytest.mark.parametrize("spec,maps", test_args, ids=test_ids)
+def test_mmap(spec: str, maps: List[Tuple[str]]):
+    for full_map_path, short_map_path in maps:
+        bsp = load_bsp(full_map_path, mmap=True)
+        assert spec_str_of(bsp) == spec
+        assert len(loading_errors_of(bsp)) == 0
+        bsp.file.close()
+
+
+@pytest.mark.parametrize("spec,maps", test_args, ids=test_ids)
+def test_lazy(spec: str, maps: List[Tuple[str]]):
+    for full_map_path, short_map_path in maps:
+        bsp = load_bsp(full_map_path, lazy=True)
+        assert spec_str_of(bsp) == spec
+        for lump_name in list(bsp.lazy_headers):
+            getattr(bsp, lump_name, None)  # mount on first access
+            assert lump_name not in bsp.lazy_headers
+            assert lump_name in bsp.mount_times
+        assert len(loading_errors_of(bsp)) == 0
+        bsp.file.close()
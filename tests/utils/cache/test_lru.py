@@ -0,0 +1,29 @@
+from bsp_tool.utils import cache
+
+
+def test_budget():
+    lru = cache.LRUCache(max_size=8)
+    lru.put("a", b"1234")
+    lru.put("b", b"5678")
+    assert lru.size == 8
+    assert lru.get("a") == b"1234"  # "b" is now least recently used
+    lru.put("c", b"90")
+    assert "b" not in lru
+    assert "a" in lru and "c" in lru
+    assert lru.size == 6
+
+
+def test_oversized():
+    lru = cache.LRUCache(max_size=4)
+    lru.put("a", b"12345")
+    assert len(lru) == 0
+    assert lru.get("a", "default") == "default"
+
+
+def test_replace():
+    lru = cache.LRUCache(max_size=8)
+    lru.put("a", b"1234")
+    lru.put("a", b"12")
+    assert lru.size == 2
+    assert lru.pop("a") == b"12"
+    assert lru.size == 0
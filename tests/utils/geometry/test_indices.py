@@ -21,3 +21,29 @@ def test_triangle_soup():
     assert soup[1].vertices == vertices[3:6]
     assert len(soup[2].vertices) == 3
     assert soup[2].vertices == vertices[6:9]
+
+
+def test_optimise_vertex_cache():
+    size = 16  # grid of quads, triangles in a scattered order
+    triangles = list()
+    for y in range(size):
+        for x in range(size):
+            a, b, c, d = (y * (size + 1) + x + i for i in (0, 1, size + 1, size + 2))
+            triangles.extend([(a, b, d), (a, d, c)])
+    triangles = triangles[::2] + triangles[1::2]
+    triangles = triangles[::7] + [t for i, t in enumerate(triangles) if i % 7 != 0]
+    indices = [i for triangle in triangles for i in triangle]
+
+    def cache_misses(indices, cache_size=16):
+        cache, misses = list(), 0
+        for index in indices:
+            if index not in cache:
+                misses += 1
+                cache = [index, *cache][:cache_size]
+        return misses
+
+    optimised = geometry.optimise_vertex_cache(indices)
+    # same triangles, same winding
+    assert sorted(zip(*[iter(optimised)] * 3)) == sorted(triangles)
+    assert cache_misses(optimised) < cache_misses(indices) * 0.75
+    assert list(geometry.optimise_vertex_cache([])) == []
@@ -0,0 +1,86 @@
+from bsp_tool.utils import geometry
+from bsp_tool.utils import vector
+
+
+def quad_arrays() -> geometry.MeshArrays:
+    arrays = geometry.MeshArrays(num_uvs=1)
+    for x, y in ((0, 0), (1, 0), (1, 1), (0, 1)):
+        arrays.add_vertex((x, y, 0), (0, 0, 1), (x, y), colour=(1, 1, 1, 1))
+    arrays.add_polygon(range(4))
+    return arrays
+
+
+def test_add_vertex():
+    arrays = quad_arrays()
+    assert len(arrays) == 4
+    assert arrays.num_polygons == 1
+    assert list(arrays.positions[3:6]) == [1, 0, 0]
+    assert list(arrays.uvs[0][4:6]) == [1, 1]
+    # new uv channels are padded for existing vertices
+    arrays.add_vertex((0, 0, 1), (0, 0, 1), (0, 0), (0.5, 0.5))
+    assert len(arrays.uvs) == 2
+    assert list(arrays.uvs[1]) == [0] * 8 + [0.5, 0.5]
+
+
+def test_polygon_view():
+    arrays = quad_arrays()
+    polygons = arrays.as_polygons()
+    assert len(polygons) == 1
+    assert len(polygons[0]) == 4
+    vertex = polygons[0].vertices[2]
+    assert isinstance(vertex, geometry.Vertex)
+    assert vertex.position == vector.vec3(1, 1, 0)
+    assert vertex.uv0 == vector.vec2(1, 1)
+    assert vertex.colour == (1, 1, 1, 1)
+
+
+def test_triangles():
+    arrays = quad_arrays()
+    assert list(arrays.triangles()) == [0, 1, 2, 0, 2, 3]
+    arrays = geometry.MeshArrays()
+    for i in range(3):
+        arrays.add_vertex((i, 0, 0), (0, 0, 1))
+    arrays.add_triangles([0, 1, 2, 2, 1, 0])
+    assert arrays.num_polygons == 2
+    assert list(arrays.triangles()) == [0, 1, 2, 2, 1, 0]
+
+
+def test_extend():
+    arrays = quad_arrays()
+    arrays.extend(quad_arrays())
+    assert len(arrays) == 8
+    assert arrays.num_polygons == 2
+    assert list(arrays.indices[4:]) == [4, 5, 6, 7]
+
+
+def test_mesh_views():
+    polygons = quad_arrays().as_polygons()
+    mesh = geometry.Mesh(polygons=polygons)
+    assert len(mesh.arrays) == 4
+    mesh = geometry.Mesh(arrays=quad_arrays())
+    assert mesh._polygons is None  # not generated until asked for
+    assert len(mesh.polygons) == 1
+
+
+def test_merge_arrays():
+    material = geometry.Material("test")
+    model = geometry.Model([
+        geometry.Mesh(material, arrays=quad_arrays()),
+        geometry.Mesh(material, arrays=quad_arrays())])
+    assert len(model.meshes) == 1
+    mesh = model.meshes[0]
+    assert mesh._polygons is None
+    assert mesh.arrays.num_polygons == 2
+
+
+def test_gather():
+    arrays = quad_arrays()
+    triangles = arrays.gather([3, 2, 0])
+    assert len(triangles) == 3
+    assert list(triangles.indices) == [0, 1, 2]
+    assert list(triangles.positions) == [0, 1, 0, 1, 1, 0, 0, 0, 0]
+    assert list(triangles.uvs[0]) == [0, 1, 1, 1, 0, 0]
+    triangles = arrays.gather([0, 1, 2, 0, 2, 3])
+    assert len(triangles) == 4
+    assert triangles.num_polygons == 2
+    assert list(triangles.indices) == [0, 1, 2, 0, 2, 3]
@@ -1,6 +1,8 @@
 import collections
 import os
 
+from bsp_tool import lumps
+from bsp_tool.archives import pkware
 from bsp_tool.valve import ValveBsp
 from bsp_tool.branches.strata import strata
 from bsp_tool.branches.valve import orange_box
@@ -74,3 +76,169 @@ def test_x360(bsp):
 def test_x360_failing(bsp):
     assert "GAME_LUMP" not in bsp.loading_errors
     assert len(bsp.GAME_LUMP.loading_errors) == 0
+
+
+def test_save_as(tmp_path):
+    bsp = ValveBsp.from_file(orange_box, "tests/maps/Team Fortress 2/mp_lobby.bsp")
+    bsp.VERTICES[0].x += 1
+    filename = str(tmp_path / "mp_lobby.bsp")
+    bsp.save_as(filename)
+    new_bsp = ValveBsp.from_file(orange_box, filename)
+    assert len(new_bsp.loading_errors) == 0
+    assert new_bsp.VERTICES[0] == bsp.VERTICES[0]
+    for LUMP in orange_box.LUMP:
+        if LUMP.name != "GAME_LUMP":
+            assert new_bsp.lump_as_bytes(LUMP.name) == bsp.lump_as_bytes(LUMP.name)
+    # overwrite
+    new_bsp.VERTICES[1].y += 1
+    new_bsp.save()
+    assert not os.path.exists(f"{filename}.tmp")
+    newer_bsp = ValveBsp.from_file(orange_box, filename)
+    assert newer_bsp.VERTICES[1] == new_bsp.VERTICES[1]
+    assert newer_bsp.lump_as_bytes("PLANES") == bsp.lump_as_bytes("PLANES")
+
+
+def test_save_in_place(tmp_path):
+    filename = str(tmp_path / "mp_lobby.bsp")
+    with open("tests/maps/Team Fortress 2/mp_lobby.bsp", "rb") as src, open(filename, "wb") as dest:
+        dest.write(src.read())
+    bsp = ValveBsp.from_file(orange_box, filename)
+    assert bsp.patches() == list()
+    list(bsp.VERTICES[::])  # reading doesn't mark anything as changed
+    assert bsp.patches() == list()
+    bsp.VERTICES[2].z += 1
+    patches = bsp.patches()
+    assert len(patches) == 1
+    offset, raw_bytes = patches[0]
+    assert offset == bsp.headers["VERTICES"].offset + 2 * 12
+    assert raw_bytes == bsp.VERTICES[2].as_bytes()
+    with open(filename, "rb") as original_file:
+        original = original_file.read()
+    bsp.save()
+    with open(filename, "rb") as saved_file:
+        saved = saved_file.read()
+    assert saved == original[:offset] + raw_bytes + original[offset + 12:]
+    # resized lumps are moved to the end of the file
+    bsp.VERTICES.append(bsp.VERTICES[0])
+    bsp.save()
+    assert bsp.headers["VERTICES"].offset >= len(saved)
+    assert bsp.patches() == list()
+    new_bsp = ValveBsp.from_file(orange_box, filename)
+    assert len(new_bsp.loading_errors) == 0
+    assert len(new_bsp.VERTICES) == len(bsp.VERTICES)
+    assert new_bsp.VERTICES[-1] == new_bsp.VERTICES[0]
+    assert new_bsp.VERTICES[2] == bsp.VERTICES[2]
+
+
+def test_save_in_place_special(tmp_path, monkeypatch):
+    filename = str(tmp_path / "mp_lobby.bsp")
+    with open("tests/maps/Team Fortress 2/mp_lobby.bsp", "rb") as src, open(filename, "wb") as dest:
+        dest.write(src.read())
+    bsp = ValveBsp.from_file(orange_box, filename)
+    # unchanged special lumps are never re-encoded
+    with monkeypatch.context() as patch:
+        patch.setattr(pkware.Zip, "as_bytes", None)
+        patch.setattr(type(bsp.ENTITIES), "as_bytes", None)
+        bsp.VERTICES[0].x += 1
+        assert len(bsp.patches()) == 1
+    # special lumps which changed size are moved to the end of the file
+    size = os.path.getsize(filename)
+    bsp.ENTITIES[0]["message"] = "a much longer message than before"
+    bsp.PAKFILE.writestr("materials/test.vmt", b'"UnlitGeneric" {}')
+    bsp.save()
+    assert bsp.headers["ENTITIES"].offset >= size
+    assert bsp.headers["PAKFILE"].offset >= size
+    assert bsp.patches() == list()
+    new_bsp = ValveBsp.from_file(orange_box, filename)
+    assert len(new_bsp.loading_errors) == 0
+    assert new_bsp.ENTITIES == bsp.ENTITIES
+    assert new_bsp.PAKFILE.read("materials/test.vmt") == b'"UnlitGeneric" {}'
+    assert new_bsp.VERTICES[0] == bsp.VERTICES[0]
+
+
+def test_save_pakfile(tmp_path):
+    bsp = ValveBsp.from_file(orange_box, "tests/maps/Team Fortress 2/mp_lobby.bsp")
+    assert isinstance(bsp.PAKFILE._buffer, pkware.AppendBuffer)  # not copied out of the .bsp
+    bsp.PAKFILE.writestr("materials/test.vmt", b'"UnlitGeneric" {}')
+    filename = str(tmp_path / "mp_lobby.bsp")
+    bsp.save_as(filename)
+    new_bsp = ValveBsp.from_file(orange_box, filename)
+    assert len(new_bsp.loading_errors) == 0
+    assert new_bsp.PAKFILE.namelist() == ["materials/test.vmt"]
+    assert new_bsp.PAKFILE.read("materials/test.vmt") == b'"UnlitGeneric" {}'
+
+
+def test_save_as_failure(tmp_path, monkeypatch):
+    filename = str(tmp_path / "mp_lobby.bsp")
+    with open("tests/maps/Team Fortress 2/mp_lobby.bsp", "rb") as src, open(filename, "wb") as dest:
+        dest.write(src.read())
+    with open(filename, "rb") as original_file:
+        original = original_file.read()
+    bsp = ValveBsp.from_file(orange_box, filename)
+    bsp.VERTICES[0].x += 1
+    # a failed write leaves no temp file behind
+    with monkeypatch.context() as patch:
+        patch.setattr(ValveBsp, "lump_as_chunks", None)
+        with pytest.raises(TypeError):
+            bsp.save_as(filename)
+    assert os.listdir(tmp_path) == ["mp_lobby.bsp"]
+    # a failed replace reopens the original file
+    with monkeypatch.context() as patch:
+        patch.setattr(os, "replace", lambda src, dest: 1 / 0)
+        with pytest.raises(ZeroDivisionError):
+            bsp.save_as(filename)
+    assert os.listdir(tmp_path) == ["mp_lobby.bsp"]
+    with open(filename, "rb") as saved_file:
+        assert saved_file.read() == original
+    assert not bsp.file.closed
+    assert bsp.VERTICES[1] == ValveBsp.from_file(orange_box, filename).VERTICES[1]
+    assert bsp.PAKFILE.namelist() == list()
+    offset = bsp.headers["GAME_LUMP"].offset
+    assert bsp.GAME_LUMP.as_bytes(offset) == lumps.read_range(bsp.file, offset, bsp.headers["GAME_LUMP"].length)
+
+
+def test_save_as_same_file(tmp_path):
+    filename = str(tmp_path / "mp_lobby.bsp")
+    with open("tests/maps/Team Fortress 2/mp_lobby.bsp", "rb") as src, open(filename, "wb") as dest:
+        dest.write(src.read())
+    bsp = ValveBsp.from_file(orange_box, filename)
+    old_file = bsp.file
+    bsp.VERTICES.append(bsp.VERTICES[0])
+    bsp.PAKFILE.writestr("materials/test.vmt", b'"UnlitGeneric" {}')
+    bsp.save_as(filename)
+    assert os.listdir(tmp_path) == ["mp_lobby.bsp"]
+    assert old_file.closed and not bsp.file.closed
+    # every lump reads from the new file
+    new_bsp = ValveBsp.from_file(orange_box, filename)
+    assert bsp.headers == new_bsp.headers
+    assert bsp.VERTICES.stream is bsp.file
+    assert list(bsp.VERTICES) == list(new_bsp.VERTICES)
+    assert bsp.PAKFILE.read("materials/test.vmt") == b'"UnlitGeneric" {}'
+    offset = bsp.headers["GAME_LUMP"].offset
+    assert bsp.GAME_LUMP.as_bytes(offset) == new_bsp.GAME_LUMP.as_bytes(offset)
+    assert bsp.patches() == list()
+
+
+def test_save_after_save_as(tmp_path):
+    filename = str(tmp_path / "mp_lobby.bsp")
+    with open("tests/maps/Team Fortress 2/mp_lobby.bsp", "rb") as src, open(filename, "wb") as dest:
+        dest.write(src.read())
+    bsp = ValveBsp.from_file(orange_box, filename)
+    bsp.VERTICES.append(bsp.VERTICES[0])
+    bsp.save_as(filename)
+    vertices = list(bsp.VERTICES)
+    bsp.NODES[0] = bsp.NODES[1]
+    patches = bsp.patches()  # in place, w/ the headers of the new file
+    assert len(patches) == 1
+    assert patches[0][0] == bsp.headers["NODES"].offset
+    bsp.save()
+    new_bsp = ValveBsp.from_file(orange_box, filename)
+    assert list(new_bsp.VERTICES) == vertices
+    assert new_bsp.NODES[0] == new_bsp.NODES[1]
+    # a file replaced behind our back is never patched
+    other_filename = str(tmp_path / "other.bsp")
+    with open(filename, "rb") as src, open(other_filename, "wb") as dest:
+        dest.write(src.read())
+    os.replace(other_filename, filename)
+    bsp.NODES[0] = bsp.NODES[2]
+    assert bsp.patches() is None